@@ -42,7 +42,7 @@ from backend.file_upload import handle_file_upload
 from backend.stateflow_agent import stateflow_agent, run_ts1_extract
 from webbot.test_webbot_html_mapping import readWebPage
 from license_llm.pageread_llm import map_json_to_html_fields
-from webbot.webbot_filler import build_fill_plan, analyze_selectors, generate_injection_script
+from webbot.webbot_filler import build_fill_plan, analyze_selectors, generate_injection_script, typing_fields_from
 from backend.features.tsx_orchestrator import TsxOrchestrator
 
 @app.route('/health', methods=['GET'])
@@ -306,6 +306,9 @@ def ts3_generate_script():
         simulate_typing = bool(options.get('simulate_typing', True))
         step_delay_ms = int(options.get('step_delay_ms', 0))
         commit_enter = bool(options.get('commit_enter', True))
+        # fast: bulk native set + one input/change per field; calibrated typing fields still get keystrokes
+        fill_mode = str(options.get('fill_mode') or 'fast')
+        typing_fields = options.get('typing_fields') or typing_fields_from(mapping)
         overrides = body.get('values') or {}
         plan, resolved, logs = build_fill_plan(mapping, ruhsat_json, raw_text=raw, options={"use_dummy_when_empty": use_dummy})
         # Apply overrides if provided (direct strings to write by field key)
@@ -318,7 +321,10 @@ def ts3_generate_script():
                         logs.append(f"override {it.field} <- {str(overrides[it.field])[:60]}{'…' if len(str(overrides[it.field]))>60 else ''}")
                     except Exception:
                         logs.append(f"override {it.field}")
-        script = generate_injection_script(plan, highlight=highlight, simulate_typing=simulate_typing, step_delay_ms=step_delay_ms, commit_enter=commit_enter)
+        t_script = time.perf_counter()
+        script = generate_injection_script(plan, highlight=highlight, simulate_typing=simulate_typing, step_delay_ms=step_delay_ms,
+                                           commit_enter=commit_enter, fill_mode=fill_mode, typing_fields=typing_fields)
+        logs.append(f"timing script-build {(time.perf_counter() - t_script) * 1000:.1f}ms mode={fill_mode} typing_fields={','.join(typing_fields) or '-'}")
         return jsonify({
             "script": script,
             "plan": [it.__dict__ for it in plan],
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Set
 
 from .types import PageKind
 from backend.logging_utils import log_backend
@@ -20,22 +20,36 @@ class ClassifyPage:
     """
 
     def __init__(self) -> None:
-        self._dash = re.compile(r"Dashboard|Gösterge|Anasayfa", re.I)
-        self._menu = re.compile(r"Menü|Side\s*Menu|Kullanıcı|Home", re.I)
-        self._final = re.compile(r"Poliçeyi\s*Aktifleştir|PDF\s*Hazır|İndir", re.I)
-        self._task = re.compile(r"Trafik|Sağlık|Sigorta|Teklif", re.I)
+        # One alternation, scanned once; each marker family is a named group
+        self._markers = re.compile(
+            r"(?P<dash>Dashboard|Gösterge|Anasayfa)"
+            r"|(?P<menu>Menü|Side\s*Menu|Kullanıcı|Home)"
+            r"|(?P<final>Poliçeyi\s*Aktifleştir|PDF\s*Hazır|İndir)"
+            r"|(?P<task>Trafik|Sağlık|Sigorta|Teklif)",
+            re.I,
+        )
+
+    def _scan(self, html: str) -> Set[str]:
+        found: Set[str] = set()
+        for m in self._markers.finditer(html):
+            found.add(m.lastgroup or "")
+            # dash outranks every other kind, so nothing more can change the result
+            if "dash" in found and "final" in found:
+                break
+        return found
 
     def classify(self, html: str) -> Classification:
-        is_final = bool(self._final.search(html))
-        if self._dash.search(html):
+        found = self._scan(html)
+        is_final = "final" in found
+        if "dash" in found:
             res = Classification(kind=PageKind.dashboard, is_final=is_final)
             log_backend("[INFO] [BE-2201] Classify: dashboard", code="BE-2201", component="ClassifyPage")
             return res
-        if self._menu.search(html):
+        if "menu" in found:
             res = Classification(kind=PageKind.home, is_final=is_final)
             log_backend("[INFO] [BE-2202] Classify: home", code="BE-2202", component="ClassifyPage")
             return res
-        if self._task.search(html):
+        if "task" in found:
             res = Classification(kind=PageKind.user_task, is_final=is_final)
             log_backend("[INFO] [BE-2203] Classify: user_task", code="BE-2203", component="ClassifyPage")
             return res
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+"""Headless batch runner: execute fill plans on a BrowserPool against local fixtures.
+
+Accepted plan shapes (normalize_plan):
+- fill_and_go FillPlan (dataclass or asdict) / plan_build_fill_plan {"plan": {...}}
+  -> actions [{kind: set_value|select_option|click, selector, value, option}]
+- calibActionsPlanner.build_fill_plan {"details": [{kind, selector, value}]}
+- webbot_filler.build_fill_plan FillItem list (field, selector, value)
+- tsx_dev_run static_ready result {"details": {"field_mapping", "actions"}};
+  values come from the ruhsat dict passed alongside, actions are the UI's
+  action strings ("css#<selector>", "click#<text>", bare label = text)
+
+Fixtures are served by FixtureServer (ThreadingHTTPServer on 127.0.0.1) so
+pages load over http:// like the real sites; by default input_htmls/,
+qt_browser/ and the stored TsX step pages are mounted.
+
+    python -m backend.helpers.batch_runner --workers 4 --repeat 3
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from dataclasses import asdict, is_dataclass
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, unquote, urlparse
+
+_REPO = Path(__file__).resolve().parents[2]
+_NOT_FOUND = str(_REPO / ".fixture-not-found")  # missing path -> 404
+
+DEFAULT_FIXTURE_DIRS = [
+    _REPO / "input_htmls",
+    _REPO / "qt_browser",
+    _REPO / "memory" / "TmpData" / "webbot2html" / "tsx_debug",
+]
+
+
+# ------------------------- fixtures -------------------------
+
+class _MountHandler(SimpleHTTPRequestHandler):
+    mounts: Dict[str, Path] = {}
+
+    def translate_path(self, path: str) -> str:
+        parts = [p for p in unquote(urlparse(path).path).split("/") if p]
+        if not parts or parts[0] not in self.mounts:
+            return _NOT_FOUND
+        base = self.mounts[parts[0]].resolve()
+        target = base.joinpath(*parts[1:]).resolve()
+        # no escaping the mounted directory with ..
+        return str(target) if target == base or base in target.parents else _NOT_FOUND
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FixtureServer:
+    """Serve directories at http://127.0.0.1:<port>/<dir name>/... from a background thread."""
+
+    def __init__(self, directories: Optional[List[Path]] = None, port: int = 0) -> None:
+        dirs = [Path(d) for d in (directories or DEFAULT_FIXTURE_DIRS) if Path(d).is_dir()]
+        self.mounts: Dict[str, Path] = {d.name: d for d in dirs}
+        handler = type("FixtureHandler", (_MountHandler,), {"mounts": self.mounts})
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, path: Path) -> str:
+        path = Path(path).resolve()
+        for name, d in self.mounts.items():
+            d = d.resolve()
+            if d in path.parents:
+                return f"{self.base_url}/{name}/" + "/".join(quote(p) for p in path.relative_to(d).parts)
+        raise ValueError(f"{path} is not under a mounted fixture directory")
+
+    def pages(self, pattern: str = "*.html") -> List[Path]:
+        out: List[Path] = []
+        for d in self.mounts.values():
+            out.extend(sorted(d.glob(pattern)))
+        return out
+
+    def start(self) -> "FixtureServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join(5)
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# ------------------------- plans -------------------------
+
+def _action_string(a: str) -> Optional[Dict[str, Any]]:
+    a = a.strip()
+    if not a:
+        return None
+    if a.startswith("css#"):
+        return {"kind": "click", "selector": a[4:]}
+    kind, sep, arg = a.partition("#")
+    if sep and kind == "click" and arg:
+        return {"kind": "click", "text": arg}
+    if a.lower().startswith(("css:", "xpath:", "text:")):
+        return {"kind": "click", "selector": a}
+    return {"kind": "click", "text": a}
+
+
+def normalize_plan(plan: Any, values: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Flatten any supported plan shape into [{kind, selector|text, value?, option?}]."""
+    values = values or {}
+    if is_dataclass(plan) and not isinstance(plan, type):
+        plan = asdict(plan)
+    if isinstance(plan, dict):
+        if isinstance(plan.get("plan"), dict):  # plan_build_fill_plan / batchFillForms result
+            return normalize_plan(plan["plan"], values)
+        if isinstance(plan.get("fill_plan"), dict):
+            return normalize_plan(plan["fill_plan"], values)
+        if "field_mapping" not in plan and isinstance(plan.get("actions"), list) and all(isinstance(a, dict) for a in plan["actions"]):
+            return normalize_plan(plan["actions"], values)
+        details = plan.get("details")
+        if isinstance(details, list):  # calibActionsPlanner
+            return normalize_plan(details, values)
+        if isinstance(details, dict):  # tsx_dev_run
+            plan = details
+        out: List[Dict[str, Any]] = []
+        fm = plan.get("field_mapping") if isinstance(plan.get("field_mapping"), dict) else {}
+        for key, sel in fm.items():
+            if isinstance(sel, str) and values.get(key) not in (None, ""):
+                out.append({"kind": "set_value", "selector": sel, "value": str(values[key]), "field": key})
+        for a in plan.get("actions") or plan.get("llm_actions") or []:
+            if isinstance(a, str) and (act := _action_string(a)):
+                out.append(act)
+        return out
+    out = []
+    for a in plan or []:
+        if is_dataclass(a) and not isinstance(a, type):
+            a = asdict(a)
+        if isinstance(a, str):
+            act = _action_string(a)
+            if act:
+                out.append(act)
+        elif isinstance(a, dict) and a.get("selector"):
+            kind = a.get("kind") or "set_value"  # FillItem has no kind
+            act = {"kind": kind, "selector": a["selector"]}
+            for k in ("value", "option", "field"):
+                if a.get(k) is not None:
+                    act[k] = a[k] if k == "field" else str(a[k])
+            out.append(act)
+    return out
+
+
+def _pw_selector(sel: str) -> str:
+    low = sel.lower()
+    if low.startswith("css:"):
+        return sel[4:].strip()
+    if low.startswith("xpath:"):
+        return "xpath=" + sel[6:].strip()
+    if low.startswith("text:"):
+        return "text=" + sel[5:].strip()
+    if sel.startswith("//"):
+        return "xpath=" + sel
+    return sel
+
+
+def execute_plan(page: Any, actions: List[Dict[str, Any]], timeout_ms: int = 5000) -> Dict[str, Any]:
+    """Apply normalized actions on a Playwright page; failures are collected, not raised."""
+    applied = 0
+    failed: List[Dict[str, Any]] = []
+    for a in actions:
+        try:
+            kind = a.get("kind")
+            if kind == "click":
+                if a.get("text"):
+                    page.get_by_text(a["text"], exact=False).first.click(timeout=timeout_ms)
+                else:
+                    page.locator(_pw_selector(a["selector"])).first.click(timeout=timeout_ms)
+            elif kind == "select_option":
+                loc = page.locator(_pw_selector(a["selector"])).first
+                opt = a.get("option") or a.get("value") or ""
+                try:
+                    loc.select_option(label=opt, timeout=timeout_ms)
+                except Exception:
+                    loc.select_option(value=opt, timeout=timeout_ms)
+            else:
+                loc = page.locator(_pw_selector(a["selector"])).first
+                tag = loc.evaluate("el => el.tagName", timeout=timeout_ms)
+                if str(tag).upper() == "SELECT":
+                    loc.select_option(label=a.get("value") or "", timeout=timeout_ms)
+                else:
+                    loc.fill(a.get("value") or "", timeout=timeout_ms)
+            applied += 1
+        except Exception as e:
+            failed.append({**a, "error": str(e).splitlines()[0][:200]})
+    return {"ok": not failed, "applied": applied, "failed": failed}
+
+
+def run_job(page: Any, job: Dict[str, Any], timeout_ms: int = 5000) -> Dict[str, Any]:
+    """Open job["url"], apply job["plan"] (with job["values"]), report timings and the final URL."""
+    t0 = time.perf_counter()
+    page.goto(job["url"], wait_until="domcontentloaded")
+    t_load = time.perf_counter()
+    actions = normalize_plan(job.get("plan"), job.get("values"))
+    res = execute_plan(page, actions, timeout_ms=timeout_ms)
+    t_end = time.perf_counter()
+    res.update({
+        "url": job["url"],
+        "final_url": page.url,
+        "actions": len(actions),
+        "load_ms": round((t_load - t0) * 1000.0, 1),
+        "exec_ms": round((t_end - t_load) * 1000.0, 1),
+        "total_ms": round((t_end - t0) * 1000.0, 1),
+    })
+    return res
+
+
+def run_batch(pool: Any, jobs: List[Dict[str, Any]], timeout_ms: int = 5000) -> Dict[str, Any]:
+    """Run all jobs on the pool; returns per-job results plus pages/min and latency percentiles."""
+    t0 = time.perf_counter()
+    results = pool.map(lambda page, job: run_job(page, job, timeout_ms), jobs)
+    elapsed = time.perf_counter() - t0
+    ok = [r for r in results if isinstance(r, dict)]
+    errors = [f"{type(r).__name__}: {r}" for r in results if not isinstance(r, dict)]
+    totals = sorted(r["total_ms"] for r in ok)
+    return {
+        "pages": len(jobs),
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_min": round(len(jobs) * 60.0 / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": round(statistics.median(totals), 1) if totals else None,
+        "p95_ms": round(totals[min(len(totals) - 1, int(len(totals) * 0.95))], 1) if totals else None,
+        "actions_applied": sum(r["applied"] for r in ok),
+        "actions_failed": sum(len(r["failed"]) for r in ok),
+        "errors": errors,
+        "results": results,
+    }
+
+
+# ------------------------- CLI -------------------------
+
+def _static_plan(html: str, url: str, ruhsat: Dict[str, Any]) -> Dict[str, Any]:
+    """Plan a fixture with the production2 static pipeline (fill_and_go FillPlan, no LLM)."""
+    p2 = _REPO / "production2"
+    for p in (p2 / "backend", p2):
+        if str(p) not in sys.path:
+            sys.path.insert(0, str(p))
+    from Features.batchFillForms import plan_fill_job  # type: ignore
+
+    return plan_fill_job(ruhsat, html, url, "Yeni Trafik", use_llm=False)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run fill plans on local fixtures with a pool of headless browsers")
+    ap.add_argument("--fixtures", action="append", help="fixture directory (repeatable); default: input_htmls, qt_browser, tsx_debug pages")
+    ap.add_argument("--plans", help="JSON file {fixture file name: plan} (any shape normalize_plan accepts)")
+    ap.add_argument("--ruhsat", help="ruhsat JSON used for the values (default: built-in sample)")
+    ap.add_argument("--workers", type=int, default=2, help="browsers in the pool")
+    ap.add_argument("--repeat", type=int, default=1, help="run every fixture this many times")
+    ap.add_argument("--timeout-ms", type=int, default=5000)
+    ap.add_argument("--headed", action="store_true")
+    ap.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = ap.parse_args(argv)
+
+    from backend.helpers.playwright_pool import BrowserPool
+
+    ruhsat = {"plaka_no": "06 AK 8886", "sasi_no": "VF1LB240531754309", "motor_no": "K4MA690",
+              "model_yili": "2005", "tckimlik": "35791182456", "dogum_tarihi": "05.03.1994"}
+    if args.ruhsat:
+        ruhsat = json.loads(Path(args.ruhsat).read_text(encoding="utf-8"))
+    plans = json.loads(Path(args.plans).read_text(encoding="utf-8")) if args.plans else {}
+
+    with FixtureServer([Path(d) for d in args.fixtures] if args.fixtures else None) as server:
+        jobs: List[Dict[str, Any]] = []
+        t0 = time.perf_counter()
+        for path in server.pages():
+            url = server.url_for(path)
+            plan = plans.get(path.name)
+            if plan is None:
+                plan = _static_plan(path.read_text(encoding="utf-8", errors="ignore"), url, ruhsat)
+            jobs.append({"url": url, "plan": plan, "values": ruhsat})
+        t_plan = time.perf_counter() - t0
+        if not jobs:
+            print("no fixture pages found")
+            return 1
+        jobs = jobs * max(1, args.repeat)
+        with BrowserPool(size=args.workers, headless=not args.headed, timeout_ms=args.timeout_ms) as pool:
+            t0 = time.perf_counter()
+            pool.submit(lambda page: None).result()  # launch cost is paid once, outside the timing
+            t_launch = time.perf_counter() - t0
+            report = run_batch(pool, jobs, timeout_ms=args.timeout_ms)
+            report["browser_launches"] = pool.stats["launches"]
+
+    report.update({"planning_s": round(t_plan, 3), "pool_start_s": round(t_launch, 3), "workers": args.workers})
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    else:
+        print(f"pages: {report['pages']}  workers: {args.workers}  launches: {report['browser_launches']}")
+        print(f"elapsed: {report['elapsed_s']} s -> {report['pages_per_min']} pages/min  p50 {report['p50_ms']} ms  p95 {report['p95_ms']} ms")
+        print(f"actions: {report['actions_applied']} applied, {report['actions_failed']} failed, {len(report['errors'])} page errors")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
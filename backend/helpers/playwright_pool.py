@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+"""Pool of long-lived Playwright browsers.
+
+Launching Chromium costs far more than opening a page, so each pool worker
+thread starts one browser and keeps it for its whole life; every job gets a
+fresh browser context (cookies/storage isolated) that is closed afterwards.
+Playwright's sync API is bound to the thread that started it, which is why
+each worker owns its own playwright instance instead of sharing one.
+
+    with BrowserPool(size=4) as pool:
+        fut = pool.submit(lambda page: page.goto(url) and page.title())
+        print(fut.result())
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_STOP = object()
+
+
+class BrowserPool:
+    """size worker threads, one browser each; submit(fn) runs fn(page, *args) in a new context."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        headless: bool = True,
+        timeout_ms: int = 15000,
+        browser: str = "chromium",
+        launch_args: Optional[Dict[str, Any]] = None,
+        context_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.size = max(1, int(size))
+        self.headless = headless
+        self.timeout_ms = timeout_ms
+        self.browser = browser
+        self.launch_args = dict(launch_args or {})
+        self.context_args = dict(context_args or {})
+        self._jobs: "queue.Queue[Any]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+        self._start_error: Optional[BaseException] = None
+        self.stats = {"jobs": 0, "errors": 0, "launches": 0}
+
+    def start(self) -> "BrowserPool":
+        with self._lock:
+            if self._threads:
+                return self
+            try:
+                import playwright.sync_api  # noqa: F401
+            except Exception as e:  # pragma: no cover - optional dep
+                raise ImportError("playwright not installed") from e
+            ready = [threading.Event() for _ in range(self.size)]
+            for i in range(self.size):
+                t = threading.Thread(target=self._worker, args=(ready[i],), name=f"browser-pool-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        for ev in ready:
+            ev.wait()
+        if self._start_error is not None:
+            self.close()
+            raise RuntimeError(f"browser launch failed: {self._start_error}") from self._start_error
+        return self
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> "Future[Any]":
+        """Run fn(page, *args, **kwargs) on a pooled browser in a fresh context."""
+        if not self._threads:
+            self.start()
+        fut: "Future[Any]" = Future()
+        self._jobs.put((fut, fn, args, kwargs))
+        return fut
+
+    def map(self, fn: Callable[..., Any], items: Iterable[Any]) -> List[Any]:
+        """fn(page, item) for every item, results in input order (exceptions are returned, not raised)."""
+        futures = [self.submit(fn, item) for item in items]
+        out: List[Any] = []
+        for f in futures:
+            try:
+                out.append(f.result())
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(_STOP)
+        for t in threads:
+            t.join(timeout)
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # --- worker side --------------------------------------------------
+    def _launch(self, pw: Any) -> Any:
+        with self._lock:
+            self.stats["launches"] += 1
+        return getattr(pw, self.browser).launch(headless=self.headless, **self.launch_args)
+
+    def _worker(self, ready: threading.Event) -> None:
+        from playwright.sync_api import sync_playwright
+
+        try:
+            pw = sync_playwright().start()
+            browser = self._launch(pw)
+        except BaseException as e:  # pragma: no cover - broken install / missing browser binary
+            self._start_error = e
+            ready.set()
+            return
+        ready.set()
+        try:
+            while True:
+                item = self._jobs.get()
+                if item is _STOP:
+                    return
+                fut, fn, args, kwargs = item
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                context = None
+                try:
+                    # crashed browser: relaunch; a failed relaunch fails this job only, the
+                    # worker stays up and retries the launch for the next one
+                    if browser is None or not browser.is_connected():
+                        browser = None
+                        browser = self._launch(pw)
+                    context = browser.new_context(**self.context_args)
+                    context.set_default_timeout(self.timeout_ms)
+                    page = context.new_page()
+                    fut.set_result(fn(page, *args, **kwargs))
+                except BaseException as e:
+                    with self._lock:
+                        self.stats["errors"] += 1
+                    fut.set_exception(e)
+                finally:
+                    with self._lock:
+                        self.stats["jobs"] += 1
+                    if context is not None:
+                        try:
+                            context.close()
+                        except Exception:
+                            pass
+        finally:
+            try:
+                if browser is not None:
+                    browser.close()
+            except Exception:
+                pass
+            finally:
+                pw.stop()
+
+
+_shared: Dict[bool, BrowserPool] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_pool(headless: bool = True) -> BrowserPool:
+    """Process-wide single-browser pool for ad-hoc helpers (closed at exit)."""
+    with _shared_lock:
+        pool = _shared.get(headless)
+        if pool is None:
+            import atexit
+
+            pool = BrowserPool(size=1, headless=headless).start()
+            atexit.register(pool.close)
+            _shared[headless] = pool
+        return pool
@@ -67,7 +67,8 @@ def stateflow_agent():
     try:
         memory['state'] = 'başladı'
         log_backend('[DEBUG] stateflow_agent thread started.', memory, code='BE-4001')
-        scheduler = JobScheduler()
+        # TS1 (JPEG → JSON) ve webbot birbirinden bağımsız: paralel koşar, mapping ikisini bekler
+        scheduler = JobScheduler(max_workers=2)
 
         def llm_extract_job():
             import json
@@ -117,8 +118,11 @@ def stateflow_agent():
             return 'llm_extracted'
 
         def wait_for_file():
+            # timeout/iptal olursa scheduler cancel_event'i set eder; beklemeyi bırak
+            cancel = scheduler.get_job('wait_for_file').cancel_event
             while memory.get('ruhsat_json') is None:
-                time.sleep(0.2)
+                if cancel.wait(0.2):
+                    raise Exception('ruhsat_json beklenirken süre doldu')
             return 'file_ready'
 
         def webbot_job():
@@ -166,15 +170,17 @@ def stateflow_agent():
 
         memory['state'] = 'devam ediyor'
         log_backend('[DEBUG] Adding jobs to scheduler.', memory, code='BE-4002')
-        scheduler.add_job(Job('llm_extract', llm_extract_job))
-        scheduler.add_job(Job('wait_for_file', wait_for_file))
-        scheduler.add_job(Job('webbot', webbot_job))
-        scheduler.add_job(Job('memory', memory_job))
-        scheduler.add_job(Job('llm', llm_job))
+        scheduler.add_job(Job('llm_extract', llm_extract_job, timeout=180))
+        scheduler.add_job(Job('wait_for_file', wait_for_file, deps=['llm_extract'], timeout=30))
+        scheduler.add_job(Job('webbot', webbot_job, timeout=120))
+        scheduler.add_job(Job('memory', memory_job, deps=['webbot']))
+        # no retry: a timed-out llm_job keeps running (it ignores cancel_event), and a
+        # retry would race it with a second paid call writing memory['mapping']
+        scheduler.add_job(Job('llm', llm_job, deps=['wait_for_file', 'memory'], timeout=180))
         log_backend('[DEBUG] Running all jobs in scheduler.', memory, code='BE-4003')
-        scheduler.run_all()
-        log_backend('[DEBUG] stateflow_agent finished all jobs.', memory, code='BE-4004')
-        return scheduler.get_states()
+        states = scheduler.run_all()
+        log_backend('[DEBUG] stateflow_agent finished all jobs.', memory, code='BE-4004', extra={'jobs': states})
+        return states
     except Exception as e:
         memory['state'] = 'hata'
         log_backend(f'[ERROR] stateflow_agent thread crashed: {e}', memory, code='BE-9104')
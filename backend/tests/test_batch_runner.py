@@ -0,0 +1,101 @@
+import sys
+import types
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from backend.helpers.batch_runner import FixtureServer, normalize_plan
+from backend.helpers.playwright_pool import BrowserPool
+from webbot.webbot_filler import FillItem
+
+
+def test_normalize_plan_shapes():
+    values = {"plaka_no": "34 ABC 123", "sasi_no": "VF1XX"}
+    fill_and_go = {"actions": [
+        {"kind": "set_value", "selector": "#plaka", "value": "34 ABC 123", "option": None},
+        {"kind": "select_option", "selector": "select#il", "value": None, "option": "Ankara"},
+        {"kind": "click", "selector": "#devam", "value": None, "option": None},
+    ], "meta": {"summary": "3 action(s)"}}
+    assert normalize_plan({"ok": True, "planType": "fillPlan", "plan": fill_and_go}) == [
+        {"kind": "set_value", "selector": "#plaka", "value": "34 ABC 123"},
+        {"kind": "select_option", "selector": "select#il", "option": "Ankara"},
+        {"kind": "click", "selector": "#devam"},
+    ]
+
+    calib = {"ok": True, "details": [{"kind": "set_value", "selector": "#sasi", "value": "VF1XX", "field": "sasi_no"}], "count": 1}
+    assert normalize_plan(calib) == [{"kind": "set_value", "selector": "#sasi", "value": "VF1XX", "field": "sasi_no"}]
+
+    webbot = [FillItem(field="plaka_no", selector="input[name=plaka]", value="34 ABC 123")]
+    assert normalize_plan(webbot) == [{"kind": "set_value", "selector": "input[name=plaka]", "value": "34 ABC 123", "field": "plaka_no"}]
+
+    tsx = {"ok": True, "state": "static_ready", "details": {
+        "field_mapping": {"plaka_no": "#plaka", "sasi_no": "#sasi", "motor_no": "#motor"},
+        "actions": ["css#button.next", "click#DEVAM", "İleri"],
+    }}
+    assert normalize_plan(tsx, values) == [
+        {"kind": "set_value", "selector": "#plaka", "value": "34 ABC 123", "field": "plaka_no"},
+        {"kind": "set_value", "selector": "#sasi", "value": "VF1XX", "field": "sasi_no"},
+        {"kind": "click", "selector": "button.next"},
+        {"kind": "click", "text": "DEVAM"},
+        {"kind": "click", "text": "İleri"},
+    ]
+
+
+def test_fixture_server_serves_mounted_dirs(tmp_path):
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "form.html").write_text("<form><input id='plaka'></form>", encoding="utf-8")
+    (tmp_path / "secret.txt").write_text("no", encoding="utf-8")
+
+    with FixtureServer([site]) as server:
+        assert server.pages() == [site / "form.html"]
+        url = server.url_for(site / "form.html")
+        assert url == f"{server.base_url}/site/form.html"
+        with urlopen(url) as resp:
+            assert b"plaka" in resp.read()
+        for bad in ("/site/../secret.txt", "/other/form.html"):
+            with pytest.raises(HTTPError) as err:
+                urlopen(server.base_url + bad)
+            assert err.value.code == 404
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, **kwargs):
+        return types.SimpleNamespace(set_default_timeout=lambda ms: None, new_page=lambda: "page", close=lambda: None)
+
+    def close(self):
+        pass
+
+
+def test_pool_survives_failed_relaunch(monkeypatch):
+    launched = []
+    outcomes = [None, RuntimeError("relaunch failed"), None]  # None: launch succeeds
+
+    def launch(headless=True, **kwargs):
+        err = outcomes.pop(0)
+        if err is not None:
+            raise err
+        launched.append(_FakeBrowser())
+        return launched[-1]
+
+    pw = types.SimpleNamespace(chromium=types.SimpleNamespace(launch=launch), stop=lambda: None)
+    sync_api = types.ModuleType("playwright.sync_api")
+    sync_api.sync_playwright = lambda: types.SimpleNamespace(start=lambda: pw)
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.sync_api", sync_api)
+
+    with BrowserPool(size=1) as pool:
+        assert pool.submit(lambda page: page).result(timeout=5) == "page"
+        launched[0].connected = False  # the browser crashed between jobs
+        with pytest.raises(RuntimeError, match="relaunch failed"):
+            pool.submit(lambda page: page).result(timeout=5)
+        assert pool._threads[0].is_alive()
+        assert pool.submit(lambda page: page + "!").result(timeout=5) == "page!"
+    assert pool.stats == {"jobs": 3, "errors": 1, "launches": 3}
@@ -20,3 +20,12 @@ def test_classify_page_basic():
     clf = ClassifyPage()
     res = clf.classify(html)
     assert res.kind in {PageKind.home, PageKind.dashboard}
+
+
+def test_classify_page_single_scan_priorities():
+    clf = ClassifyPage()
+    res = clf.classify("<div>Yeni Trafik Teklif</div><button>Poliçeyi Aktifleştir</button><a>Anasayfa</a>")
+    assert res.kind == PageKind.dashboard and res.is_final is True
+    res = clf.classify("<h1>Trafik Sigortası</h1>")
+    assert res.kind == PageKind.user_task and res.is_final is False
+    assert clf.classify("<p>nothing here</p>").kind == PageKind.unknown
@@ -69,7 +69,7 @@ def log_backend(msg):
 def stateflow_agent():
     import os
     from license_llm.license_llm_extractor import extract_vehicle_info_from_image
-    scheduler = JobScheduler()
+    scheduler = JobScheduler(max_workers=2)
 
     def llm_extract_job():
         log_backend('[INFO] LLM extract job: Son JPEG dosyası aranıyor...')
@@ -95,8 +95,10 @@ def stateflow_agent():
         return 'llm_extracted'
 
     def wait_for_file():
+        cancel = scheduler.get_job('wait_for_file').cancel_event
         while memory.get('ruhsat_json') is None:
-            time.sleep(0.2)
+            if cancel.wait(0.2):
+                raise Exception('ruhsat_json beklenirken süre doldu')
         return 'file_ready'
 
     def webbot_job():
@@ -125,20 +127,24 @@ def stateflow_agent():
             'mapping': mapping
         })
         return 'llm_done'
+
+    # llm_extract ile webbot bağımsız (paralel); llm mapping ikisini de bekler
+    scheduler.add_job(Job('llm_extract', llm_extract_job, timeout=180))
+    scheduler.add_job(Job('wait_for_file', wait_for_file, deps=['llm_extract'], timeout=30))
+    scheduler.add_job(Job('webbot', webbot_job, timeout=120))
+    scheduler.add_job(Job('memory', memory_job, deps=['webbot']))
+    # retry yok: zaman aşımına uğrayan llm_job çalışmaya devam eder, ikinci ücretli çağrı
+    # memory['mapping'] için onunla yarışırdı
+    scheduler.add_job(Job('llm', llm_job, deps=['wait_for_file', 'memory'], timeout=180))
+    states = scheduler.run_all()
+    memory['state'] = 'done'
+    return states
+
 # Mapping sonucunu frontend'e özel endpoint ile sun
 @app.route('/api/mapping', methods=['GET'])
 def get_mapping():
     return jsonify({'mapping': memory.get('mapping')})
 
-    scheduler.add_job(Job('llm_extract', llm_extract_job))
-    scheduler.add_job(Job('wait_for_file', wait_for_file))
-    scheduler.add_job(Job('webbot', webbot_job))
-    scheduler.add_job(Job('memory', memory_job))
-    scheduler.add_job(Job('llm', llm_job))
-    scheduler.run_all()
-    memory['state'] = 'done'
-    return scheduler.get_states()
-
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     import os
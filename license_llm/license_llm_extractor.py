@@ -3,16 +3,22 @@ import base64
 from dotenv import load_dotenv
 import openai
 
+try:
+    # production2 record/replay transport (P2_LLM_REPLAY=record|replay|auto); plain OpenAI otherwise
+    from production2.backend.Components.llmReplay import api_key as _replay_api_key, openai_client as _openai_client
+except Exception:
+    _replay_api_key = _openai_client = None
+
 load_dotenv()
 
 def extract_vehicle_info_from_image(file_path: str) -> dict:
     """
     OpenAI API ile ruhsat görselinden araç bilgilerini çıkarır.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = _replay_api_key() if _replay_api_key else os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY .env dosyasında bulunamadı!")
-    client = openai.OpenAI(api_key=api_key)
+    client = _openai_client(api_key) if _openai_client else openai.OpenAI(api_key=api_key)
     prompt = """
 The following image is a Turkish vehicle registration document (ruhsat). Please extract ONLY the following fields as a valid JSON object, using Turkish characters where appropriate:
 - plaka_no (license plate, exactly as printed on the document, e.g. '06 AK 8886', with correct spacing and no extra characters)
@@ -2,6 +2,12 @@
 import os
 import openai
 
+try:
+  # production2 record/replay transport (P2_LLM_REPLAY=record|replay|auto); plain module client otherwise
+  from production2.backend.Components.llmReplay import api_key as _replay_api_key, openai_client as _openai_client
+except Exception:
+  _replay_api_key = _openai_client = None
+
 try:
   # Lazy imports to avoid circular import failures at module import time
   from backend.logging_utils import log_backend  # type: ignore
@@ -19,7 +25,7 @@ def map_json_to_html_fields(html_string: str, ruhsat_json: dict, model="gpt-4o")
   """
   import re
   from bs4 import BeautifulSoup
-  openai.api_key = os.getenv("OPENAI_API_KEY")
+  openai.api_key = _replay_api_key() if _replay_api_key else os.getenv("OPENAI_API_KEY")
   # Önce <form>...</form> varsa onu kullan, yoksa input/select/label/button özetini çıkar
   form_match = re.search(r'<form[\s\S]*?</form>', html_string, re.IGNORECASE)
   if form_match:
@@ -187,7 +193,8 @@ def map_json_to_html_fields(html_string: str, ruhsat_json: dict, model="gpt-4o")
   except Exception:
     pass
 
-  response = openai.chat.completions.create(
+  client = _openai_client(openai.api_key) if _openai_client else openai
+  response = client.chat.completions.create(
     model=model,
     messages=[{"role": "user", "content": prompt}],
     temperature=0.1,
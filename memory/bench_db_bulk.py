@@ -0,0 +1,73 @@
+# bench_db_bulk.py
+# 100k form_map satırı: eski bağlantı-başına-satır yazımı, kalıcı bağlantı ile
+# satır-satır save_form_map ve save_form_maps_bulk karşılaştırması.
+#
+#     python -m memory.bench_db_bulk [--rows 100000] [--legacy-rows 2000]
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from memory.db import Database
+
+
+def _legacy_insert(db_path, rows):
+    # Önceki db.py davranışı: her satırda yeni bağlantı + commit (rollback journal)
+    for run_id, page_state, map_json in rows:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                'INSERT INTO form_maps (run_id, page_state, map_json) VALUES (?, ?, ?)',
+                (run_id, page_state, map_json)
+            )
+            conn.commit()
+
+
+def _rows(n):
+    payload = json.dumps({'plaka': '06 ABC 123', 'sasi': 'WF0DXXSKR8R2222222', 'selector': '#txtPlaka'})
+    return [(1 + i // 100, f'page_{i % 7}', payload) for i in range(n)]
+
+
+def main_cli(argv=None):
+    ap = argparse.ArgumentParser(description='form_map insert benchmark')
+    ap.add_argument('--rows', type=int, default=100000)
+    ap.add_argument('--legacy-rows', type=int, default=2000, help='eski yol yavaş; bu kadar satırdan ekstrapole edilir')
+    args = ap.parse_args(argv)
+    rows = _rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        Database(legacy_path).close()
+        sqlite3.connect(legacy_path).execute('PRAGMA journal_mode=DELETE').close()
+        t0 = time.perf_counter()
+        _legacy_insert(legacy_path, rows[:args.legacy_rows])
+        t_legacy = (time.perf_counter() - t0) * args.rows / max(1, args.legacy_rows)
+
+        db = Database(os.path.join(tmp, 'single.db'))
+        t0 = time.perf_counter()
+        for r in rows:
+            db.save_form_map(*r)
+        t_single = time.perf_counter() - t0
+        db.close()
+
+        db = Database(os.path.join(tmp, 'bulk.db'))
+        t0 = time.perf_counter()
+        db.save_form_maps_bulk(rows)
+        t_bulk = time.perf_counter() - t0
+        run_ids = range(1, 1 + args.rows // 100, max(1, args.rows // 10000))
+        t0 = time.perf_counter()
+        for run_id in run_ids:
+            db.get_form_maps_by_run(run_id)
+        t_read = time.perf_counter() - t0
+        db.close()
+
+    print(f"{'mode':<28} {'seconds':>9} {'rows/s':>10}")
+    for name, t in (('legacy (extrapolated)', t_legacy), ('pooled save_form_map', t_single), ('save_form_maps_bulk', t_bulk)):
+        print(f'{name:<28} {t:9.2f} {args.rows / t:10.0f}')
+    print(f'indexed get_form_maps_by_run x{len(run_ids)}: {t_read * 1000:.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main_cli())
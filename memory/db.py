@@ -1,13 +1,112 @@
 import sqlite3
+import threading
 from contextlib import closing
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Sequence, Union
 from .data_dictionary import AutomationStatus, SessionStatus, ProcessStatus
 
+# Bağlantı başına uygulanan ayarlar (WAL: okuyucular yazıcıyı beklemez)
+_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA busy_timeout=5000',
+)
+
+_INDEXES = '''
+CREATE INDEX IF NOT EXISTS idx_runs_user_id ON runs(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id);
+CREATE INDEX IF NOT EXISTS idx_form_maps_run_id ON form_maps(run_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_run_id ON notifications(run_id);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_document_id ON ocr_results(document_id);
+CREATE INDEX IF NOT EXISTS idx_run_steps_run_id ON run_steps(run_id);
+CREATE INDEX IF NOT EXISTS idx_run_steps_host ON run_steps(host, created_at);
+'''
+
+_RUN_STEP_COLUMNS = ('run_id', 'flow', 'op', 'phase', 'host', 'fingerprint', 'ok',
+                     'latency_ms', 'llm_calls', 'llm_tokens', 'detail_json')
+
+Row = Union[Sequence[Any], Dict[str, Any]]
+
+
 class Database:
+    """SQLite erişim katmanı.
+
+    Her thread kendi kalıcı bağlantısını kullanır (WAL modunda); tek satırlık
+    yazmalar kısa bir transaction ile commit edilir, toplu yazmalar
+    executemany ile tek transaction'da yapılır.
+    """
+
     def __init__(self, db_path: str = 'insurance.db'):
         self.db_path = db_path
+        self._local = threading.local()
+        self._all_conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._keepalive: Optional[sqlite3.Connection] = None
+        if db_path == ':memory:':
+            # Paylaşımlı bellek içi DB: thread bağlantıları aynı veriyi görsün
+            self._uri = f'file:memdb_{id(self)}?mode=memory&cache=shared'
+            self._keepalive = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        else:
+            self._uri = None
         self._create_tables()
 
+    # Thread'e ait bağlantı (ilk kullanımda açılır ve pragmalar uygulanır)
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        if self._uri:
+            conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in _PRAGMAS:
+            if self._uri and 'journal_mode' in pragma:
+                continue
+            conn.execute(pragma)
+        self._local.conn = conn
+        with self._conns_lock:
+            self._all_conns.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Tüm thread bağlantılarını kapat (uygulama kapanışında)."""
+        with self._conns_lock:
+            conns, self._all_conns = self._all_conns, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+        if self._keepalive is not None:
+            self._keepalive.close()
+            self._keepalive = None
+
+    def _execute_write(self, sql: str, params: Sequence[Any]) -> int:
+        conn = self._connection()
+        with conn:
+            with closing(conn.cursor()) as cur:
+                cur.execute(sql, params)
+                return cur.lastrowid
+
+    def _executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        conn = self._connection()
+        with conn:
+            with closing(conn.cursor()) as cur:
+                cur.executemany(sql, rows)
+                return cur.rowcount
+
+    def _fetch(self, sql: str, params: Sequence[Any], one: bool = False) -> Any:
+        conn = self._connection()
+        with closing(conn.cursor()) as cur:
+            cur.row_factory = sqlite3.Row
+            cur.execute(sql, params)
+            if one:
+                row = cur.fetchone()
+                return dict(row) if row else None
+            return [dict(row) for row in cur.fetchall()]
+
     def _create_tables(self):
         schema = '''
         CREATE TABLE IF NOT EXISTS users (
@@ -51,118 +150,176 @@ class Database:
           screenshot_path TEXT,
           created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+        CREATE TABLE IF NOT EXISTS run_steps (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          run_id INTEGER,
+          flow TEXT,
+          op TEXT,
+          phase TEXT,
+          host TEXT,
+          fingerprint TEXT,
+          ok INTEGER,
+          latency_ms REAL,
+          llm_calls INTEGER,
+          llm_tokens INTEGER,
+          detail_json TEXT,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
         '''
-        with sqlite3.connect(self.db_path) as conn:
-            conn.executescript(schema)
+        conn = self._connection()
+        conn.executescript(schema + _INDEXES)
+        conn.commit()
 
     # Kullanıcı ekle
     def add_user(self, name: str, email: str, phone: str) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'INSERT INTO users (name, email, phone) VALUES (?, ?, ?)',
-                    (name, email, phone)
-                )
-                conn.commit()
-                return cur.lastrowid
+        return self._execute_write(
+            'INSERT INTO users (name, email, phone) VALUES (?, ?, ?)',
+            (name, email, phone)
+        )
 
     # Doküman kaydet
     def save_document(self, user_id: int, file_path: str) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'INSERT INTO documents (user_id, file_path) VALUES (?, ?)',
-                    (user_id, file_path)
-                )
-                conn.commit()
-                return cur.lastrowid
+        return self._execute_write(
+            'INSERT INTO documents (user_id, file_path) VALUES (?, ?)',
+            (user_id, file_path)
+        )
 
     # OCR sonucu kaydet
     def save_ocr_result(self, document_id: int, result_json: str) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'INSERT INTO ocr_results (document_id, result_json) VALUES (?, ?)',
-                    (document_id, result_json)
-                )
-                conn.commit()
-                return cur.lastrowid
+        return self._execute_write(
+            'INSERT INTO ocr_results (document_id, result_json) VALUES (?, ?)',
+            (document_id, result_json)
+        )
 
     # Run başlat
     def start_run(self, user_id: int) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'INSERT INTO runs (user_id, status, attempt_count) VALUES (?, ?, ?)',
-                    (user_id, AutomationStatus.NotStarted.value, 1)
-                )
-                conn.commit()
-                return cur.lastrowid
+        return self._execute_write(
+            'INSERT INTO runs (user_id, status, attempt_count) VALUES (?, ?, ?)',
+            (user_id, AutomationStatus.NotStarted.value, 1)
+        )
 
     # Run durumunu güncelle
     def update_run_status(self, run_id: int, status: AutomationStatus, last_error: Optional[str] = None, attempt_count: Optional[int] = None):
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                if attempt_count is not None:
-                    cur.execute(
-                        'UPDATE runs SET status = ?, last_error = ?, attempt_count = ? WHERE id = ?',
-                        (status.value, last_error, attempt_count, run_id)
-                    )
-                else:
-                    cur.execute(
-                        'UPDATE runs SET status = ?, last_error = ? WHERE id = ?',
-                        (status.value, last_error, run_id)
-                    )
-                conn.commit()
+        if attempt_count is not None:
+            self._execute_write(
+                'UPDATE runs SET status = ?, last_error = ?, attempt_count = ? WHERE id = ?',
+                (status.value, last_error, attempt_count, run_id)
+            )
+        else:
+            self._execute_write(
+                'UPDATE runs SET status = ?, last_error = ? WHERE id = ?',
+                (status.value, last_error, run_id)
+            )
 
     # Form map kaydet
     def save_form_map(self, run_id: int, page_state: str, map_json: str) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'INSERT INTO form_maps (run_id, page_state, map_json) VALUES (?, ?, ?)',
-                    (run_id, page_state, map_json)
-                )
-                conn.commit()
-                return cur.lastrowid
+        return self._execute_write(
+            'INSERT INTO form_maps (run_id, page_state, map_json) VALUES (?, ?, ?)',
+            (run_id, page_state, map_json)
+        )
+
+    # Form map'leri toplu kaydet: (run_id, page_state, map_json) tuple'ları veya aynı anahtarlı dict'ler
+    def save_form_maps_bulk(self, rows: Iterable[Row]) -> int:
+        return self._executemany(
+            'INSERT INTO form_maps (run_id, page_state, map_json) VALUES (?, ?, ?)',
+            (_as_tuple(r, ('run_id', 'page_state', 'map_json')) for r in rows)
+        )
 
     # Bildirim logla
     def log_notification(self, run_id: int, type_: str, message: str, screenshot_path: Optional[str] = None) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'INSERT INTO notifications (run_id, type, message, screenshot_path) VALUES (?, ?, ?, ?)',
-                    (run_id, type_, message, screenshot_path)
-                )
-                conn.commit()
-                return cur.lastrowid
+        return self._execute_write(
+            'INSERT INTO notifications (run_id, type, message, screenshot_path) VALUES (?, ?, ?, ?)',
+            (run_id, type_, message, screenshot_path)
+        )
+
+    # Bildirimleri toplu logla: (run_id, type, message[, screenshot_path]) veya dict
+    def log_notifications_bulk(self, rows: Iterable[Row]) -> int:
+        return self._executemany(
+            'INSERT INTO notifications (run_id, type, message, screenshot_path) VALUES (?, ?, ?, ?)',
+            (_as_tuple(r, ('run_id', 'type', 'message', 'screenshot_path'), optional=('screenshot_path',)) for r in rows)
+        )
+
+    # Adım kayıtlarını toplu kaydet: _RUN_STEP_COLUMNS sırasında tuple veya dict
+    def save_run_steps_bulk(self, rows: Iterable[Row]) -> int:
+        return self._executemany(
+            f'INSERT INTO run_steps ({", ".join(_RUN_STEP_COLUMNS)}) VALUES ({", ".join("?" * len(_RUN_STEP_COLUMNS))})',
+            (_as_tuple(r, _RUN_STEP_COLUMNS) for r in rows)
+        )
 
     # Son run'ı getir
     def get_last_run(self, user_id: int) -> Optional[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'SELECT * FROM runs WHERE user_id = ? ORDER BY created_at DESC LIMIT 1',
-                    (user_id,)
-                )
-                row = cur.fetchone()
-                return dict(row) if row else None
+        return self._fetch(
+            'SELECT * FROM runs WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 1',
+            (user_id,), one=True
+        )
 
     # Kullanıcıya ait dokümanları getir
     def get_documents_by_user(self, user_id: int) -> List[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            with closing(conn.cursor()) as cur:
-                cur.execute(
-                    'SELECT * FROM documents WHERE user_id = ?', (user_id,))
-                return [dict(row) for row in cur.fetchall()]
+        return self._fetch('SELECT * FROM documents WHERE user_id = ?', (user_id,))
 
     # Run detaylarını getir
     def get_run_details(self, run_id: int) -> Optional[Dict[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            with closing(conn.cursor()) as cur:
-                cur.execute('SELECT * FROM runs WHERE id = ?', (run_id,))
-                row = cur.fetchone()
-                return dict(row) if row else None
+        return self._fetch('SELECT * FROM runs WHERE id = ?', (run_id,), one=True)
+
+    # Run'a ait form map'leri getir
+    def get_form_maps_by_run(self, run_id: int) -> List[Dict[str, Any]]:
+        return self._fetch('SELECT * FROM form_maps WHERE run_id = ? ORDER BY id', (run_id,))
+
+    # Run'a ait adımları getir
+    def get_run_steps(self, run_id: int) -> List[Dict[str, Any]]:
+        return self._fetch('SELECT * FROM run_steps WHERE run_id = ? ORDER BY id', (run_id,))
+
+    # Son run'lar ve adım özetleri (host verilirse yalnızca o host'a dokunan run'lar)
+    def get_run_history(self, limit: int = 50, host: Optional[str] = None) -> List[Dict[str, Any]]:
+        where = 'WHERE r.id IN (SELECT run_id FROM run_steps WHERE host = ?)' if host else ''
+        params: List[Any] = [host] if host else []
+        return self._fetch(
+            f'''SELECT r.*, COUNT(s.id) AS steps, SUM(1 - s.ok) AS failed_steps,
+                       MAX(s.host) AS host, SUM(s.latency_ms) AS latency_ms,
+                       SUM(s.llm_calls) AS llm_calls, SUM(s.llm_tokens) AS llm_tokens,
+                       (SELECT phase FROM run_steps WHERE run_id = r.id ORDER BY id DESC LIMIT 1) AS last_phase
+                FROM runs r LEFT JOIN run_steps s ON s.run_id = r.id
+                {where}
+                GROUP BY r.id ORDER BY r.id DESC LIMIT ?''',
+            params + [int(limit)]
+        )
+
+    # Host başına başarı oranı: tamamlanan run'lar ve başarılı adımlar
+    def get_host_success_rates(self, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        where = "WHERE s.host IS NOT NULL AND s.host != ''"
+        params: List[Any] = []
+        if since:
+            where += ' AND s.created_at >= ?'
+            params.append(since)
+        rows = self._fetch(
+            f'''SELECT s.host AS host, COUNT(DISTINCT s.run_id) AS runs,
+                       COUNT(DISTINCT CASE WHEN r.status = ? THEN s.run_id END) AS completed_runs,
+                       COUNT(s.id) AS steps, SUM(s.ok) AS ok_steps,
+                       AVG(s.latency_ms) AS avg_latency_ms, SUM(s.llm_tokens) AS llm_tokens
+                FROM run_steps s LEFT JOIN runs r ON r.id = s.run_id
+                {where}
+                GROUP BY s.host ORDER BY runs DESC''',
+            [AutomationStatus.Completed.value] + params
+        )
+        for row in rows:
+            row['run_success_rate'] = round(row['completed_runs'] / row['runs'], 4) if row['runs'] else 0.0
+            row['step_success_rate'] = round((row['ok_steps'] or 0) / row['steps'], 4) if row['steps'] else 0.0
+        return rows
+
+
+def _as_tuple(row: Row, keys: Sequence[str], optional: Sequence[str] = ()) -> Sequence[Any]:
+    # yalnızca optional kolonlar (sondakiler) eksik olabilir; eksik/fazla satır ValueError ile
+    # toplu insert'i (ve transaction'ı) durdurur, None ile yazılmaz
+    if isinstance(row, dict):
+        # log_notification parametre adıyla uyum: type_ de kabul edilir
+        missing = [k for k in keys if k not in row and k + '_' not in row and k not in optional]
+        if missing:
+            raise ValueError(f'bulk insert row is missing {missing}: {row!r}')
+        return tuple(row.get(k, row.get(k + '_')) for k in keys)
+    vals = tuple(row)
+    required = len(keys)
+    while required and keys[required - 1] in optional:
+        required -= 1
+    if not required <= len(vals) <= len(keys):
+        raise ValueError(f'bulk insert row needs {required}-{len(keys)} values {tuple(keys)}, got {len(vals)}: {vals!r}')
+    return vals + (None,) * (len(keys) - len(vals))
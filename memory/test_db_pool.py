@@ -0,0 +1,95 @@
+# test_db_pool.py
+# Database: thread başına kalıcı bağlantı, WAL, toplu insert ve index'leri test eder.
+import threading
+
+import pytest
+
+from memory.db import Database
+from memory.data_dictionary import AutomationStatus
+
+
+def test_wal_and_indexes(tmp_path):
+    db = Database(str(tmp_path / 'pool.db'))
+    conn = db._connection()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_runs_user_id', 'idx_documents_user_id', 'idx_form_maps_run_id'} <= names
+    plan = ' '.join(str(r) for r in conn.execute('EXPLAIN QUERY PLAN SELECT * FROM form_maps WHERE run_id = 1'))
+    assert 'idx_form_maps_run_id' in plan
+    # aynı thread aynı bağlantıyı tekrar kullanır
+    assert db._connection() is conn
+    db.close()
+
+
+def test_bulk_inserts_and_reads(tmp_path):
+    db = Database(str(tmp_path / 'bulk.db'))
+    user_id = db.add_user('Aziz Serdar', 'a@b.c', '555')
+    run_id = db.start_run(user_id)
+    n = db.save_form_maps_bulk([(run_id, f'page_{i}', '{}') for i in range(500)])
+    assert n == 500
+    db.save_form_maps_bulk([{'run_id': run_id, 'page_state': 'dict', 'map_json': '{"a": 1}'}])
+    maps = db.get_form_maps_by_run(run_id)
+    assert len(maps) == 501 and maps[-1]['page_state'] == 'dict'
+
+    n = db.log_notifications_bulk([(run_id, 'info', 'm1'), {'run_id': run_id, 'type_': 'error', 'message': 'm2', 'screenshot_path': 'x.png'}])
+    assert n == 2
+    rows = db._connection().execute('SELECT type, screenshot_path FROM notifications ORDER BY id').fetchall()
+    assert rows == [('info', None), ('error', 'x.png')]
+
+    db.update_run_status(run_id, AutomationStatus.Completed, attempt_count=2)
+    assert db.get_last_run(user_id)['attempt_count'] == 2
+    db.close()
+
+
+def test_bulk_insert_rolls_back_on_error(tmp_path):
+    db = Database(str(tmp_path / 'rb.db'))
+    assert db.save_form_maps_bulk([(1, 'ok', '{}')]) == 1
+    # eksik/fazla kolon veya anahtar: hata, yarım batch yazılmaz
+    for bad in ([(1, 'a', '{}'), (1, 'bad')],
+                [(1, 'a', '{}'), (1, 'b', '{}', 'fazla')],
+                [(1, 'a', '{}'), {'run_id': 1, 'page_state': 'no map'}]):
+        with pytest.raises(ValueError):
+            db.save_form_maps_bulk(bad)
+    assert len(db.get_form_maps_by_run(1)) == 1
+    # yalnızca screenshot_path isteğe bağlı
+    assert db.log_notifications_bulk([(1, 'info', 'm'), {'run_id': 1, 'type': 'info', 'message': 'd'}]) == 2
+    with pytest.raises(ValueError):
+        db.log_notifications_bulk([(1, 'info')])
+    db.close()
+
+
+def test_threads_use_own_connections(tmp_path):
+    db = Database(str(tmp_path / 'threads.db'))
+    run_id = db.start_run(1)
+    seen = []
+    errors = []
+
+    def worker(k):
+        try:
+            seen.append(id(db._connection()))
+            for i in range(50):
+                db.save_form_map(run_id, f't{k}_{i}', '{}')
+        except Exception as e:  # pragma: no cover - hata mesajını test çıktısına taşı
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(set(seen)) == 4
+    assert len(db.get_form_maps_by_run(run_id)) == 200
+    db.close()
+
+
+def test_memory_db_shared_across_threads():
+    db = Database(':memory:')
+    uid = db.add_user('x', 'y', 'z')
+    out = []
+    t = threading.Thread(target=lambda: out.append(db.start_run(uid)))
+    t.start()
+    t.join()
+    assert db.get_run_details(out[0])['user_id'] == uid
+    db.close()
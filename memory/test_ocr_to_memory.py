@@ -3,7 +3,6 @@
 import os
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
-import sqlite3
 import json
 import pytest
 from memory.db import Database
@@ -67,7 +66,7 @@ def test_ocr_result_to_memory(tmp_path):
         ocr_sample = fill_ocr_sample(llm_result)
         ocr_json = json.dumps(ocr_sample, ensure_ascii=False)
         ocr_id = db.save_ocr_result(document_id=document_id, result_json=ocr_json)
-        with db._get_connection() as conn:
+        with db._connection() as conn:
             cur = conn.cursor()
             cur.execute("SELECT result_json FROM ocr_results WHERE id = ?", (ocr_id,))
             row = cur.fetchone()
@@ -126,12 +125,6 @@ def test_ocr_result_to_memory(tmp_path):
     for key in ocr_sample:
         assert result[key] == ocr_sample[key]
 
-# Database class'ına test için connection döndüren yardımcı fonksiyon ekle
-# (testte private method olarak kullanılır, production'da kullanılmaz)
-def _get_connection(self):
-    return sqlite3.connect(self.db_path)
-Database._get_connection = _get_connection
-
 #run commands
 #pytest memory/test_ocr_to_memory.py
 #Coverage report
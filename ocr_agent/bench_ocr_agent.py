@@ -0,0 +1,89 @@
+# bench_ocr_agent.py
+# Ruhsat ön işleme: eski PIL (grayscale + kontrast + sabit threshold) ile NumPy
+# adaptif threshold, form bulma + eğim düzeltme + alan kutuları süreleri.
+# tesseract kuruluysa tüm sayfa OCR'ı ile alan kutusu OCR'ı da karşılaştırılır.
+#
+#     python -m ocr_agent.bench_ocr_agent [--repeat 5] [--rotate 3] [resim ...]
+import argparse
+import os
+import statistics
+import time
+
+from PIL import Image, ImageEnhance, ImageOps
+
+from ocr_agent.ocr_agent import _extract_page, _extract_roi, _preprocess, prepare_form, roi_crops
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_IMAGES = [
+    os.path.join(_HERE, 'sample_ruhsat.jpg'),
+    os.path.join(_HERE, 'sample_ruhsat_modern.jpg'),
+    os.path.join(_HERE, '..', 'tdsp', 'ruhsat', 'Ruhsat.jpg'),
+    os.path.join(_HERE, '..', 'tdsp', 'ruhsat', 'sample_ruhsat_modern.jpg'),
+]
+
+
+def _legacy_preprocess(img):
+    # Önceki _preprocess: gri ton, kontrast x2, 140 sabit eşik
+    img = ImageOps.grayscale(img)
+    img = ImageEnhance.Contrast(img).enhance(2.0)
+    return img.point(lambda x: 0 if x < 140 else 255, '1')
+
+
+def _timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def _has_tesseract():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def _roi_only(img):
+    gray, layout, _ = prepare_form(img)
+    return roi_crops(gray, layout)
+
+
+def main_cli(argv=None):
+    ap = argparse.ArgumentParser(description='ruhsat OCR ön işleme benchmark')
+    ap.add_argument('images', nargs='*')
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--rotate', type=float, default=0.0, help='eğik fotoğraf benzetimi (derece)')
+    args = ap.parse_args(argv)
+    paths = [p for p in (args.images or _DEFAULT_IMAGES) if os.path.exists(p)]
+    if not paths:
+        print('resim bulunamadı')
+        return 1
+    ocr = _has_tesseract()
+
+    print(f"{'image':<28} {'legacy ms':>10} {'numpy ms':>9} {'form+roi ms':>12} {'layout':>7} {'skew':>6}"
+          + (f" {'page ocr ms':>12} {'roi ocr ms':>11}" if ocr else ''))
+    for path in paths:
+        img = Image.open(path).convert('RGB')
+        if args.rotate:
+            img = img.rotate(args.rotate, resample=Image.BICUBIC, expand=True, fillcolor=(90, 70, 50))
+        t_legacy = _timed(lambda: _legacy_preprocess(img), args.repeat)
+        t_numpy = _timed(lambda: _preprocess(img), args.repeat)
+        t_roi = _timed(lambda: _roi_only(img), args.repeat)
+        _, layout, angle = prepare_form(img)
+        row = f'{os.path.basename(path):<28} {t_legacy:10.1f} {t_numpy:9.1f} {t_roi:12.1f} {layout:>7} {angle:6.2f}'
+        if ocr:
+            t_page = _timed(lambda: _extract_page(img), 1)
+            t_roi_ocr = _timed(lambda: _extract_roi(img, 6), 1)
+            row += f' {t_page:12.1f} {t_roi_ocr:11.1f}'
+        print(row)
+    if not ocr:
+        print('tesseract bulunamadı: OCR süreleri ölçülmedi')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main_cli())
@@ -3,9 +3,11 @@
 import os
 import json
 import re
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 import pytesseract
-from PIL import Image, ImageOps, ImageEnhance
+from PIL import Image
 
 # Ruhsattan çıkarılacak alanlar (bazıları default, bazıları OCR ile)
 DEFAULT_OCR_RESULT = {
@@ -20,74 +22,400 @@ DEFAULT_OCR_RESULT = {
     "sasi_no": None
 }
 
-def extract_ruhsat_info(image_path: str) -> Dict[str, Any]:
+# Alan bazlı desen gücü: katı regex 1.0, sezgisel yakalama daha düşük
+_PATTERN_STRENGTH = {
+    "plaka_no": 1.0,
+    "plaka_no_heuristic": 0.5,
+    "marka": 0.9,
+    "marka_anywhere": 0.6,
+    "model_yili": 0.6,  # metindeki ilk 1980-2030 arası yıl; başka tarihlerle karışabilir
+    "tescil_tarihi": 0.8,
+    "sasi_no": 1.0,
+    "motor_no": 0.8,
+}
+
+# ROI yolunda desen alanın kendi kutusunda aranır: sayfa yolundaki yıl/tarih karışması
+# olmaz, ama motor_no hâlâ sezgisel (kutudaki 6-15 harf/rakam, etiket/desen yok)
+_ROI_STRENGTH = {
+    "plaka_no": 1.0,
+    "marka": 0.9,
+    "model_yili": 0.9,
+    "tescil_tarihi": 0.9,
+    "sasi_no": 1.0,
+    "motor_no": 0.6,
+}
+
+
+# Bilinen ruhsat düzenleri: alan kutuları, beyaz form alanına göre oran (x0, y0, x1, y1)
+RUHSAT_LAYOUTS: Dict[str, Dict[str, Tuple[float, float, float, float]]] = {
+    # Eski mavi kart (MOTORLU ARAÇ TESCİL BELGESİ)
+    "legacy": {
+        "plaka_no": (0.01, 0.165, 0.41, 0.234),
+        "marka": (0.34, 0.165, 0.76, 0.234),
+        "model_yili": (0.76, 0.165, 1.0, 0.234),
+        "tescil_tarihi": (0.51, 0.074, 1.0, 0.148),
+        "motor_no": (0.01, 0.433, 1.0, 0.507),
+        "sasi_no": (0.01, 0.507, 1.0, 0.576),
+    },
+    # Yeni tip (Y.1 / A / B ... kodlu alanlar)
+    "modern": {
+        "plaka_no": (0.005, 0.104, 0.49, 0.153),
+        "tescil_tarihi": (0.49, 0.178, 1.0, 0.228),
+        "marka": (0.005, 0.25, 0.49, 0.295),
+        "model_yili": (0.49, 0.318, 0.77, 0.364),
+        "motor_no": (0.0, 0.459, 1.0, 0.504),
+        "sasi_no": (0.0, 0.527, 1.0, 0.576),
+    },
+}
+# Form alanı yükseklik/genişlik oranı: eski kart ~1.2, yeni tip ~1.4
+_MODERN_MIN_ASPECT = 1.3
+_MAX_ASPECT = 1.42  # modern düzen (yükseklik / genişlik)
+
+_MARKA_LIST = ['RENAULT', 'FORD', 'FIAT', 'TOYOTA', 'VOLKSWAGEN', 'OPEL', 'PEUGEOT', 'CITROEN', 'HYUNDAI', 'HONDA', 'MERCEDES', 'BMW', 'NISSAN', 'KIA', 'SEAT', 'SKODA', 'DACIA', 'SUZUKI', 'MAZDA', 'MITSUBISHI']
+_MARKA_RE = re.compile('|'.join(_MARKA_LIST))
+_PLAKA_RE = re.compile(r'\b\d{2}\s*[A-ZÇĞİÖŞÜ]{1,3}\s*\d{2,4}\b')
+_YEAR_RE = re.compile(r'\b(19\d{2}|20[0-2]\d|2030)\b')
+_DATE_RE = re.compile(r'(\d{2}[./]\d{2}[./]\d{4})')
+_VIN_RE = re.compile(r'\b[A-HJ-NPR-Z0-9]{17}\b')
+_MOTOR_LABEL_RE = re.compile(r'MOTOR\s*N[OUÖ0]\.?\s*[:：]?', re.I)
+_MOTOR_RE = re.compile(r'MOTOR\s*N[OUÖ0]\.?\s*[:：]?\s*([A-Z0-9]{2,15}(?: [A-Z0-9]{2,15})?)\b', re.I)
+
+
+# --- NumPy ön işleme -----------------------------------------------------
+
+def to_gray(img: Image.Image) -> np.ndarray:
+    """RGB -> gri ton (float32, 0-255), ITU-R 601 ağırlıkları."""
+    a = np.asarray(img.convert('RGB'), dtype=np.float32)
+    return a @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def stretch_contrast(gray: np.ndarray, low: float = 2.0, high: float = 98.0) -> np.ndarray:
+    """Yüzdelik kontrast germe: low..high yüzdelikleri 0..255'e yayılır (uint8)."""
+    g8 = np.clip(gray, 0, 255).astype(np.uint8)
+    # sıralama yerine 256 kutulu histogramdan yüzdelik
+    cdf = np.cumsum(np.bincount(g8.ravel(), minlength=256))
+    lo = int(np.searchsorted(cdf, cdf[-1] * low / 100.0))
+    hi = int(np.searchsorted(cdf, cdf[-1] * high / 100.0))
+    if hi - lo < 1:
+        return g8
+    lut = np.clip((np.arange(256) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+    return lut[g8]
+
+
+def adaptive_threshold(gray: np.ndarray, block: int = 31, c: float = 10.0) -> np.ndarray:
+    """Yerel ortalama eşikleme (integral görüntü ile O(1)/piksel): mürekkep 0, zemin 255."""
+    block = max(3, block | 1)
+    pad = block // 2
+    h, w = gray.shape
+    g = np.clip(gray, 0, 255).astype(np.int32)
+    # int32 yeter: 255 x piksel sayısı < 2^31 (~8 MP'ye kadar)
+    ii = np.zeros((h + 2 * pad + 1, w + 2 * pad + 1), dtype=np.int32)
+    ii[1:, 1:] = np.pad(g, pad, mode='edge').cumsum(0, dtype=np.int32).cumsum(1, dtype=np.int32)
+    s = ii[block:block + h, block:block + w] - ii[0:h, block:block + w] - ii[block:block + h, 0:w] + ii[0:h, 0:w]
+    area = block * block
+    return np.where(g * area < s - int(c * area), 0, 255).astype(np.uint8)
+
+
+def _skew_scores(ys: np.ndarray, xs: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    rad = np.deg2rad(angles)[:, None]
+    # her açı için döndürülmüş y koordinatları (açı x nokta); tek bincount ile tüm profiller
+    proj = np.rint(ys[None, :] * np.cos(rad) - xs[None, :] * np.sin(rad)).astype(np.int64)
+    proj -= proj.min(axis=1, keepdims=True)
+    width = int(proj.max()) + 1
+    hist = np.bincount((proj + np.arange(len(angles))[:, None] * width).ravel(), minlength=len(angles) * width)
+    return hist.reshape(len(angles), width).astype(np.float64).var(axis=1)
+
+
+def estimate_skew(binary: np.ndarray, max_angle: float = 5.0, step: float = 0.25, max_points: int = 20000) -> float:
+    """Projeksiyon profili ile eğim açısı (derece): satır toplamlarının varyansını en büyükleyen açı.
+
+    Önce 1 derecelik adımlarla kaba, sonra en iyi açı çevresinde step ile ince arama.
     """
-    Türk araç ruhsatı fotoğrafından temel bilgileri OCR ile çıkarır.
+    ys, xs = np.nonzero(binary == 0)
+    if ys.size < 50:
+        return 0.0
+    if ys.size > max_points:
+        pick = np.random.default_rng(0).choice(ys.size, max_points, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    coarse = np.arange(-max_angle, max_angle + 0.5, 1.0)
+    best = float(coarse[int(np.argmax(_skew_scores(ys, xs, coarse)))])
+    fine = np.arange(best - 1.0, best + 1.0 + step / 2, step)
+    return float(fine[int(np.argmax(_skew_scores(ys, xs, fine)))])
+
+
+def _span(frac: np.ndarray, thr: float, gap: int) -> Tuple[int, int]:
+    idx = np.flatnonzero(frac > thr)
+    if idx.size == 0:
+        return 0, len(frac)
+    segs = np.split(idx, np.flatnonzero(np.diff(idx) > gap) + 1)
+    seg = max(segs, key=lambda g: g[-1] - g[0])
+    return int(seg[0]), int(seg[-1]) + 1
+
+
+def form_bbox(img: Image.Image, scale: int = 2) -> Tuple[int, int, int, int]:
+    """Ruhsatın beyaz form alanı (x0, y0, x1, y1): açık ve düşük doygunluklu piksellerin projeksiyonları.
+
+    Projeksiyonlar scale kat küçültülmüş görüntüde hesaplanır, koordinatlar geri ölçeklenir.
     """
-    # Görüntü ön işleme: gri ton, kontrast artırma, threshold
-    img = Image.open(image_path)
-    img = ImageOps.grayscale(img)
-    img = ImageEnhance.Contrast(img).enhance(2.0)
-    img = img.point(lambda x: 0 if x < 140 else 255, '1')
+    small = img.convert('RGB').reduce(scale) if scale > 1 else img.convert('RGB')
+    a = np.asarray(small, dtype=np.int16)
+    mx, mn = a.max(axis=2), a.min(axis=2)
+    mask = (mx > 140) & ((mx - mn) < 50)
+    h, w = mask.shape
+    c0, c1 = _span(mask.mean(axis=0), 0.25, max(1, w // 50))
+    r0, r1 = 0, h
+    for _ in range(2):
+        # satır boşluk toleransı form genişliğine bağlı: ince çizgiler/gölgeler bölmesin, kenarlık bölsün
+        r0, r1 = _span(mask[:, c0:c1].mean(axis=1), 0.45, max(2, (c1 - c0) // 50))
+        c0, c1 = _span(mask[r0:r1].mean(axis=0), 0.5, max(1, w // 50))
+    limit = int((c1 - c0) * _MAX_ASPECT)
+    if r1 - r0 > limit * 1.03:
+        # kol/gölge form kenarına yapışmış: bilinen en uzun düzen boyunda en dolu pencereyi seç
+        rows = np.concatenate(([0.0], np.cumsum(mask[r0:r1, c0:c1].mean(axis=1))))
+        start = int(np.argmax(rows[limit:] - rows[:-limit]))
+        r0, r1 = r0 + start, r0 + start + limit
+    k = max(1, scale)
+    return c0 * k, r0 * k, min(img.width, c1 * k), min(img.height, r1 * k)
 
-    # OCR parametreleri: Türkçe, psm 6 (satır satır okuma)
-    text = pytesseract.image_to_string(img, lang='tur', config='--psm 6')
-    print("OCR ham metin:\n", text)
 
-    result = DEFAULT_OCR_RESULT.copy()
+def detect_layout(bbox: Tuple[int, int, int, int]) -> str:
+    x0, y0, x1, y1 = bbox
+    return "modern" if (y1 - y0) / max(1, x1 - x0) >= _MODERN_MIN_ASPECT else "legacy"
+
+
+def _preprocess(img: Image.Image) -> Image.Image:
+    """Görüntü ön işleme (NumPy): gri ton, kontrast germe, adaptif threshold"""
+    binary = adaptive_threshold(stretch_contrast(to_gray(img)))
+    return Image.fromarray(binary, mode='L')
+
+
+def prepare_form(img: Image.Image) -> Tuple[np.ndarray, str, float]:
+    """Eğimi düzeltir ve form alanını kırpar; (gri form, düzen adı, açı) döner."""
+    img = img.convert('RGB')
+    bbox = form_bbox(img)
+    total = 0.0
+    # iki tur: eğik fotoğrafta ilk form alanı arka plan içerir, ilk açı kestirimi kaba kalır
+    for _ in range(2):
+        x0, y0, x1, y1 = bbox
+        angle = estimate_skew(adaptive_threshold(stretch_contrast(to_gray(img.crop(bbox)))))
+        if abs(angle) < 0.5:
+            break
+        # payla kırp, döndür, form alanını yeniden bul
+        mx, my = (x1 - x0) // 8, (y1 - y0) // 8
+        img = img.crop((max(0, x0 - mx), max(0, y0 - my), min(img.width, x1 + mx), min(img.height, y1 + my)))
+        img = img.rotate(angle, resample=Image.BILINEAR, fillcolor=(0, 0, 0))
+        bbox = form_bbox(img)
+        total += angle
+    return stretch_contrast(to_gray(img.crop(bbox))), detect_layout(bbox), total
+
+
+def roi_crops(gray: np.ndarray, layout: str) -> Dict[str, Image.Image]:
+    """Düzendeki her alan için eşiklenmiş küçük kırpıntı."""
+    h, w = gray.shape
+    out: Dict[str, Image.Image] = {}
+    for field, (x0, y0, x1, y1) in RUHSAT_LAYOUTS[layout].items():
+        box = gray[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)]
+        if box.size:
+            out[field] = Image.fromarray(adaptive_threshold(box, block=max(15, (box.shape[0] // 2) | 1)), mode='L')
+    return out
+
+
+def _ocr_lines(img: Image.Image, psm: int = 6) -> List[List[Tuple[str, float]]]:
+    """Tesseract kelime çıktısı, satır satır [(kelime, güven 0-100), ...]."""
+    # OCR parametreleri: Türkçe, psm 6 (satır satır okuma) / psm 7 (tek satırlık alan kutusu)
+    data = pytesseract.image_to_data(img, lang='tur', config=f'--psm {psm}', output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], List[Tuple[str, float]]] = {}
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        try:
+            conf = float(data["conf"][i])
+        except (TypeError, ValueError):
+            conf = -1.0
+        lines.setdefault(key, []).append((word, conf))
+    return [lines[k] for k in sorted(lines)]
+
+
+def _parse_text(text: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """OCR metninden alanları çıkarır; (alanlar, desen gücü) döner. Bulunamayan alan dönmez."""
+    result: Dict[str, Any] = {}
+    strength: Dict[str, float] = {}
     lines = text.split('\n')
     # Plaka: ilk 12 satırda, harf ve rakam karışımı, 2 rakam + harf + rakam toleranslı regex
     for l in lines[:12]:
         # Türk plakası: 2 rakam, 1-3 harf, 2-4 rakam (aralarda boşluk olabilir)
-        plaka_match = re.search(r'\b\d{2}\s*[A-ZÇĞİÖŞÜ]{1,3}\s*\d{2,4}\b', l.replace('|','I'))
+        plaka_match = _PLAKA_RE.search(l.replace('|','I'))
         if plaka_match:
             result['plaka_no'] = plaka_match.group(0)
+            strength['plaka_no'] = _PATTERN_STRENGTH['plaka_no']
             break
         # Alternatif: satırda hem rakam hem harf varsa ve uzunluğu 6-10 arasıysa
         words = l.split()
         for word in words:
             if (sum(c.isdigit() for c in word) >= 2 and sum(c.isalpha() for c in word) >= 1 and 6 <= len(word) <= 10):
                 result['plaka_no'] = word
+                strength['plaka_no'] = _PATTERN_STRENGTH['plaka_no_heuristic']
                 break
 
     # Marka: MARKA/MARKASI veya MODELİ satırında ve bir sonraki satırda yaygın marka isimlerini ara
-    marka_list = ['RENAULT', 'FORD', 'FIAT', 'TOYOTA', 'VOLKSWAGEN', 'OPEL', 'PEUGEOT', 'CITROEN', 'HYUNDAI', 'HONDA', 'MERCEDES', 'BMW', 'NISSAN', 'KIA', 'SEAT', 'SKODA', 'DACIA', 'SUZUKI', 'MAZDA', 'MITSUBISHI']
+    # (tek derlenmiş alternasyon regex'i; satır başına liste taraması yok)
     for i, l in enumerate(lines):
         if 'MARKA' in l or 'MODELİ' in l or 'MODELI' in l:
             # Satırda marka var mı bak
-            for marka in marka_list:
-                if marka in l:
-                    result['marka'] = marka
-                    break
+            m = _MARKA_RE.search(l)
+            if m:
+                result['marka'] = m.group(0)
             # Sonraki satırda marka var mı bak
             if i+1 < len(lines):
-                for marka in marka_list:
-                    if marka in lines[i+1]:
-                        result['marka'] = marka
-                        break
+                m = _MARKA_RE.search(lines[i+1])
+                if m:
+                    result['marka'] = m.group(0)
+            if result.get('marka'):
+                strength['marka'] = _PATTERN_STRENGTH['marka']
             break
     # Alternatif: metnin tamamında marka ara
-    if not result['marka']:
-        for marka in marka_list:
-            if marka in text:
-                result['marka'] = marka
-                break
+    if not result.get('marka'):
+        m = _MARKA_RE.search(text)
+        if m:
+            result['marka'] = m.group(0)
+            strength['marka'] = _PATTERN_STRENGTH['marka_anywhere']
 
     # Model yılı: 4 haneli, 1980-2030 arası bir sayı
-    model_match = re.search(r'\b(19\d{2}|20[0-2]\d|2030)\b', text)
+    model_match = _YEAR_RE.search(text)
     if model_match:
         result['model_yili'] = model_match.group(0)
+        strength['model_yili'] = _PATTERN_STRENGTH['model_yili']
 
     # Tescil tarihi: gg.aa.yyyy veya gg/aa/yyyy
-    tescil_match = re.search(r'(\d{2}[./]\d{2}[./]\d{4})', text)
+    tescil_match = _DATE_RE.search(text)
     if tescil_match:
         result['tescil_tarihi'] = tescil_match.group(1)
+        strength['tescil_tarihi'] = _PATTERN_STRENGTH['tescil_tarihi']
 
     # Şasi no: 17 karakterli, harf ve rakam karışık (ör: VF1LB240531754309)
-    sasi_match = re.search(r'\b[A-HJ-NPR-Z0-9]{17}\b', text)
+    sasi_match = _VIN_RE.search(text)
     if sasi_match:
         result['sasi_no'] = sasi_match.group(0)
+        strength['sasi_no'] = _PATTERN_STRENGTH['sasi_no']
+
+    # Motor no: MOTOR NO etiketinden sonra gelen 6-15 karakterli harf/rakam dizisi (tek boşluk olabilir)
+    motor_match = _MOTOR_RE.search(text)
+    if motor_match and 6 <= len(motor_match.group(1).replace(' ', '')) <= 15:
+        result['motor_no'] = motor_match.group(1).upper()
+        strength['motor_no'] = _PATTERN_STRENGTH['motor_no']
+
+    return result, strength
+
+
+def _value_confidence(value: str, lines: List[List[Tuple[str, float]]]) -> float:
+    """Değeri oluşturan kelimelerin en düşük tesseract güveni (0-1); eşleşme yoksa 0.5."""
+    parts = [p for p in re.split(r'\s+', str(value)) if p]
+    confs: List[float] = []
+    for part in parts:
+        best = -1.0
+        for line in lines:
+            for word, conf in line:
+                if part in word and conf > best:
+                    best = conf
+        if best >= 0:
+            confs.append(best)
+    return (min(confs) / 100.0) if confs and len(confs) == len(parts) else 0.5
+
+
+def _parse_field(field: str, text: str) -> Optional[str]:
+    """Tek alan kutusunun metninden değer (kutu zaten alana ait olduğu için etiket aranmaz)."""
+    t = text.replace('|', 'I').strip()
+    if field == "plaka_no":
+        m = _PLAKA_RE.search(t)
+        return m.group(0) if m else None
+    if field == "marka":
+        m = _MARKA_RE.search(t.upper())
+        return m.group(0) if m else None
+    if field == "model_yili":
+        m = _YEAR_RE.search(t)
+        return m.group(0) if m else None
+    if field == "tescil_tarihi":
+        m = _DATE_RE.search(t)
+        return m.group(1) if m else None
+    if field == "sasi_no":
+        m = _VIN_RE.search(t) or _VIN_RE.search(re.sub(r'\s+', '', t))
+        return m.group(0) if m else None
+    if field == "motor_no":
+        rest = re.sub(r'[^A-Z0-9 ]', ' ', _MOTOR_LABEL_RE.sub(' ', t).upper())
+        rest = ' '.join(rest.split())
+        return rest if 6 <= len(rest.replace(' ', '')) <= 15 else None
+    return None
+
+
+def _text_of(lines: List[List[Tuple[str, float]]]) -> str:
+    return "\n".join(" ".join(w for w, _ in line) for line in lines)
+
 
+def _extract_page(img: Image.Image) -> Dict[str, Any]:
+    lines = _ocr_lines(_preprocess(img))
+    text = _text_of(lines)
+    fields, strength = _parse_text(text)
+    confidence = {k: round(_value_confidence(v, lines) * strength.get(k, 0.5), 3) for k, v in fields.items()}
+    return {"fields": fields, "confidence": confidence, "text": text}
+
+
+def _extract_roi(img: Image.Image, workers: int) -> Dict[str, Any]:
+    gray, layout, angle = prepare_form(img)
+    crops = roi_crops(gray, layout)
+    # tesseract ayrı bir süreç: kutular thread havuzunda paralel okunur
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(crops) or 1))) as pool:
+        results = dict(zip(crops, pool.map(lambda c: _ocr_lines(c, psm=7), crops.values())))
+    fields: Dict[str, Any] = {}
+    confidence: Dict[str, float] = {}
+    texts: List[str] = []
+    for field, lines in results.items():
+        text = _text_of(lines)
+        texts.append(f"[{field}] {text}")
+        value = _parse_field(field, text)
+        if value:
+            fields[field] = value
+            # kelime güveni x desen gücü (sayfa yoluyla aynı ölçek)
+            confidence[field] = round(_value_confidence(value, lines) * _ROI_STRENGTH.get(field, 0.5), 3)
+    return {"fields": fields, "confidence": confidence, "text": "\n".join(texts), "layout": layout, "skew": angle}
+
+
+def extract_ruhsat_fields(image_path: str, mode: str = "roi", workers: int = 6) -> Dict[str, Any]:
+    """
+    Ruhsat fotoğrafından yalnızca OCR ile okunan alanları ve alan bazlı güveni döner.
+
+    {"fields": {alan: değer}, "confidence": {alan: 0-1}, "text": ham metin, "mode": "roi"|"page"|"roi+page"}
+    mode="roi": form alanı bulunur, eğim düzeltilir, bilinen düzenin alan kutuları
+    paralel okunur; eksik kalan alanlar için tüm sayfa OCR'ı (psm 6) çalışır.
+    mode="page": yalnızca tüm sayfa OCR'ı.
+    Güven = tesseract kelime güveni x desen gücü (katı regex > sezgisel yakalama).
+    """
+    img = Image.open(image_path)
+    if mode != "roi":
+        return {**_extract_page(img), "mode": "page"}
+    out = {**_extract_roi(img, workers), "mode": "roi"}
+    missing = [k for k in RUHSAT_LAYOUTS[out["layout"]] if k not in out["fields"]]
+    if missing:
+        page = _extract_page(img)
+        for k in missing:
+            if k in page["fields"]:
+                out["fields"][k] = page["fields"][k]
+                out["confidence"][k] = page["confidence"][k]
+        out["text"] += "\n" + page["text"]
+        out["mode"] = "roi+page"
+    return out
+
+
+def extract_ruhsat_info(image_path: str) -> Dict[str, Any]:
+    """
+    Türk araç ruhsatı fotoğrafından temel bilgileri OCR ile çıkarır.
+    """
+    out = extract_ruhsat_fields(image_path)
+    print("OCR ham metin:\n", out["text"])
+
+    result = DEFAULT_OCR_RESULT.copy()
+    result.update(out["fields"])
     return result
 
 if __name__ == "__main__":
@@ -2,7 +2,13 @@
 # Basit birim testi: örnek ruhsat fotoğrafı ile OCR sonucu kontrolü
 import os
 import pytest
-from ocr_agent.ocr_agent import extract_ruhsat_info
+import numpy as np
+from PIL import Image, ImageDraw
+from ocr_agent import ocr_agent as oa
+from ocr_agent.ocr_agent import (extract_ruhsat_info, _parse_text, _parse_field, adaptive_threshold,
+                                 estimate_skew, prepare_form, roi_crops, RUHSAT_LAYOUTS)
+
+_TDSP = os.path.join(os.path.dirname(__file__), '..', 'tdsp', 'ruhsat')
 
 
 def test_extract_ruhsat_info_file(pytestconfig):
@@ -15,5 +21,67 @@ def test_extract_ruhsat_info_file(pytestconfig):
     assert isinstance(result, dict)
     assert any([result.get('plaka_no'), result.get('marka'), result.get('model_yili')])
 
+
+def test_parse_text_fields_and_pattern_strength():
+    text = "T.C.\n34 ABC 123\nMARKASI RENAULT\nMODEL YILI 2019\nTESCİL 12.03.2020\nŞASİ VF1LB240531754309\nMOTOR NO: K9KA123456"
+    fields, strength = _parse_text(text)
+    assert fields == {"plaka_no": "34 ABC 123", "marka": "RENAULT", "model_yili": "2019",
+                      "tescil_tarihi": "12.03.2020", "sasi_no": "VF1LB240531754309", "motor_no": "K9KA123456"}
+    assert strength["sasi_no"] > strength["model_yili"]
+
+
+def _lined_page(angle):
+    img = Image.new('L', (600, 400), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(40, 380, 30):
+        draw.rectangle((40, y, 560, y + 6), fill=0)
+    return img.rotate(angle, resample=Image.BILINEAR, fillcolor=255)
+
+
+def test_adaptive_threshold_and_skew_on_synthetic_lines():
+    straight = np.asarray(_lined_page(0))
+    binary = adaptive_threshold(straight)
+    assert binary.dtype == np.uint8 and set(np.unique(binary)) <= {0, 255}
+    assert binary[43, 300] == 0 and binary[60, 300] == 255  # çizgi mürekkep, arası kağıt
+    assert abs(estimate_skew(binary)) < 0.5
+    for angle in (2.0, -3.0):
+        # düzeltme açısı: img.rotate(estimate) eğimi geri alır
+        assert abs(estimate_skew(adaptive_threshold(np.asarray(_lined_page(angle)))) + angle) <= 0.5
+
+
+def test_parse_field_reads_single_roi():
+    assert _parse_field("plaka_no", "34 ABC 123") == "34 ABC 123"
+    assert _parse_field("model_yili", "2019") == "2019"
+    assert _parse_field("sasi_no", "VF1LB240531754309") == "VF1LB240531754309"
+
+
+def test_roi_confidence_uses_pattern_strength(monkeypatch):
+    boxes = {"sasi_no": "VF1LB240531754309", "motor_no": "K9KA123456"}
+    monkeypatch.setattr(oa, "prepare_form", lambda img: (None, "eski", 0.0))
+    monkeypatch.setattr(oa, "roi_crops", lambda gray, layout: dict(boxes))
+    monkeypatch.setattr(oa, "_ocr_lines", lambda crop, psm=6: [[(crop, 95.0)]])
+    out = oa._extract_roi(None, workers=2)
+    assert out["fields"] == boxes
+    # aynı kelime güveni: kesin desen (VIN) güvenilir, sezgisel motor_no eşiğin altında kalır
+    assert out["confidence"]["sasi_no"] == 0.95 and out["confidence"]["motor_no"] < 0.8
+
+
+@pytest.mark.parametrize("name,layout", [("Ruhsat.jpg", "legacy"), ("sample_ruhsat_modern.jpg", "modern")])
+@pytest.mark.parametrize("angle", [0, -3])
+def test_prepare_form_layout_and_roi_crops(name, layout, angle):
+    path = os.path.join(_TDSP, name)
+    if not os.path.exists(path):
+        pytest.skip(f"{name} yok")
+    img = Image.open(path).convert('RGB')
+    if angle:
+        img = img.rotate(angle, resample=Image.BICUBIC, fillcolor=(90, 70, 50))
+    gray, found, skew = prepare_form(img)
+    assert found == layout
+    assert abs(skew + angle) <= 1.0
+    crops = roi_crops(gray, found)
+    assert set(crops) == set(RUHSAT_LAYOUTS[layout])
+    for crop in crops.values():
+        assert crop.mode == 'L' and crop.width > crop.height > 10
+
 #pytest ocr_agent/test_ocr_agent.py -s --file=sample_ruhsat.jpg
 #pytest ocr_agent/test_ocr_agent.py -s --file=sample_ruhsat_modern.jpg
\ No newline at end of file
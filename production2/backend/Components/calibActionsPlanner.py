@@ -3,10 +3,23 @@ from __future__ import annotations
 """Calibration actions planner.
 
 Turns a dict of fieldSelectors + ruhsat JSON into a sequence of set_value
-actions ordered by executionOrder (when provided).
+actions ordered by executionOrder (when provided). Keys missing at the top
+level of the ruhsat JSON are resolved through webbot_filler's per-document
+value index (nested keys, synonyms, raw_response extraction), without its
+substring fallback: a field the document does not have is skipped rather
+than filled with a look-alike key's value.
 """
 
-from typing import Any, Dict, List, Union
+import sys
+from pathlib import Path as _Path
+from typing import Any, Dict, List, Optional, Union
+
+# Repo root (for webbot); appended so production2's own modules keep precedence
+_REPO = _Path(__file__).resolve().parents[3]
+if str(_REPO) not in sys.path:
+    sys.path.append(str(_REPO))
+
+from webbot.webbot_filler import ValueIndex, value_index  # type: ignore
 
 
 def build_fill_plan(field_selectors: Dict[str, Union[str, List[str]]], ruhsat_json: Dict[str, Any], execution_order: List[str]) -> Dict[str, Any]:
@@ -14,11 +27,15 @@ def build_fill_plan(field_selectors: Dict[str, Union[str, List[str]]], ruhsat_js
     if not order:
         order = list(field_selectors.keys())
     details: List[Dict[str, Any]] = []
+    index: Optional[ValueIndex] = None
     for key in order:
         sel = field_selectors.get(key)
         if not sel:
             continue
         val = ruhsat_json.get(key)
+        if val is None:
+            index = index or value_index(ruhsat_json)
+            val, _ = index.lookup(key, allow_substring=False)
         if val is None:
             continue
         selectors: List[str] = []
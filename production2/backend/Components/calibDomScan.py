@@ -15,13 +15,15 @@ except Exception:  # pragma: no cover - optional dependency
     BeautifulSoup = None  # type: ignore
 
 from .calibSelectorUtils import build_selector
+from . import metrics
 
 
 def _soup(html: str):
     if not BeautifulSoup:
         return None
     try:
-        return BeautifulSoup(html or "", "html.parser")
+        with metrics.stage("parse"):
+            return BeautifulSoup(html or "", "html.parser")
     except Exception:
         return None
 
@@ -8,8 +8,10 @@ draft taking precedence to enable quick iteration before finalizing.
 
 from typing import Any, Dict
 from .calibStorage import load as _load_calib
+from . import tracing
 
 
+@tracing.traced()
 def resolve_site_mapping(host: str, task: str, config: Dict[str, Any]) -> Dict[str, Any]:
     from backend.logging_utils import log  # type: ignore
     
@@ -35,7 +37,8 @@ def resolve_site_mapping(host: str, task: str, config: Dict[str, Any]) -> Dict[s
         "criticalFields": [],
         "synonyms": {},
         "pages": [],          # added
-        "actionsDetail": []    # added (future usage)
+        "actionsDetail": [],   # added (future usage)
+        "typingFields": []     # fields that must be typed char by char (fast fill skips them)
     }
     # merge config then calib (calib wins)
     for k in list(out.keys()):
@@ -50,6 +50,18 @@ def _write_all(data: Dict[str, Any]) -> None:
     _CALIB_FILE.write_text(json.dumps(data or {}, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
+def version() -> str:
+    """Changes whenever calib.json or config.json (finalizeToConfig target) is rewritten."""
+    parts = []
+    for p in (_CALIB_FILE, _ROOT / "config.json"):
+        try:
+            st = p.stat()
+            parts.append(f"{st.st_mtime_ns}.{st.st_size}")
+        except OSError:
+            parts.append("-")
+    return ":".join(parts)
+
+
 def load(host: str, task: str) -> Dict[str, Any]:
     from backend.logging_utils import log  # type: ignore
     
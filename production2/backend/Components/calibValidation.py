@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
+from . import metrics
+
 
 def get_critical_fields(task: str, config: Dict[str, Any], fallback: List[str]) -> List[str]:
     # Try config staticFormMapping first
@@ -13,6 +15,7 @@ def get_critical_fields(task: str, config: Dict[str, Any], fallback: List[str])
     return list(fallback or [])
 
 
+@metrics.timed("validation")
 def validate_mapping(field_selectors: Dict[str, Any], critical_fields: List[str], threshold: float = 0.75) -> Dict[str, Any]:
     crit_set = set(critical_fields or [])
     def _has_mapping(v: Any) -> bool:
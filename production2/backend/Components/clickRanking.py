@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+"""clickRanking
+
+Learned ordering of click candidates from observed outcomes.
+
+FindHomePage / goUserPage / openSideMenu hand the UI a static list of
+selectors that it tries one by one until the page changes. The UI reports
+which selector it clicked together with the change-detection call; the
+outcome is stored per (scope, host, structural page signature) and later
+plans for the same kind of page are re-ordered so the selector that worked
+last time is tried first.
+
+- scope separates flows ("findHomePage", "openSideMenu", "goUserPage:<task>").
+- signature is diffInteractiveRegions.structural_signature of the page the
+  click happened on, so typed values / text churn do not split the stats.
+- A host-wide bucket ("*") is kept as well; it breaks ties when the exact
+  page signature has never been seen (e.g. a banner added a region).
+- Scores decay exponentially (halfLifeHours): a change adds 1, a click with
+  no change subtracts missPenalty. Unknown selectors keep their static order;
+  learned winners that are not in the static list are prepended.
+
+State is a small JSON file (tmp/clickRanking.json), written behind:
+record() only marks the data dirty, and a daemon thread rewrites the file
+atomically at most every flushIntervalMs (and on close()).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import math
+import os
+import threading
+import time
+
+from .calibStorage import host_from_url
+from .diffInteractiveRegions import structural_signature
+
+try:
+    from logging_utils import log  # type: ignore
+except Exception:  # pragma: no cover - imported outside the backend dir
+    def log(*args: Any, **kwargs: Any) -> None:
+        pass
+
+ANY_PAGE = "*"
+# diffInteractiveRegions kinds that count as "the click worked"; value_change / no_change
+# (CSRF tokens, timestamps, carousels re-rendering) are misses
+EFFECTIVE_CHANGE_KINDS = ("navigation", "structure_change")
+
+
+def click_changed_page(result: Any) -> bool:
+    """Ranking outcome of a structural change check (detect_web_page_change(..., structural=True))."""
+    details = getattr(result, "details", None) or {}
+    return details.get("kind") in EFFECTIVE_CHANGE_KINDS
+
+
+def page_key(url: Optional[str], html: Optional[str]) -> Tuple[str, str]:
+    """(host, structural signature) of the page a click is planned/made on."""
+    return host_from_url(url), structural_signature(html or "")
+
+
+class ClickRanker:
+    """Decayed success scores per (scope, host, signature) -> selector."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        half_life_s: float = 7 * 24 * 3600.0,
+        miss_penalty: float = 0.25,
+        max_selectors: int = 50,
+        max_keys: int = 2000,
+        enabled: bool = True,
+        flush_interval_s: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.half_life_s = max(1.0, float(half_life_s))
+        self.miss_penalty = max(0.0, float(miss_penalty))
+        self.max_selectors = max(1, int(max_selectors))
+        self.max_keys = max(1, int(max_keys))
+        self.enabled = enabled
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # one file writer at a time (worker, flush(), close())
+        self._dirty = False
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        # "scope|host|signature" -> {selector: {"score", "wins", "misses", "ts"}}
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = self._load()
+        self._stats = {"ranked": 0, "reordered": 0, "recorded": 0, "writes": 0, "writeErrors": 0}
+
+    # --- persistence --------------------------------------------------
+    def _load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            log("WARN", "RANK-LOAD", f"ignoring unreadable ranking file: {e}", component="ClickRanking")
+            return {}
+
+    def flush(self) -> bool:
+        """Write pending outcomes now; False when the write failed (retried on the next flush)."""
+        if not self.path:
+            return True
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                payload = json.dumps(self._data, ensure_ascii=False)
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                    self._stats["writeErrors"] += 1
+                log("WARN", "RANK-SAVE", f"ranking not persisted: {e}", component="ClickRanking")
+                return False
+            with self._lock:
+                self._stats["writes"] += 1
+            return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the background writer and write what is still pending."""
+        self._stop.set()
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            writer.join(timeout)
+        self._writer = None
+        self.flush()
+
+    def _ensure_writer(self) -> None:
+        if not self.path or self._stop.is_set() or (self._writer is not None and self._writer.is_alive()):
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run_writer, name="click-ranking-writer", daemon=True)
+                self._writer.start()
+
+    def _run_writer(self) -> None:
+        while not self._stop.wait(self.flush_interval_s):
+            self.flush()
+
+    # --- scoring ------------------------------------------------------
+    def _decayed(self, entry: Dict[str, Any], now: float) -> float:
+        age = max(0.0, now - float(entry.get("ts", now)))
+        return float(entry.get("score", 0.0)) * math.pow(0.5, age / self.half_life_s)
+
+    def _scores(self, key: str, now: float) -> Dict[str, float]:
+        return {sel: self._decayed(e, now) for sel, e in (self._data.get(key) or {}).items()}
+
+    def scores(self, scope: str, host: str, signature: str) -> Dict[str, float]:
+        """Current (decayed) scores for one page; mainly for debugging/tests."""
+        with self._lock:
+            return self._scores(f"{scope}|{host}|{signature}", time.time())
+
+    def rank(
+        self,
+        scope: str,
+        url: Optional[str],
+        html: Optional[str],
+        selectors: List[str],
+        include_learned: bool = True,
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """Re-order selectors by learned success; returns (ordered, info).
+
+        Ties (including never-seen selectors) keep their static order, so with
+        no history the result equals the input.
+        """
+        host, signature = page_key(url, html)
+        info: Dict[str, Any] = {"host": host, "signature": signature[:16], "learned": 0, "reordered": False}
+        if not self.enabled:
+            return list(selectors), info
+        now = time.time()
+        with self._lock:
+            exact = self._scores(f"{scope}|{host}|{signature}", now)
+            wide = self._scores(f"{scope}|{host}|{ANY_PAGE}", now)
+            self._stats["ranked"] += 1
+        if not exact and not wide:
+            return list(selectors), info
+        ordered = list(dict.fromkeys(selectors))
+        if include_learned:
+            # winners found earlier (e.g. via the LLM fallback) that static mapping does not produce
+            known = set(ordered)
+            extra = [s for s, v in sorted(exact.items(), key=lambda kv: -kv[1]) if v > 0 and s not in known]
+            ordered = extra + ordered
+            info["learned"] = len(extra)
+        pos = {s: i for i, s in enumerate(ordered)}
+        ordered.sort(key=lambda s: (-(exact.get(s, 0.0) + 0.5 * wide.get(s, 0.0)), pos[s]))
+        info["reordered"] = ordered != list(dict.fromkeys(selectors))
+        info["top"] = ordered[0] if ordered else None
+        if info["reordered"]:
+            with self._lock:
+                self._stats["reordered"] += 1
+        return ordered, info
+
+    def record(
+        self,
+        scope: str,
+        url: Optional[str],
+        html: Optional[str],
+        selector: Optional[str],
+        changed: bool,
+    ) -> Optional[Dict[str, Any]]:
+        """Store the outcome of clicking selector on the page (url, html)."""
+        sel = (selector or "").strip()
+        if not self.enabled or not sel:
+            return None
+        host, signature = page_key(url, html)
+        now = time.time()
+        delta = 1.0 if changed else -self.miss_penalty
+        with self._lock:
+            for sig in (signature, ANY_PAGE):
+                bucket = self._data.setdefault(f"{scope}|{host}|{sig}", {})
+                entry = bucket.get(sel) or {"score": 0.0, "wins": 0, "misses": 0}
+                entry["score"] = round(self._decayed(entry, now) + delta, 4)
+                entry["wins" if changed else "misses"] = int(entry.get("wins" if changed else "misses", 0)) + 1
+                entry["ts"] = now
+                bucket[sel] = entry
+                if len(bucket) > self.max_selectors:
+                    keep = sorted(bucket, key=lambda s: -abs(self._decayed(bucket[s], now)))[: self.max_selectors]
+                    self._data[f"{scope}|{host}|{sig}"] = {s: bucket[s] for s in keep}
+            if len(self._data) > self.max_keys:
+                # drop the least recently touched pages
+                newest = {k: max((e.get("ts", 0) for e in v.values()), default=0) for k, v in self._data.items()}
+                for k in sorted(newest, key=newest.get)[: len(self._data) - self.max_keys]:
+                    self._data.pop(k, None)
+            self._stats["recorded"] += 1
+            self._dirty = True
+        self._ensure_writer()
+        log("INFO", "RANK-REC", f"{scope} {sel} changed={changed}", component="ClickRanking",
+            extra={"host": host, "signature": signature[:16]})
+        return {"host": host, "signature": signature[:16], "selector": sel, "changed": changed}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "pages": len(self._data), "pendingWrite": self._dirty, "enabled": self.enabled}
@@ -13,10 +13,21 @@ Updated logic:
 			 - pdf_links / pdf_embeds lists for diagnostics
 
 We still return legacy keys (is_final, hits, weak) for backward compatibility.
+
+Single pass: one precompiled tokenizer walks the markup once. CTA synonyms
+are matched only against visible text nodes and label-like attribute values
+(value, aria-label, title, alt); script/style/template bodies and hidden
+subtrees are skipped. PDF evidence is read from href/src/data/type
+attributes. Only the collected text is case/accent folded, never the whole
+raw page, and synonyms are folded once up front.
 """
 
-from typing import Any, Dict, List
+from html import unescape
+from typing import Any, Dict, List, Optional, Tuple
 import re
+import unicodedata
+
+from . import tracing
 
 FINAL_CTA_SYNONYMS: List[str] = [
     "Poliçeyi Aktifleştir",
@@ -27,10 +38,34 @@ FINAL_CTA_SYNONYMS: List[str] = [
     "Satın Al",
 ]
 
+# Comments | skipped raw-text elements | start tag | end tag | text run | stray '<'
+_TOKEN_RE = re.compile(
+	r"<!--.*?-->"
+	r"|<(script|style|noscript|template)\b[^>]*>.*?</\1\s*>"
+	r"|<([a-zA-Z][\w:-]*)([^>]*)>"
+	r"|</([a-zA-Z][\w:-]*)[^>]*>"
+	r"|([^<]+)"
+	r"|<",
+	re.S | re.I,
+)
+_ATTR_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?""")
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+_PDF_HREF_RE = re.compile(r"[^\"']+\.pdf(?:\?[^\"']*)?", re.I)
+_WEAK_CLASS_RE = re.compile(r"bg-green-600|btn-primary|btn-success|success|primary", re.I)
+_LABEL_ATTR_RE = re.compile(r"""(?:value|aria-label|title|alt)\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.I)
+_COMBINING_RE = re.compile("[\u0300-\u036f]+")
+
+_VOID_TAGS = frozenset({
+	"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+	"meta", "param", "source", "track", "wbr",
+})
+_EMBED_TAGS = frozenset({"iframe", "embed", "object"})
+# Cheap substring prefilter before parsing a tag's attributes
+_ATTR_HINTS = ("hidden", "none", "pdf", "success", "primary", "bg-green-600")
+
 
 def _normalize(s: str) -> str:
 	try:
-		import unicodedata
 		s = unicodedata.normalize("NFKD", s)
 		s = "".join(ch for ch in s if not unicodedata.combining(ch))
 	except Exception:
@@ -38,6 +73,108 @@ def _normalize(s: str) -> str:
 	return s.lower().strip()
 
 
+_FOLDED_SYNONYMS: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+
+
+def _fold(s: str) -> str:
+	# _normalize with whitespace collapsed; the regex strip of combining marks stays in C
+	if not s.isascii():
+		s = _COMBINING_RE.sub("", unicodedata.normalize("NFKD", s))
+	return " ".join(s.lower().split())
+
+
+def _folded_synonyms() -> List[Tuple[str, str]]:
+	key = tuple(FINAL_CTA_SYNONYMS)
+	pairs = _FOLDED_SYNONYMS.get(key)
+	if pairs is None:
+		pairs = [(term, " ".join(_normalize(term).split())) for term in key]
+		_FOLDED_SYNONYMS.clear()
+		_FOLDED_SYNONYMS[key] = pairs
+	return pairs
+
+
+def _parse_attrs(raw: str) -> Dict[str, str]:
+	attrs: Dict[str, str] = {}
+	for m in _ATTR_RE.finditer(raw):
+		name = m.group(1).lower()
+		if name not in attrs:
+			val = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+			attrs[name] = val or ""
+	return attrs
+
+
+def _is_hidden(tag: str, attrs: Dict[str, str]) -> bool:
+	if "hidden" in attrs or attrs.get("aria-hidden", "").lower() == "true":
+		return True
+	if tag == "input" and attrs.get("type", "").lower() == "hidden":
+		return True
+	style = attrs.get("style")
+	return bool(style and _HIDDEN_STYLE_RE.search(style))
+
+
+def scan_final_page_signals(html: str) -> Dict[str, Any]:
+	"""One pass over the markup collecting visible text/attributes and PDF evidence."""
+	visible: List[str] = []
+	pdf_links: List[str] = []
+	data_pdf: List[str] = []
+	pdf_embeds: List[str] = []
+	weak = False
+	hidden_tag: Optional[str] = None  # root tag of the hidden subtree being skipped
+	hidden_depth = 0
+
+	for m in _TOKEN_RE.finditer(html):
+		text = m.group(5)
+		if text is not None:
+			if not hidden_depth:
+				visible.append(text)
+			continue
+		tag = m.group(2)
+		if tag is None:
+			end = m.group(4)
+			if hidden_depth and end is not None and end.lower() == hidden_tag:
+				hidden_depth -= 1
+			continue
+		tag = tag.lower()
+		raw = m.group(3)
+		if hidden_depth:
+			if tag == hidden_tag and tag not in _VOID_TAGS and not raw.endswith("/"):
+				hidden_depth += 1
+		low_raw = raw.lower()
+		if not any(h in low_raw for h in _ATTR_HINTS):
+			if not hidden_depth and "=" in raw:
+				visible.extend(a or b for a, b in _LABEL_ATTR_RE.findall(raw))
+			continue
+		attrs = _parse_attrs(raw)
+		href = attrs.get("href")
+		if href:
+			if _PDF_HREF_RE.fullmatch(href):
+				pdf_links.append(href)
+			elif href[:20].lower() == "data:application/pdf" and len(href) > 20:
+				data_pdf.append(href)
+		if tag in _EMBED_TAGS:
+			src = attrs.get("src") or (attrs.get("data") if tag == "object" else "") or ""
+			if attrs.get("type", "").lower() == "application/pdf" or ".pdf" in src.lower():
+				pdf_embeds.append(m.group(0))
+		if hidden_depth:
+			continue
+		if _is_hidden(tag, attrs):
+			if tag not in _VOID_TAGS and not raw.endswith("/"):
+				hidden_tag, hidden_depth = tag, 1
+			continue
+		if not weak and _WEAK_CLASS_RE.search(attrs.get("class", "")):
+			weak = True
+		visible.extend(attrs.get(k, "") for k in ("value", "aria-label", "title", "alt"))
+
+	text = " ".join(visible)
+	return {
+		"text": _fold(unescape(text) if "&" in text else text),
+		"pdf_links": pdf_links,
+		"pdf_embeds": pdf_embeds + data_pdf,
+		"weak": weak,
+	}
+
+
+@tracing.traced()
 def detect_final_page_arrived(html: str) -> Dict[str, Any]:
 	"""Return structured detection result.
 
@@ -47,34 +184,23 @@ def detect_final_page_arrived(html: str) -> Dict[str, Any]:
 	if not isinstance(html, str) or not html:
 		return {"is_final": False, "reason": "no_html", "cta_present": False, "pdf_found": False}
 
-	low = _normalize(html)
-	hits: List[str] = []
-	for term in FINAL_CTA_SYNONYMS:
-		t = _normalize(term)
-		if t and t in low:
-			hits.append(term)
+	sig = scan_final_page_signals(html)
+	text = sig["text"]
+	hits: List[str] = [term for term, folded in _folded_synonyms() if folded and folded in text]
 	cta_present = bool(hits)
 
-	# PDF evidence heuristics
-	pdf_links = re.findall(r'href=["\']([^"\']+\.pdf(?:\?[^"\']*)?)["\']', html, flags=re.IGNORECASE)
-	data_pdf = re.findall(r'href=["\'](data:application/pdf[^"\']+)["\']', html, flags=re.IGNORECASE)
-	pdf_iframes = re.findall(r'<(?:iframe|embed|object)[^>]+(?:type=["\']application/pdf["\']|src=["\'][^"\']+\.pdf)', html, flags=re.IGNORECASE)
-
-	pdf_found = bool(pdf_links or data_pdf or pdf_iframes)
-
-	# Additionally detect common CTA classes/colors as weak signal
-	weak = False
-	if re.search(r"bg-green-600|btn-primary|btn-success|class=\".*(success|primary).*\"", html, flags=re.IGNORECASE):
-		weak = True
+	pdf_links = sig["pdf_links"]
+	pdf_embeds = sig["pdf_embeds"]
+	pdf_found = bool(pdf_links or pdf_embeds)
 
 	return {
 		"is_final": pdf_found,        # strict final condition now
 		"hits": hits,                 # CTA text hits
 		"cta_present": cta_present,
-		"weak": weak,
+		"weak": sig["weak"],          # CTA-like button classes (bg-green-600, btn-primary, ...)
 		"pdf_found": pdf_found,
 		"pdf_links": pdf_links,
-		"pdf_embeds": pdf_iframes + data_pdf,
+		"pdf_embeds": pdf_embeds,
 		"reason": "pdf_detected" if pdf_found else ("cta_only" if cta_present else "no_final_signals"),
 	}
 
@@ -82,4 +208,3 @@ def detect_final_page_arrived(html: str) -> Dict[str, Any]:
 if __name__ == "__main__":
 	demo = '<button class="px-8 py-3 bg-green-600 text-white">Poliçeyi Aktifleştir</button>'
 	print(detect_final_page_arrived(demo))
-
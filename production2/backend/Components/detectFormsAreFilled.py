@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional, Tuple
 
+from . import tracing
+
 
 def _is_truthy_text(v: Any) -> bool:
     try:
@@ -42,6 +44,7 @@ def _value_from_after(after: Dict[str, Any]) -> Tuple[bool, Any]:
     return (_is_truthy_text(v), v)
 
 
+@tracing.traced()
 def detect_forms_filled(
     details: Optional[List[Dict[str, Any]]] = None,
     html: Optional[str] = None,
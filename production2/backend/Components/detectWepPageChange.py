@@ -4,13 +4,14 @@ from __future__ import annotations
 
 Compares previous vs current page using:
 - hash (sha256 of raw HTML)
-- strict string compare (raw HTML)
-- optional normalized comparison (collapse whitespace)
+- optional structural diff of interactive regions (diffInteractiveRegions),
+  which tells navigation apart from value-only changes
 
 Relies on production2/memory.py for last captures when prev/current not provided.
 """
 
 from typing import Optional, Dict, Any
+from dataclasses import asdict
 import hashlib
 import sys
 from pathlib import Path as _Path
@@ -23,26 +24,30 @@ if str(_root) not in sys.path:
 	sys.path.insert(0, str(_root))
 
 from memory import PageChangeResult, PageChangeRequest  # type: ignore  # noqa: E402
+from .diffInteractiveRegions import diff_interactive_regions  # noqa: E402
+from . import tracing  # noqa: E402
 
 
 def _sha256(s: str) -> str:
 	return hashlib.sha256((s or "").encode("utf-8")).hexdigest()
 
 
-def _normalize_spaces(s: str) -> str:
-	# Collapse redundant whitespace to compare semantically-same HTML markup
-	return " ".join((s or "").split())
-
-
+@tracing.traced()
 def detect_web_page_change(
 	current_raw_html: Optional[str] = None,
 	prev_raw_html: Optional[str] = None,
 	use_normalized_compare: bool = True,
+	structural: bool = False,
 ) -> PageChangeResult:
 	"""Detect if the page changed using raw HTML (stateless).
 
 	Provide current_raw_html and prev_raw_html explicitly. No global memory fallback.
 	Returns a PageChangeResult dataclass defined in memory.py.
+
+	Equal hashes imply equal strings, so no extra full-page copies are compared;
+	use_normalized_compare is kept for call-site compatibility.
+	With structural=True a changed page also carries details.regions (added /
+	removed / modified interactive regions) and details.kind.
 	"""
 	if current_raw_html is None or prev_raw_html is None:
 		return PageChangeResult(
@@ -57,36 +62,29 @@ def detect_web_page_change(
 	before_hash = _sha256(prev_raw_html)
 	after_hash = _sha256(current_raw_html)
 
-	if before_hash != after_hash:
+	if before_hash == after_hash:
 		return PageChangeResult(
-			changed=True,
-			reason="hash_changed",
-			before_hash=before_hash,
-			after_hash=after_hash,
-		)
-
-	if current_raw_html != prev_raw_html:
-		return PageChangeResult(
-			changed=True,
-			reason="raw_string_changed",
+			changed=False,
+			reason="no_change",
 			before_hash=before_hash,
 			after_hash=after_hash,
+			details={"kind": "no_change"} if structural else None,
 		)
 
-	if use_normalized_compare:
-		if _normalize_spaces(current_raw_html) != _normalize_spaces(prev_raw_html):
-			return PageChangeResult(
-				changed=True,
-				reason="normalized_changed",
-				before_hash=before_hash,
-				after_hash=after_hash,
-			)
+	details: Optional[Dict[str, Any]] = None
+	if structural:
+		try:
+			diff = diff_interactive_regions(prev_raw_html, current_raw_html)
+			details = {"kind": diff.kind, "regions": asdict(diff)}
+		except Exception as e:
+			details = {"kind": "unknown", "error": f"region_diff_failed: {e}"}
 
 	return PageChangeResult(
-		changed=False,
-		reason="no_change",
+		changed=True,
+		reason="hash_changed",
 		before_hash=before_hash,
 		after_hash=after_hash,
+		details=details,
 	)
 
 
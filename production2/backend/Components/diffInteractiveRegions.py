@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+"""Structural diff of interactive page regions.
+
+Splits a raw HTML snapshot into interactive regions (forms, fieldsets,
+dialogs and a catch-all "page" region for standalone controls) in a single
+html.parser pass, then compares two snapshots region by region:
+
+- added / removed regions (e.g. a new form step rendered)
+- modified regions, split into structure changes (controls added/removed)
+  and value-only changes (user typed / filler set a value)
+
+The overall kind lets callers tell "navigation happened" apart from
+"a value was typed" without re-running the full page analysis.
+"""
+
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import sys
+from pathlib import Path as _Path
+
+_this = _Path(__file__).resolve()
+_root = _this.parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from memory import DomDiffResult, RegionChange  # type: ignore  # noqa: E402
+from . import tracing  # noqa: E402
+
+
+_CONTROL_TAGS = {"input", "select", "textarea", "button"}
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+_SKIP_TAGS = {"script", "style", "noscript", "template"}
+_REGION_ROLES = {"form", "dialog", "region", "tabpanel"}
+_PAGE_REGION = "page"
+
+
+def _sha256(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+class _RegionParser(HTMLParser):
+    """Collects controls per region; tolerant of unclosed/malformed markup."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.regions: Dict[str, List[Dict[str, Any]]] = {}
+        self.title = ""
+        # Element stack of (tag, region_key or None)
+        self._stack: List[Tuple[str, Optional[str]]] = []
+        self._region_seq: Dict[str, int] = {}
+        self._skip_depth = 0
+        self._in_title = False
+        self._select: Optional[Dict[str, Any]] = None
+        self._option: Optional[Dict[str, Any]] = None
+        self._text_target: Optional[Dict[str, Any]] = None
+
+    # ---- helpers ----
+    def _current_region(self) -> str:
+        for _tag, key in reversed(self._stack):
+            if key:
+                return key
+        return _PAGE_REGION
+
+    def _region_key(self, tag: str, attrs: Dict[str, str]) -> Optional[str]:
+        role = (attrs.get("role") or "").lower()
+        if tag == "form":
+            ident = attrs.get("id") or attrs.get("name") or attrs.get("action")
+        elif tag in ("fieldset", "dialog") or role in _REGION_ROLES:
+            ident = attrs.get("id") or attrs.get("name") or attrs.get("aria-label")
+            if not ident and tag != "fieldset" and tag != "dialog":
+                return None
+        else:
+            return None
+        base = f"{tag}#{ident}" if ident else tag
+        n = self._region_seq.get(base, 0)
+        self._region_seq[base] = n + 1
+        return base if n == 0 else f"{base}:{n}"
+
+    def _add_control(self, ctl: Dict[str, Any]) -> None:
+        self.regions.setdefault(self._current_region(), []).append(ctl)
+
+    # ---- HTMLParser hooks ----
+    def handle_starttag(self, tag: str, attrs_list: List[Tuple[str, Optional[str]]]) -> None:
+        if self._skip_depth:
+            if tag in _SKIP_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_depth = 1
+            return
+        attrs = {k: (v or "") for k, v in attrs_list}
+        if tag == "title":
+            self._in_title = True
+        if tag == "option" and self._select is not None:
+            self._option = {"value": attrs.get("value"), "text": "", "selected": "selected" in attrs}
+            self._text_target = self._option
+            return
+        if tag in _CONTROL_TAGS:
+            typ = (attrs.get("type") or ("submit" if tag == "button" else "text" if tag == "input" else "")).lower()
+            ctl: Dict[str, Any] = {
+                "tag": tag,
+                "type": typ,
+                "key": attrs.get("id") or attrs.get("name") or "",
+                "value": "",
+                "label": attrs.get("aria-label") or attrs.get("placeholder") or "",
+            }
+            if tag == "input":
+                val = attrs.get("value", "")
+                if typ in ("checkbox", "radio"):
+                    val = f"{val}|{'checked' in attrs}"
+                ctl["value"] = val
+            self._add_control(ctl)
+            if tag == "select":
+                ctl["_options"] = []
+                self._select = ctl
+            elif tag in ("textarea", "button"):
+                ctl["_text"] = ""
+                self._text_target = ctl
+        if tag in _VOID_TAGS:
+            return
+        self._stack.append((tag, self._region_key(tag, attrs)))
+
+    def handle_startendtag(self, tag: str, attrs_list: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs_list)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_depth:
+            if tag in _SKIP_TAGS:
+                self._skip_depth -= 1
+            return
+        if tag == "title":
+            self._in_title = False
+        if tag == "option" and self._option is not None and self._select is not None:
+            self._select["_options"].append(self._option)
+            self._option = None
+            self._text_target = None
+            return
+        if tag == "select" and self._select is not None:
+            opts = self._select.pop("_options", [])
+            chosen = next((o for o in opts if o["selected"]), opts[0] if opts else None)
+            if chosen is not None:
+                self._select["value"] = chosen["value"] if chosen["value"] is not None else chosen["text"].strip()
+            self._select["options"] = len(opts)
+            self._select = None
+        if tag in ("textarea", "button") and self._text_target is not None:
+            txt = " ".join(self._text_target.pop("_text", "").split())
+            if tag == "textarea":
+                self._text_target["value"] = txt
+            else:
+                self._text_target["label"] = self._text_target["label"] or txt
+            self._text_target = None
+        # Pop up to the most recent matching open tag (ignore stray end tags)
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        tgt = self._text_target
+        if tgt is not None:
+            if "_text" in tgt:
+                tgt["_text"] += data
+            elif "text" in tgt:
+                tgt["text"] += data
+
+
+def _control_ids(controls: List[Dict[str, Any]]) -> List[str]:
+    # id/name when present; else tag[type](label), numbered only on duplicates
+    ids: List[str] = []
+    seen: Dict[str, int] = {}
+    for c in controls:
+        base = c["key"] or f"{c['tag']}[{c['type']}]" + (f"({c['label']})" if c["label"] else "")
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        ids.append(base if n == 0 else f"{base}#{n}")
+    return ids
+
+
+def _summarize(controls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ids = _control_ids(controls)
+    shape = "|".join(f"{i}:{c['tag']}:{c['type']}:{c['label']}:{c.get('options', '')}" for i, c in zip(ids, controls))
+    return {
+        "structure": _sha256(shape),
+        "controls": dict(zip(ids, (c["value"] for c in controls))),
+        "shape": dict(zip(ids, (f"{c['tag']}:{c['type']}" for c in controls))),
+    }
+
+
+def extract_interactive_regions(html: Optional[str]) -> Dict[str, Any]:
+    """Return { title, regions: { key -> { structure, controls, shape } } }."""
+    parser = _RegionParser()
+    try:
+        parser.feed(html or "")
+        parser.close()
+    except Exception:
+        pass
+    regions = {k: _summarize(v) for k, v in parser.regions.items() if v}
+    return {"title": " ".join(parser.title.split()), "regions": regions}
+
+
+def structural_signature(html: Optional[str] = None, extracted: Optional[Dict[str, Any]] = None) -> str:
+    """Hash of region layout and control shapes, ignoring control values.
+
+    Two snapshots of the same form step share a signature even after typing.
+    """
+    ex = extracted if extracted is not None else extract_interactive_regions(html)
+    parts = [ex.get("title", "")]
+    for key in sorted(ex.get("regions", {})):
+        parts.append(f"{key}={ex['regions'][key]['structure']}")
+    return _sha256("\n".join(parts))
+
+
+@tracing.traced()
+def diff_interactive_regions(prev_html: Optional[str], current_html: Optional[str]) -> DomDiffResult:
+    """Compare two raw HTML snapshots region by region.
+
+    kind:
+      - no_change: identical interactive regions (only text/styling differs, if anything)
+      - value_change: same structure, only control values differ
+      - structure_change: some regions added/removed/restructured, others kept
+      - navigation: title changed or no region survived unchanged
+    """
+    before = extract_interactive_regions(prev_html)
+    after = extract_interactive_regions(current_html)
+    b_regions = before["regions"]
+    a_regions = after["regions"]
+
+    added = [k for k in a_regions if k not in b_regions]
+    removed = [k for k in b_regions if k not in a_regions]
+    modified: List[RegionChange] = []
+    kept = 0
+    for key, a in a_regions.items():
+        b = b_regions.get(key)
+        if b is None:
+            continue
+        if b["structure"] != a["structure"]:
+            modified.append(RegionChange(
+                region=key,
+                change="structure",
+                controls_added=[c for c in a["shape"] if c not in b["shape"]],
+                controls_removed=[c for c in b["shape"] if c not in a["shape"]],
+            ))
+            continue
+        kept += 1
+        changed = [c for c, v in a["controls"].items() if b["controls"].get(c) != v]
+        if changed:
+            modified.append(RegionChange(region=key, change="values", controls_changed=changed))
+
+    title_changed = bool(before["title"] or after["title"]) and before["title"] != after["title"]
+    structural = added or removed or any(m.change == "structure" for m in modified)
+    if title_changed or (structural and kept == 0):
+        kind = "navigation"
+    elif structural:
+        kind = "structure_change"
+    elif modified:
+        kind = "value_change"
+    else:
+        kind = "no_change"
+
+    return DomDiffResult(
+        kind=kind,
+        added=added,
+        removed=removed,
+        modified=modified,
+        before_signature=structural_signature(extracted=before),
+        after_signature=structural_signature(extracted=after),
+        title_changed=title_changed,
+    )
+
+
+if __name__ == "__main__":
+    a = '<form id="f"><input name="plaka" value=""><button>Devam</button></form>'
+    b = '<form id="f"><input name="plaka" value="06ABC123"><button>Devam</button></form>'
+    print(diff_interactive_regions(a, b))
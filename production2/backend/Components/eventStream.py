@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+"""eventStream
+
+Push channel for the UI: log records, step results and page-change events
+(GET /api/events as Server-Sent Events, /api/ws/events as WebSocket).
+
+Producers (log(), _record_step, PageChangeHub.publish) run on arbitrary
+threads and call EventBus.publish(), which never blocks: each subscriber
+owns a bounded deque. When a client cannot keep up, the oldest events are
+dropped and the next delivered batch starts with a {"type": "dropped",
+"count": n} marker so the client can resync (e.g. GET /api/logs?since=seq).
+The consumer side is an asyncio coroutine per client, woken with
+loop.call_soon_threadsafe; a slow client therefore costs memory bounded by
+maxQueue, not a thread or a blocked producer.
+"""
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+TOPICS = ("log", "step", "page")
+
+
+class Subscriber:
+    """One connected client: topic filter + bounded queue + wakeup."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, topics: Iterable[str], max_queue: int,
+                 session_id: Optional[str] = None) -> None:
+        self.loop = loop
+        self.topics: Set[str] = {t for t in topics if t in TOPICS} or set(TOPICS)
+        self.session_id = session_id
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.max_queue = max(1, int(max_queue))
+        self.dropped = 0
+        self.dropped_total = 0
+        self.sent = 0
+        self._wake = asyncio.Event()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        if event["type"] not in self.topics:
+            return False
+        # session filter applies to session-scoped events only (steps, pages); logs are global
+        sid = event.get("session_id")
+        return not (self.session_id and sid and sid != self.session_id)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self.queue) >= self.max_queue:
+                self.queue.popleft()
+                self.dropped += 1
+                self.dropped_total += 1
+            self.queue.append(event)
+        try:
+            self.loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:  # loop closed: client is gone
+            self.closed = True
+
+    async def next_batch(self, timeout_s: float, max_batch: int = 100) -> List[Dict[str, Any]]:
+        """Wait up to timeout_s for events; [] means idle (send a heartbeat)."""
+        if not self.queue:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout_s)
+            except asyncio.TimeoutError:
+                return []
+        with self._lock:
+            batch = [self.queue.popleft() for _ in range(min(max_batch, len(self.queue)))]
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            batch.insert(0, {"type": "dropped", "count": dropped, "ts": time.time()})
+        self.sent += len(batch)
+        return batch
+
+
+class EventBus:
+    """Fan-out of events to subscribers; publish() is thread-safe and non-blocking."""
+
+    def __init__(self, max_queue: int = 500, max_clients: int = 32) -> None:
+        self.max_queue = max_queue
+        self.max_clients = max_clients
+        self._subs: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stats = {"published": 0, "rejected": 0}
+
+    def subscribe(self, topics: Iterable[str], session_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Register the calling coroutine's client; None when maxClients is reached."""
+        sub = Subscriber(asyncio.get_running_loop(), topics, self.max_queue, session_id)
+        with self._lock:
+            self._subs = [s for s in self._subs if not s.closed]
+            if len(self._subs) >= self.max_clients:
+                self._stats["rejected"] += 1
+                return None
+            self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        sub.closed = True
+        with self._lock:
+            self._subs = [s for s in self._subs if s is not sub]
+
+    def publish(self, type_: str, data: Dict[str, Any], session_id: Optional[str] = None) -> None:
+        with self._lock:
+            subs = list(self._subs)
+            self._stats["published"] += 1
+        if not subs:
+            return
+        event = {"id": next(self._ids), "type": type_, "ts": time.time(), "data": data}
+        if session_id:
+            event["session_id"] = session_id
+        for s in subs:
+            if not s.closed and s.wants(event):
+                s.offer(event)
+
+    def listener(self, type_: str, session_key: Optional[str] = None) -> Callable[[Dict[str, Any]], None]:
+        """Callback for producers that emit plain dicts (logging_utils, PageChangeHub)."""
+        def _emit(data: Dict[str, Any]) -> None:
+            self.publish(type_, data, session_id=data.get(session_key) if session_key else None)
+        return _emit
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subs = list(self._subs)
+            return {**self._stats, "clients": len(subs),
+                    "queued": sum(len(s.queue) for s in subs),
+                    "dropped": sum(s.dropped_total for s in subs)}
+
+
+async def pump_ws(websocket: Any, sub: Subscriber, heartbeat_s: float) -> None:
+    """Send sub's batches (or heartbeats) over a WebSocket until the client disconnects.
+
+    The socket is read concurrently so a closed client is noticed immediately;
+    client messages are ignored.
+    """
+    recv = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            nxt = asyncio.ensure_future(sub.next_batch(heartbeat_s))
+            await asyncio.wait({recv, nxt}, return_when=asyncio.FIRST_COMPLETED)
+            if recv.done() and recv.result().get("type") == "websocket.disconnect":
+                nxt.cancel()
+                return
+            if nxt.done():
+                # both may be done: next_batch already popped these events, so send before re-arming recv
+                await websocket.send_json(nxt.result() or [{"type": "heartbeat", "ts": time.time()}])
+            else:
+                nxt.cancel()  # nothing popped yet (cancelled while waiting for the wakeup)
+            if recv.done():
+                recv = asyncio.ensure_future(websocket.receive())
+    finally:
+        recv.cancel()
+
+
+def sse_format(event: Dict[str, Any]) -> str:
+    """One SSE frame: `id` (when present), `event` = type, `data` = JSON."""
+    head = f"id: {event['id']}\n" if "id" in event else ""
+    return f"{head}event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+
+def step_summary(flow: str, op: Optional[str], res: Any, latency_ms: float,
+                 session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Small, UI-facing view of a step result (the full result stays in /api/runs)."""
+    out: Dict[str, Any] = {"flow": flow, "op": op, "latency_ms": round(latency_ms, 1), "session_id": session_id}
+    if isinstance(res, dict):
+        out["ok"] = res.get("ok")
+        for k in ("state", "next", "planType", "action", "error", "changed"):
+            if k in res:
+                out[k] = res[k]
+        det = res.get("checkHtmlIfChanged")
+        if isinstance(det, dict):
+            out["changed"] = det.get("changed")
+    return out
+
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+"""extractRuhsatEngines
+
+Local OCR and the vision LLM racing on the same ruhsat image.
+
+- OCR (ocr_agent, tesseract) starts immediately; its fields are published
+  as a partial result (extraction_progress) as soon as they are read.
+- The vision call starts after a short head start (visionHeadStartMs). If OCR
+  has already read every critical field with confidence >= minConfidence the
+  call is skipped (no spend); if it is already in flight its result is
+  abandoned and the merge returns at OCR time.
+- Otherwise both results are merged per field by confidence: OCR confidence
+  comes from tesseract word confidences x pattern strength, vision fields get
+  a flat visionConfidence; values both engines agree on are boosted.
+
+Engines are injected (ocr_fn / vision_fn) so readInputConvertJson can pass
+its configured vision call and tests can pass fakes.
+"""
+
+from collections import OrderedDict
+from pathlib import Path as _Path
+from typing import Any, Callable, Dict, List, Optional
+import contextvars
+import re
+import sys
+import threading
+import time
+
+# Repo root (for ocr_agent); appended so production2's own modules keep precedence
+_REPO = _Path(__file__).resolve().parents[3]
+if str(_REPO) not in sys.path:
+    sys.path.append(str(_REPO))
+
+try:
+    from logging_utils import log  # type: ignore
+except Exception:  # pragma: no cover - imported outside the backend dir
+    def log(*args: Any, **kwargs: Any) -> None:
+        pass
+
+from . import tracing  # noqa: E402
+
+DEFAULT_CRITICAL = ["plaka_no", "sasi_no", "model_yili", "motor_no"]
+
+# image path -> state, oldest first; bounded so a long-running server keeps only recent images
+_PROGRESS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PROGRESS_MAX = 64
+_PROGRESS_LOCK = threading.Lock()
+
+
+def ocr_extract(image_path: str) -> Optional[Dict[str, Any]]:
+    """ocr_agent fields + per-field confidence, or None when tesseract is unavailable/fails."""
+    try:
+        from ocr_agent.ocr_agent import extract_ruhsat_fields  # type: ignore
+    except Exception as e:  # pytesseract / PIL not installed
+        log("WARN", "F3-INGEST", f"ocr engine unavailable: {e}", component="F3")
+        return None
+    try:
+        return extract_ruhsat_fields(image_path)
+    except Exception as e:  # tesseract binary missing, unreadable image, ...
+        log("WARN", "F3-INGEST", f"ocr failed: {e}", component="F3", extra={"path": image_path})
+        return None
+
+
+def _norm(v: Any) -> str:
+    return re.sub(r"[\s\-./]+", "", str(v or "")).upper()
+
+
+def _present(v: Any) -> bool:
+    return v is not None and str(v).strip() != ""
+
+
+def confident_fields(ocr: Optional[Dict[str, Any]], critical: List[str], min_confidence: float) -> bool:
+    """True when OCR read every critical field with confidence >= min_confidence."""
+    if not ocr:
+        return False
+    fields = ocr.get("fields") or {}
+    conf = ocr.get("confidence") or {}
+    return all(_present(fields.get(k)) and float(conf.get(k, 0.0)) >= min_confidence for k in critical)
+
+
+def merge_extractions(
+    ocr: Optional[Dict[str, Any]],
+    vision: Optional[Dict[str, Any]],
+    vision_confidence: float = 0.85,
+    agree_bonus: float = 0.1,
+) -> Dict[str, Any]:
+    """Per-field merge: the higher-confidence value wins; agreeing values get a bonus.
+
+    Returns {"data": {...}, "confidence": {...}, "sources": {field: "ocr"|"vision"|"ocr+vision"}}.
+    Vision keys OCR never reads (ad_soyad, adres, ...) are passed through.
+    """
+    o_fields = (ocr or {}).get("fields") or {}
+    o_conf = (ocr or {}).get("confidence") or {}
+    v_fields = vision or {}
+    data: Dict[str, Any] = {}
+    confidence: Dict[str, float] = {}
+    sources: Dict[str, str] = {}
+    for k in list(dict.fromkeys(list(v_fields.keys()) + list(o_fields.keys()))):
+        ov, vv = o_fields.get(k), v_fields.get(k)
+        oc = float(o_conf.get(k, 0.0)) if _present(ov) else -1.0
+        vc = vision_confidence if _present(vv) else -1.0
+        if oc < 0 and vc < 0:
+            data[k] = vv if k in v_fields else ov
+            continue
+        if oc >= 0 and vc >= 0 and _norm(ov) == _norm(vv):
+            data[k], confidence[k], sources[k] = vv, round(min(1.0, max(oc, vc) + agree_bonus), 3), "ocr+vision"
+        elif oc > vc:
+            data[k], confidence[k], sources[k] = ov, round(oc, 3), "ocr"
+        else:
+            data[k], confidence[k], sources[k] = vv, round(vc, 3), "vision"
+    return {"data": data, "confidence": confidence, "sources": sources}
+
+
+def _publish(image_path: str, **state: Any) -> None:
+    with _PROGRESS_LOCK:
+        cur = _PROGRESS.setdefault(image_path, {"path": image_path, "started_at": time.time()})
+        cur.update(state)
+        _PROGRESS.move_to_end(image_path)
+        while len(_PROGRESS) > _PROGRESS_MAX:
+            _PROGRESS.popitem(last=False)
+
+
+def extraction_progress(image_path: Optional[str] = None) -> Dict[str, Any]:
+    """Latest (or given image's) extraction state: stage, partial OCR fields, engine status."""
+    with _PROGRESS_LOCK:
+        if image_path:
+            return dict(_PROGRESS.get(image_path) or {})
+        if not _PROGRESS:
+            return {}
+        return dict(max(_PROGRESS.values(), key=lambda s: s.get("started_at", 0)))
+
+
+@tracing.traced()
+def extract_ruhsat_race(
+    image_path: str,
+    vision_fn: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+    ocr_fn: Callable[[str], Optional[Dict[str, Any]]] = ocr_extract,
+    critical_fields: Optional[List[str]] = None,
+    min_confidence: float = 0.8,
+    vision_head_start_ms: int = 800,
+    vision_confidence: float = 0.85,
+    vision_timeout_s: float = 60.0,
+    on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Race OCR and vision for one image.
+
+    Returns {"ok", "data", "confidence", "sources", "confident", "engines": {ocr, vision, *_ms}}
+    where engines.vision is "used" | "skipped" | "cancelled" | "failed" | "disabled" and
+    confident tells whether OCR read every critical field with >= min_confidence.
+    """
+    critical = list(critical_fields or DEFAULT_CRITICAL)
+    t0 = time.perf_counter()
+    ocr_done = threading.Event()
+    stop_vision = threading.Event()
+    box: Dict[str, Any] = {"vision_state": "disabled" if vision_fn is None else "pending"}
+    vision_done = threading.Event()
+    # guards stop_vision + box["vision_state"]: the vision thread checks the stop flag and moves to
+    # "running" atomically, so a call that goes out is never reported as "skipped"
+    state_lock = threading.Lock()
+    with _PROGRESS_LOCK:
+        _PROGRESS.pop(image_path, None)
+    _publish(image_path, stage="running", engines={"ocr": "running", "vision": box["vision_state"]})
+
+    def _vision() -> None:
+        # head start: give OCR the chance to make the call unnecessary
+        ocr_done.wait(max(0, vision_head_start_ms) / 1000.0)
+        with state_lock:
+            if stop_vision.is_set():
+                box["vision_state"] = "skipped"
+                vision_done.set()
+                return
+            box["vision_state"] = "running"
+            box["vision_started_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        try:
+            with tracing.span("ruhsat.vision"):
+                res = vision_fn(image_path) if vision_fn else None
+        except Exception as e:
+            log("WARN", "F3-INGEST", f"vision engine failed: {e}", component="F3")
+            res = None
+        box["vision"] = res if isinstance(res, dict) else None
+        box["vision_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        with state_lock:
+            if box["vision_state"] == "running":
+                box["vision_state"] = "used" if box["vision"] else "failed"
+        vision_done.set()
+
+    vt: Optional[threading.Thread] = None
+    if vision_fn is not None:
+        # copy_context: the vision span joins the request trace from its own thread
+        vt = threading.Thread(target=contextvars.copy_context().run, args=(_vision,), name="ruhsat-vision", daemon=True)
+        vt.start()
+
+    with tracing.span("ruhsat.ocr"):
+        ocr = ocr_fn(image_path)
+    ocr_ms = round((time.perf_counter() - t0) * 1000, 1)
+    confident = confident_fields(ocr, critical, min_confidence)
+    if confident:
+        with state_lock:
+            stop_vision.set()
+    ocr_done.set()
+    if ocr and on_partial:
+        try:
+            on_partial({"fields": ocr.get("fields") or {}, "confidence": ocr.get("confidence") or {}, "confident": confident})
+        except Exception:
+            pass
+    _publish(image_path, stage="ocr_done", ocr_ms=ocr_ms, partial=(ocr or {}).get("fields") or {},
+             partial_confidence=(ocr or {}).get("confidence") or {}, confident=confident,
+             engines={"ocr": "done" if ocr else "failed", "vision": box["vision_state"]})
+
+    vision: Optional[Dict[str, Any]] = None
+    if vt is not None:
+        if confident:
+            # vision either never starts (skipped) or its in-flight result is dropped
+            vision_done.wait(0.05)
+            with state_lock:
+                if box["vision_state"] == "pending":  # stop flag is set; the thread will not call
+                    box["vision_state"] = "skipped"
+                elif box["vision_state"] == "running":
+                    box["vision_state"] = "cancelled"
+        else:
+            vision_done.wait(vision_timeout_s)
+            with state_lock:
+                if not vision_done.is_set():
+                    box["vision_state"] = "cancelled"
+            vision = box.get("vision")
+
+    merged = merge_extractions(ocr if ocr else None, vision, vision_confidence=vision_confidence)
+    engines = {
+        "ocr": "done" if ocr else "failed",
+        "vision": box["vision_state"],
+        "ocr_ms": ocr_ms,
+        "total_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    for k in ("vision_started_ms", "vision_ms"):
+        if k in box:
+            engines[k] = box[k]
+    ok = bool(merged["data"])
+    _publish(image_path, stage="done", engines=engines, confidence=merged["confidence"], sources=merged["sources"])
+    log("INFO", "F3-INGEST", f"engines ocr={engines['ocr']} vision={engines['vision']} total_ms={engines['total_ms']}",
+        component="F3", extra={"sources": merged["sources"]})
+    return {"ok": ok, **merged, "confident": confident, "engines": engines}
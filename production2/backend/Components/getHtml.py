@@ -9,6 +9,8 @@ import shutil
 import sys
 import json
 from pathlib import Path as _Path
+from collections import OrderedDict
+from threading import Lock
 
 
 @dataclass
@@ -32,6 +34,7 @@ if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
 from memory import RawHtmlResult, FilteredHtmlResult, HtmlCaptureResult  # type: ignore  # noqa: E402
+from . import metrics  # noqa: E402
 
 
 def _project_root() -> Path:
@@ -60,7 +63,40 @@ def get_Html(raw_html: Optional[str]) -> RawHtmlResult:
     """
     return RawHtmlResult(html=(raw_html or "").strip())
 
-def filter_Html(raw_html: Optional[str]) -> FilteredHtmlResult:
+# Fingerprint-keyed cache: the UI re-sends the same page many times per step
+# (plan, detect, LLM fallback), so identical snapshots skip the BeautifulSoup pass.
+_FILTER_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_FILTER_CACHE_MAX = 16
+_FILTER_LOCK = Lock()
+
+
+def filter_Html(raw_html: Optional[str], fingerprint: Optional[str] = None) -> FilteredHtmlResult:
+    """Cached front of _filter_Html keyed by the raw HTML fingerprint.
+
+    Pass fingerprint when already known (e.g. from the snapshot store) to skip hashing.
+    """
+    if not raw_html:
+        return FilteredHtmlResult(html="")
+    fp = fingerprint or _fingerprint(raw_html)
+    with _FILTER_LOCK:
+        hit = _FILTER_CACHE.get(fp)
+        if hit is not None:
+            _FILTER_CACHE.move_to_end(fp)
+    metrics.cache_lookup("filterHtml", hit is not None)
+    if hit is not None:
+        return FilteredHtmlResult(html=hit)
+    with metrics.stage("filter"):
+        res = _filter_Html(raw_html)
+    metrics.observe_page_size("raw", len(raw_html.encode("utf-8")))
+    metrics.observe_page_size("filtered", len(res.html.encode("utf-8")))
+    with _FILTER_LOCK:
+        _FILTER_CACHE[fp] = res.html
+        while len(_FILTER_CACHE) > _FILTER_CACHE_MAX:
+            _FILTER_CACHE.popitem(last=False)
+    return res
+
+
+def _filter_Html(raw_html: Optional[str]) -> FilteredHtmlResult:
     """Filter raw HTML and keep only interactive elements relevant for automation.
 
     Keeps a compact subset of the page:
@@ -108,7 +144,8 @@ def filter_Html(raw_html: Optional[str]) -> FilteredHtmlResult:
         body.append("</body></html>")
         return FilteredHtmlResult(html="\n".join(body))
 
-    soup = BeautifulSoup((raw_html or ""), "html.parser")
+    with metrics.stage("parse"):
+        soup = BeautifulSoup((raw_html or ""), "html.parser")
 
     # Remove known noise elements (e.g., builder badges/overlays)
     try:
@@ -355,7 +392,8 @@ def get_save_Html(
     }
 
     out_path = out_dir / f"{prefix}{use_name}.json"
-    out_path.write_text(json.dumps(json_data, indent=2, ensure_ascii=False), encoding="utf-8")
+    with metrics.stage("artifact_write"):
+        out_path.write_text(json.dumps(json_data, indent=2, ensure_ascii=False), encoding="utf-8")
 
     result = HtmlCaptureResult(html_path=str(out_path), fingerprint=fp, timestamp=ts, name=use_name)
     return result
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+"""htmlSnapshotStore
+
+Per-session snapshot store behind the delta HTML upload protocol.
+
+The UI may send a page in one of four shapes (all keyed by the sha256
+fingerprint of the UTF-8 HTML, same as getHtml._fingerprint):
+
+- full:        { html }                                  (legacy, always accepted)
+- compressed:  { html_b64, html_encoding: gzip|zstd, html_fp? }
+- delta:       { html_base_fp, html_delta: [[op, arg], ...], html_fp }
+               op '=' copies arg chars from the base, '-' skips arg chars,
+               '+' inserts the arg string
+- unchanged:   { html_fp }                               (page not changed since fp)
+
+The backend keeps the last few snapshots per session so it can rebuild the
+HTML, and a small derived-data slot per snapshot so callers can skip
+re-parsing when the fingerprint matches. Unknown fingerprints raise
+SnapshotMissError; the UI then resends the full body.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional
+import base64
+import hashlib
+import sys
+from pathlib import Path as _Path
+
+_this = _Path(__file__).resolve()
+_root = _this.parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from config import get_api_compression  # type: ignore  # noqa: E402
+from memory import HtmlUploadResult  # type: ignore  # noqa: E402
+from .wireCompression import decompress_body  # noqa: E402
+
+
+class SnapshotMissError(LookupError):
+    """Referenced base/unchanged fingerprint is not (or no longer) stored."""
+
+    def __init__(self, fingerprint: str) -> None:
+        super().__init__(fingerprint)
+        self.fingerprint = fingerprint
+
+
+def _fingerprint(html: str) -> str:
+    return hashlib.sha256((html or "").encode("utf-8")).hexdigest()
+
+
+class HtmlSnapshotStore:
+    """Bounded in-RAM snapshot store: LRU over sessions, last N snapshots each."""
+
+    def __init__(self, max_sessions: int = 16, per_session: int = 3) -> None:
+        self.max_sessions = max_sessions
+        self.per_session = per_session
+        self._lock = Lock()
+        # session_id -> OrderedDict[fp -> {"html": str, "derived": dict}]
+        self._sessions: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+
+    def _session(self, session_id: str) -> "OrderedDict[str, Dict[str, Any]]":
+        snaps = self._sessions.get(session_id)
+        if snaps is None:
+            snaps = OrderedDict()
+            self._sessions[session_id] = snaps
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return snaps
+
+    def put(self, session_id: str, html: str, fingerprint: Optional[str] = None) -> str:
+        fp = fingerprint or _fingerprint(html)
+        with self._lock:
+            snaps = self._session(session_id)
+            if fp in snaps:
+                snaps.move_to_end(fp)
+            else:
+                snaps[fp] = {"html": html, "derived": {}}
+                while len(snaps) > self.per_session:
+                    snaps.popitem(last=False)
+        return fp
+
+    def _touch(self, session_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        # Reads count as use: a base fingerprint re-sent on every poll must not age out
+        snaps = self._sessions.get(session_id)
+        if snaps is None or fingerprint not in snaps:
+            return None
+        self._sessions.move_to_end(session_id)
+        snaps.move_to_end(fingerprint)
+        return snaps[fingerprint]
+
+    def get(self, session_id: str, fingerprint: str) -> Optional[str]:
+        with self._lock:
+            snap = self._touch(session_id, fingerprint)
+            return snap["html"] if snap else None
+
+    def derived(self, session_id: str, fingerprint: str) -> Dict[str, Any]:
+        """Mutable per-snapshot cache for parse/analysis results (empty if unknown)."""
+        with self._lock:
+            snap = self._touch(session_id, fingerprint)
+            return snap["derived"] if snap else {}
+
+    def clear(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+
+# Global singleton (one per backend process)
+snapshot_store = HtmlSnapshotStore()
+
+
+def decode_html_body(html_b64: str, encoding: Optional[str], max_size: Optional[int] = None) -> str:
+    """Decode a base64 body compressed with gzip/zstd (or 'identity').
+
+    The decoded size is capped like request bodies (api.compression.maxRequestBytes).
+    """
+    raw = base64.b64decode(html_b64)
+    limit = int(get_api_compression("maxRequestBytes", 64 * 1024 * 1024) or 0) if max_size is None else max_size
+    try:
+        raw = decompress_body(raw, encoding or "identity", limit)
+    except OverflowError:
+        raise ValueError("html_too_large")
+    except LookupError as e:  # zstd_unavailable / unsupported_encoding
+        raise ValueError(str(e))
+    if limit > 0 and len(raw) > limit:
+        raise ValueError("html_too_large")
+    return raw.decode("utf-8")
+
+
+def apply_html_delta(base: str, ops: List[Any]) -> str:
+    """Apply [[op, arg], ...] copy/skip/insert ops to the base snapshot."""
+    out: List[str] = []
+    pos = 0
+    for item in ops or []:
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            raise ValueError(f"bad_delta_op: {item!r}")
+        op, arg = item
+        if op == "=":
+            n = int(arg)
+            if n < 0 or pos + n > len(base):
+                raise ValueError("delta_out_of_range")
+            out.append(base[pos:pos + n])
+            pos += n
+        elif op == "-":
+            n = int(arg)
+            if n < 0 or pos + n > len(base):
+                raise ValueError("delta_out_of_range")
+            pos += n
+        elif op == "+":
+            out.append(str(arg))
+        else:
+            raise ValueError(f"bad_delta_op: {op!r}")
+    # Anything not explicitly skipped after the last op is kept
+    out.append(base[pos:])
+    return "".join(out)
+
+
+def resolve_html_upload(
+    session_id: Optional[str],
+    html: Optional[str] = None,
+    html_fp: Optional[str] = None,
+    html_base_fp: Optional[str] = None,
+    html_delta: Optional[List[Any]] = None,
+    html_encoding: Optional[str] = None,
+    html_b64: Optional[str] = None,
+    store: Optional[HtmlSnapshotStore] = None,
+) -> Optional[HtmlUploadResult]:
+    """Rebuild the page HTML from any supported upload shape and remember it.
+
+    Returns None when the request carries no HTML at all (caller decides).
+    Raises SnapshotMissError for unknown fingerprints (or a rebuilt page whose
+    fingerprint does not match html_fp) and ValueError for malformed bodies.
+    """
+    st = store or snapshot_store
+    sid = session_id or "default"
+
+    if html is not None:
+        source = "full"
+        text = html
+    elif html_b64:
+        source = "compressed"
+        text = decode_html_body(html_b64, html_encoding)
+    elif html_base_fp and html_delta is not None:
+        base = st.get(sid, html_base_fp)
+        if base is None:
+            raise SnapshotMissError(html_base_fp)
+        source = "delta"
+        text = apply_html_delta(base, html_delta)
+    elif html_fp:
+        text = st.get(sid, html_fp)
+        if text is None:
+            raise SnapshotMissError(html_fp)
+        st.put(sid, text, html_fp)
+        return HtmlUploadResult(html=text, fingerprint=html_fp, source="unchanged", unchanged=True)
+    else:
+        return None
+
+    fp = _fingerprint(text)
+    if html_fp and source != "full" and fp != html_fp:
+        # Client/server disagree (e.g. UTF-16 offsets); force a full resend
+        raise SnapshotMissError(html_fp)
+    unchanged = st.get(sid, fp) is not None
+    st.put(sid, text, fp)
+    return HtmlUploadResult(html=text, fingerprint=fp, source=source, unchanged=unchanged)
+
+
+def resolve_html_ref(session_id: Optional[str], html: Optional[str], html_fp: Optional[str], store: Optional[HtmlSnapshotStore] = None) -> Optional[str]:
+    """Resolve a secondary snapshot (prev/current) given inline or by fingerprint."""
+    st = store or snapshot_store
+    sid = session_id or "default"
+    if html is not None:
+        st.put(sid, html)
+        return html
+    if not html_fp:
+        return None
+    text = st.get(sid, html_fp)
+    if text is None:
+        raise SnapshotMissError(html_fp)
+    return text
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+"""jobQueue
+
+Durable SQLite work queue for the (document, host, task) fan-out: every
+ruhsat document has to be filled on several insurer portals, and each
+triple is an independent unit of work.
+
+States: queued -> leased -> done | queued (retry) | dead (dead letter).
+
+- enqueue() is idempotent per (document, host, task) while the job is not
+  done/dead; enqueue_fanout() crosses documents x hosts.
+- lease() atomically claims queued jobs (BEGIN IMMEDIATE) for lease_s
+  seconds; a lease that expires (crashed worker) makes the job claimable
+  again and counts as an attempt.
+- fail() requeues with exponential backoff until max_attempts, then moves
+  the job to dead; requeue() revives dead jobs.
+- stats() reports per-state counts, jobs/minute over a sliding window and
+  average run time.
+
+WAL + one connection per thread, like memory/db.py, so several worker
+threads (or processes) can share the file.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import sqlite3
+import threading
+import time
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_jobs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  document TEXT NOT NULL,
+  host TEXT NOT NULL,
+  task TEXT NOT NULL,
+  state TEXT NOT NULL DEFAULT 'queued',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 3,
+  not_before REAL NOT NULL DEFAULT 0,
+  lease_owner TEXT,
+  lease_expires REAL,
+  payload_json TEXT,
+  result_json TEXT,
+  last_error TEXT,
+  created_at REAL NOT NULL,
+  started_at REAL,
+  finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_work_jobs_ready ON work_jobs(state, not_before);
+CREATE INDEX IF NOT EXISTS idx_work_jobs_finished ON work_jobs(state, finished_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_work_jobs_active
+  ON work_jobs(document, host, task) WHERE state IN ('queued', 'leased');
+"""
+
+
+@dataclass
+class WorkJob:
+    id: int
+    document: str
+    host: str
+    task: str
+    attempts: int
+    max_attempts: int
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class JobQueue:
+    def __init__(self, db_path: str, backoff_s: float = 5.0, max_backoff_s: float = 300.0) -> None:
+        self.db_path = db_path
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE for leases)
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for c in conns:
+            try:
+                c.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+    # --- producer -------------------------------------------------------
+    def enqueue(self, document: str, host: str, task: str, payload: Optional[Dict[str, Any]] = None, max_attempts: int = 3) -> Optional[int]:
+        """Queue one job; returns its id, or None if the same triple is already queued/leased."""
+        cur = self._conn().execute(
+            "INSERT OR IGNORE INTO work_jobs (document, host, task, max_attempts, payload_json, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (document, host, task, max(1, int(max_attempts)), json.dumps(payload or {}, ensure_ascii=False), time.time()),
+        )
+        return cur.lastrowid if cur.rowcount else None
+
+    def enqueue_fanout(
+        self,
+        documents: Iterable[str],
+        hosts: Iterable[str],
+        task: str,
+        payload: Optional[Dict[str, Any]] = None,
+        max_attempts: int = 3,
+        document_payloads: Optional[Dict[str, Dict[str, Any]]] = None,
+        host_payloads: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[int]:
+        """One job per (document, host); each payload is payload + document_payloads[d] + host_payloads[h]."""
+        hosts = list(hosts)
+        docs_extra = document_payloads or {}
+        hosts_extra = host_payloads or {}
+        rows = [
+            (d, h, task, max(1, int(max_attempts)),
+             json.dumps({**(payload or {}), **docs_extra.get(d, {}), **hosts_extra.get(h, {})}, ensure_ascii=False), time.time())
+            for d in documents for h in hosts
+        ]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids: List[int] = []
+            for row in rows:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO work_jobs (document, host, task, max_attempts, payload_json, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                if cur.rowcount:
+                    ids.append(cur.lastrowid)
+            conn.execute("COMMIT")
+            return ids
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- worker ---------------------------------------------------------
+    def lease(self, worker_id: str, lease_s: float = 120.0, limit: int = 1) -> List[WorkJob]:
+        """Claim up to limit ready jobs (queued, or leased with an expired lease)."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # expired leases that used up their attempts go to the dead letter state
+            conn.execute(
+                "UPDATE work_jobs SET state = ?, lease_owner = NULL, finished_at = ?, last_error = COALESCE(last_error, 'lease expired') "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (DEAD, now, LEASED, now),
+            )
+            rows = conn.execute(
+                "SELECT * FROM work_jobs WHERE (state = ? AND not_before <= ?) OR (state = ? AND lease_expires < ?) ORDER BY id LIMIT ?",
+                (QUEUED, now, LEASED, now, max(1, int(limit))),
+            ).fetchall()
+            expires = now + lease_s
+            conn.executemany(
+                "UPDATE work_jobs SET state = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                [(LEASED, worker_id, expires, now, r["id"]) for r in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            WorkJob(
+                id=r["id"], document=r["document"], host=r["host"], task=r["task"],
+                attempts=r["attempts"] + 1, max_attempts=r["max_attempts"],
+                lease_owner=worker_id, lease_expires=expires,
+                payload=json.loads(r["payload_json"] or "{}"),
+            )
+            for r in rows
+        ]
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_s: float = 120.0) -> bool:
+        """Extend the lease; False when the job is no longer leased by this worker."""
+        cur = self._conn().execute(
+            "UPDATE work_jobs SET lease_expires = ? WHERE id = ? AND state = ? AND lease_owner = ?",
+            (time.time() + lease_s, job_id, LEASED, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        cur = self._conn().execute(
+            "UPDATE work_jobs SET state = ?, result_json = ?, lease_owner = NULL, lease_expires = NULL, finished_at = ?, last_error = NULL "
+            "WHERE id = ? AND state = ? AND lease_owner = ?",
+            (DONE, json.dumps(result or {}, ensure_ascii=False, default=str), time.time(), job_id, LEASED, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retryable: bool = True) -> Optional[str]:
+        """Record a failed attempt; returns the new state (queued/dead) or None if the lease was lost."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM work_jobs WHERE id = ? AND state = ? AND lease_owner = ?",
+                (job_id, LEASED, worker_id),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if retryable and row["attempts"] < row["max_attempts"]:
+                delay = min(self.max_backoff_s, self.backoff_s * (2 ** (row["attempts"] - 1)))
+                conn.execute(
+                    "UPDATE work_jobs SET state = ?, not_before = ?, lease_owner = NULL, lease_expires = NULL, last_error = ? WHERE id = ?",
+                    (QUEUED, now + delay, str(error)[:2000], job_id),
+                )
+                state = QUEUED
+            else:
+                conn.execute(
+                    "UPDATE work_jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, last_error = ?, finished_at = ? WHERE id = ?",
+                    (DEAD, str(error)[:2000], now, job_id),
+                )
+                state = DEAD
+            conn.execute("COMMIT")
+            return state
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- admin / metrics ------------------------------------------------
+    def requeue(self, job_id: int, reset_attempts: bool = True) -> bool:
+        """Move a dead job back to queued (the same triple must not be active already)."""
+        try:
+            cur = self._conn().execute(
+                "UPDATE work_jobs SET state = ?, not_before = 0, finished_at = NULL, attempts = CASE WHEN ? THEN 0 ELSE attempts END "
+                "WHERE id = ? AND state = ?",
+                (QUEUED, 1 if reset_attempts else 0, job_id, DEAD),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        return cur.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM work_jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_dict(row) if row else None
+
+    def list_jobs(self, state: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        if state:
+            rows = self._conn().execute("SELECT * FROM work_jobs WHERE state = ? ORDER BY id DESC LIMIT ?", (state, int(limit))).fetchall()
+        else:
+            rows = self._conn().execute("SELECT * FROM work_jobs ORDER BY id DESC LIMIT ?", (int(limit),)).fetchall()
+        return [_row_dict(r) for r in rows]
+
+    def stats(self, window_s: float = 300.0) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._conn()
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        for r in conn.execute("SELECT state, COUNT(*) AS n FROM work_jobs GROUP BY state"):
+            counts[r["state"]] = r["n"]
+        recent = conn.execute(
+            "SELECT COUNT(*) AS n, AVG(finished_at - started_at) AS avg_s, MIN(finished_at) AS first FROM work_jobs WHERE state = ? AND finished_at >= ?",
+            (DONE, now - window_s),
+        ).fetchone()
+        total = conn.execute(
+            "SELECT MIN(started_at) AS first, MAX(finished_at) AS last, COUNT(*) AS n FROM work_jobs WHERE state = ?", (DONE,)
+        ).fetchone()
+        span = (total["last"] - total["first"]) if total["n"] and total["last"] and total["first"] else 0.0
+        return {
+            "counts": counts,
+            "window_s": window_s,
+            "done_in_window": recent["n"],
+            "jobs_per_min": round(recent["n"] * 60.0 / window_s, 2),
+            # done jobs / time between the first lease and the last completion
+            "jobs_per_min_overall": round(total["n"] * 60.0 / span, 2) if span > 0 else None,
+            "avg_job_s": round(recent["avg_s"], 3) if recent["avg_s"] is not None else None,
+        }
+
+
+def _row_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    out = dict(row)
+    for k in ("payload_json", "result_json"):
+        v = out.pop(k, None)
+        out[k[:-5]] = json.loads(v) if v else None
+    return out
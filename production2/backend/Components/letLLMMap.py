@@ -6,6 +6,7 @@ from datetime import datetime
 import shutil
 import sys
 import os
+import time
 
 # Ensure production2 is importable
 _this = _Path(__file__).resolve()
@@ -19,9 +20,13 @@ from config import (  # type: ignore
 )
 from logging_utils import log
 from Components.fillPageFromMapping import fill_and_go  # type: ignore
+from Components import llmReplay  # type: ignore
+from Components import metrics  # type: ignore
+from Components import tracing  # type: ignore
 import re as _re
 
 
+@tracing.traced()
 def def_let_llm_map(
     filtered_html: str,
     mapping: Any,
@@ -93,6 +98,7 @@ def def_let_llm_map(
     # Will be populated only if an LLM call is made
     llm_raw_path = prompts_dir / f"llm_response_attempt{attempt}_{ts}.txt"
     llm_parsed_path = prompts_dir / f"llm_parsed_attempt{attempt}_{ts}.json"
+    t_write = time.perf_counter()
     try:
         default_path.write_text(default_prompt, encoding="utf-8")
     except Exception:
@@ -123,6 +129,7 @@ def def_let_llm_map(
         meta_path.write_text(_json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
     except Exception:
         pass
+    metrics.observe_stage("artifact_write", time.perf_counter() - t_write)
 
     msg = f"attempt {attempt+1}/{max_attempts} fb_len={len(fb)} prompt_len={len(composed_prompt)}"
     log("INFO", "LLM-SAVED", msg, component="letLLMMap", extra={
@@ -162,14 +169,16 @@ def def_let_llm_map(
                         _fb_tried_set.add(m.group(1).strip())
     except Exception:
         pass
-    key = os.getenv("OPENAI_API_KEY")
+    key = llmReplay.api_key()
     model = os.getenv("LLM_MODEL", "gpt-4o")
     if key:
+        t_llm = time.perf_counter()
+        llm_recorded = False
         try:
             # Import lazily to avoid test/runtime import issues when key is absent
+            resp = None
             try:
-                from openai import OpenAI  # type: ignore
-                client = OpenAI(api_key=key)
+                client = llmReplay.openai_client(key)
                 messages = [
                     {"role": "system", "content": "You will return ONLY strict JSON with the requested schema. No prose."},
                     {"role": "user", "content": composed_prompt},
@@ -196,6 +205,8 @@ def def_let_llm_map(
                     temperature=0.0,
                     max_tokens=256,
                 ).choices[0].message.content.strip()
+            metrics.record_llm_call(model, "F1", time.perf_counter() - t_llm, resp=resp, ok=bool(content))
+            llm_recorded = True
 
             # Try to parse JSON strictly; if it fails, attempt to strip code fences or extract a JSON object.
             parsed: Optional[Dict[str, Any]] = None
@@ -237,6 +248,7 @@ def def_let_llm_map(
                 log("INFO", "LLM-CLEAN", "stripped fences/extras to parse JSON", component="letLLMMap", extra={"llm": True})
             content_to_save = raw_content
             # Persist raw and parsed responses for analysis
+            t_write = time.perf_counter()
             try:
                 if content_to_save:
                     llm_raw_path.write_text(content_to_save, encoding="utf-8")
@@ -248,6 +260,7 @@ def def_let_llm_map(
                     llm_parsed_path.write_text(_json.dumps(parsed, indent=2, ensure_ascii=False), encoding="utf-8")
             except Exception:
                 pass
+            metrics.observe_stage("artifact_write", time.perf_counter() - t_write)
             if parsed and isinstance(parsed, dict):
                 # Normalize suggestion
                 st = str(parsed.get("selectorType") or parsed.get("type") or "").lower()
@@ -314,6 +327,8 @@ def def_let_llm_map(
             log("INFO", "LLM-RESP", f"ok content_len={len(content)}", component="letLLMMap", extra={"llm": True})
         except Exception as e:
             log("ERROR", "LLM-ERR", f"{type(e).__name__}: {str(e)[:160]}", component="letLLMMap", extra={"llm": True})
+            if not llm_recorded:
+                metrics.record_llm_call(model, "F1", time.perf_counter() - t_llm, ok=False)
 
     # Build saved paths dict (include LLM response paths if present on disk)
     saved_paths = {
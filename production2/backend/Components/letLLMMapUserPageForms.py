@@ -12,10 +12,12 @@ Returns a dict suitable to be embedded in a feature plan.
 """
 
 from pathlib import Path as _Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+from dataclasses import asdict
 import os
 import json
 import re
+import time
 
 _THIS = _Path(__file__).resolve()
 _ROOT = _THIS.parents[2]
@@ -24,6 +26,17 @@ if str(_ROOT) not in _sys.path:
 	_sys.path.insert(0, str(_ROOT))
 
 from config import get  # type: ignore
+from memory import PromptBudgetStats  # type: ignore
+from .promptBudget import (
+	CONTROLS_TABLE_HEADER,
+	estimate_tokens,
+	fit_lines,
+	format_controls_table,
+	rank_controls,
+)
+from . import llmReplay
+from . import metrics
+from . import tracing
 try:
 	from logging_utils import log as _log  # type: ignore
 except Exception:
@@ -107,6 +120,42 @@ def _infer_keys_from_labels(labels: List[str]) -> List[str]:
 
 
 def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
+	return _build_prompt_with_stats(html, ruhsat_json)[0]
+
+
+def _prompt_budget_tokens() -> int:
+	try:
+		return max(0, int(get("goFillForms.llm.promptBudgetTokens", 6000) or 0))
+	except Exception:
+		return 6000
+
+
+def _usage_of(resp: Any, model: Optional[str]) -> Dict[str, Any]:
+	"""Token usage reported by a chat.completions response (empty counts when absent)."""
+	u = getattr(resp, "usage", None)
+	out: Dict[str, Any] = {"model": getattr(resp, "model", None) or model, "calls": 1}
+	for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
+		v = getattr(u, k, None) if u is not None else None
+		if isinstance(v, int):
+			out[k] = v
+	return out
+
+def _build_prompt_with_stats(
+	html: str,
+	ruhsat_json: Optional[Dict[str, Any]],
+	mapped_keys: Optional[List[str]] = None,
+	budget_tokens: Optional[int] = None,
+	model: Optional[str] = None,
+) -> Tuple[str, PromptBudgetStats]:
+	"""Build the mapping prompt; switch to a compact control table when over budget.
+
+	The full prompt (inventories + filtered HTML) is kept as-is when it fits
+	goFillForms.llm.promptBudgetTokens (0 disables the budget). Otherwise the
+	raw HTML and inventories are replaced by a tag|type|id|name|label|extra
+	table of controls ranked by relevance to the ruhsat keys not yet mapped,
+	cut to what fits the remaining budget. When the head alone is over budget
+	the controls matching missing keys are still listed (logged as overflow).
+	"""
 	# Strengthened default prompt: explicit schema, strict-output rules, selector constraints, and omission when unsure.
 	default = (
 		"You are an expert web UI analyzer.\n"
@@ -135,6 +184,7 @@ def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
 
 	# Summarize available controls to help the LLM pick real selectors
 	controls_summary: List[str] = []
+	control_rows: List[Dict[str, Any]] = []
 	ids_present: List[str] = []
 	names_present: List[str] = []
 	data_attr_names_present: List[str] = []
@@ -155,6 +205,12 @@ def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
 				aria_db = attrs.get('aria-describedby') or ''
 				title = attrs.get('title') or ''
 				bits = [tag]
+				row: Dict[str, Any] = {
+					"tag": tag,
+					"type": (attrs.get('type') or ('text' if tag == 'input' else tag)),
+					"id": idv, "name": namev, "placeholder": ph, "aria": al, "title": title,
+				}
+				row_labels: List[str] = []
 				if idv:
 					bits.append(f"#{idv}")
 					ids_present.append(str(idv))
@@ -177,14 +233,17 @@ def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
 						lab_el = soup.find('label', {'for': idv})
 						if lab_el and hasattr(lab_el, 'get_text'):
 							bits.append("label=" + lab_el.get_text(" ").strip())
+							row_labels.append(lab_el.get_text(" ").strip())
 					parent_label = el.find_parent('label') if hasattr(el, 'find_parent') else None
 					if parent_label and hasattr(parent_label, 'get_text'):
 						bits.append("label-wrap=" + parent_label.get_text(" ").strip())
+						row_labels.append(parent_label.get_text(" ").strip())
 					if aria_lb:
 						for rid in str(aria_lb).split():
 							ref_el = soup.find(id=rid)
 							if ref_el and hasattr(ref_el, 'get_text'):
 								bits.append("lb=" + ref_el.get_text(" ").strip())
+								row_labels.append(ref_el.get_text(" ").strip())
 					if aria_db:
 						for rid in str(aria_db).split():
 							ref_el = soup.find(id=rid)
@@ -212,6 +271,9 @@ def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
 				for db in data_bits[:2]:
 					bits.append(db)
 				controls_summary.append(" ".join(bits)[:200])
+				row["label"] = " / ".join(t for t in row_labels if t)
+				row["extra"] = data_bits[0] if data_bits else ""
+				control_rows.append(row)
 			except Exception:
 				pass
 	except Exception:
@@ -248,6 +310,7 @@ def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
 			"Likely present logical keys on this step (restrict mapping ONLY to these if you map anything): "
 			+ ", ".join(cand_keys)
 		)
+	n_head = len(parts)  # instructions, ruhsat JSON, likely keys (kept in compact mode)
 	if ids_present:
 		parts.append("IDs present on this page (prefer these first):\n- #" + "\n- #".join(list(dict.fromkeys(ids_present))[:60]))
 	if names_present:
@@ -262,7 +325,46 @@ def _build_prompt(html: str, ruhsat_json: Optional[Dict[str, Any]]) -> str:
 		parts.append("Available controls (first 60; showing tag, id/name, data-*, aria/placeholder):\n- " + "\n- ".join(controls_summary[:60]))
 	parts.append("Detected labels/placeholders (truncated):\n" + "; ".join(labels[:30]))
 	parts.append("Filtered HTML (truncated if long):\n" + (html[:16000] if isinstance(html, str) else ""))
-	return "\n\n".join(parts)
+	full_prompt = "\n\n".join(parts)
+
+	budget = _prompt_budget_tokens() if budget_tokens is None else max(0, int(budget_tokens))
+	mapped = set(mapped_keys or [])
+	missing = [k for k, v in (ruhsat_json or {}).items() if k not in mapped and v not in (None, "", [], {})]
+	full_tokens = estimate_tokens(full_prompt, model)
+	if not budget or full_tokens <= budget:
+		return full_prompt, PromptBudgetStats(
+			mode="full", budget_tokens=budget, full_tokens=full_tokens, prompt_tokens=full_tokens,
+			tokens_saved=0, controls_total=len(control_rows), controls_listed=len(control_rows), missing_keys=missing,
+		)
+
+	# Compact mode: instructions + ruhsat + ranked control table, no raw HTML
+	head = parts[:n_head]
+	if missing:
+		head.append("Logical keys still missing (map these first): " + ", ".join(missing))
+	head.append(
+		"The page HTML is omitted to save tokens. Controls are listed below as "
+		+ CONTROLS_TABLE_HEADER
+		+ " (extra = one data-* attribute). Build selectors ONLY from the id, name or data-* values shown; "
+		"omit a key if no listed control fits."
+	)
+	head_text = "\n\n".join(head)
+	ranked = [r for _score, r in rank_controls(control_rows, missing, _DEFAULT_SYNONYMS)]
+	room = budget - estimate_tokens(head_text, model) - estimate_tokens(CONTROLS_TABLE_HEADER, model) - 4
+	table = fit_lines(format_controls_table(ranked), max(0, room), model)
+	if not table and ranked:
+		# the head alone fills the budget: an empty table leaves nothing to map, so go over budget
+		# with the controls that match a still-missing key (the best-ranked one when none do)
+		critical = [r for r in ranked if r.get("keys")][:max(1, len(missing))] or ranked[:1]
+		table = format_controls_table(critical)
+		_log("WARN", "F3-PROMPT-BUDGET", f"prompt head exceeds budget {budget}; listing {len(table)} critical controls anyway",
+			component="F3", extra={"budget_tokens": budget, "head_tokens": estimate_tokens(head_text, model), "missing_keys": missing})
+	prompt = head_text + "\n\n" + "\n".join([CONTROLS_TABLE_HEADER] + table)
+	prompt_tokens = estimate_tokens(prompt, model)
+	return prompt, PromptBudgetStats(
+		mode="compact", budget_tokens=budget, full_tokens=full_tokens, prompt_tokens=prompt_tokens,
+		tokens_saved=max(0, full_tokens - prompt_tokens), controls_total=len(control_rows),
+		controls_listed=len(table), missing_keys=missing,
+	)
 
 
 def _try_parse_json(txt: str) -> Optional[Dict[str, Any]]:
@@ -501,6 +603,7 @@ def _unique_selector_for_node(soup, n) -> Optional[str]:
 	return None
 
 
+@tracing.traced()
 def _heuristic_map_fields(html: str, keys: List[str], synonyms: Optional[Dict[str, List[str]]] = None) -> Dict[str, str]:
 	"""When LLM mapping fails, try to map logical keys to inputs by label/placeholder/name proximity."""
 	try:
@@ -579,6 +682,7 @@ def _heuristic_map_fields(html: str, keys: List[str], synonyms: Optional[Dict[st
 		return {}
 
 
+@metrics.timed("validation")
 def _validate_and_clean_mapping(html: str, field_mapping: Dict[str, Any]) -> Dict[str, Any]:
 	"""Validate selectors against HTML. Keep only unique selectors that resolve to a single input/select/textarea.
 	Returns { cleaned: {..}, dropped: {key: reason}, stats: {kept, dropped} }
@@ -674,17 +778,24 @@ def _validate_and_clean_mapping(html: str, field_mapping: Dict[str, Any]) -> Dic
 		return {"cleaned": {k: str(v) for k, v in (field_mapping or {}).items()}, "dropped": {}, "contexts": {}, "stats": {"kept": len(field_mapping or {}), "dropped": 0}}
 
 
-def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+@tracing.traced()
+def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = None, mapped_keys: Optional[List[str]] = None) -> Dict[str, Any]:
 	"""Compose an LLM call to map ruhsat_json to form fields or detect final activation page.
 
-	Returns a dict: { ok, page_kind, field_mapping?, actions?, evidence?, raw? }
+	mapped_keys: logical keys already mapped/filled (e.g. by the static pass);
+	the prompt budget ranks controls for the remaining ruhsat keys first.
+
+	Returns a dict: { ok, page_kind, field_mapping?, actions?, evidence?, raw?, prompt_budget }
 	"""
-	key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY")
+	key = llmReplay.api_key()
 	# Prefer mappingModel; fallback to generic model or env
 	model = get("goFillForms.llm.mappingModel", get("goFillForms.llm.model", os.getenv("LLM_MODEL", "gpt-4o")))
 	temp = float(get("goFillForms.llm.temperature", 0.0) or 0.0)
 
-	prompt = _build_prompt(html, ruhsat_json)
+	prompt, budget_stats = _build_prompt_with_stats(html, ruhsat_json, mapped_keys=mapped_keys, model=model)
+	_log("INFO", "F3-PROMPT-BUDGET",
+		f"mode={budget_stats.mode} tokens={budget_stats.prompt_tokens}/{budget_stats.budget_tokens} saved={budget_stats.tokens_saved}",
+		component="F3", extra=asdict(budget_stats))
 	try:
 		# Log a short snippet of the prompt for diagnostics
 		_log("INFO", "F3-PROMPT", (prompt or "")[:1500], component="F3")
@@ -697,11 +808,12 @@ def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = N
 	except Exception:
 		pass
 	raw: str = ""
+	llm_usage: Dict[str, Any] = {"model": model, "calls": 1 if key else 0}
 	_log("INFO", "F3-ANALYZE", f"key_present={bool(key)} model={model} temp={temp}", component="F3")
+	t_llm = time.perf_counter()
 	if key:
 		try:
-			from openai import OpenAI  # type: ignore
-			client = OpenAI(api_key=key)
+			client = llmReplay.openai_client(key)
 			# First attempt with max_tokens (legacy param)
 			try:
 				resp = client.chat.completions.create(
@@ -714,6 +826,7 @@ def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = N
 					max_tokens=400,
 				)
 				raw = (resp.choices[0].message.content or "").strip()
+				llm_usage = _usage_of(resp, model)
 			except Exception as e1:
 				# Retry using max_completion_tokens when model rejects max_tokens
 				msg = str(e1)
@@ -730,6 +843,7 @@ def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = N
 							max_completion_tokens=400,  # type: ignore[arg-type]
 						)
 						raw = (resp.choices[0].message.content or "").strip()
+						llm_usage = _usage_of(resp, model)
 					except Exception:
 						raw = ""
 				else:
@@ -770,6 +884,7 @@ def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = N
 						raw = ""
 			except Exception:
 				raw = ""
+		metrics.record_llm_call(model, "F3", time.perf_counter() - t_llm, usage=llm_usage, ok=bool(raw))
 	# If no key or failure, return empty mapping (caller can fallback)
 	if not raw:
 		return {"ok": False, "error": "no_llm_response"}
@@ -852,6 +967,8 @@ def map_json_to_html_fields(html: str, ruhsat_json: Optional[Dict[str, Any]] = N
 		# Diagnostics (safe to ignore by UI)
 		"prompt_source": _prompt_source,
 		"prompt_snippet": (prompt or "")[:1500],
+		"prompt_budget": asdict(budget_stats),
+		"llm_usage": llm_usage,
 		"ruhsat_keys": _ru_keys,
 	# New diagnostics to assess LLM mapping quality vs heuristics
 	"llm_field_mapping": original_mapping if isinstance(original_mapping, dict) else {},
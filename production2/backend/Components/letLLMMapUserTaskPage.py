@@ -31,6 +31,7 @@ from datetime import datetime
 import shutil
 import sys
 import os
+import time
 import re as _re
 
 # Ensure production2 root on path
@@ -46,6 +47,9 @@ from config import (  # type: ignore
 from backend.logging_utils import log  # type: ignore
 from backend.Components.mappingStaticUserTask import get_user_task_candidates  # type: ignore
 from backend.Components.fillPageFromMapping import fill_and_go  # type: ignore
+from backend.Components import llmReplay  # type: ignore
+from backend.Components import metrics  # type: ignore
+from backend.Components import tracing  # type: ignore
 
 
 def _collect_static_synonyms() -> List[str]:
@@ -68,6 +72,7 @@ def _collect_static_synonyms() -> List[str]:
 	return out
 
 
+@tracing.traced()
 def build_llm_prompt_user_task(
 	filtered_html: str,
 	task_label: str,
@@ -150,6 +155,7 @@ def build_llm_prompt_user_task(
 	llm_raw_path = prompts_dir / f"llm_response_attempt{attempt}_{ts}.txt"
 	llm_parsed_path = prompts_dir / f"llm_parsed_attempt{attempt}_{ts}.json"
 
+	t_write = time.perf_counter()
 	try:
 		default_path.write_text(default_prompt, encoding="utf-8")
 		composed_path.write_text(composed_prompt, encoding="utf-8")
@@ -172,19 +178,21 @@ def build_llm_prompt_user_task(
 		meta_path.write_text(_json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
 	except Exception:
 		pass
+	metrics.observe_stage("artifact_write", time.perf_counter() - t_write)
 
 	log("INFO", "LLM-UTASK-SAVED", f"attempt {attempt+1}/{max_attempts}", component="letLLMMapUserTask")
 
 	# Optional LLM call
 	llm_suggestion: Optional[Dict[str, Any]] = None
 	llm_candidates: List[Dict[str, Any]] = []
-	key = os.getenv("OPENAI_API_KEY")
+	key = llmReplay.api_key()
 	model = os.getenv("LLM_MODEL", "gpt-4o")
 
 	if key:
+		t_llm = time.perf_counter()
+		resp = None
 		try:
-			from openai import OpenAI  # type: ignore
-			client = OpenAI(api_key=key)
+			client = llmReplay.openai_client(key)
 			messages = [
 				{"role": "system", "content": "Return ONLY strict JSON with required schema. No prose."},
 				{"role": "user", "content": composed_prompt},
@@ -214,6 +222,7 @@ def build_llm_prompt_user_task(
 			except Exception as e:  # pragma: no cover
 				content = ""
 				log("ERROR", "LLM-UTASK-ERR", str(e)[:160], component="letLLMMapUserTask")
+		metrics.record_llm_call(model, "F2", time.perf_counter() - t_llm, resp=resp, ok=bool(content))
 
 		raw_content = content
 		parsed: Optional[Dict[str, Any]] = None
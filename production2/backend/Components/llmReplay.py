@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+"""llmReplay
+
+Record/replay transport for the OpenAI SDK, so the F1/F2/F3 LLM paths can be
+benchmarked and load-tested without network access or API spend.
+
+The SDK's httpx client gets a ReplayTransport:
+- record  forwards every request to api.openai.com and saves the
+          request/response pair as <fixturesDir>/<key>.json
+- replay  answers from the fixture with the same key after a synthetic delay
+          (the recorded latency, or a fixed number, scaled and jittered);
+          a missing fixture is a 404 "replay_miss" error (never retried)
+- auto    replay when the fixture exists, record otherwise
+
+The key is a hash of the request: method, path and the JSON body with sorted
+keys (model, messages/input, temperature, max_tokens, ...), so the same
+prompt for the same model always maps to the same fixture. Settings come
+from config.llmReplay, overridden by env P2_LLM_REPLAY / P2_LLM_FIXTURES /
+P2_LLM_LATENCY_MS / P2_LLM_JITTER_MS.
+
+Call sites use openai_client(key) instead of OpenAI(api_key=key), and
+api_key() instead of os.getenv("OPENAI_API_KEY"): in replay mode it returns
+a placeholder key so the key-gated LLM branches run offline.
+"""
+
+from pathlib import Path as _Path
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import httpx
+
+_ROOT = _Path(__file__).resolve().parents[2]  # production2
+MODES = ("off", "record", "replay", "auto")
+REPLAY_API_KEY = "sk-replay-offline"
+_MAX_STORED_STR = 2000  # longer request strings (base64 images, page HTML) are stored as a digest
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """Fixture key for one API request (stable across runs and key order)."""
+    try:
+        canonical = json.dumps(json.loads(body or b"null"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    except Exception:
+        canonical = body or b""
+    return _sha(method.upper().encode() + b" " + path.encode() + b"\n" + canonical)[:32]
+
+
+def _abbrev(obj: Any) -> Any:
+    if isinstance(obj, str) and len(obj) > _MAX_STORED_STR:
+        return f"{obj[:200]}...<{len(obj)} chars sha256:{_sha(obj.encode('utf-8'))[:16]}>"
+    if isinstance(obj, list):
+        return [_abbrev(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: _abbrev(v) for k, v in obj.items()}
+    return obj
+
+
+def settings() -> Dict[str, Any]:
+    """Effective mode / fixtures dir / latency settings (config, then env)."""
+    try:
+        from config import get_llm_replay  # type: ignore
+    except Exception:  # imported outside production2 (e.g. license_llm)
+        def get_llm_replay(key: str, default: Any = None) -> Any:
+            return default
+    mode = (os.getenv("P2_LLM_REPLAY") or get_llm_replay("mode", "off") or "off").strip().lower()
+    fixtures = _Path(os.getenv("P2_LLM_FIXTURES") or get_llm_replay("fixturesDir", "tmp/llmFixtures"))
+    latency = os.getenv("P2_LLM_LATENCY_MS") or get_llm_replay("latencyMs", "recorded")
+    return {
+        "mode": mode if mode in MODES else "off",
+        "fixturesDir": str(fixtures if fixtures.is_absolute() else _ROOT / fixtures),
+        "latencyMs": latency if str(latency) == "recorded" else float(latency),
+        "latencyScale": float(get_llm_replay("latencyScale", 1.0)),
+        "jitterMs": float(os.getenv("P2_LLM_JITTER_MS") or get_llm_replay("jitterMs", 0)),
+    }
+
+
+class ReplayTransport(httpx.BaseTransport):
+    def __init__(self, fixtures_dir: str, mode: str = "replay", latency_ms: Any = "recorded",
+                 latency_scale: float = 1.0, jitter_ms: float = 0.0,
+                 upstream: Optional[httpx.BaseTransport] = None, seed: Optional[int] = None) -> None:
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"unknown replay mode: {mode}")
+        self.dir = _Path(fixtures_dir)
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self.jitter_ms = jitter_ms
+        self._upstream = upstream
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "recorded": 0}
+
+    def path_for(self, key: str) -> _Path:
+        return self.dir / f"{key}.json"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def _delay_s(self, recorded_ms: float) -> float:
+        base = recorded_ms if self.latency_ms == "recorded" else float(self.latency_ms)
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, base * self.latency_scale + jitter) / 1000.0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        key = request_key(request.method, request.url.path, body)
+        path = self.path_for(key)
+        if self.mode != "record" and path.exists():
+            fx = json.loads(path.read_text(encoding="utf-8"))
+            resp = fx["response"]
+            time.sleep(self._delay_s(float(fx.get("elapsed_ms") or 0.0)))
+            self._count("hits")
+            content = resp["body"] if isinstance(resp["body"], str) else json.dumps(resp["body"], ensure_ascii=False)
+            return httpx.Response(resp["status"], headers={"content-type": resp.get("content_type") or "application/json",
+                                                           "x-llm-replay": key}, content=content.encode("utf-8"))
+        if self.mode == "replay":
+            self._count("misses")
+            return httpx.Response(404, json={"error": {
+                "message": f"llm replay: no fixture {key}.json in {self.dir}",
+                "type": "replay_miss", "code": "replay_miss"}})
+        return self._record(request, body, key, path)
+
+    def _record(self, request: httpx.Request, body: bytes, key: str, path: _Path) -> httpx.Response:
+        if self._upstream is None:
+            self._upstream = httpx.HTTPTransport()
+        t0 = time.perf_counter()
+        upstream = self._upstream.handle_request(request)
+        try:
+            content = upstream.read()
+        finally:
+            upstream.close()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        ctype = upstream.headers.get("content-type", "")
+        text = content.decode("utf-8", errors="replace")
+        try:
+            req_body = json.loads(body) if body else None
+        except Exception:
+            req_body = body.decode("utf-8", errors="replace")
+        try:
+            stored_body: Any = json.loads(text) if "json" in ctype else text
+        except Exception:
+            stored_body = text
+        fixture = {
+            "key": key,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "request": {"method": request.method, "path": request.url.path, "body": _abbrev(req_body)},
+            "response": {"status": upstream.status_code, "content_type": ctype, "body": stored_body},
+        }
+        # errors are passed through but not stored: replaying a 429 would only hide it
+        if upstream.status_code < 400:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(fixture, indent=1, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+            self._count("recorded")
+        return httpx.Response(upstream.status_code, headers={"content-type": ctype or "application/json"}, content=content)
+
+    def close(self) -> None:
+        if self._upstream is not None:
+            self._upstream.close()
+
+
+_TRANSPORTS: Dict[tuple, ReplayTransport] = {}
+_TRANSPORTS_LOCK = threading.Lock()
+
+
+def transport() -> Optional[ReplayTransport]:
+    """The shared transport for the current settings, or None when replay is off."""
+    s = settings()
+    if s["mode"] == "off":
+        return None
+    k = (s["mode"], s["fixturesDir"], s["latencyMs"], s["latencyScale"], s["jitterMs"])
+    with _TRANSPORTS_LOCK:
+        t = _TRANSPORTS.get(k)
+        if t is None:
+            t = _TRANSPORTS[k] = ReplayTransport(s["fixturesDir"], s["mode"], s["latencyMs"], s["latencyScale"], s["jitterMs"])
+    return t
+
+
+def api_key() -> Optional[str]:
+    """OPENAI_API_KEY, or a placeholder in replay mode (no real key needed)."""
+    key = os.getenv("OPENAI_API_KEY")
+    if not key and settings()["mode"] == "replay":
+        return REPLAY_API_KEY
+    return key
+
+
+def openai_client(key: Optional[str] = None, **kwargs: Any) -> Any:
+    """OpenAI(api_key=key) whose HTTP calls go through the replay transport when enabled.
+
+    Also routes the module-level client (legacy `openai.chat.completions...`
+    fallbacks) through the same transport.
+    """
+    import openai  # type: ignore
+
+    t = transport()
+    if t is None:
+        if getattr(getattr(openai, "http_client", None), "_llm_replay", None) is not None:
+            openai.http_client = None  # replay was switched off
+        return openai.OpenAI(api_key=key, **kwargs)
+    if getattr(openai, "http_client", None) is None or getattr(openai.http_client, "_llm_replay", None) is not t:
+        module_client = httpx.Client(transport=t)
+        module_client._llm_replay = t  # type: ignore[attr-defined]
+        openai.http_client = module_client
+    return openai.OpenAI(api_key=key or REPLAY_API_KEY, http_client=httpx.Client(transport=t), **kwargs)
@@ -13,6 +13,8 @@ try:
 except Exception:
     _HAS_BS = False
 from .calibRuntimeLookup import resolve_site_mapping  # type: ignore
+from . import metrics
+from . import tracing
 
 
 def _sha(s: str) -> str:
@@ -24,7 +26,10 @@ def _clean(s: str) -> str:
 
 
 def _soup(html: str):
-    return BeautifulSoup(html or "", "html.parser") if _HAS_BS else None
+    if not _HAS_BS:
+        return None
+    with metrics.stage("parse"):
+        return BeautifulSoup(html or "", "html.parser")
 
 
 def _exists_selector_in_html(html: str, selector: str) -> bool:
@@ -213,6 +218,8 @@ DEFAULT_SYNONYMS = {
 }
 
 
+@tracing.traced()
+@metrics.timed("static_mapping")
 def static_analyze_page(html: str, url: str, task: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
     """
     Static alternative to analyzePage. Returns the same shape, without LLM.
@@ -251,8 +258,10 @@ def static_analyze_page(html: str, url: str, task: str, cfg: Dict[str, Any]) ->
     calib_page_match = None
     calib_page_actions: List[str] = []              # text labels (for text-based clicking)
     calib_page_action_selectors: List[str] = []      # css selectors for deterministic clicking
+    typing_fields: List[str] = []                    # fields the site only accepts as keystrokes
     if host:
         site_map = resolve_site_mapping(host, task, cfg) or {}
+        typing_fields = [str(k) for k in (site_map.get("typingFields") or []) if k]
         seeded = site_map.get("fieldSelectors") or {}
         if isinstance(seeded, dict) and seeded:
             from backend.logging_utils import log  # type: ignore
@@ -460,11 +469,15 @@ def static_analyze_page(html: str, url: str, task: str, cfg: Dict[str, Any]) ->
             pass
             # Action filtering removed - actions come only from calibration now
 
+    if isinstance(calib_page_match, dict) and isinstance(calib_page_match.get("typingFields"), list):
+        typing_fields = [str(k) for k in calib_page_match["typingFields"] if k]
+
     fp = _sha(html)
     out = {
         "ok": len(mapping) > 0,
         "page_kind": "fill_form",
         "field_mapping": mapping,
+        "typing_fields": [k for k in typing_fields if k in mapping],
         "actions": actions_found,
         "validation": {"contexts": contexts, "counts": {"mapped": len(mapping)}},
         "mapping_source": mapping_src,
@@ -477,7 +490,7 @@ def static_analyze_page(html: str, url: str, task: str, cfg: Dict[str, Any]) ->
     dump_dir = os.path.join(_cfg_get(cfg, "paths.tmpDir", "production2/tmp"), "JpegJsonWebpageHtml")
     os.makedirs(dump_dir, exist_ok=True)
     try:
-        with open(os.path.join(dump_dir, f"{fp}_static_mapping.json"), "w", encoding="utf-8") as f:
+        with metrics.stage("artifact_write"), open(os.path.join(dump_dir, f"{fp}_static_mapping.json"), "w", encoding="utf-8") as f:
             json.dump(out, f, ensure_ascii=False, indent=2)
     except Exception:
         pass
@@ -24,7 +24,9 @@ if str(_root) not in sys.path:
 
 from config import get_static_max_candidates_go_user_task, get_map_user_task  # type: ignore
 from memory import MappingJson, MappingMeta, MappingAction, MappingCandidate  # type: ignore
+from . import metrics
 
+@metrics.timed("static_mapping")
 def map_side_menu_static(html: Optional[str] = None, name: Optional[str] = None) -> MappingJson:
     """
     Scan filtered HTML for side menu / hamburger toggle buttons and save a mapping JSON.
@@ -67,7 +69,8 @@ def map_side_menu_static(html: Optional[str] = None, name: Optional[str] = None)
     soup = None
     try:
         from bs4 import BeautifulSoup  # type: ignore
-        soup = BeautifulSoup(filtered_html, "html.parser")
+        with metrics.stage("parse"):
+            soup = BeautifulSoup(filtered_html, "html.parser")
     except Exception:
         soup = None
 
@@ -387,7 +390,8 @@ def map_side_menu_static(html: Optional[str] = None, name: Optional[str] = None)
     mapping_json = MappingJson(meta=meta_dc, mapping=action_dc, candidates=candidates_dc)
 
     out_path = out_dir / f"{base}_{ts}.json"
-    out_path.write_text(json.dumps(asdict(mapping_json), indent=2, ensure_ascii=False), encoding="utf-8")
+    with metrics.stage("artifact_write"):
+        out_path.write_text(json.dumps(asdict(mapping_json), indent=2, ensure_ascii=False), encoding="utf-8")
 
     return mapping_json
 
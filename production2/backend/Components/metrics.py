@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+"""metrics
+
+Prometheus-style counters and histograms for the backend, exposed as text
+on GET /metrics (exposition format 0.0.4) and as a JSON p50/p95 summary on
+GET /api/metrics/summary.
+
+What is recorded (all names prefixed p2_):
+- request_seconds{endpoint, op, outcome}   F1/F2/F3/F3-Static/TsX/calib handlers
+- stage_seconds{stage}                      parse, filter, static_mapping,
+                                            validation, llm, artifact_write
+                                            (stages nest: static_mapping includes its parse)
+- llm_calls_total{model, component, outcome}, llm_tokens_total{model, kind},
+  llm_call_seconds{model, component}
+- cache_requests_total{cache, result}       hit / miss; p2_cache_hit_ratio is derived
+- page_html_bytes{kind}                     raw vs filtered page sizes
+
+No prometheus_client dependency: a small lock-per-metric registry is enough
+for one process. Label sets per metric are capped (max_series); overflow is
+folded into label values "_other" so arbitrary ops cannot grow memory.
+
+stage() / timed() / observe_stage() / record_llm_call() also add a span to
+the current request trace (tracing.py) when the request is sampled.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import sys
+import threading
+import time
+
+from . import tracing
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STAGES = ("parse", "filter", "static_mapping", "validation", "llm", "artifact_write")
+OTHER = "_other"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_: str, labelnames: Sequence[str], max_series: int) -> None:
+        self.name = name
+        self.help = help_
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        key = tuple("" if labels.get(n) is None else str(labels.get(n)) for n in self.labelnames)
+        if key not in self._series and len(self._series) >= self.max_series:
+            return tuple(OTHER for _ in self.labelnames)
+        return key
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, value: float = 1.0, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + value
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._series)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in sorted(self.values().items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_: str, labelnames: Sequence[str], max_series: int,
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help_, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._key(labels)
+            s = self._series.get(key)
+            if s is None:
+                # per-bucket (non-cumulative) counts, last slot = +Inf; then sum, count
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _copy(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        with self._lock:
+            return {k: (list(s[0]), s[1], s[2]) for k, s in self._series.items()}
+
+    def quantile(self, q: float, counts: List[int], count: int) -> Optional[float]:
+        """Bucket-interpolated quantile (same estimate as PromQL histogram_quantile)."""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                if i >= len(self.buckets):
+                    return self.buckets[-1]
+                lo = self.buckets[i - 1] if i else 0.0
+                return lo + (self.buckets[i] - lo) * ((rank - seen) / c)
+            seen += c
+        return self.buckets[-1]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        out = []
+        for key, (counts, total, count) in sorted(self._copy().items()):
+            out.append({**dict(zip(self.labelnames, key)), "count": count,
+                        "mean": total / count if count else None,
+                        "p50": self.quantile(0.5, counts, count),
+                        "p95": self.quantile(0.95, counts, count)})
+        return out
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._copy().items()):
+            acc = 0
+            for b, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le = 'le="%s"' % _fmt(b)
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {acc}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics (get-or-create) + text exposition."""
+
+    def __init__(self, max_series: int = 200) -> None:
+        self.enabled = True
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls: type, name: str, help_: str, labelnames: Sequence[str], **kw: Any) -> Any:
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help_, labelnames, self.max_series, **kw)
+            return m
+
+    def counter(self, name: str, help_: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help_, labelnames)
+
+    def histogram(self, name: str, help_: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_, labelnames, buckets=buckets)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self) -> None:
+        for m in self.metrics():
+            m.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in sorted(self.metrics(), key=lambda m: m.name):
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        ratios = cache_hit_ratios()
+        if ratios:
+            lines.append("# HELP p2_cache_hit_ratio Hits / (hits + misses) since start")
+            lines.append("# TYPE p2_cache_hit_ratio gauge")
+            for cache, ratio in sorted(ratios.items()):
+                lines.append(f'p2_cache_hit_ratio{{cache="{_escape(cache)}"}} {_fmt(ratio)}')
+        return "\n".join(lines) + "\n"
+
+
+def _shared_registry() -> MetricsRegistry:
+    # Components are imported both as Components.x (main) and backend.Components.x
+    # (tests, some features): reuse the registry of whichever copy loaded first.
+    for name in ("Components.metrics", "backend.Components.metrics"):
+        mod = sys.modules.get(name)
+        if name != __name__ and getattr(mod, "registry", None) is not None:
+            return mod.registry  # type: ignore[union-attr]
+    return MetricsRegistry()
+
+
+registry = _shared_registry()
+
+REQUEST_SECONDS = registry.histogram("p2_request_seconds", "API handler latency by endpoint and op", ("endpoint", "op", "outcome"))
+STAGE_SECONDS = registry.histogram("p2_stage_seconds", "Pipeline stage latency", ("stage",))
+LLM_CALLS = registry.counter("p2_llm_calls_total", "LLM calls by model, caller and outcome", ("model", "component", "outcome"))
+LLM_TOKENS = registry.counter("p2_llm_tokens_total", "LLM tokens reported by the API", ("model", "kind"))
+LLM_SECONDS = registry.histogram("p2_llm_call_seconds", "LLM call latency", ("model", "component"))
+CACHE_REQUESTS = registry.counter("p2_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+PAGE_BYTES = registry.histogram("p2_page_html_bytes", "Page sizes seen by the parser (raw) and sent onwards (filtered)", ("kind",), buckets=BYTES_BUCKETS)
+
+
+# --- recording helpers (no-ops when registry.enabled is False) ----------------
+
+@contextmanager
+def request_timer(endpoint: str, op: Optional[str]) -> Iterator[None]:
+    """Time one API call; outcome = ok | http_<status> | error."""
+    tracing.set_attrs(endpoint=endpoint, op=op or "")
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception as e:
+        status = getattr(e, "status_code", None)
+        outcome = f"http_{status}" if status else "error"
+        raise
+    finally:
+        if registry.enabled:
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint, op=op or "", outcome=outcome)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        with tracing.span(f"stage:{name}"):
+            yield
+    finally:
+        if registry.enabled:
+            STAGE_SECONDS.observe(time.perf_counter() - t0, stage=name)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """stage() for code that is easier to time with two perf_counter() calls."""
+    tracing.record_span(f"stage:{name}", seconds)
+    if registry.enabled:
+        STAGE_SECONDS.observe(seconds, stage=name)
+
+
+def timed(stage_name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of stage() for whole functions."""
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def record_llm_call(model: Optional[str], component: str, seconds: float, resp: Any = None,
+                    usage: Optional[Dict[str, Any]] = None, ok: bool = True) -> None:
+    """Count one chat.completions call; tokens come from resp.usage or a usage dict."""
+    model = (getattr(resp, "model", None) if resp is not None else None) or model or "unknown"
+    tracing.record_span("stage:llm", seconds, model=model, component=component, ok=ok)
+    if not registry.enabled:
+        return
+    LLM_CALLS.inc(model=model, component=component, outcome="ok" if ok else "error")
+    LLM_SECONDS.observe(seconds, model=model, component=component)
+    STAGE_SECONDS.observe(seconds, stage="llm")
+    u = getattr(resp, "usage", None) if resp is not None else None
+    # chat.completions: prompt/completion_tokens; Responses API: input/output_tokens
+    for kind, names in (("prompt", ("prompt_tokens", "input_tokens")), ("completion", ("completion_tokens", "output_tokens"))):
+        for n in names:
+            v = getattr(u, n, None) if u is not None else (usage or {}).get(n)
+            if isinstance(v, int) and v > 0:
+                LLM_TOKENS.inc(v, model=model, kind=kind)
+                break
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    if registry.enabled:
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def observe_page_size(kind: str, nbytes: int) -> None:
+    if registry.enabled:
+        PAGE_BYTES.observe(nbytes, kind=kind)
+
+
+def cache_hit_ratios() -> Dict[str, float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), v in CACHE_REQUESTS.values().items():
+        t = totals.setdefault(cache, [0.0, 0.0])
+        t[0 if result == "hit" else 1] += v
+    return {c: h / (h + m) for c, (h, m) in totals.items() if h + m}
+
+
+def summary() -> Dict[str, Any]:
+    """JSON view: p50/p95 per endpoint/op and stage, LLM usage, cache hit ratios."""
+    return {
+        "requests": REQUEST_SECONDS.summary(),
+        "stages": STAGE_SECONDS.summary(),
+        "llm": {
+            "calls": [{"model": k[0], "component": k[1], "outcome": k[2], "count": v} for k, v in sorted(LLM_CALLS.values().items())],
+            "tokens": [{"model": k[0], "kind": k[1], "count": v} for k, v in sorted(LLM_TOKENS.values().items())],
+        },
+        "cache_hit_ratio": cache_hit_ratios(),
+        "page_bytes": PAGE_BYTES.summary(),
+    }
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+"""pageChangeWatch
+
+Server-side "await change" for the click → wait → detect loops.
+
+Instead of sleeping a fixed wait_ms inside a request (one worker thread
+parked per in-flight click), the UI
+  1. pushes page snapshots as the webview reports navigation / DOM
+     mutations (POST /api/page/snapshot, delta upload protocol), and
+  2. long-polls GET /api/page/await-change with the fingerprint it clicked
+     from.
+
+The long-poll is an asyncio future on the event loop: no thread is held
+while it waits. publish() runs in the sync handlers' threadpool and wakes
+matching waiters with loop.call_soon_threadsafe. A waiter resolves as soon
+as a snapshot whose structural signature differs from the starting page
+arrives (mode="structure"; mode="any" = any fingerprint change), or when
+the timeout expires.
+
+Signatures (diffInteractiveRegions.structural_signature) are computed in
+publish(), on the caller's threadpool thread and outside the hub lock, so
+the event loop (wait_for_change) only compares stored strings and never
+parses HTML.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import threading
+import time
+
+from .diffInteractiveRegions import structural_signature
+
+
+def _fingerprint(html: str) -> str:
+    return hashlib.sha256((html or "").encode("utf-8")).hexdigest()
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "from_fp", "from_signature", "mode")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: "asyncio.Future[Dict[str, Any]]",
+                 from_fp: Optional[str], from_signature: Optional[str], mode: str) -> None:
+        self.loop = loop
+        self.future = future
+        self.from_fp = from_fp
+        self.from_signature = from_signature
+        self.mode = mode
+
+
+class PageChangeHub:
+    """Latest snapshots per session + pending await-change futures."""
+
+    def __init__(self, max_sessions: int = 64, per_session: int = 8) -> None:
+        self.max_sessions = max(1, int(max_sessions))
+        self.per_session = max(1, int(per_session))
+        self._lock = threading.Lock()
+        # session -> OrderedDict[fp -> {"seq", "fingerprint", "url", "ts", "signature"?}]
+        self._sessions: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+        self._waiters: Dict[str, List[_Waiter]] = {}
+        self._seq = 0
+        self._stats = {"published": 0, "waits": 0, "changed": 0, "timeouts": 0}
+        # called with every published snapshot (+ session_id), outside the lock; must not block
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    # --- snapshots ----------------------------------------------------
+    def publish(
+        self,
+        session_id: str,
+        html: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        url: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Record the page the UI currently shows; wakes waiters it satisfies."""
+        if html is None and not fingerprint:
+            raise ValueError("html or fingerprint required")
+        fp = fingerprint or _fingerprint(html or "")
+        signature: Optional[str] = None
+        if html is not None:
+            with self._lock:
+                signature = ((self._sessions.get(session_id) or {}).get(fp) or {}).get("signature")
+            if signature is None:
+                signature = structural_signature(html)  # full parse: never under the lock
+        with self._lock:
+            self._seq += 1
+            snaps = self._sessions.get(session_id)
+            if snaps is None:
+                snaps = self._sessions[session_id] = OrderedDict()
+                while len(self._sessions) > self.max_sessions:
+                    old, _ = self._sessions.popitem(last=False)
+                    self._waiters.pop(old, None)
+            self._sessions.move_to_end(session_id)
+            entry = snaps.pop(fp, None) or {"fingerprint": fp}
+            if signature is not None:
+                entry["signature"] = signature
+            entry.update(seq=self._seq, url=url or entry.get("url"), ts=time.time())
+            snaps[fp] = entry
+            while len(snaps) > self.per_session:
+                snaps.popitem(last=False)
+            self._stats["published"] += 1
+            waiters = self._waiters.get(session_id) or []
+            woken: List[Tuple[_Waiter, Dict[str, Any]]] = []
+            for w in list(waiters):
+                if self._is_change(session_id, w, entry):
+                    waiters.remove(w)
+                    woken.append((w, self._public(entry)))
+            out = self._public(entry)
+        for w, snap in woken:
+            w.loop.call_soon_threadsafe(_resolve, w.future, {"changed": True, "reason": w.mode, "snapshot": snap})
+        for fn in list(self._listeners):
+            try:
+                fn({**out, "session_id": session_id, "woke": len(woken)})
+            except Exception:
+                pass
+        return out
+
+    def _public(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: entry.get(k) for k in ("seq", "fingerprint", "signature", "url", "ts")}
+
+    def latest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            snaps = self._sessions.get(session_id)
+            if not snaps:
+                return None
+            return self._public(next(reversed(snaps.values())))
+
+    def signature_of(self, session_id: str, fingerprint: str) -> Optional[str]:
+        with self._lock:
+            entry = (self._sessions.get(session_id) or {}).get(fingerprint)
+            return entry.get("signature") if entry else None
+
+    def _is_change(self, session_id: str, w: _Waiter, entry: Dict[str, Any]) -> bool:
+        # caller holds the lock
+        if w.from_fp and entry["fingerprint"] == w.from_fp:
+            return False
+        if w.mode == "any":
+            return True
+        if w.from_signature is None and w.from_fp:
+            base = (self._sessions.get(session_id) or {}).get(w.from_fp)
+            w.from_signature = base.get("signature") if base else None
+        if w.from_signature is None:
+            return True  # starting page unknown: any other page counts
+        return entry.get("signature") != w.from_signature
+
+    # --- waiting ------------------------------------------------------
+    async def wait_for_change(
+        self,
+        session_id: str,
+        from_fp: Optional[str] = None,
+        from_signature: Optional[str] = None,
+        timeout_s: float = 5.0,
+        mode: str = "structure",
+    ) -> Dict[str, Any]:
+        """Resolve on the first snapshot that differs from the starting page, or time out.
+
+        Returns {"changed", "reason": structure|any|timeout, "snapshot", "waited_ms"}.
+        A snapshot already published after from_fp resolves immediately.
+        """
+        t0 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+        w = _Waiter(loop, fut, from_fp, from_signature, "any" if mode == "any" else "structure")
+        with self._lock:
+            self._stats["waits"] += 1
+            snaps = self._sessions.get(session_id)
+            if snaps:
+                base = snaps.get(from_fp) if from_fp else None
+                latest = next(reversed(snaps.values()))
+                # only pages pushed after the starting one count (the UI may re-push the old page)
+                if latest is not base and (base is None or latest["seq"] > base["seq"]) and self._is_change(session_id, w, latest):
+                    fut.set_result({"changed": True, "reason": w.mode, "snapshot": self._public(latest)})
+            if not fut.done():
+                self._waiters.setdefault(session_id, []).append(w)
+        try:
+            res = await asyncio.wait_for(fut, timeout=max(0.0, timeout_s))
+            with self._lock:
+                self._stats["changed"] += 1
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            res = {"changed": False, "reason": "timeout", "snapshot": self.latest(session_id)}
+        finally:
+            # timed out or cancelled (client went away): forget the waiter
+            with self._lock:
+                waiters = self._waiters.get(session_id) or []
+                if w in waiters:
+                    waiters.remove(w)
+        res["waited_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return res
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "sessions": len(self._sessions),
+                    "waiting": sum(len(v) for v in self._waiters.values())}
+
+
+def _resolve(fut: "asyncio.Future[Dict[str, Any]]", value: Dict[str, Any]) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+# Process-wide hub used by the API
+page_change_hub = PageChangeHub()
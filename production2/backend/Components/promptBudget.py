@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+"""promptBudget
+
+Token-aware helpers for keeping LLM prompts inside a budget.
+
+- estimate_tokens: tiktoken when installed (optional dependency), otherwise a
+  character heuristic that over-counts non-ASCII text (Turkish labels split
+  into more tokens than English ones)
+- rank_controls: order form controls by relevance to the logical keys that
+  are still missing (label/name/id/placeholder vs. key synonyms)
+- format_controls_table: compact pipe table (tag|type|id|name|label|extra)
+  used instead of raw HTML when the full prompt would not fit
+- fit_lines: take lines in order until the token budget is used up
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import re
+
+_ENCODERS: Dict[str, Any] = {}
+
+
+def _encoder(model: Optional[str]) -> Any:
+	key = model or ""
+	if key in _ENCODERS:
+		return _ENCODERS[key]
+	enc = None
+	try:
+		import tiktoken  # type: ignore
+		try:
+			enc = tiktoken.encoding_for_model(model or "gpt-4o")
+		except Exception:
+			enc = tiktoken.get_encoding("o200k_base")
+	except Exception:
+		enc = None
+	_ENCODERS[key] = enc
+	return enc
+
+
+def estimate_tokens(text: Optional[str], model: Optional[str] = None) -> int:
+	"""Token count of text for model (exact with tiktoken, else ~4 chars/token ASCII, ~2 non-ASCII)."""
+	if not text:
+		return 0
+	enc = _encoder(model)
+	if enc is not None:
+		try:
+			return len(enc.encode(text, disallowed_special=()))
+		except Exception:
+			pass
+	non_ascii = 0 if text.isascii() else sum(1 for ch in text if ord(ch) > 127)
+	return int(math.ceil((len(text) - non_ascii) / 4.0 + non_ascii / 2.0))
+
+
+def _norm(s: Any) -> str:
+	t = str(s or "").lower()
+	t = (t.replace('ç', 'c').replace('ğ', 'g').replace('ı', 'i').replace('ö', 'o').replace('ş', 's').replace('ü', 'u')
+		.replace('\u0307', ''))
+	return " ".join(re.sub(r"[_\-./:#\[\]()]+", " ", t).split())
+
+
+def rank_controls(
+	rows: Sequence[Dict[str, Any]],
+	missing_keys: Sequence[str],
+	synonyms: Optional[Dict[str, List[str]]] = None,
+) -> List[Tuple[int, Dict[str, Any]]]:
+	"""Return [(score, row)] sorted by relevance to missing_keys (stable for ties).
+
+	A row scores 10 per synonym hit in its label text and 6 in id/name-like
+	attributes, plus 1 for being a free-text/select control. Rows that match
+	no missing key keep document order after the relevant ones.
+	"""
+	syn = synonyms or {}
+	terms: List[Tuple[str, List[str]]] = []
+	for k in missing_keys:
+		words = [_norm(w) for w in (syn.get(k) or [])] + [_norm(k)]
+		terms.append((k, [w for w in dict.fromkeys(words) if w]))
+	scored: List[Tuple[int, int, Dict[str, Any]]] = []
+	for idx, row in enumerate(rows):
+		label = _norm(" ".join(str(row.get(k) or "") for k in ("label", "placeholder", "aria", "title")))
+		attrs = _norm(" ".join(str(row.get(k) or "") for k in ("id", "name", "extra")))
+		score = 0
+		matched: List[str] = []
+		for key, words in terms:
+			hit = 0
+			for w in words:
+				if w in label:
+					hit = max(hit, 10)
+				elif w in attrs:
+					hit = max(hit, 6)
+			if hit:
+				matched.append(key)
+				score += hit
+		if (row.get("type") or "") in ("", "text", "search", "tel", "number", "select", "textarea"):
+			score += 1
+		if matched:
+			row = {**row, "keys": matched}
+		scored.append((score, idx, row))
+	scored.sort(key=lambda t: (-t[0], t[1]))
+	return [(s, r) for s, _i, r in scored]
+
+
+def _cell(v: Any, limit: int) -> str:
+	s = " ".join(str(v or "").split()).replace("|", "/")
+	return s if len(s) <= limit else s[: limit - 1] + "…"
+
+
+CONTROLS_TABLE_HEADER = "tag|type|id|name|label|extra"
+
+
+def format_controls_table(rows: Sequence[Dict[str, Any]]) -> List[str]:
+	"""One line per control; empty cells stay empty to keep columns aligned."""
+	out: List[str] = []
+	for r in rows:
+		label = r.get("label") or r.get("aria") or r.get("placeholder") or r.get("title") or ""
+		out.append("|".join([
+			# ids/names/data-* are selector material: never shorten those
+			_cell(r.get("tag"), 10), _cell(r.get("type"), 12), _cell(r.get("id"), 200), _cell(r.get("name"), 200),
+			_cell(label, 60), _cell(r.get("extra"), 200),
+		]))
+	return out
+
+
+def fit_lines(lines: Sequence[str], budget_tokens: int, model: Optional[str] = None) -> List[str]:
+	"""Prefix of lines whose estimated tokens (incl. newlines) stay within budget."""
+	out: List[str] = []
+	used = 0
+	for ln in lines:
+		cost = estimate_tokens(ln, model) + 1
+		if used + cost > budget_tokens:
+			break
+		out.append(ln)
+		used += cost
+	return out
@@ -5,10 +5,11 @@ from __future__ import annotations
 Standalone input ingestor for FillForms (F3):
 - Reads configuration from production2/config.json (goFillForms.input.*)
 - Loads ruhsat data from either a provided JSON file or extracts from the latest image
-  in the configured directory via an LLM (optional, requires OPENAI_API_KEY).
+  in the configured directory: local OCR (ocr_agent, if tesseract is installed) races
+  the vision LLM (optional, requires OPENAI_API_KEY), see extractRuhsatEngines.
 - Returns a normalized Python dict with extracted fields.
 
-This module is self-contained within production2 and does not import external
+Apart from the optional ocr_agent engine this module does not import external
 project packages (license_llm, etc.).
 """
 
@@ -18,6 +19,7 @@ import os
 import glob
 import json
 import base64
+import time
 from datetime import datetime as _dt
 
 # Ensure production2 config import
@@ -31,6 +33,10 @@ if str(_BACKEND) not in _sys.path:
 	_sys.path.insert(0, str(_BACKEND))
 
 from config import get  # type: ignore
+from Components.extractRuhsatEngines import extract_ruhsat_race  # type: ignore
+from Components import llmReplay  # type: ignore
+from Components import metrics  # type: ignore
+from Components import tracing  # type: ignore
 try:
 	from logging_utils import log as _log  # type: ignore
 except Exception:
@@ -86,7 +92,7 @@ def _extract_with_llm(image_path: str, model: Optional[str] = None, temperature:
 
 	Returns a dict of fields on success, or None on failure.
 	"""
-	key = os.getenv("OPENAI_API_KEY")
+	key = llmReplay.api_key()
 	if not key:
 		return None
 
@@ -118,9 +124,10 @@ def _extract_with_llm(image_path: str, model: Optional[str] = None, temperature:
 	]
 
 	# Try new SDK first, fallback to legacy
+	t_llm = time.perf_counter()
+	resp = resp2 = None
 	try:
-		from openai import OpenAI  # type: ignore
-		client = OpenAI(api_key=key)
+		client = llmReplay.openai_client(key)
 		resp = client.chat.completions.create(
 			model=model,
 			messages=[{"role": "user", "content": content}],  # type: ignore[arg-type]
@@ -135,8 +142,7 @@ def _extract_with_llm(image_path: str, model: Optional[str] = None, temperature:
 			pass
 		# Fallback 1: Responses API (multi-modal)
 		try:
-			from openai import OpenAI as _OpenAI  # type: ignore
-			_client2 = _OpenAI(api_key=key)
+			_client2 = llmReplay.openai_client(key)
 			resp2 = _client2.responses.create(
 				model=model,
 				input=[{
@@ -174,9 +180,12 @@ def _extract_with_llm(image_path: str, model: Optional[str] = None, temperature:
 					_log("WARN", "F3-INGEST", f"legacy openai call failed: {e2}", component="F3")
 				except Exception:
 					pass
+				metrics.record_llm_call(model, "ruhsat", time.perf_counter() - t_llm, ok=False)
 				return None
+	metrics.record_llm_call(model, "ruhsat", time.perf_counter() - t_llm, resp=resp or resp2, ok=bool(txt))
 
 	# Dump raw model output for debugging
+	t_write = time.perf_counter()
 	try:
 		stem = _Path(image_path).stem
 		ts = _dt.utcnow().strftime("%Y%m%d_%H%M%S%fZ")
@@ -189,6 +198,7 @@ def _extract_with_llm(image_path: str, model: Optional[str] = None, temperature:
 		_log("INFO", "F3-INGEST", f"saved LLM raw JSON -> {raw_json_file}", component="F3")
 	except Exception:
 		pass
+	metrics.observe_stage("artifact_write", time.perf_counter() - t_write)
 
 	# Parse JSON (allow code fences)
 	try:
@@ -217,6 +227,45 @@ def _extract_with_llm(image_path: str, model: Optional[str] = None, temperature:
 		return None
 
 
+def extract_from_image(image_path: str, model: Optional[str] = None, temperature: float = 0.0) -> Dict[str, Any]:
+	"""Ruhsat fields from an image: local OCR races the vision LLM (goFillForms.ingest.*).
+
+	Returns {"data": dict|None, "source": "ocr"|"vision_llm"|"ocr+vision", and, when OCR ran,
+	"engines", "confidence", "field_sources"}. Vision is only used when OPENAI_API_KEY is set.
+	An OCR-only result that misses a critical field (or reads it below minConfidence) is not
+	trusted: data is None and the fields are returned as "partial".
+	"""
+	vision_fn = (lambda path: _extract_with_llm(path, model=model, temperature=temperature)) if llmReplay.api_key() else None
+	if not _get_cfg("goFillForms.ingest.ocr", True):
+		return {"data": vision_fn(image_path) if vision_fn else None, "source": "vision_llm"}
+	race = extract_ruhsat_race(
+		image_path,
+		vision_fn=vision_fn,
+		critical_fields=_get_cfg("goFillForms.ingest.criticalFields"),
+		min_confidence=float(_get_cfg("goFillForms.ingest.minConfidence", 0.8) or 0.8),
+		vision_head_start_ms=int(_get_cfg("goFillForms.ingest.visionHeadStartMs", 800) or 0),
+		vision_confidence=float(_get_cfg("goFillForms.ingest.visionConfidence", 0.85) or 0.85),
+		vision_timeout_s=float(_get_cfg("goFillForms.ingest.visionTimeoutS", 60) or 60),
+	)
+	engines = race.get("engines") or {}
+	source = "ocr"
+	if engines.get("vision") == "used":
+		source = "ocr+vision" if engines.get("ocr") == "done" else "vision_llm"
+	data = race.get("data") if race.get("ok") else None
+	partial = None
+	if data is not None and source == "ocr" and not race.get("confident"):
+		data, partial = None, data
+	return {
+		"data": data,
+		"partial": partial,
+		"source": source,
+		"engines": engines,
+		"confidence": race.get("confidence"),
+		"field_sources": race.get("sources"),
+	}
+
+
+@tracing.traced()
 def read_input_and_convert_to_json() -> Dict[str, Any]:
 	"""Main entry: decide source and return ruhsat JSON + metadata.
 
@@ -263,14 +312,18 @@ def read_input_and_convert_to_json() -> Dict[str, Any]:
 				_log("INFO", "F3-INGEST", f"loaded companion json {stem_json}", component="F3")
 				return {"ok": True, "data": data, "meta": meta}
 
-		# Try LLM extraction
-		if not os.getenv("OPENAI_API_KEY"):
+		# Local OCR races the vision LLM; without a key only OCR runs
+		has_key = bool(llmReplay.api_key())
+		ext = extract_from_image(latest, model=model, temperature=temperature)
+		data, source = ext.get("data"), ext.get("source")
+		meta.update({k: ext[k] for k in ("engines", "confidence", "field_sources") if k in ext})
+		partial = {"partial": ext["partial"]} if ext.get("partial") else {}
+		if data is None and not has_key:
 			_log("WARN", "F3-INGEST", "OPENAI_API_KEY missing for vision extraction", component="F3")
-			return {"ok": False, "error": "no_key_for_vision", "meta": {**meta, "path": latest}}
-		data = _extract_with_llm(latest, model=model, temperature=temperature)
+			return {"ok": False, "error": "no_key_for_vision", **partial, "meta": {**meta, "path": latest}}
 		if data is not None:
-			meta.update({"source": "vision_llm", "path": latest})
-			_log("INFO", "F3-INGEST", f"vision extracted fields={list(data.keys())}", component="F3")
+			meta.update({"source": source, "path": latest})
+			_log("INFO", "F3-INGEST", f"{source} extracted fields={list(data.keys())}", component="F3")
 			# Optional persist
 			try:
 				if isinstance(persist_dir, str) and persist_dir.strip():
@@ -286,7 +339,7 @@ def read_input_and_convert_to_json() -> Dict[str, Any]:
 
 		# Vision tried but failed to extract JSON
 		_log("WARN", "F3-INGEST", "vision extract failed", component="F3", extra={"meta": {**meta, "path": latest}})
-		return {"ok": False, "error": "vision_extract_failed", "meta": {**meta, "path": latest}}
+		return {"ok": False, "error": "vision_extract_failed", **partial, "meta": {**meta, "path": latest}}
 
 	# No images in directory
 	_log("WARN", "F3-INGEST", "no images found in image_dir", component="F3", extra={"meta": meta})
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+"""requestProfiler
+
+On-demand profiling of live API requests (POST /api/admin/profile).
+
+An admin arms a session for the next N calls to one endpoint; each of those
+calls runs under cProfile in its handler thread while a sampler thread reads
+the same thread's stack every few ms. Per session this keeps
+- aggregated pstats  -> top functions by cumulative time
+- folded stack counts -> collapsed-stack text ("a;b;c 42" lines) for
+  flamegraph.pl / speedscope / inferno
+
+Only one request is profiled at a time (cProfile is process-wide on newer
+Pythons); concurrent calls to the same endpoint run unprofiled and do not
+use up the session's count. Nothing is recorded while no session is armed.
+"""
+
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path as _Path
+from typing import Any, Dict, Iterator, List, Optional
+import cProfile
+import pstats
+import sys
+import threading
+import time
+import uuid
+
+_ROOT = str(_Path(__file__).resolve().parents[2])  # production2
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_ROOT):
+        return filename[len(_ROOT):].lstrip("/\\")
+    for marker in ("site-packages/", "site-packages\\"):
+        i = filename.find(marker)
+        if i >= 0:
+            return filename[i + len(marker):]
+    return filename
+
+
+def _frame_label(code: Any) -> str:
+    # ';' separates frames in collapsed-stack lines (the count follows the last space)
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class ProfileSession:
+    def __init__(self, endpoint: str, count: int, interval_s: float) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.count = count
+        self.interval_s = interval_s
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.state = "armed"  # armed | done | cancelled
+        self.requests: List[Dict[str, Any]] = []
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "endpoint": self.endpoint, "state": self.state, "count": self.count,
+            "profiled": len(self.requests), "samples": self.samples, "interval_ms": round(self.interval_s * 1000, 3),
+            "created": self.created, "finished": self.finished,
+            "wall_ms_total": round(sum(r["wall_ms"] for r in self.requests), 1),
+        }
+
+    def top_functions(self, limit: int = 40, sort: str = "cumulative") -> List[Dict[str, Any]]:
+        if self.stats is None:
+            return []
+        idx = 3 if sort == "cumulative" else 2  # (cc, nc, tt, ct, callers)
+        rows = sorted(self.stats.stats.items(), key=lambda kv: kv[1][idx], reverse=True)[:max(1, limit)]  # type: ignore[attr-defined]
+        out = []
+        for (filename, line, func), (cc, nc, tt, ct, _callers) in rows:
+            out.append({
+                "function": f"{_short_path(filename)}:{line}({func})" if line else func,
+                "ncalls": nc, "primitive_calls": cc,
+                "tottime_ms": round(tt * 1000, 3), "cumtime_ms": round(ct * 1000, 3),
+                "percall_cum_ms": round(ct * 1000 / cc, 3) if cc else None,
+            })
+        return out
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Armed sessions per endpoint; profile(endpoint) wraps one handler call."""
+
+    def __init__(self, max_sessions: int = 20, max_count: int = 100, interval_ms: float = 5.0,
+                 max_stack_depth: int = 128) -> None:
+        self.max_sessions = max_sessions
+        self.max_count = max_count
+        self.interval_s = max(0.001, interval_ms / 1000.0)
+        self.max_stack_depth = max_stack_depth
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()  # one profiled request at a time
+        self._sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+
+    def arm(self, endpoint: str, count: int, interval_ms: Optional[float] = None) -> ProfileSession:
+        interval_s = self.interval_s if interval_ms is None else max(0.001, float(interval_ms) / 1000.0)
+        sess = ProfileSession(endpoint, max(1, min(int(count), self.max_count)), interval_s)
+        with self._lock:
+            self._sessions[sess.id] = sess
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return sess
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [s.summary() for s in reversed(self._sessions.values())]
+
+    def cancel(self, session_id: str) -> bool:
+        with self._lock:
+            sess = self._sessions.get(session_id)
+            if sess is None or sess.state != "armed":
+                return False
+            sess.state = "cancelled"
+            sess.finished = time.time()
+            return True
+
+    def _claim(self, endpoint: str) -> Optional[ProfileSession]:
+        with self._lock:
+            for sess in self._sessions.values():
+                if sess.state == "armed" and sess.endpoint == endpoint:
+                    return sess
+        return None
+
+    def _sample(self, ident: int, sess: ProfileSession, stop: threading.Event) -> None:
+        while not stop.wait(sess.interval_s):
+            frame = sys._current_frames().get(ident)
+            labels: List[str] = []
+            while frame is not None and len(labels) < self.max_stack_depth:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                with self._lock:
+                    sess.stacks[";".join(reversed(labels))] += 1
+                    sess.samples += 1
+
+    @contextmanager
+    def profile(self, endpoint: str, **meta: Any) -> Iterator[None]:
+        """Profile this call if a session is armed for endpoint (cheap no-op otherwise)."""
+        sess = self._claim(endpoint) if self._sessions else None
+        if sess is None or not self._busy.acquire(blocking=False):
+            yield
+            return
+        if sess.state != "armed":  # completed by the request that held _busy
+            self._busy.release()
+            yield
+            return
+        prof: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            prof.enable()  # type: ignore[union-attr]
+        except ValueError:  # another profiler (debugger, coverage) owns the hook: stacks only
+            prof = None
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(threading.get_ident(), sess, stop),
+                                   name=f"profile-{sess.id}", daemon=True)
+        sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_ms = round((time.perf_counter() - t0) * 1000, 1)
+            if prof is not None:
+                prof.disable()
+            stop.set()
+            sampler.join()
+            with self._lock:
+                if prof is not None:
+                    if sess.stats is None:
+                        sess.stats = pstats.Stats(prof)
+                    else:
+                        sess.stats.add(prof)
+                sess.requests.append({"ts": time.time(), "wall_ms": wall_ms, **meta})
+                if sess.state == "armed" and len(sess.requests) >= sess.count:
+                    sess.state = "done"
+                    sess.finished = time.time()
+            self._busy.release()
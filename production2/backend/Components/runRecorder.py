@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+"""runRecorder
+
+Write-behind persistence of F1/F2/F3/TsX steps into the repo's SQLite
+database (memory/db.py: runs, run_steps, form_maps, notifications).
+
+Endpoints call record_step() after building their response; it only does a
+non-blocking put on a bounded queue (full queue -> the step is dropped and
+counted, never waited on). A daemon worker drains the queue in batches
+(batchSize rows or flushIntervalMs, whichever comes first), derives the
+page fingerprint/host, and writes each batch with the bulk inserts.
+
+Runs are keyed by the UI session_id: the first step of a session starts a
+run, a final page (PDF evidence) completes it, and the next step after that
+(or a TsX hard_reset) starts a new one. Only the maxSessions most recently
+active sessions are tracked; an evicted session's next step starts a new run.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import hashlib
+import importlib.util
+import json
+import queue
+import sys
+import threading
+import time
+from pathlib import Path as _Path
+
+_this = _Path(__file__).resolve()
+_root = _this.parents[2]  # production2
+_REPO = _root.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+try:
+    from logging_utils import log  # type: ignore
+except Exception:  # pragma: no cover - imported outside the backend dir
+    def log(*args: Any, **kwargs: Any) -> None:
+        pass
+
+_STOP = object()
+
+
+def _load_repo_db() -> Any:
+    """memory/db.py of the repo root (the name `memory` is taken by production2/memory.py)."""
+    mod = sys.modules.get("_repo_memory")
+    if mod is None:
+        init = _REPO / "memory" / "__init__.py"
+        spec = importlib.util.spec_from_file_location("_repo_memory", init, submodule_search_locations=[str(init.parent)])
+        if spec is None or spec.loader is None:
+            raise ImportError(f"cannot load {init}")
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules["_repo_memory"] = mod
+        try:
+            spec.loader.exec_module(mod)
+        except Exception:
+            sys.modules.pop("_repo_memory", None)
+            raise
+    return mod
+
+
+def _host_of(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    try:
+        return urlparse(url).hostname or None
+    except Exception:
+        return None
+
+
+def _phase_of(op: str, result: Dict[str, Any]) -> str:
+    details = result.get("details") if isinstance(result.get("details"), dict) else {}
+    for v in (result.get("state"), details.get("phase"), result.get("page_kind"), result.get("reason"), result.get("next")):
+        if isinstance(v, str) and v:
+            return v
+    return op
+
+
+def _is_final(result: Dict[str, Any]) -> bool:
+    return bool(result.get("is_final") or result.get("state") == "final_page_detected" or result.get("next") == "final")
+
+
+def _summary(result: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """(detail, field_mapping) kept for a step; raw HTML and prompts are not stored."""
+    details = result.get("details") if isinstance(result.get("details"), dict) else {}
+    mapping = result.get("field_mapping") or details.get("field_mapping")
+    detail: Dict[str, Any] = {}
+    actions = result.get("actions") if "actions" in result else details.get("actions")
+    if actions:
+        detail["actions"] = actions
+    for k in ("error", "method", "success_rate", "changed", "selector", "hits", "pdf_links"):
+        v = result.get(k, details.get(k))
+        if v not in (None, "", [], {}):
+            detail[k] = v
+    return detail, (mapping if isinstance(mapping, dict) and mapping else None)
+
+
+class RunRecorder:
+    """Bounded write-behind queue in front of memory/db.Database."""
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 200,
+        flush_interval_s: float = 0.25,
+        max_queue: int = 1000,
+        max_sessions: int = 500,
+        enabled: bool = True,
+    ) -> None:
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self.max_sessions = max(1, int(max_sessions))
+        self.enabled = enabled
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._db: Any = None
+        self._worker: Optional[threading.Thread] = None
+        # session -> [run_id, host, completed], least recently active first; only touched by the worker
+        self._sessions: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._stats = {"queued": 0, "dropped": 0, "written": 0, "batches": 0, "errors": 0}
+
+    # --- request side -------------------------------------------------
+    def record_step(
+        self,
+        flow: str,
+        op: Optional[str],
+        result: Any,
+        *,
+        session_id: Optional[str] = None,
+        url: Optional[str] = None,
+        html: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        latency_ms: float = 0.0,
+        new_run: bool = False,
+    ) -> bool:
+        """Queue one step; returns False when disabled or the queue is full."""
+        if not self.enabled:
+            return False
+        self._ensure_worker()
+        item = (flow, op or "", result if isinstance(result, dict) else {}, session_id or "default",
+                url, html, fingerprint, float(latency_ms), bool(new_run), time.time())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+        with self._lock:
+            self._stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written (True) or timeout (False)."""
+        if not self.enabled or self._worker is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+        out["pending"] = self._queue.qsize()
+        return out
+
+    def database(self) -> Any:
+        with self._lock:
+            if self._db is None:
+                _Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = _load_repo_db().Database(self.db_path)
+            return self._db
+
+    # --- queries (pending steps are flushed first, briefly) ---------------
+    def run_history(self, limit: int = 50, host: Optional[str] = None) -> List[Dict[str, Any]]:
+        self.flush(timeout=1.0)
+        return self.database().get_run_history(limit=limit, host=host)
+
+    def run_steps(self, run_id: int) -> Dict[str, Any]:
+        self.flush(timeout=1.0)
+        db = self.database()
+        run = db.get_run_details(run_id)
+        if run is None:
+            return {}
+        steps = db.get_run_steps(run_id)
+        for s in steps:
+            if s.get("detail_json"):
+                s["detail"] = json.loads(s.pop("detail_json"))
+            else:
+                s.pop("detail_json", None)
+        return {"run": run, "steps": steps}
+
+    def host_success_rates(self, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        self.flush(timeout=1.0)
+        return self.database().get_host_success_rates(since=since)
+
+    def close(self, timeout: float = 5.0) -> None:
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(_STOP)
+            worker.join(timeout)
+        self._worker = None
+        with self._lock:
+            db, self._db = self._db, None
+        if db is not None:
+            db.close()
+
+    # --- worker side --------------------------------------------------
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="run-recorder", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            try:
+                first = self._queue.get()
+            except Exception:
+                continue
+            deadline = time.monotonic() + self.flush_interval_s
+            pending = [first]
+            while pending:
+                it = pending.pop()
+                if it is _STOP:
+                    stop = True
+                elif isinstance(it, threading.Event):
+                    waiters.append(it)
+                else:
+                    batch.append(it)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for ev in waiters:
+                ev.set()
+            if stop:
+                return
+
+    def _write(self, batch: List[Any]) -> None:
+        try:
+            db = self.database()
+            status = _load_repo_db().AutomationStatus
+            steps: List[Tuple[Any, ...]] = []
+            form_maps: List[Tuple[Any, ...]] = []
+            notes: List[Tuple[Any, ...]] = []
+            run_state: Dict[int, Tuple[Any, Optional[str]]] = {}
+            for flow, op, result, session_id, url, html, fp, latency_ms, new_run, _ts in batch:
+                sess = self._sessions.get(session_id)
+                if sess is None or sess[2] or new_run:
+                    run_id = db.start_run(0)
+                    sess = [run_id, sess[1] if sess else None, False]
+                    self._sessions[session_id] = sess
+                    run_state[run_id] = (status.Running, None)
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                run_id = sess[0]
+                sess[1] = _host_of(url) or sess[1]
+                if fp is None and html:
+                    fp = hashlib.sha256(html.encode("utf-8")).hexdigest()
+                phase = _phase_of(op, result)
+                ok = result.get("ok", True) is not False
+                detail, mapping = _summary(result)
+                usage = result.get("llm_usage") if isinstance(result.get("llm_usage"), dict) else {}
+                steps.append((run_id, flow, op, phase, sess[1], fp, int(ok), round(latency_ms, 2),
+                               int(usage.get("calls") or 0), int(usage.get("total_tokens") or 0),
+                               json.dumps(detail, ensure_ascii=False, default=str) if detail else None))
+                if mapping:
+                    form_maps.append((run_id, phase, json.dumps(mapping, ensure_ascii=False, default=str)))
+                if not ok:
+                    err = str(result.get("error") or phase)
+                    notes.append((run_id, "error", f"{flow}/{op}: {err}"[:500]))
+                    run_state[run_id] = (run_state.get(run_id, (status.Running, None))[0], err[:500])
+                if _is_final(result):
+                    sess[2] = True
+                    run_state[run_id] = (status.Completed, run_state.get(run_id, (None, None))[1])
+            db.save_run_steps_bulk(steps)
+            if form_maps:
+                db.save_form_maps_bulk(form_maps)
+            if notes:
+                db.log_notifications_bulk(notes)
+            for run_id, (st, err) in run_state.items():
+                db.update_run_status(run_id, st, err)
+            with self._lock:
+                self._stats["written"] += len(steps)
+                self._stats["batches"] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            log("ERROR", "RUN-RECORDER", f"batch of {len(batch)} steps not persisted: {e}", component="RunRecorder")
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+"""tracing
+
+Lightweight request tracing: which stage of a slow dev-run / F3 call took
+the time.
+
+- TracingMiddleware opens a root span per sampled API request (rate
+  api.tracing.sampleRate; `X-Trace: 1` header or `?trace=1` forces one) and
+  returns the id in the `X-Trace-Id` response header.
+- The current span lives in a ContextVar, so it follows the request into
+  FastAPI's threadpool; @traced() / span() add nested spans in Features and
+  Components, metrics.stage() adds one per stage. Without an active trace
+  they cost one ContextVar lookup.
+- Finished traces are kept in a bounded in-RAM ring and exported by
+  GET /api/trace/<id> as a span tree (default) or OTLP/JSON
+  (?format=otlp, loadable by OpenTelemetry tooling).
+
+Threads started inside a request (e.g. the ruhsat OCR/vision race) join
+the trace when their target runs via contextvars.copy_context().run.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import random
+import sys
+import threading
+import time
+
+SERVICE_NAME = "production2-backend"
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def _attr(v: Any) -> Any:
+    return v if isinstance(v, (str, int, float, bool)) or v is None else str(v)[:200]
+
+
+class _Trace:
+    __slots__ = ("trace_id", "name", "spans", "dropped", "max_spans", "lock", "started")
+
+    def __init__(self, trace_id: str, name: str, max_spans: int) -> None:
+        self.trace_id = trace_id
+        self.name = name
+        self.spans: List["_Span"] = []
+        self.dropped = 0
+        self.max_spans = max_spans
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def add(self, span: "_Span") -> bool:
+        with self.lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return False
+            self.spans.append(span)
+            return True
+
+
+class _Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attrs", "error", "thread")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: Optional[str], attrs: Dict[str, Any],
+                 start_ns: Optional[int] = None) -> None:
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attrs = {k: _attr(v) for k, v in attrs.items()}
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+
+def _shared(attr: str) -> Any:
+    # imported as Components.tracing and backend.Components.tracing: the two
+    # copies must see the same current span and store the same traces
+    for name in ("Components.tracing", "backend.Components.tracing"):
+        mod = sys.modules.get(name)
+        if name != __name__ and getattr(mod, attr, None) is not None:
+            return getattr(mod, attr)
+    return None
+
+
+_CURRENT: ContextVar[Optional[_Span]] = _shared("_CURRENT") or ContextVar("p2_trace_span", default=None)
+
+
+class Tracer:
+    """Sampling decision + bounded store of finished traces."""
+
+    def __init__(self, sample_rate: float = 0.1, max_traces: int = 200, max_spans: int = 2000) -> None:
+        self.sample_rate = sample_rate
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, _Trace]" = OrderedDict()
+        self._stats = {"started": 0, "unsampled": 0}
+
+    def configure(self, sample_rate: Optional[float] = None, max_traces: Optional[int] = None,
+                  max_spans: Optional[int] = None) -> None:
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        if max_traces is not None:
+            self.max_traces = max(1, int(max_traces))
+        if max_spans is not None:
+            self.max_spans = max(1, int(max_spans))
+
+    def sampled(self, force: bool = False) -> bool:
+        ok = force or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        with self._lock:
+            self._stats["started" if ok else "unsampled"] += 1
+        return ok
+
+    @contextmanager
+    def trace(self, name: str, force: bool = False, **attrs: Any) -> Iterator[Optional[str]]:
+        """Root span for one unit of work; yields the trace id (None when not sampled)."""
+        if _CURRENT.get() is not None or not self.sampled(force):
+            yield None
+            return
+        tr = _Trace(_new_id(128), name, self.max_spans)
+        root = _Span(tr, name, None, attrs)
+        tr.add(root)
+        token = _CURRENT.set(root)
+        try:
+            yield tr.trace_id
+        except BaseException as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _CURRENT.reset(token)
+            with self._lock:
+                self._traces[tr.trace_id] = tr
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[_Trace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces.values())[-max(0, limit):]
+        out = []
+        for tr in reversed(traces):
+            root = tr.spans[0]
+            out.append({"trace_id": tr.trace_id, "name": tr.name, "ts": tr.started,
+                        "duration_ms": _ms(root.start_ns, root.end_ns), "spans": len(tr.spans),
+                        "error": root.error, "attrs": root.attrs})
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "stored": len(self._traces), "sample_rate": self.sample_rate}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+tracer: Tracer = _shared("tracer") or Tracer()
+
+
+# --- instrumentation API --------------------------------------------------------
+
+def current_trace_id() -> Optional[str]:
+    sp = _CURRENT.get()
+    return sp.trace.trace_id if sp is not None else None
+
+
+def set_attrs(**attrs: Any) -> None:
+    """Annotate the current span (no-op outside a trace)."""
+    sp = _CURRENT.get()
+    if sp is not None:
+        sp.attrs.update({k: _attr(v) for k, v in attrs.items()})
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    parent = _CURRENT.get()
+    if parent is None:
+        yield
+        return
+    sp = _Span(parent.trace, name, parent.span_id, attrs)
+    if not parent.trace.add(sp):
+        yield
+        return
+    token = _CURRENT.set(sp)
+    try:
+        yield
+    except BaseException as e:
+        sp.error = type(e).__name__
+        raise
+    finally:
+        sp.end_ns = time.time_ns()
+        _CURRENT.reset(token)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator: run the function inside span(name or module.function)."""
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _CURRENT.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def record_span(name: str, seconds: float, **attrs: Any) -> None:
+    """Add an already finished child span that ended now (for code timed by hand)."""
+    parent = _CURRENT.get()
+    if parent is None:
+        return
+    end = time.time_ns()
+    sp = _Span(parent.trace, name, parent.span_id, attrs, start_ns=end - int(seconds * 1e9))
+    sp.end_ns = end
+    parent.trace.add(sp)
+
+
+# --- export -------------------------------------------------------------------
+
+def _ms(start_ns: int, end_ns: Optional[int]) -> Optional[float]:
+    return round((end_ns - start_ns) / 1e6, 3) if end_ns is not None else None
+
+
+def to_tree(tr: _Trace) -> Dict[str, Any]:
+    """Nested span tree; times in ms relative to the root span start."""
+    with tr.lock:
+        spans = list(tr.spans)
+    t0 = spans[0].start_ns
+    nodes = {s.span_id: {"name": s.name, "span_id": s.span_id, "start_ms": round((s.start_ns - t0) / 1e6, 3),
+                         "duration_ms": _ms(s.start_ns, s.end_ns), "attrs": s.attrs, "error": s.error,
+                         "thread": s.thread, "children": []} for s in spans}
+    root = nodes[spans[0].span_id]
+    for s in spans[1:]:
+        parent = nodes.get(s.parent_id or "") or root
+        parent["children"].append(nodes[s.span_id])
+    for n in nodes.values():
+        n["children"].sort(key=lambda c: c["start_ms"])
+    return {"trace_id": tr.trace_id, "name": tr.name, "spans": len(spans), "dropped_spans": tr.dropped, "root": root}
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": "" if v is None else str(v)}
+
+
+def to_otlp(tr: _Trace) -> Dict[str, Any]:
+    """OTLP/JSON (ExportTraceServiceRequest) with one resource and scope."""
+    with tr.lock:
+        spans = list(tr.spans)
+    out = []
+    for s in spans:
+        item: Dict[str, Any] = {
+            "traceId": tr.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,  # SERVER root, INTERNAL children
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in {**s.attrs, "thread.name": s.thread}.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        out.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "production2.tracing"}, "spans": out}],
+    }]}
+
+
+# --- ASGI middleware ------------------------------------------------------------
+
+class TracingMiddleware:
+    """Root span per sampled HTTP request under the given path prefixes."""
+
+    def __init__(self, app: Any, prefixes: Iterable[str] = ("/api/",), exclude: Iterable[str] = ()) -> None:
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        path = scope.get("path") or ""
+        if scope.get("type") != "http" or not path.startswith(self.prefixes) or path.startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        force = headers.get(b"x-trace", b"") in (b"1", b"true") or b"trace=1" in (scope.get("query_string") or b"")
+        with tracer.trace(f"{scope.get('method', 'GET')} {path}", force=force, **{"http.route": path}) as trace_id:
+            if trace_id is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_id(message: Dict[str, Any]) -> None:
+                if message.get("type") == "http.response.start":
+                    set_attrs(**{"http.status_code": message.get("status")})
+                    message = {**message, "headers": list(message.get("headers") or []) + [(b"x-trace-id", trace_id.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
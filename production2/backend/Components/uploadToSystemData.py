@@ -23,6 +23,7 @@ if str(_ROOT) not in _sys.path:
     _sys.path.insert(0, str(_ROOT))
 
 from config import get  # type: ignore
+from . import tracing
 try:
     from logging_utils import log as _log  # type: ignore
 except Exception:
@@ -127,6 +128,7 @@ def stage_uploaded_file(data: bytes, original_name: str) -> Dict[str, Any]:
     return {"ok": True, "path": str(out)}
 
 
+@tracing.traced()
 def ensure_f3_data_ready() -> Dict[str, Any]:
     """Best-effort preparation before F3 ingest.
 
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+"""wireCompression
+
+Wire-size helpers for the production2 API:
+
+- WireCompressionMiddleware (pure ASGI):
+    * request bodies sent with Content-Encoding: gzip | zstd are decoded
+      before FastAPI parses the JSON (415 for other encodings, 400 if corrupt)
+    * responses >= minimum_size are compressed with zstd (when the optional
+      `zstandard` package is installed and the client accepts it) or gzip
+    * streaming responses (text/event-stream) and already-encoded responses
+      pass through untouched
+- strip_diagnostics: drops large diagnostic blobs (analysis, debug_dumps,
+  raw, prompt_snippet) from a response payload for ?verbose=0 callers.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import gzip
+import zlib
+
+try:  # optional dependency
+    import zstandard as _zstd  # type: ignore
+except Exception:  # pragma: no cover - depends on environment
+    _zstd = None
+
+
+# Keys removed by ?verbose=0 (at any depth of the response payload)
+DIAGNOSTIC_KEYS = frozenset({"analysis", "debug_dumps", "raw", "prompt_snippet"})
+
+_STREAMING_TYPES = ("text/event-stream",)
+
+
+def zstd_available() -> bool:
+    return _zstd is not None
+
+
+def strip_diagnostics(payload: Any, keys: Iterable[str] = DIAGNOSTIC_KEYS) -> Any:
+    """Return a copy of payload without diagnostic keys (input is not mutated).
+
+    Callers may hold cached results (e.g. TsX derived cache), so nested dicts
+    and lists are rebuilt instead of edited in place.
+    """
+    drop = keys if isinstance(keys, (set, frozenset)) else frozenset(keys)
+    if isinstance(payload, dict):
+        return {k: strip_diagnostics(v, drop) for k, v in payload.items() if k not in drop}
+    if isinstance(payload, list):
+        return [strip_diagnostics(v, drop) for v in payload]
+    return payload
+
+
+def compress_body(data: bytes, encoding: str, gzip_level: int = 6, zstd_level: int = 3) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=gzip_level)
+    if encoding == "zstd":
+        if _zstd is None:
+            raise ValueError("zstd_unavailable")
+        return _zstd.ZstdCompressor(level=zstd_level).compress(data)
+    if encoding == "identity":
+        return data
+    raise ValueError(f"unsupported_encoding: {encoding}")
+
+
+def decompress_body(data: bytes, encoding: str, max_size: int = 0) -> bytes:
+    """Decode a gzip/zstd request body; max_size > 0 bounds the decoded size."""
+    enc = (encoding or "identity").strip().lower()
+    limit = max_size if max_size > 0 else -1
+    if enc in ("identity", ""):
+        return data
+    if enc in ("gzip", "x-gzip"):
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        out = d.decompress(data, limit + 1 if limit > 0 else 0)
+        if limit > 0 and (len(out) > limit or d.unconsumed_tail):
+            raise OverflowError("body_too_large")
+        return out + d.flush()
+    if enc == "zstd":
+        if _zstd is None:
+            raise LookupError("zstd_unavailable")
+        parts: List[bytes] = []
+        total = 0
+        with _zstd.ZstdDecompressor().stream_reader(data) as reader:
+            while True:
+                chunk = reader.read(1 << 20)
+                if not chunk:
+                    break
+                total += len(chunk)
+                if limit > 0 and total > limit:
+                    raise OverflowError("body_too_large")
+                parts.append(chunk)
+        return b"".join(parts)
+    raise LookupError(f"unsupported_encoding: {enc}")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick zstd > gzip from an Accept-Encoding header (q=0 means refused)."""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        bits = [b.strip() for b in part.split(";")]
+        name = bits[0].lower()
+        if not name:
+            continue
+        q = 1.0
+        for b in bits[1:]:
+            if b.startswith("q="):
+                try:
+                    q = float(b[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    if _zstd is not None and accepted.get("zstd", 0) > 0:
+        return "zstd"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for k, v in headers:
+        if k.lower() == name:
+            return v.decode("latin-1")
+    return None
+
+
+class WireCompressionMiddleware:
+    """ASGI middleware for compressed request bodies and responses."""
+
+    def __init__(
+        self,
+        app: Any,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        max_request_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.max_request_bytes = max_request_bytes
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = list(scope.get("headers") or [])
+        req_enc = (_header(headers, b"content-encoding") or "").strip().lower()
+        if req_enc and req_enc != "identity":
+            body = b""
+            while True:
+                msg = await receive()
+                body += msg.get("body", b"")
+                if not msg.get("more_body"):
+                    break
+            try:
+                body = decompress_body(body, req_enc, self.max_request_bytes)
+            except LookupError as e:
+                await self._plain(send, 415, str(e))
+                return
+            except OverflowError as e:
+                await self._plain(send, 413, str(e))
+                return
+            except Exception:
+                await self._plain(send, 400, "invalid compressed body")
+                return
+            scope = dict(scope)
+            scope["headers"] = [
+                (k, v) for k, v in headers if k.lower() not in (b"content-encoding", b"content-length")
+            ] + [(b"content-length", str(len(body)).encode("latin-1"))]
+            sent = False
+
+            async def receive() -> Dict[str, Any]:  # type: ignore[no-redef]
+                nonlocal sent
+                if sent:
+                    return {"type": "http.disconnect"}
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+
+        encoding = choose_encoding(_header(headers, b"accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                resp_headers = list(message.get("headers") or [])
+                ctype = (_header(resp_headers, b"content-type") or "").lower()
+                if _header(resp_headers, b"content-encoding") or ctype.startswith(_STREAMING_TYPES):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            data = b"".join(chunks)
+            resp_headers = [(k, v) for k, v in start.get("headers") or [] if k.lower() != b"content-length"]
+            if len(data) >= self.minimum_size:
+                data = compress_body(data, encoding, self.gzip_level, self.zstd_level)
+                resp_headers.append((b"content-encoding", encoding.encode("latin-1")))
+                resp_headers.append((b"vary", b"Accept-Encoding"))
+            resp_headers.append((b"content-length", str(len(data)).encode("latin-1")))
+            await send({**start, "headers": resp_headers})
+            await send({"type": "http.response.body", "body": data, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _plain(send: Any, status: int, text: str) -> None:
+        body = text.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode("latin-1"))],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+"""batchFillForms feature: queue workers for the (document, host, task) fan-out.
+
+Each worker leases jobs from Components/jobQueue.py and runs the same
+static-first / LLM-fallback pipeline the TsX endpoint uses:
+
+  detectFinalPage -> analyzePageStaticFillForms -> validateCriticalFields
+  -> checkShouldFallbackToLLM -> (analyzePage via LLM for the missing keys)
+  -> buildFillPlan
+
+The page HTML comes from a page source callable (job -> (html, url)). The
+default one reads payload["html"] / payload["html_path"]; a browser-backed
+source can be plugged in without touching the queue. Exceptions and
+ok=False steps fail the attempt (retry with backoff, then dead letter);
+a missing document or page goes to the dead letter state at once. A
+computed outcome such as need_llm_fallback completes the job.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pathlib import Path as _Path
+import json as _json
+import os
+import sys
+import threading
+import time
+import uuid
+
+_this = _Path(__file__).resolve()
+_root = _this.parents[2]
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from Components.jobQueue import JobQueue, WorkJob  # type: ignore
+from Components import tracing  # type: ignore
+from Features.fillFormsUserTaskPageStatic import (  # type: ignore
+    plan_analyze_page_static_fill_forms,
+    plan_validate_critical_fields,
+    plan_detect_final_page,
+    plan_check_should_fallback_to_llm,
+)
+from Features.fillFormsUserTaskPage import plan_analyze_page, plan_build_fill_plan  # type: ignore
+
+try:
+    from logging_utils import log  # type: ignore
+except Exception:
+    def log(*args: Any, **kwargs: Any) -> None:
+        pass
+
+PageSource = Callable[[WorkJob], Tuple[str, Optional[str]]]
+
+
+class StepFailed(RuntimeError):
+    """A pipeline step returned ok=False; the job attempt fails (and retries unless retryable=False)."""
+
+    def __init__(self, message: str, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _resolve(path: str) -> _Path:
+    p = _Path(path)
+    return p if p.is_absolute() else _root / p
+
+
+def load_document(document: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Ruhsat JSON for a job: payload.ruhsat_json, a .json file, or an image (OCR racing the Vision LLM)."""
+    payload = payload or {}
+    if isinstance(payload.get("ruhsat_json"), dict):
+        return payload["ruhsat_json"]
+    path = _resolve(document)
+    if not path.exists():
+        raise StepFailed(f"document not found: {document}", retryable=False)
+    if path.suffix.lower() == ".json":
+        data = _json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, dict) or not data:
+            raise StepFailed(f"document is not a ruhsat object: {document}", retryable=False)
+        return data
+    # Same extraction the F3 ingest uses for the latest upload
+    from Components.readInputConvertJson import extract_from_image  # type: ignore
+    data = extract_from_image(str(path)).get("data")
+    if not data:
+        raise StepFailed(f"vision_extract_failed: {document}")
+    return data
+
+
+def payload_page_source(job: WorkJob) -> Tuple[str, Optional[str]]:
+    """Default page source: payload.html or payload.html_path (+ payload.url)."""
+    html = job.payload.get("html")
+    if not html and job.payload.get("html_path"):
+        html = _resolve(str(job.payload["html_path"])).read_text(encoding="utf-8", errors="ignore")
+    if not html:
+        raise StepFailed(f"no page for host {job.host}: payload needs html or html_path", retryable=False)
+    return html, job.payload.get("url") or f"https://{job.host}/"
+
+
+def plan_fill_job(ruhsat_json: Dict[str, Any], html: str, url: Optional[str], task: str, use_llm: bool = True) -> Dict[str, Any]:
+    """Static-first / LLM-fallback fill plan for one page (no browser actions)."""
+    final_check = plan_detect_final_page(html)
+    if final_check.get("ok") and final_check.get("is_final"):
+        return {"ok": True, "state": "final_page_detected", "method": "static_detection", "cta_buttons": final_check.get("hits", [])}
+
+    analysis = plan_analyze_page_static_fill_forms(html, url, task)
+    # static_analyze_page reports ok=False for "nothing mapped"; only an error fails the attempt
+    if analysis.get("error"):
+        raise StepFailed(f"static analysis failed: {analysis.get('error')}")
+    field_mapping: Dict[str, Any] = dict(analysis.get("field_mapping") or {})
+    if not field_mapping and not use_llm:
+        return {"ok": True, "state": "no_forms_detected", "method": "static_detection"}
+
+    method = "static_heuristics"
+    validation: Dict[str, Any] = {}
+    if field_mapping:
+        validation = plan_validate_critical_fields(field_mapping, ruhsat_json, task)
+        fallback = plan_check_should_fallback_to_llm(validation, task)
+        need_llm = bool(fallback.get("should_fallback"))
+    else:
+        fallback = {"reason": "no_static_mapping"}
+        need_llm = True
+    llm_actions: List[Any] = []
+    llm_usage: Dict[str, Any] = {}
+    if need_llm:
+        if not use_llm:
+            return {
+                "ok": True, "state": "need_llm_fallback", "method": "static_to_llm",
+                "fallback_reason": fallback.get("reason"), "field_mapping": field_mapping,
+                "missing_critical": validation.get("missing_critical", []),
+            }
+        llm = plan_analyze_page(html, ruhsat_json, list(field_mapping.keys()))
+        if not llm.get("ok"):
+            raise StepFailed(f"llm analyzePage failed: {llm.get('error')}")
+        llm_usage = llm.get("llm_usage") or {}
+        if llm.get("page_kind") == "final_activation":
+            return {"ok": True, "state": "final_page_detected", "method": "llm", "llm_usage": llm_usage}
+        # static selectors win; the LLM fills the keys the static pass missed
+        merged = dict(llm.get("field_mapping") or {})
+        merged.update(field_mapping)
+        field_mapping = merged
+        llm_actions = llm.get("actions") or []
+        method = "static+llm"
+        validation = plan_validate_critical_fields(field_mapping, ruhsat_json, task) if field_mapping else {}
+
+    if not field_mapping:
+        return {"ok": True, "state": "no_forms_detected", "method": method, "llm_usage": llm_usage}
+    plan = plan_build_fill_plan({"field_mapping": field_mapping, "llm_actions": llm_actions}, ruhsat_json)
+    if not plan.get("ok"):
+        raise StepFailed(f"buildFillPlan failed: {plan.get('error')}")
+    return {
+        "ok": True,
+        "state": "plan_ready",
+        "method": method,
+        "field_mapping": field_mapping,
+        "fill_plan": plan.get("plan"),
+        "success_rate": validation.get("success_rate"),
+        "missing_critical": validation.get("missing_critical", []),
+        "llm_usage": llm_usage,
+    }
+
+
+class QueueWorker:
+    """Lease -> run pipeline -> complete/fail loop; the lease is renewed while a job runs."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        page_source: Optional[PageSource] = None,
+        worker_id: Optional[str] = None,
+        lease_s: float = 120.0,
+        poll_s: float = 1.0,
+        use_llm: bool = True,
+    ) -> None:
+        self.queue = queue
+        self.page_source = page_source or payload_page_source
+        self.worker_id = worker_id or f"w-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.use_llm = use_llm
+        self.processed = 0
+
+    def process(self, job: WorkJob) -> Optional[str]:
+        """Run one leased job; returns the state it ended in (done/queued/dead, None if the lease was lost)."""
+        stop = threading.Event()
+
+        def _renew() -> None:
+            while not stop.wait(self.lease_s / 3.0):
+                if not self.queue.heartbeat(job.id, self.worker_id, self.lease_s):
+                    return
+
+        hb = threading.Thread(target=_renew, name=f"lease-{job.id}", daemon=True)
+        hb.start()
+        t0 = time.perf_counter()
+        try:
+            ruhsat = load_document(job.document, job.payload)
+            html, url = self.page_source(job)
+            result = plan_fill_job(ruhsat, html, url, job.task, use_llm=self.use_llm)
+            result["elapsed_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+            ok = self.queue.complete(job.id, self.worker_id, result)
+            state = "done" if ok else None
+            log("INFO", "QUEUE-JOB-DONE", f"job {job.id} {job.host} {result.get('state')}", component="BatchFill", extra={
+                "document": job.document, "host": job.host, "task": job.task, "elapsed_ms": result["elapsed_ms"],
+            })
+        except Exception as e:
+            state = self.queue.fail(job.id, self.worker_id, f"{type(e).__name__}: {e}", retryable=getattr(e, "retryable", True))
+            log("WARN", "QUEUE-JOB-FAIL", f"job {job.id} {job.host} attempt {job.attempts}/{job.max_attempts}: {e}", component="BatchFill", extra={
+                "document": job.document, "host": job.host, "next_state": state,
+            })
+        finally:
+            stop.set()
+        self.processed += 1
+        return state
+
+    def run_once(self) -> bool:
+        jobs = self.queue.lease(self.worker_id, self.lease_s, limit=1)
+        for job in jobs:
+            # sampled like API requests; the span tree shows up under GET /api/trace
+            with tracing.tracer.trace("queue.job", job_id=job.id, host=job.host, task=job.task):
+                self.process(job)
+        return bool(jobs)
+
+    def run(self, stop: threading.Event, max_jobs: Optional[int] = None, exit_when_idle: bool = False) -> int:
+        while not stop.is_set() and (max_jobs is None or self.processed < max_jobs):
+            if not self.run_once():
+                if exit_when_idle:
+                    break
+                stop.wait(self.poll_s)
+        return self.processed
+
+
+def start_workers(queue: JobQueue, count: int, **kwargs: Any) -> Tuple[List[threading.Thread], threading.Event]:
+    """Start count daemon worker threads sharing one stop event."""
+    stop = threading.Event()
+    threads: List[threading.Thread] = []
+    for i in range(max(0, int(count))):
+        worker = QueueWorker(queue, **kwargs)
+        t = threading.Thread(target=worker.run, args=(stop,), name=f"queue-worker-{i}", daemon=True)
+        t.start()
+        threads.append(t)
+    return threads, stop
@@ -12,7 +12,7 @@ Provides planning (no direct execution) for actions:
 Also exposes plan_full_fill_flow to chain analyzePage + buildFillPlan when needed.
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import asdict
 from pathlib import Path as _Path
 import sys
@@ -26,6 +26,8 @@ if str(_root) not in sys.path:
 
 from Components.readInputConvertJson import read_input_and_convert_to_json  # type: ignore
 from Components.letLLMMapUserPageForms import map_json_to_html_fields  # type: ignore
+from Components import metrics  # type: ignore
+from Components import tracing  # type: ignore
 from Components.detectFinalPageArrivedinUserTask import detect_final_page_arrived  # type: ignore
 from Components.fillPageFromMapping import fill_and_go  # type: ignore
 from Components.detectWepPageChange import detect_web_page_change  # type: ignore
@@ -45,6 +47,7 @@ def _fingerprint(html: Optional[str]) -> Optional[str]:
 
 # ------------------------- loadRuhsatFromTmp -------------------------
 
+@tracing.traced()
 def plan_load_ruhsat_json() -> Dict[str, Any]:
 	"""Return ruhsat JSON via ingest pipeline.
 
@@ -63,11 +66,12 @@ def plan_load_ruhsat_json() -> Dict[str, Any]:
 
 # ------------------------- analyzePage -------------------------
 
-def plan_analyze_page(filtered_html: Optional[str], ruhsat_json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+@tracing.traced()
+def plan_analyze_page(filtered_html: Optional[str], ruhsat_json: Optional[Dict[str, Any]] = None, mapped_keys: Optional[List[str]] = None) -> Dict[str, Any]:
 	if not filtered_html:
 		return {"ok": False, "error": "no_filtered_html"}
 	try:
-		out = map_json_to_html_fields(filtered_html, ruhsat_json or {})
+		out = map_json_to_html_fields(filtered_html, ruhsat_json or {}, mapped_keys=mapped_keys)
 		# Attach a simple fingerprint for observability
 		fp = _fingerprint(filtered_html)
 		out["fingerprint"] = fp
@@ -79,10 +83,11 @@ def plan_analyze_page(filtered_html: Optional[str], ruhsat_json: Optional[Dict[s
 			base = (fp or "page")[:16]
 			html_path = dump_dir / f"{base}.html"
 			map_path = dump_dir / f"{base}_mapping.json"
-			with open(html_path, "w", encoding="utf-8") as f:
-				f.write(filtered_html)
-			with open(map_path, "w", encoding="utf-8") as f:
-				_json.dump(out, f, ensure_ascii=False, indent=2)
+			with metrics.stage("artifact_write"):
+				with open(html_path, "w", encoding="utf-8") as f:
+					f.write(filtered_html)
+				with open(map_path, "w", encoding="utf-8") as f:
+					_json.dump(out, f, ensure_ascii=False, indent=2)
 			out.setdefault("debug_dumps", {})
 			out["debug_dumps"].update({"html": str(html_path), "mapping": str(map_path)})
 		except Exception:
@@ -94,6 +99,7 @@ def plan_analyze_page(filtered_html: Optional[str], ruhsat_json: Optional[Dict[s
 
 # ------------------------- buildFillPlan -------------------------
 
+@tracing.traced()
 def plan_build_fill_plan(mapping: Optional[Dict[str, Any]], ruhsat_json: Optional[Dict[str, Any]]) -> Dict[str, Any]:
 	"""Build FillPlan actions from LLM-provided mapping and ruhsat data.
 
@@ -131,6 +137,7 @@ def plan_build_fill_plan(mapping: Optional[Dict[str, Any]], ruhsat_json: Optiona
 
 # ------------------------- detectFinalPage -------------------------
 
+@tracing.traced()
 def plan_detect_final_page(filtered_html: Optional[str]) -> Dict[str, Any]:
 	if not filtered_html:
 		return {"ok": True, "is_final": False, "reason": "no_html"}
@@ -143,17 +150,20 @@ def plan_detect_final_page(filtered_html: Optional[str]) -> Dict[str, Any]:
 
 # ------------------------- checkPageChanged -------------------------
 
+@tracing.traced()
 def plan_check_page_changed(current_raw_html: Optional[str], prev_raw_html: Optional[str], use_normalized_compare: bool = True) -> Dict[str, Any]:
 	result = detect_web_page_change(
 		current_raw_html=current_raw_html,
 		prev_raw_html=prev_raw_html,
 		use_normalized_compare=use_normalized_compare,
+		structural=True,
 	)
 	return {"ok": True, "action": "checkPageChanged", "result": asdict(result)}
 
 
 # ------------------------- detectFormsFilled -------------------------
 
+@tracing.traced()
 def plan_detect_forms_filled(details: Optional[Dict[str, Any]] = None, html: Optional[str] = None, min_filled: int = 2) -> Dict[str, Any]:
 	"""Check if at least min_filled inputs are filled.
 
@@ -28,6 +28,8 @@ from backend.Components.detectFinalPageArrivedinUserTask import detect_final_pag
 from backend.Components.detectFormsAreFilled import detect_forms_filled  # type: ignore
 from backend.Components.uploadToSystemData import ensure_f3_data_ready  # type: ignore
 from backend.Components.mappingStaticFillForms import static_analyze_page  # type: ignore
+from backend.Components import metrics  # type: ignore
+from backend.Components import tracing  # type: ignore
 
 
 def _fingerprint(html: Optional[str]) -> Optional[str]:
@@ -41,6 +43,7 @@ def _fingerprint(html: Optional[str]) -> Optional[str]:
 
 # ------------------------- loadRuhsatFromTmp -------------------------
 
+@tracing.traced()
 def plan_load_ruhsat_json() -> Dict[str, Any]:
     """Return ruhsat JSON via ingest pipeline with richer diagnostics.
 
@@ -96,6 +99,7 @@ def plan_load_ruhsat_json() -> Dict[str, Any]:
 
 # ------------------------- analyzePageStaticFillForms (STATIC ONLY) -------------------------
 
+@tracing.traced()
 def plan_analyze_page_static_fill_forms(filtered_html: Optional[str], url: Optional[str] = None, task: Optional[str] = None) -> Dict[str, Any]:
     """Static-only page analysis. No LLM calls."""
     from backend.logging_utils import log  # type: ignore
@@ -134,6 +138,8 @@ def plan_analyze_page_static_fill_forms(filtered_html: Optional[str], url: Optio
         return {"ok": False, "error": f"analyze_static_failed: {e}"}
 
 
+@tracing.traced()
+@metrics.timed("validation")
 def plan_validate_critical_fields(field_mapping: Dict[str, str], ruhsat_json: Dict[str, Any], task: Optional[str] = None, critical_fields_override: Optional[List[str]] = None) -> Dict[str, Any]:
     """Validate that critical fields from config were successfully mapped and have data.
     
@@ -216,6 +222,7 @@ def plan_validate_critical_fields(field_mapping: Dict[str, str], ruhsat_json: Di
         return {"ok": False, "error": f"validation_failed: {e}"}
 
 
+@tracing.traced()
 def plan_detect_final_page(filtered_html: Optional[str]) -> Dict[str, Any]:
     if not filtered_html:
         return {"ok": True, "is_final": False, "reason": "no_html"}
@@ -232,6 +239,7 @@ def plan_detect_final_page(filtered_html: Optional[str]) -> Dict[str, Any]:
         return {"ok": False, "error": f"detect_failed: {e}"}
 
 
+@tracing.traced()
 def plan_detect_forms_filled(details: Optional[Dict[str, Any]] = None, html: Optional[str] = None, min_filled: int = 2) -> Dict[str, Any]:
     """Check if at least min_filled inputs are filled."""
     try:
@@ -244,6 +252,7 @@ def plan_detect_forms_filled(details: Optional[Dict[str, Any]] = None, html: Opt
         return {"ok": False, "error": f"detect_forms_failed: {e}"}
 
 
+@tracing.traced()
 def plan_check_should_fallback_to_llm(validation_result: Dict[str, Any], task: Optional[str] = None) -> Dict[str, Any]:
     """Determine if we should fall back to LLM due to insufficient static mapping."""
     try:
@@ -278,6 +287,121 @@ def plan_check_should_fallback_to_llm(validation_result: Dict[str, Any], task: O
         return {"ok": False, "error": f"fallback_check_failed: {e}"}
 
 
+# ------------------------- planPage (composite) -------------------------
+
+_DEFAULT_CRITICAL = ["plaka_no", "model_yili", "sasi_no", "motor_no"]
+
+
+def _present(v: Any) -> bool:
+    return v is not None and str(v).strip() != ""
+
+
+def _click_actions(actions: Optional[List[Any]]) -> List[str]:
+    """UI action strings: css#<selector> kept, text labels become click#<label>."""
+    out: List[str] = []
+    for a in actions or []:
+        if isinstance(a, str) and a.strip():
+            out.append(a if a.startswith(("css#", "click#")) else f"click#{a}")
+    return out
+
+
+@tracing.traced()
+def plan_page_transition(
+    filtered_html: Optional[str],
+    url: Optional[str] = None,
+    task: Optional[str] = None,
+    ruhsat_json: Optional[Dict[str, Any]] = None,
+    last_execution: Optional[Dict[str, Any]] = None,
+    critical_fields_override: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """One round-trip per page: final-page signals, static mapping, critical-field
+    validation + LLM-fallback gate, fill plan, predicted verification and the next
+    action selectors (replaces analyze/detectFinalPage/validate/fallback/detectFormsFilled).
+
+    last_execution (optional): what the UI did on the previous page
+      { url, fingerprint, selector_status: {field: bool}, actions: [..], details: [..] }
+    It is checked against this page (changed? previous fill verified?) so the
+    UI does not need separate checkPageChanged/detectFormsFilled calls.
+    """
+    if not filtered_html:
+        return {"ok": False, "error": "no_filtered_html"}
+    t = task or "Yeni Trafik"
+    ruhsat = ruhsat_json or {}
+    fp = _fingerprint(filtered_html)
+    out: Dict[str, Any] = {"ok": True, "fingerprint": fp, "url": url, "task": t}
+
+    # previous transition: did the page change, and was the last fill verified?
+    if isinstance(last_execution, dict) and last_execution:
+        prev_fp = last_execution.get("fingerprint")
+        prev_url = last_execution.get("url")
+        status = last_execution.get("selector_status") if isinstance(last_execution.get("selector_status"), dict) else {}
+        last: Dict[str, Any] = {
+            "page_changed": bool((prev_fp and prev_fp != fp) or (prev_url and url and prev_url != url)),
+            "url_changed": bool(prev_url and url and prev_url != url),
+            "verified_fields": [k for k, v in status.items() if v],
+            "unverified_fields": [k for k, v in status.items() if not v],
+        }
+        if isinstance(last_execution.get("details"), list):
+            last["forms_filled"] = plan_detect_forms_filled(details={"details": last_execution["details"]}, min_filled=int(last_execution.get("min_filled") or 2))
+        out["last_execution"] = last
+
+    final = plan_detect_final_page(filtered_html)
+    out["final"] = {k: final.get(k) for k in ("is_final", "pdf_found", "cta_present", "hits", "pdf_links", "reason") if k in final}
+
+    analysis = plan_analyze_page_static_fill_forms(filtered_html, url, t)
+    if analysis.get("error"):
+        out.update({"ok": False, "error": analysis.get("error"), "next": "fallback_llm", "should_fallback": True})
+        return out
+    field_mapping: Dict[str, str] = dict(analysis.get("field_mapping") or {})
+    next_actions = _click_actions(analysis.get("actions"))
+    out.update({
+        "field_mapping": field_mapping,
+        "typing_fields": analysis.get("typing_fields") or [],
+        "next_actions": next_actions,
+        "analysis": analysis,  # diagnostics; dropped with ?verbose=0
+    })
+
+    if not field_mapping:
+        out["fill_plan"] = {"order": [], "actions": []}
+        out["verification"] = {"expected_fields": [], "min_filled": 0, "critical_fields": [], "predicted_ok": True}
+        if out["final"].get("is_final"):
+            out["next"] = "final"
+        else:
+            out["next"] = "act" if next_actions else "wait"
+        return out
+
+    critical = list(critical_fields_override or analysis.get("critical_fields") or [])
+    validation = plan_validate_critical_fields(field_mapping, ruhsat, t, critical or None)
+    fallback = plan_check_should_fallback_to_llm(validation, t) if validation.get("ok") else {"ok": False}
+    critical = list(validation.get("critical_fields") or critical or _DEFAULT_CRITICAL)
+    out["validation"] = {k: validation.get(k) for k in ("ok", "is_success", "success_rate", "mapped_critical", "missing_critical", "error") if k in validation}
+    out["fallback"] = {k: fallback.get(k) for k in ("should_fallback", "reason", "threshold") if k in fallback}
+    out["should_fallback"] = bool(fallback.get("should_fallback"))
+
+    # Same fill order and gate the stateflow used: critical first, then the rest with data
+    expected = [k for k in field_mapping if _present(ruhsat.get(k))]
+    order = [k for k in dict.fromkeys(critical + expected) if field_mapping.get(k) and _present(ruhsat.get(k))]
+    min_filled = min(2, max(1, 2 if len(expected) >= 2 else 1))
+    actions = [{"kind": "set_value", "selector": field_mapping[k], "value": str(ruhsat[k]), "field": k} for k in order]
+    out["fill_plan"] = {"order": order, "actions": actions}
+    critical_mapped = [k for k in critical if field_mapping.get(k)]
+    out["verification"] = {
+        "expected_fields": order,
+        "min_filled": min_filled,
+        "critical_fields": critical_mapped,
+        # every planned selector came from this DOM, so the fill is expected to verify
+        "predicted_ok": len(order) >= min_filled and all(k in order for k in critical_mapped),
+        "predicted_filled": len(order),
+    }
+    if out["should_fallback"]:
+        out["next"] = "fallback_llm"
+    elif out["final"].get("is_final") and not order:
+        out["next"] = "final"
+    else:
+        out["next"] = "fill_and_act" if next_actions else "fill"
+    return out
+
+
 if __name__ == "__main__":  # smoke test
     demo_filtered = """
     <form>
@@ -16,8 +16,9 @@ from Components.getHtml import get_save_Html, get_Html, filter_Html
 from Components.mappingStatic import map_home_page_static
 from Components.fillPageFromMapping import fill_and_go
 from Components.detectWepPageChange import detect_web_page_change
+from Components.clickRanking import click_changed_page
 from Components.letLLMMap import def_let_llm_map
-import time
+from Components import tracing
 from config import (  # type: ignore
     get_llm_prompt_find_home_page_default,
     get_llm_max_attempts_find_home_page,
@@ -34,6 +35,7 @@ if str(_root) not in sys.path:
 from memory import HtmlCaptureResult  # type: ignore
 
 
+@tracing.traced()
 def FindHomePage(
     html: str,
     name: Optional[str] = None,
@@ -49,16 +51,25 @@ def FindHomePage(
     # Back-compat: already-filtered HTMLs (legacy callers)
     prev_filtered_html: Optional[str] = None,
     current_filtered_html: Optional[str] = None,
-    wait_ms: int = 200,
+    # Ignored (kept for old callers): the request no longer sleeps before comparing;
+    # wait for the change with GET /api/page/await-change instead.
+    wait_ms: int = 0,
     # LLM planning
     llm_feedback: Optional[str] = None,
     llm_attempt_index: Optional[int] = None,
+    # Learned ranking (Components.clickRanking.ClickRanker); None keeps the static order
+    ranker: Optional[Any] = None,
+    current_url: Optional[str] = None,  # url of `html` (ranking key)
+    prev_url: Optional[str] = None,  # url of prev_html, the page tried_selector was clicked on
+    tried_selector: Optional[str] = None,  # planCheckHtmlIfChanged: the click being checked
 ) -> Dict[str, Any]:
     """Stateless: compute mapping from in-memory HTML; save to tmp only for debug.
 
     Flow:
     - Normalize raw HTML -> filter in-memory -> build mapping (no disk dependency)
     - Additionally save filtered snapshot under tmp/html for debugging (optional)
+    - With a ranker: candidates are re-ordered by past click outcomes for this
+      (host, page structure), and planCheckHtmlIfChanged records the outcome of tried_selector
     """
     # In-memory processing (stateless)
     # Planning: compute mapping and ordered candidate selectors from CURRENT page
@@ -139,6 +150,15 @@ def FindHomePage(
     except Exception:
         pass
 
+    # Learned order first (before the cap, so a past winner deep in the list is not cut off)
+    ranking: Optional[Dict[str, Any]] = None
+    if ranker is not None and (op or "").strip() == "allPlanHomePageCandidates":
+        try:
+            candidate_selectors_in_order, ranking = ranker.rank("findHomePage", current_url, html, candidate_selectors_in_order)
+            log("DEBUG", "F1-RANK", f"reordered={ranking.get('reordered')} learned={ranking.get('learned')}", component="FindHomePage")
+        except Exception as e:
+            log("WARN", "F1-RANK", f"ranking skipped: {e}", component="FindHomePage")
+
     # Cap how many static selectors we expose, configurable via config
     try:
         static_cap = int(get_static_max_candidates_find_home_page())
@@ -176,11 +196,11 @@ def FindHomePage(
         det_curr_filtered = current_filtered_html
 
     if det_prev_filtered is not None and det_curr_filtered is not None:
-        if wait_ms and wait_ms > 0:
-            time.sleep(max(0, wait_ms) / 1000.0)
+        recording = ranker is not None and bool(tried_selector)
         dres = detect_web_page_change(
             current_raw_html=det_curr_filtered,
             prev_raw_html=det_prev_filtered,
+            structural=recording,  # region diff only when the click outcome is recorded
         )
         changed_info = {
             "changed": dres.changed,
@@ -188,7 +208,17 @@ def FindHomePage(
             "before_hash": dres.before_hash,
             "after_hash": dres.after_hash,
         }
+        if dres.details and dres.details.get("kind"):
+            changed_info["kind"] = dres.details["kind"]
         log("INFO", "F1-DET", f"changed={dres.changed} reason={dres.reason}", component="FindHomePage")
+        if recording:
+            try:
+                changed_info["recorded"] = bool(ranker.record(
+                    "findHomePage", prev_url or current_url, prev_html if prev_html is not None else det_prev_filtered,
+                    tried_selector, click_changed_page(dres),
+                ))
+            except Exception as e:
+                log("WARN", "F1-RANK", f"outcome not recorded: {e}", component="FindHomePage")
         # Optionally save detection snapshots with '-nochange' suffix
         if debug and (dres.changed or save_on_nochange):
             try:
@@ -224,6 +254,7 @@ def FindHomePage(
             "selectorsInOrder": candidate_selectors_in_order,
             "mapping": asdict(mapping),
         },
+        "ranking": ranking,
     "capture": (
             {
                 "nonfiltered": {
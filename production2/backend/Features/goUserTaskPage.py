@@ -10,7 +10,7 @@ Provides planning (no direct execution) for three actions:
 Also exposes plan_full_user_task_flow utility to chain openSideMenu + goUserPage.
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import asdict
 from pathlib import Path as _Path
 import sys
@@ -26,6 +26,8 @@ from Components.mappingStaticUserTask import find_best_user_task_button  # type:
 from Components.fillPageFromMapping import fill_and_go  # type: ignore
 from Components.letLLMMapUserTaskPage import build_llm_prompt_user_task  # type: ignore
 from Components.detectWepPageChange import detect_web_page_change  # type: ignore
+from Components.clickRanking import click_changed_page  # type: ignore
+from Components import tracing  # type: ignore
 from memory import MappingJson  # type: ignore
 
 
@@ -40,13 +42,37 @@ def _fingerprint(html: Optional[str]) -> Optional[str]:
 
 # ------------------------- openSideMenu -------------------------
 
-def plan_open_side_menu(filtered_html: Optional[str]) -> Dict[str, Any]:
+def _rank(ranker: Any, scope: str, url: Optional[str], html: Optional[str], selectors: List[str]) -> tuple:
+    """Learned order of selectors (Components.clickRanking); static order when no ranker/failure."""
+    if ranker is None or not selectors:
+        return list(selectors), None
+    try:
+        return ranker.rank(scope, url, html, selectors)
+    except Exception:
+        return list(selectors), None
+
+
+def user_task_scope(task_label: str) -> str:
+    return f"goUserPage:{(task_label or '').strip().lower()}"
+
+
+@tracing.traced()
+def plan_open_side_menu(
+    filtered_html: Optional[str],
+    ranker: Any = None,
+    current_url: Optional[str] = None,
+) -> Dict[str, Any]:
     """Return a plan to click side menu (hamburger) if detectable statically."""
     if not filtered_html:
         return {"ok": False, "error": "no_filtered_html"}
 
     mapping: MappingJson = map_side_menu_static(filtered_html, name="side_menu")  # type: ignore
     primary = getattr(mapping.mapping, "primary_selector", None)
+    alternatives = list(getattr(mapping.mapping, "alternatives", []) or [])
+    ranking = None
+    if primary:
+        ordered, ranking = _rank(ranker, "openSideMenu", current_url, filtered_html, [primary] + alternatives)
+        primary, alternatives = ordered[0], ordered[1:]
     if not primary:
         return {
             "ok": False,
@@ -62,15 +88,17 @@ def plan_open_side_menu(filtered_html: Optional[str]) -> Dict[str, Any]:
         "fingerprint": _fingerprint(filtered_html),
         "mapping": {
             "primary": primary,
-            "alternatives": getattr(mapping.mapping, "alternatives", []),
+            "alternatives": alternatives,
             "candidateCount": len(mapping.candidates),
         },
+        "ranking": ranking,
         "plan": asdict(plan),
     }
 
 
 # ------------------------- goUserPage -------------------------
 
+@tracing.traced()
 def plan_go_user_page(
     filtered_html: Optional[str],
     task_label: str,
@@ -78,6 +106,8 @@ def plan_go_user_page(
     force_llm: bool = False,
     llm_feedback: Optional[str] = None,
     llm_attempt_index: Optional[int] = None,
+    ranker: Any = None,
+    current_url: Optional[str] = None,
 ) -> Dict[str, Any]:
     if not filtered_html:
         return {"ok": False, "error": "no_filtered_html"}
@@ -86,19 +116,15 @@ def plan_go_user_page(
 
     if static_button and not force_llm:
         selectors = static_button.get("selectors", [])
-        chosen: Optional[str] = None
+        candidates: List[str] = []
         for s in selectors:
             if isinstance(s, dict) and s.get("type") in ("text", "xpath", "css"):
                 val = s.get("value")
                 if isinstance(val, str) and val.strip():
-                    t = s.get("type")
-                    if t == "text":
-                        chosen = f"text:{val}"
-                    elif t == "xpath":
-                        chosen = f"xpath:{val}"
-                    else:
-                        chosen = f"css:{val}"
-                    break
+                    candidates.append(f"{s.get('type')}:{val}")
+        # selector that changed this page for this task before goes first
+        candidates, ranking = _rank(ranker, user_task_scope(task_label), current_url, filtered_html, candidates)
+        chosen: Optional[str] = candidates[0] if candidates else None
         if chosen:
             plan = fill_and_go(mapping={}, action_button_selector=chosen)
             return {
@@ -113,6 +139,8 @@ def plan_go_user_page(
                     "priority": static_button.get("priority"),
                 },
                 "selector": chosen,
+                "alternatives": candidates[1:],
+                "ranking": ranking,
                 "plan": asdict(plan),
             }
 
@@ -138,37 +166,62 @@ def plan_go_user_page(
 
 # ------------------------- checkPageChanged -------------------------
 
+@tracing.traced()
 def plan_check_page_changed(
     current_raw_html: Optional[str],
     prev_raw_html: Optional[str],
     use_normalized_compare: bool = True,
+    ranker: Any = None,
+    tried_selector: Optional[str] = None,
+    tried_op: Optional[str] = None,
+    task_label: Optional[str] = None,
+    prev_url: Optional[str] = None,
 ) -> Dict[str, Any]:
+    """Diff prev/current; with tried_selector the outcome is recorded for ranking.
+
+    tried_op says which plan the click came from: 'openSideMenu' or 'goUserPage'
+    (the latter needs task_label).
+    """
     result = detect_web_page_change(
         current_raw_html=current_raw_html,
         prev_raw_html=prev_raw_html,
         use_normalized_compare=use_normalized_compare,
+        structural=True,
     )
-    return {"ok": True, "action": "checkPageChanged", "result": asdict(result)}
+    out: Dict[str, Any] = {"ok": True, "action": "checkPageChanged", "result": asdict(result)}
+    if ranker is not None and tried_selector and tried_op in ("openSideMenu", "goUserPage"):
+        scope = "openSideMenu" if tried_op == "openSideMenu" else user_task_scope(task_label or "")
+        try:
+            # a hash change alone (tokens, timestamps) is not a win; only navigation/structure changes are
+            out["recorded"] = bool(ranker.record(scope, prev_url, prev_raw_html, tried_selector, click_changed_page(result)))
+        except Exception:
+            out["recorded"] = False
+    return out
 
 
 # --------------- Combined flow ---------------
 
+@tracing.traced()
 def plan_full_user_task_flow(
     filtered_html: str,
     task_label: str,
     open_menu_first: bool = True,
     llm_feedback: Optional[str] = None,
     llm_attempt_index: Optional[int] = None,
+    ranker: Any = None,
+    current_url: Optional[str] = None,
 ) -> Dict[str, Any]:
     steps: Dict[str, Any] = {}
     if open_menu_first:
-        steps["openSideMenu"] = plan_open_side_menu(filtered_html)
+        steps["openSideMenu"] = plan_open_side_menu(filtered_html, ranker=ranker, current_url=current_url)
     steps["goUserPage"] = plan_go_user_page(
         filtered_html=filtered_html,
         task_label=task_label,
         use_llm_fallback=True,
         llm_feedback=llm_feedback,
         llm_attempt_index=llm_attempt_index,
+        ranker=ranker,
+        current_url=current_url,
     )
     return {"ok": True, "flow": steps, "taskLabel": task_label}
 
@@ -3,11 +3,15 @@ from __future__ import annotations
 from collections import deque
 from datetime import datetime
 from threading import Lock
-from typing import Any, Deque, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional
 
 _LOCK = Lock()
 # Keep all logs until explicitly cleared via API (no max length)
 _LOGS: Deque[Dict[str, Any]] = deque()
+# Monotonic record number (survives clear) so clients can ask for "since seq"
+_SEQ = 0
+# Called with each new record outside the lock (e.g. the /api/events push channel); must not block
+_LISTENERS: List[Callable[[Dict[str, Any]], None]] = []
 
 
 def log(level: str, code: str, message: str, *, component: str = "backend", extra: Optional[Dict[str, Any]] = None) -> None:
@@ -19,13 +23,28 @@ def log(level: str, code: str, message: str, *, component: str = "backend", extr
         "message": message,
         "extra": extra or {},
     }
+    global _SEQ
     with _LOCK:
+        _SEQ += 1
+        rec["seq"] = _SEQ
         _LOGS.append(rec)
+    for fn in list(_LISTENERS):
+        try:
+            fn(rec)
+        except Exception:
+            pass
 
 
-def get_log_records() -> List[Dict[str, Any]]:
+def add_log_listener(fn: Callable[[Dict[str, Any]], None]) -> None:
+    if fn not in _LISTENERS:
+        _LISTENERS.append(fn)
+
+
+def get_log_records(since: Optional[int] = None) -> List[Dict[str, Any]]:
     with _LOCK:
-        return list(_LOGS)
+        if since is None:
+            return list(_LOGS)
+        return [r for r in _LOGS if r.get("seq", 0) > since]
 
 
 def clear_log_records() -> None:
@@ -1,28 +1,45 @@
 from __future__ import annotations
 
+import atexit
+import hmac
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Union
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from pathlib import Path
 from dataclasses import asdict
+from urllib.parse import urlsplit
 
 # Import capture helper (Components is a sibling folder of this file)
 from Components.getHtml import get_save_Html
 from Features.findHomePage import FindHomePage
 from Components.getHtml import remember_raw_html
-from Components.detectWepPageChange import detect_web_page_change
 from Features.goUserTaskPage import (
     plan_open_side_menu,
     plan_go_user_page,
     plan_check_page_changed,
     plan_full_user_task_flow,
 )
-from logging_utils import log, get_log_records, clear_log_records
-from config import load_config, get_go_user_task_stateflow
+from logging_utils import log, get_log_records, clear_log_records, add_log_listener
+from config import (
+    load_config,
+    get_go_user_task_stateflow,
+    get_api_compression,
+    get_api_run_history,
+    get_api_work_queue,
+    get_api_page_change,
+    get_api_events,
+    get_api_metrics,
+    get_api_tracing,
+    get_api_admin,
+    get_api_profiling,
+    get_click_ranking,
+)
 from Features.fillFormsUserTaskPage import (
     plan_load_ruhsat_json,
     plan_analyze_page,
@@ -31,6 +48,22 @@ from Features.fillFormsUserTaskPage import (
     plan_check_page_changed as plan_check_page_changed_f3,
 )
 from Components.uploadToSystemData import stage_uploaded_file  # type: ignore
+from Components.htmlSnapshotStore import (  # type: ignore
+    SnapshotMissError,
+    resolve_html_upload,
+    resolve_html_ref,
+    snapshot_store,
+)
+from Components.wireCompression import WireCompressionMiddleware, strip_diagnostics  # type: ignore
+from Components.runRecorder import RunRecorder  # type: ignore
+from Components.jobQueue import JobQueue  # type: ignore
+from Components.extractRuhsatEngines import extraction_progress  # type: ignore
+from Components.clickRanking import ClickRanker  # type: ignore
+from Components.pageChangeWatch import page_change_hub  # type: ignore
+from Components.eventStream import EventBus, pump_ws, sse_format, step_summary  # type: ignore
+from Components import metrics  # type: ignore
+from Components import tracing  # type: ignore
+from Components.requestProfiler import RequestProfiler  # type: ignore
 
 
 class TsxRequest(BaseModel):
@@ -42,6 +75,14 @@ class TsxRequest(BaseModel):
     force_llm: Optional[bool] = None
     hard_reset: Optional[bool] = None
     ruhsat_json: Optional[Dict[str, Any]] = None
+    # Delta upload protocol (see Components/htmlSnapshotStore.py); html may be omitted
+    session_id: Optional[str] = None
+    html_fp: Optional[str] = None  # sha256 of html; alone = "unchanged since fp"
+    html_base_fp: Optional[str] = None  # base snapshot for html_delta
+    html_delta: Optional[List[Any]] = None  # [[op, arg], ...] with op in '=', '-', '+'
+    html_encoding: Optional[str] = None  # gzip | zstd for html_b64
+    html_b64: Optional[str] = None
+    prev_html_fp: Optional[str] = None
 
 
 # Load local .env if present (keep env decoupled from root)
@@ -57,13 +98,144 @@ except Exception:
 app = FastAPI(title="Production2 Backend", version="0.0.1")
 
 # CORS (dev): allow UI/Electron to call the API easily
+class _CORSExceptAdmin(CORSMiddleware):
+    # /api/admin/* gets no CORS headers: a web page open in the user's browser
+    # must not be able to preflight or read the admin API over loopback
+    async def __call__(self, scope, receive, send) -> None:  # type: ignore[override]
+        if scope["type"] == "http" and str(scope.get("path", "")).startswith("/api/admin/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 app.add_middleware(
-    CORSMiddleware,
+    _CORSExceptAdmin,
     allow_origins=["*"],  # tighten later
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
+)
+
+# Compressed request bodies (Content-Encoding) and responses (Accept-Encoding)
+if get_api_compression("enabled", True):
+    app.add_middleware(
+        WireCompressionMiddleware,
+        minimum_size=int(get_api_compression("minimumSize", 1024)),
+        gzip_level=int(get_api_compression("gzipLevel", 6)),
+        zstd_level=int(get_api_compression("zstdLevel", 3)),
+        max_request_bytes=int(get_api_compression("maxRequestBytes", 64 * 1024 * 1024)),
+    )
+
+# Span tree per sampled request (GET /api/trace/<id>); streams and the trace API itself are skipped
+tracing.tracer.configure(
+    sample_rate=float(get_api_tracing("sampleRate", 0.1)),
+    max_traces=int(get_api_tracing("maxTraces", 200)),
+    max_spans=int(get_api_tracing("maxSpansPerTrace", 2000)),
+)
+app.add_middleware(
+    tracing.TracingMiddleware,
+    prefixes=("/api/",),
+    exclude=("/api/trace", "/api/events", "/api/ws/", "/api/logs", "/api/metrics", "/api/page/await-change"),
+)
+
+
+# Step history: endpoints queue each step, a background worker batches the writes
+run_recorder = RunRecorder(
+    str(Path(__file__).resolve().parents[1] / str(get_api_run_history("dbPath", "tmp/runHistory.db"))),
+    batch_size=int(get_api_run_history("batchSize", 200)),
+    flush_interval_s=float(get_api_run_history("flushIntervalMs", 250)) / 1000.0,
+    max_queue=int(get_api_run_history("maxQueue", 1000)),
+    max_sessions=int(get_api_run_history("maxSessions", 500)),
+    enabled=bool(get_api_run_history("enabled", True)),
+)
+
+atexit.register(run_recorder.close)  # flush queued steps on exit
+
+# Learned click order for F1/F2 candidates (UI reports tried_selector with each change check)
+click_ranker = ClickRanker(
+    str(Path(__file__).resolve().parents[1] / str(get_click_ranking("path", "tmp/clickRanking.json"))),
+    half_life_s=float(get_click_ranking("halfLifeHours", 168)) * 3600.0,
+    miss_penalty=float(get_click_ranking("missPenalty", 0.25)),
+    max_selectors=int(get_click_ranking("maxSelectorsPerPage", 50)),
+    max_keys=int(get_click_ranking("maxPages", 2000)),
+    enabled=bool(get_click_ranking("enabled", True)),
+    flush_interval_s=float(get_click_ranking("flushIntervalMs", 1000)) / 1000.0,
 )
+atexit.register(click_ranker.close)  # write pending outcomes on exit
+
+
+metrics.registry.enabled = bool(get_api_metrics("enabled", True))
+
+# On-demand cProfile/stack sampling of the next N calls to one endpoint (POST /api/admin/profile)
+request_profiler = RequestProfiler(
+    max_sessions=int(get_api_profiling("maxSessions", 20)),
+    max_count=int(get_api_profiling("maxRequestsPerSession", 100)),
+    interval_ms=float(get_api_profiling("sampleIntervalMs", 5)),
+)
+PROFILABLE_ENDPOINTS = ("/api/f1", "/api/f2", "/api/f3", "/api/f3-static", "/api/tsx/dev-run", "/api/calib")
+
+# Push channel (/api/events SSE, /api/ws/events): logs, step results, page snapshots
+event_bus = EventBus(
+    max_queue=int(get_api_events("maxQueue", 500)),
+    max_clients=int(get_api_events("maxClients", 32)),
+)
+add_log_listener(event_bus.listener("log"))
+page_change_hub.add_listener(event_bus.listener("page", "session_id"))
+
+
+def _record_step(flow: str, op: Optional[str], req: Any, res: Any, t0: float, new_run: bool = False) -> None:
+    """Queue the step for persistence; hashing and DB writes happen off the request thread."""
+    latency_ms = (time.perf_counter() - t0) * 1000.0
+    session_id = getattr(req, "session_id", None)
+    try:
+        run_recorder.record_step(
+            flow, op, res,
+            session_id=session_id,
+            url=getattr(req, "current_url", None),
+            html=getattr(req, "html", None) or getattr(req, "current_html", None),
+            latency_ms=latency_ms,
+            new_run=new_run,
+        )
+    except Exception as e:
+        log("WARN", "RUN-RECORD", f"step not queued: {e}", component="RunRecorder")
+    event_bus.publish("step", step_summary(flow, op, res, latency_ms, session_id), session_id=session_id)
+
+
+def _with_verbosity(payload: Dict[str, Any], verbose: int) -> Dict[str, Any]:
+    """?verbose=0 drops diagnostic blobs (analysis, debug_dumps, raw, prompt_snippet)."""
+    return payload if verbose else strip_diagnostics(payload)
+
+
+def _resolve_html_upload(req: Any, refs: tuple = ()) -> Any:
+    """Rebuild req.html (and prev/current refs) from the delta upload protocol in place.
+
+    Returns the HtmlUploadResult (or None for requests without any page).
+    Unknown fingerprints -> 409 snapshot_miss so the UI resends the full body.
+    """
+    try:
+        up = resolve_html_upload(
+            req.session_id,
+            html=req.html,
+            html_fp=req.html_fp,
+            html_base_fp=req.html_base_fp,
+            html_delta=req.html_delta,
+            html_encoding=req.html_encoding,
+            html_b64=req.html_b64,
+        )
+        if up is not None:
+            req.html = up.html
+            if up.source in ("delta", "unchanged"):
+                metrics.cache_lookup("htmlSnapshot", True)
+        for field in refs:
+            setattr(req, field, resolve_html_ref(req.session_id, getattr(req, field), getattr(req, f"{field}_fp", None)))
+        return up
+    except SnapshotMissError as e:
+        metrics.cache_lookup("htmlSnapshot", False)
+        log("WARN", "HTML-SNAPSHOT-MISS", f"unknown fingerprint {e.fingerprint[:12]}", component="Upload", extra={"session_id": req.session_id})
+        raise HTTPException(status_code=409, detail={"error": "snapshot_miss", "fingerprint": e.fingerprint})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"invalid html upload: {e}")
 
 
 @app.get("/health")
@@ -101,7 +273,7 @@ def get_config() -> Dict[str, Any]:
 
 
 @app.post("/api/tsx/dev-run")
-def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
+def tsx_dev_run(req: TsxRequest, verbose: int = 1) -> Dict[str, Any]:
     """POST: TsX orchestration - Static-first form filling with LLM fallback.
     
     F3 Button Flow:
@@ -109,12 +281,25 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
     2. If static succeeds → return success with actions
     3. If static fails critical validation → return should_go_home + use_llm_fallback
     """
+    t0 = time.perf_counter()
+    with metrics.request_timer("/api/tsx/dev-run", "devRun"), request_profiler.profile("/api/tsx/dev-run", op="devRun"):
+        res = _tsx_dev_run(req)
+    _record_step("TsX", "devRun", req, res, t0, new_run=bool(req.hard_reset))
+    return _with_verbosity(res, verbose)
+
+
+def _tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
+    upload = _resolve_html_upload(req, ("prev_html",))
+    # Per-snapshot cache: an unchanged page skips the final-page/analysis parses
+    derived = snapshot_store.derived(req.session_id or "default", upload.fingerprint) if upload else {}
     log("INFO", "TSX-START", f"TsX endpoint called", component="TsX", extra={
         "html_len": len(req.html or ""),
         "current_url": req.current_url,
         "user_command": req.user_command,
         "force_llm": req.force_llm,
-        "hard_reset": req.hard_reset
+        "hard_reset": req.hard_reset,
+        "upload": upload.source if upload else None,
+        "unchanged": bool(upload and upload.unchanged),
     })
     
     if not req.html:
@@ -128,7 +313,7 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
     try:
         # Load ruhsat data first
         log("INFO", "TSX-RUHSAT", "Loading ruhsat data", component="TsX")
-        ruhsat_result = f3_static(F3Request(op="loadRuhsatFromTmp"))
+        ruhsat_result = _f3_static(F3Request(op="loadRuhsatFromTmp"))
         log("INFO", "TSX-RUHSAT-RES", f"Ruhsat result: ok={ruhsat_result.get('ok')}", component="TsX")
         
         if not ruhsat_result.get("ok"):
@@ -145,7 +330,12 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
         
         # Check if final page first
         log("INFO", "TSX-FINAL-CHECK", "Checking for final page", component="TsX")
-        final_check = f3_static(F3Request(op="detectFinalPage", html=req.html))
+        final_check = derived.get("final_check")
+        metrics.cache_lookup("tsxDerived", final_check is not None)
+        if final_check is None:
+            final_check = _f3_static(F3Request(op="detectFinalPage", html=req.html))
+            if final_check.get("ok"):
+                derived["final_check"] = final_check
         log("INFO", "TSX-FINAL-RES", f"Final check: ok={final_check.get('ok')} is_final={final_check.get('is_final')}", component="TsX")
         
         if final_check.get("ok") and final_check.get("is_final"):
@@ -164,12 +354,23 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
         
         # Analyze page with static heuristics
         log("INFO", "TSX-ANALYZE", "Starting static page analysis", component="TsX")
-        analysis = f3_static(F3Request(
-            op="analyzePageStaticFillForms", 
-            html=req.html,
-            current_url=req.current_url,
-            task="Yeni Trafik"
-        ))
+        # The analysis reads html (derived is per snapshot fingerprint), current_url, task and
+        # calib.json / config.json (calib_version); the other TsxRequest fields (user_command,
+        # executed_action, force_llm, hard_reset, ruhsat_json, prev_html) never reach it
+        from Components.calibStorage import version as calib_version
+        task = "Yeni Trafik"
+        analysis_key = f"analysis|{req.current_url or ''}|{task}|{calib_version()}"
+        analysis = derived.get(analysis_key)
+        metrics.cache_lookup("tsxDerived", analysis is not None)
+        if analysis is None:
+            analysis = _f3_static(F3Request(
+                op="analyzePageStaticFillForms", 
+                html=req.html,
+                current_url=req.current_url,
+                task=task
+            ))
+            if analysis.get("ok"):
+                derived[analysis_key] = analysis
         log("INFO", "TSX-ANALYZE-RES", f"Analysis result: ok={analysis.get('ok')}", component="TsX")
         
         if not analysis.get("ok"):
@@ -199,11 +400,11 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
         
         # Validate critical fields
         log("INFO", "TSX-VALIDATE", "Validating critical fields", component="TsX")
-        validation = f3_static(F3Request(
+        validation = _f3_static(F3Request(
             op="validateCriticalFields",
             mapping=field_mapping,
             ruhsat_json=ruhsat_data,
-            task="Yeni Trafik"
+            task=task
         ))
         log("INFO", "TSX-VALIDATE-RES", f"Validation result: ok={validation.get('ok')}", component="TsX")
         
@@ -218,10 +419,10 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
         
         # Check if should fallback to LLM
         log("INFO", "TSX-FALLBACK-CHECK", "Checking if LLM fallback needed", component="TsX")
-        fallback_check = f3_static(F3Request(
+        fallback_check = _f3_static(F3Request(
             op="checkShouldFallbackToLLM",
             validation_result=validation,
-            task="Yeni Trafik"
+            task=task
         ))
         log("INFO", "TSX-FALLBACK-RES", f"Fallback check: ok={fallback_check.get('ok')} should_fallback={fallback_check.get('should_fallback')}", component="TsX")
         
@@ -277,7 +478,7 @@ def tsx_dev_run(req: TsxRequest) -> Dict[str, Any]:
 class HtmlCaptureRequest(BaseModel):
     # Operation mode (MANDATORY): 'allPlanHomePageCandidates' | 'planCheckHtmlIfChanged'
     op: str
-    html: str
+    html: Optional[str] = None  # may be omitted when using the delta upload protocol
     name: Optional[str] = None
     # Debug/diagnostics
     debug: Optional[bool] = None
@@ -294,6 +495,19 @@ class HtmlCaptureRequest(BaseModel):
     # LLM fallback fields
     llm_feedback: Optional[str] = None  # UI-provided feedback text about failed candidates/tries
     llm_attempt_index: Optional[int] = None  # 0-based attempt count maintained by UI
+    # Delta upload protocol (see Components/htmlSnapshotStore.py)
+    session_id: Optional[str] = None
+    html_fp: Optional[str] = None
+    html_base_fp: Optional[str] = None
+    html_delta: Optional[List[Any]] = None
+    html_encoding: Optional[str] = None
+    html_b64: Optional[str] = None
+    prev_html_fp: Optional[str] = None
+    current_html_fp: Optional[str] = None
+    # Learned ranking: url of html (allPlanHomePageCandidates) / of prev_html + the clicked selector (planCheckHtmlIfChanged)
+    current_url: Optional[str] = None
+    prev_url: Optional[str] = None
+    tried_selector: Optional[str] = None
 
 
 class HtmlSaveRequest(BaseModel):
@@ -313,10 +527,16 @@ class GoUserTaskRequest(BaseModel):
     llm_attempt_index: Optional[int] = None
     force_llm: Optional[bool] = None
     open_menu_first: Optional[bool] = None  # for fullFlow
+    session_id: Optional[str] = None  # groups steps into one run (/api/runs)
+    # Learned ranking: url of html / prev_html, and on change checks the clicked selector + the op it came from
+    current_url: Optional[str] = None
+    prev_url: Optional[str] = None
+    tried_selector: Optional[str] = None
+    tried_op: Optional[str] = None  # openSideMenu | goUserPage
 
 
 class F3Request(BaseModel):
-    # op: loadRuhsatFromTmp | analyzePage | buildFillPlan | detectFinalPage | analyzePageStaticFillForms | validateCriticalFields | detectFormsFilled | checkShouldFallbackToLLM
+    # op: loadRuhsatFromTmp | analyzePage | buildFillPlan | detectFinalPage | analyzePageStaticFillForms | validateCriticalFields | detectFormsFilled | checkShouldFallbackToLLM | planPage
     op: Optional[str] = None
     html: Optional[str] = None
     ruhsat_json: Optional[Dict[str, Any]] = None
@@ -332,6 +552,9 @@ class F3Request(BaseModel):
     # For page change detection
     current_html: Optional[str] = None
     prev_html: Optional[str] = None
+    # For planPage: what the UI did on the previous page (url, fingerprint, selector_status, details)
+    last_execution: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None  # groups steps into one run (/api/runs)
 
 
 @app.post("/api/f1")
@@ -339,10 +562,22 @@ def f1(req: HtmlCaptureRequest) -> Dict[str, Any]:
     """F1: On-demand FindHomePage feature entry.
 
     UI sends { html, name? } here; calls FindHomePage.
+    html/prev_html/current_html may instead be sent via the delta upload protocol.
     """
+    t0 = time.perf_counter()
+    with metrics.request_timer("/api/f1", req.op), request_profiler.profile("/api/f1", op=req.op):
+        res = _f1(req)
+    _record_step("F1", req.op, req, res, t0)
+    return res
+
+
+def _f1(req: HtmlCaptureRequest) -> Dict[str, Any]:
     valid_ops = {"allPlanHomePageCandidates", "planCheckHtmlIfChanged", "planLetLLMMap"}
     if req.op not in valid_ops:
         raise HTTPException(status_code=422, detail=f"invalid op: {req.op}. expected one of {sorted(valid_ops)}")
+    _resolve_html_upload(req, ("prev_html", "current_html"))
+    if req.html is None:
+        raise HTTPException(status_code=422, detail="missing html")
     log("INFO", "F1-REQ", f"op={req.op}", component="F1", extra={
         "name": req.name or "F1",
         "html_len": len(req.html or ""),
@@ -369,6 +604,10 @@ def f1(req: HtmlCaptureRequest) -> Dict[str, Any]:
         # LLM planning
         llm_feedback=req.llm_feedback,
         llm_attempt_index=req.llm_attempt_index,
+        ranker=click_ranker,
+        current_url=req.current_url,
+        prev_url=req.prev_url,
+        tried_selector=req.tried_selector,
     )
     keys = list(res.keys())
     log("INFO", "F1-RES", f"keys={keys}", component="F1", extra={"op": req.op})
@@ -387,20 +626,38 @@ def f2(req: GoUserTaskRequest) -> Dict[str, Any]:
 
     Backward compatibility: if no op provided but prev/current html given -> perform diff only.
     """
+    t0 = time.perf_counter()
+    with metrics.request_timer("/api/f2", req.op or "diff"), request_profiler.profile("/api/f2", op=req.op or "diff"):
+        res = _f2(req)
+    _record_step("F2", req.op or "diff", req, res, t0)
+    return res
+
+
+def _f2(req: GoUserTaskRequest) -> Dict[str, Any]:
     op = (req.op or "").strip()
     # Raw diff only fallback
     if not op:
         if not (req.current_html or req.html):
             raise HTTPException(status_code=422, detail="missing html or op")
-        res = detect_web_page_change(current_raw_html=req.current_html or req.html, prev_raw_html=req.prev_html)
+        chk = plan_check_page_changed(
+            current_raw_html=req.current_html or req.html,
+            prev_raw_html=req.prev_html,
+            ranker=click_ranker,
+            tried_selector=req.tried_selector,
+            tried_op=req.tried_op,
+            task_label=req.taskLabel,
+            prev_url=req.prev_url,
+        )
+        res = chk["result"]
         return {
             "ok": True,
-            "changed": res.changed,
-            "reason": res.reason,
-            "before_hash": res.before_hash,
-            "after_hash": res.after_hash,
-            "details": res.details or {},
+            "changed": res["changed"],
+            "reason": res["reason"],
+            "before_hash": res["before_hash"],
+            "after_hash": res["after_hash"],
+            "details": res["details"] or {},
             "mode": "diff-only",
+            **({"recorded": chk["recorded"]} if "recorded" in chk else {}),
         }
 
     # Require html for planning ops (except pure checkPageChanged which uses current_html)
@@ -408,7 +665,7 @@ def f2(req: GoUserTaskRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=422, detail="missing html for planning")
 
     if op == "openSideMenu":
-        return plan_open_side_menu(req.html)
+        return plan_open_side_menu(req.html, ranker=click_ranker, current_url=req.current_url)
     if op == "goUserPage":
         if not req.taskLabel:
             raise HTTPException(status_code=422, detail="missing taskLabel")
@@ -419,11 +676,18 @@ def f2(req: GoUserTaskRequest) -> Dict[str, Any]:
             force_llm=bool(req.force_llm),
             llm_feedback=req.llm_feedback,
             llm_attempt_index=req.llm_attempt_index,
+            ranker=click_ranker,
+            current_url=req.current_url,
         )
     if op == "checkPageChanged":
         return plan_check_page_changed(
             current_raw_html=req.current_html,
             prev_raw_html=req.prev_html,
+            ranker=click_ranker,
+            tried_selector=req.tried_selector,
+            tried_op=req.tried_op,
+            task_label=req.taskLabel,
+            prev_url=req.prev_url,
         )
     if op == "fullFlow":
         if not req.taskLabel:
@@ -434,6 +698,8 @@ def f2(req: GoUserTaskRequest) -> Dict[str, Any]:
             open_menu_first=True if req.open_menu_first is None else bool(req.open_menu_first),
             llm_feedback=req.llm_feedback,
             llm_attempt_index=req.llm_attempt_index,
+            ranker=click_ranker,
+            current_url=req.current_url,
         )
     raise HTTPException(status_code=422, detail=f"invalid op: {op}")
 
@@ -450,6 +716,11 @@ def calib(req: F3Request) -> Dict[str, Any]:
       - load { mapping: { host, task } }
       - finalizeToConfig { mapping: { host, task } }
     """
+    with metrics.request_timer("/api/calib", req.op), request_profiler.profile("/api/calib", op=req.op):
+        return _calib(req)
+
+
+def _calib(req: F3Request) -> Dict[str, Any]:
     op = (req.op or "").strip()
     if not op:
         raise HTTPException(status_code=422, detail="missing op")
@@ -512,7 +783,7 @@ def calib(req: F3Request) -> Dict[str, Any]:
 
 
 @app.post("/api/f3")
-def f3(req: F3Request) -> Dict[str, Any]:
+def f3(req: F3Request, verbose: int = 1) -> Dict[str, Any]:
     """F3: fillFormsUserTaskPage feature entry.
 
     Operations (req.op):
@@ -521,6 +792,14 @@ def f3(req: F3Request) -> Dict[str, Any]:
       - buildFillPlan: turn field_mapping + ruhsat_json into FillPlan actions
       - detectFinalPage: static final-page detection via CTA synonyms
     """
+    t0 = time.perf_counter()
+    with metrics.request_timer("/api/f3", req.op), request_profiler.profile("/api/f3", op=req.op):
+        res = _f3(req)
+    _record_step("F3", req.op, req, res, t0)
+    return _with_verbosity(res, verbose)
+
+
+def _f3(req: F3Request) -> Dict[str, Any]:
     op = (req.op or "").strip()
     if not op:
         raise HTTPException(status_code=422, detail="missing op")
@@ -531,7 +810,9 @@ def f3(req: F3Request) -> Dict[str, Any]:
     if op == "analyzePage":
         if not req.html:
             raise HTTPException(status_code=422, detail="missing html")
-        return plan_analyze_page(req.html, req.ruhsat_json or {})
+        # mapping.field_mapping (optional): keys already mapped, so the prompt budget favours the rest
+        fm = (req.mapping or {}).get("field_mapping")
+        return plan_analyze_page(req.html, req.ruhsat_json or {}, list(fm.keys()) if isinstance(fm, dict) else None)
 
     if op == "buildFillPlan":
         # Build plan of set_value/select_option actions from mapping + ruhsat_json
@@ -560,7 +841,7 @@ def f3(req: F3Request) -> Dict[str, Any]:
 
 
 @app.post("/api/f3-static")
-def f3_static(req: F3Request) -> Dict[str, Any]:
+def f3_static(req: F3Request, verbose: int = 1) -> Dict[str, Any]:
     """F3-Static: fillFormsUserTaskPageStatic feature entry (STATIC ONLY).
 
     Operations (req.op):
@@ -570,7 +851,17 @@ def f3_static(req: F3Request) -> Dict[str, Any]:
       - detectFinalPage: static final-page detection via CTA synonyms
       - detectFormsFilled: check if forms are filled
       - checkShouldFallbackToLLM: determine if LLM fallback is needed
+      - planPage: all of the above in one call -> fill plan, predicted verification,
+        final-page signals, next action selectors and the next step
     """
+    t0 = time.perf_counter()
+    with metrics.request_timer("/api/f3-static", req.op), request_profiler.profile("/api/f3-static", op=req.op):
+        res = _f3_static(req)
+    _record_step("F3-Static", req.op, req, res, t0)
+    return _with_verbosity(res, verbose)
+
+
+def _f3_static(req: F3Request) -> Dict[str, Any]:
     op = (req.op or "").strip()
     if not op:
         raise HTTPException(status_code=422, detail="missing op")
@@ -591,8 +882,14 @@ def f3_static(req: F3Request) -> Dict[str, Any]:
         plan_detect_final_page as static_plan_detect_final_page,
         plan_detect_forms_filled as static_plan_detect_forms_filled,
         plan_check_should_fallback_to_llm,
+        plan_page_transition,
     )
 
+    if op == "planPage":
+        if not req.html:
+            raise HTTPException(status_code=422, detail="missing html")
+        return plan_page_transition(req.html, req.current_url, req.task, req.ruhsat_json, req.last_execution, req.critical_fields_override)
+
     if op == "loadRuhsatFromTmp":
         return static_plan_load_ruhsat_json()
 
@@ -644,15 +941,167 @@ def capture_html(req: HtmlSaveRequest) -> Dict[str, Any]:
 
 
 @app.get("/api/logs")
-def get_logs() -> Dict[str, Any]:
-    """Return accumulated backend logs for the UI log panel."""
+def get_logs(since: Optional[int] = None) -> Dict[str, Any]:
+    """Return accumulated backend logs for the UI log panel (only seq > since when given)."""
     try:
-        logs = get_log_records()
+        logs = get_log_records(since)
         return {"logs": logs}
     except Exception:
         return {"logs": []}
 
 
+def _topics(topics: Optional[str]) -> List[str]:
+    return [t.strip() for t in (topics or "").split(",") if t.strip()]
+
+
+@app.get("/api/events")
+async def events_sse(request: Request, topics: Optional[str] = None, session_id: Optional[str] = None) -> Any:
+    """Server-Sent Events: `log`, `step`, `page` events as they happen (topics=log,step,page).
+
+    Each client has a bounded queue; when it falls behind the oldest events are dropped and a
+    `dropped` event {count} is sent first (resync logs via /api/logs?since=<last seq>).
+    """
+    sub = event_bus.subscribe(_topics(topics), session_id=session_id)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="too many event stream clients")
+    heartbeat_s = float(get_api_events("heartbeatS", 15))
+
+    async def stream():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                batch = await sub.next_batch(heartbeat_s)
+                if await request.is_disconnected():
+                    break
+                if not batch:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(sse_format(ev) for ev in batch)
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.websocket("/api/ws/events")
+async def events_ws(websocket: WebSocket, topics: Optional[str] = None, session_id: Optional[str] = None) -> None:
+    """WebSocket variant of /api/events: one JSON array of events per message."""
+    await websocket.accept()
+    sub = event_bus.subscribe(_topics(topics), session_id=session_id)
+    if sub is None:
+        await websocket.close(code=1013)
+        return
+    try:
+        await pump_ws(websocket, sub, float(get_api_events("heartbeatS", 15)))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        event_bus.unsubscribe(sub)
+
+
+@app.get("/metrics")
+def prometheus_metrics() -> Any:
+    """Prometheus text exposition of the metrics registry (Components/metrics.py)."""
+    if not metrics.registry.enabled:
+        raise HTTPException(status_code=404, detail="metrics disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/metrics/summary")
+def metrics_summary() -> Dict[str, Any]:
+    """p50/p95 per endpoint/op and stage, LLM calls/tokens by model, cache hit ratios."""
+    return {"ok": True, "enabled": metrics.registry.enabled, **metrics.summary()}
+
+
+@app.get("/api/trace")
+def trace_list(limit: int = 50) -> Dict[str, Any]:
+    """Most recent finished traces (newest first) with root duration and span count."""
+    return {"ok": True, **tracing.tracer.stats(), "traces": tracing.tracer.recent(limit)}
+
+
+@app.get("/api/trace/{trace_id}")
+def trace_get(trace_id: str, format: str = "tree") -> Dict[str, Any]:
+    """Span tree of one request (format=tree) or the same spans as OTLP/JSON (format=otlp)."""
+    tr = tracing.tracer.get(trace_id)
+    if tr is None:
+        raise HTTPException(status_code=404, detail=f"unknown trace: {trace_id}")
+    if format == "otlp":
+        return tracing.to_otlp(tr)
+    if format != "tree":
+        raise HTTPException(status_code=422, detail="format must be tree or otlp")
+    return {"ok": True, **tracing.to_tree(tr)}
+
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def _require_admin(request: Request) -> None:
+    # browsers send Origin on cross-origin requests (incl. "simple" POSTs that skip preflight)
+    origin = request.headers.get("origin")
+    if origin and urlsplit(origin).netloc != request.headers.get("host", ""):
+        raise HTTPException(status_code=403, detail="cross-origin admin requests are not allowed")
+    token = str(get_api_admin("token", "") or os.getenv("P2_ADMIN_TOKEN", ""))
+    if token:
+        if not hmac.compare_digest(request.headers.get("x-admin-token", ""), token):
+            raise HTTPException(status_code=403, detail="admin token required")
+    elif (request.client.host if request.client else "") not in _LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="admin endpoints are loopback-only without api.admin.token")
+    # DNS rebinding: a page on evil.test resolving to 127.0.0.1 has a loopback peer and
+    # Origin == Host, so without a token the Host itself must name the loopback interface
+    elif urlsplit("//" + request.headers.get("host", "")).hostname not in _LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="admin endpoints need Host localhost/127.0.0.1/[::1] without api.admin.token")
+
+
+class ProfileRequest(BaseModel):
+    endpoint: str  # one of PROFILABLE_ENDPOINTS
+    count: int = 5  # next N calls to the endpoint
+    interval_ms: Optional[float] = None  # stack sampling period (default api.profiling.sampleIntervalMs)
+
+
+@app.post("/api/admin/profile")
+def admin_profile_start(req: ProfileRequest, request: Request) -> Dict[str, Any]:
+    """Arm a profiling session: the next `count` calls to `endpoint` run under cProfile + stack sampling."""
+    _require_admin(request)
+    if req.endpoint not in PROFILABLE_ENDPOINTS:
+        raise HTTPException(status_code=422, detail=f"endpoint must be one of {list(PROFILABLE_ENDPOINTS)}")
+    sess = request_profiler.arm(req.endpoint, req.count, req.interval_ms)
+    log("INFO", "PROFILE-ARMED", f"profiling next {sess.count} calls to {sess.endpoint}", component="Admin", extra={"id": sess.id})
+    return {"ok": True, **sess.summary()}
+
+
+@app.get("/api/admin/profile")
+def admin_profile_list(request: Request) -> Dict[str, Any]:
+    _require_admin(request)
+    return {"ok": True, "sessions": request_profiler.sessions()}
+
+
+@app.get("/api/admin/profile/{session_id}")
+def admin_profile_get(session_id: str, request: Request, format: str = "json", top: int = 40, sort: str = "cumulative") -> Any:
+    """Top functions by cumulative (or sort=tottime) time; format=collapsed returns folded stacks for flamegraph tools."""
+    _require_admin(request)
+    sess = request_profiler.get(session_id)
+    if sess is None:
+        raise HTTPException(status_code=404, detail=f"unknown profile session: {session_id}")
+    if format == "collapsed":
+        return PlainTextResponse(sess.collapsed(), headers={"Content-Disposition": f'attachment; filename="profile-{sess.id}.folded"'})
+    if format != "json":
+        raise HTTPException(status_code=422, detail="format must be json or collapsed")
+    return {"ok": True, **sess.summary(), "requests": sess.requests, "top_functions": sess.top_functions(top, sort)}
+
+
+@app.delete("/api/admin/profile/{session_id}")
+def admin_profile_cancel(session_id: str, request: Request) -> Dict[str, Any]:
+    _require_admin(request)
+    if request_profiler.get(session_id) is None:
+        raise HTTPException(status_code=404, detail=f"unknown profile session: {session_id}")
+    return {"ok": True, "cancelled": request_profiler.cancel(session_id)}
+
+
+@app.get("/api/events/stats")
+def events_stats() -> Dict[str, Any]:
+    return {"ok": True, **event_bus.stats()}
+
+
 @app.post("/api/logs/clear")
 def clear_logs() -> Dict[str, Any]:
     """Clear accumulated backend logs."""
@@ -663,6 +1112,151 @@ def clear_logs() -> Dict[str, Any]:
         return {"ok": False}
 
 
+@app.get("/api/runs")
+def list_runs(limit: int = 50, host: Optional[str] = None) -> Dict[str, Any]:
+    """Recent runs (newest first) with step counts, last phase, latency and LLM usage."""
+    limit = max(1, min(int(limit), 500))
+    return {"ok": True, "runs": run_recorder.run_history(limit=limit, host=host), "recorder": run_recorder.stats()}
+
+
+@app.get("/api/runs/hosts")
+def runs_by_host(since: Optional[str] = None) -> Dict[str, Any]:
+    """Per-host success rate: completed runs / runs and ok steps / steps (since: 'YYYY-MM-DD HH:MM:SS' UTC)."""
+    return {"ok": True, "hosts": run_recorder.host_success_rates(since=since)}
+
+
+@app.get("/api/runs/{run_id}")
+def get_run(run_id: int) -> Dict[str, Any]:
+    """One run with its recorded steps (phase, fingerprint, actions, latency, LLM usage)."""
+    res = run_recorder.run_steps(run_id)
+    if not res:
+        raise HTTPException(status_code=404, detail=f"unknown run: {run_id}")
+    return {"ok": True, **res}
+
+
+# ------------------------- work queue (documents x hosts) -------------------------
+
+_work_queue: Optional[JobQueue] = None
+_queue_workers: Dict[str, Any] = {"threads": [], "stop": None}
+
+
+def _get_work_queue() -> JobQueue:
+    global _work_queue
+    if _work_queue is None:
+        db_path = Path(__file__).resolve().parents[1] / str(get_api_work_queue("dbPath", "tmp/workQueue.db"))
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        _work_queue = JobQueue(str(db_path), backoff_s=float(get_api_work_queue("backoffSeconds", 5)))
+    return _work_queue
+
+
+def _start_queue_workers(count: int, use_llm: bool) -> int:
+    from Features.batchFillForms import start_workers  # type: ignore
+    _queue_workers["threads"] = [t for t in _queue_workers["threads"] if t.is_alive()]
+    if _queue_workers["threads"]:
+        return len(_queue_workers["threads"])
+    threads, stop = start_workers(
+        _get_work_queue(), count,
+        lease_s=float(get_api_work_queue("leaseSeconds", 120)),
+        use_llm=use_llm,
+    )
+    _queue_workers.update(threads=threads, stop=stop)
+    log("INFO", "QUEUE-WORKERS", f"started {len(threads)} queue workers", component="BatchFill", extra={"use_llm": use_llm})
+    return len(threads)
+
+
+class QueueDocument(BaseModel):
+    id: str  # ruhsat .json file or image (relative to production2/); any label when ruhsat_json is given
+    ruhsat_json: Optional[Dict[str, Any]] = None
+
+
+class QueueEnqueueRequest(BaseModel):
+    documents: List[Union[str, QueueDocument]]  # paths, or {id, ruhsat_json} for inline documents
+    hosts: Optional[List[str]] = None  # default: every calibrated site
+    task: str = "Yeni Trafik"
+    payload: Optional[Dict[str, Any]] = None  # extras copied into every job
+    pages: Optional[Dict[str, Dict[str, Any]]] = None  # host -> {html | html_path, url}
+    max_attempts: Optional[int] = None
+
+
+_PER_DOCUMENT_KEYS = ("ruhsat_json",)
+_PER_HOST_KEYS = ("html", "html_path", "url")
+
+
+class QueueWorkersRequest(BaseModel):
+    count: int = 2
+    use_llm: Optional[bool] = None
+
+
+@app.post("/api/queue/enqueue")
+def queue_enqueue(req: QueueEnqueueRequest) -> Dict[str, Any]:
+    """Fan out documents x hosts into (document, host, task) jobs; active duplicates are skipped."""
+    hosts = req.hosts
+    if hosts is None:
+        from Components.calibStorage import list_sites  # type: ignore
+        hosts = list_sites()
+    if not req.documents or not hosts:
+        raise HTTPException(status_code=422, detail="documents and hosts must not be empty")
+    docs = [d if isinstance(d, QueueDocument) else QueueDocument(id=d) for d in req.documents]
+    shared = dict(req.payload or {})
+    # a shared payload is copied into every job: it must not carry one document's data or one site's page
+    if len(docs) > 1 and any(k in shared for k in _PER_DOCUMENT_KEYS):
+        raise HTTPException(status_code=422, detail="payload.ruhsat_json would apply to every document; use documents[].ruhsat_json")
+    if len(hosts) > 1 and any(k in shared for k in _PER_HOST_KEYS):
+        raise HTTPException(status_code=422, detail="payload html/html_path/url would apply to every host; use pages.<host>")
+    max_attempts = int(req.max_attempts or get_api_work_queue("maxAttempts", 3))
+    ids = _get_work_queue().enqueue_fanout(
+        [d.id for d in docs], hosts, req.task, shared, max_attempts=max_attempts,
+        document_payloads={d.id: {"ruhsat_json": d.ruhsat_json} for d in docs if d.ruhsat_json is not None},
+        host_payloads={h: {k: v for k, v in (p or {}).items() if k in _PER_HOST_KEYS} for h, p in (req.pages or {}).items()},
+    )
+    total = len(docs) * len(hosts)
+    return {"ok": True, "enqueued": len(ids), "skipped": total - len(ids), "ids": ids}
+
+
+@app.get("/api/queue/stats")
+def queue_stats(window_s: float = 300.0) -> Dict[str, Any]:
+    """Per-state counts plus jobs/min over the window and overall."""
+    alive = sum(1 for t in _queue_workers["threads"] if t.is_alive())
+    return {"ok": True, **_get_work_queue().stats(window_s=max(1.0, window_s)), "workers": alive}
+
+
+@app.get("/api/queue/jobs")
+def queue_jobs(state: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    """Newest jobs first, optionally filtered by state (queued/leased/done/dead)."""
+    return {"ok": True, "jobs": _get_work_queue().list_jobs(state=state, limit=max(1, min(int(limit), 1000)))}
+
+
+@app.post("/api/queue/jobs/{job_id}/requeue")
+def queue_requeue(job_id: int) -> Dict[str, Any]:
+    """Revive a dead-letter job (409 when it is not dead or the triple is active again)."""
+    if _get_work_queue().get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"unknown job: {job_id}")
+    if not _get_work_queue().requeue(job_id):
+        raise HTTPException(status_code=409, detail=f"job {job_id} is not requeueable")
+    return {"ok": True, "id": job_id}
+
+
+@app.post("/api/queue/workers")
+def queue_workers_start(req: QueueWorkersRequest) -> Dict[str, Any]:
+    use_llm = bool(get_api_work_queue("useLLM", True)) if req.use_llm is None else req.use_llm
+    return {"ok": True, "workers": _start_queue_workers(max(1, min(req.count, 32)), use_llm)}
+
+
+@app.delete("/api/queue/workers")
+def queue_workers_stop() -> Dict[str, Any]:
+    """Stop after the current jobs; unfinished leases expire and are picked up again."""
+    stop = _queue_workers.get("stop")
+    if stop is not None:
+        stop.set()
+    n = len(_queue_workers["threads"])
+    _queue_workers.update(threads=[], stop=None)
+    return {"ok": True, "stopped": n}
+
+
+if int(get_api_work_queue("workers", 0) or 0) > 0:
+    _start_queue_workers(int(get_api_work_queue("workers", 0)), bool(get_api_work_queue("useLLM", True)))
+
+
 @app.post("/api/upload")
 async def upload(file: UploadFile = File(...)) -> Dict[str, Any]:
     """Accept JPEG/PNG and stage into configured data dir (goFillForms.input.imageDir)."""
@@ -682,6 +1276,60 @@ async def upload(file: UploadFile = File(...)) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class PageSnapshotRequest(BaseModel):
+    # The page the webview shows now; any delta upload shape (html may be omitted)
+    session_id: Optional[str] = None
+    html: Optional[str] = None
+    html_fp: Optional[str] = None
+    html_base_fp: Optional[str] = None
+    html_delta: Optional[List[Any]] = None
+    html_encoding: Optional[str] = None
+    html_b64: Optional[str] = None
+    current_url: Optional[str] = None
+
+
+@app.post("/api/page/snapshot")
+def page_snapshot(req: PageSnapshotRequest) -> Dict[str, Any]:
+    """Push the current webview page; wakes /api/page/await-change waiters it satisfies.
+
+    Push the page you click from first, then a snapshot per navigation / DOM-mutation event.
+    """
+    up = _resolve_html_upload(req)
+    if up is None:
+        raise HTTPException(status_code=422, detail="missing html")
+    snap = page_change_hub.publish(req.session_id or "default", html=up.html, fingerprint=up.fingerprint, url=req.current_url)
+    return {"ok": True, "seq": snap["seq"], "fingerprint": snap["fingerprint"]}
+
+
+@app.get("/api/page/await-change")
+async def page_await_change(
+    session_id: Optional[str] = None,
+    from_fp: Optional[str] = None,
+    from_signature: Optional[str] = None,
+    timeout_ms: Optional[int] = None,
+    mode: str = "structure",
+) -> Dict[str, Any]:
+    """Long-poll: returns when a snapshot with a different structural signature (mode=any: fingerprint)
+    than from_fp's arrives, or after timeout_ms with changed=false. Holds no worker thread while waiting.
+    """
+    if mode not in ("structure", "any"):
+        raise HTTPException(status_code=422, detail=f"invalid mode: {mode}")
+    default_ms = int(get_api_page_change("defaultTimeoutMs", 5000))
+    cap_ms = int(get_api_page_change("maxTimeoutMs", 30000))
+    wait_ms = min(cap_ms, max(0, int(timeout_ms if timeout_ms is not None else default_ms)))
+    res = await page_change_hub.wait_for_change(
+        session_id or "default", from_fp=from_fp, from_signature=from_signature, timeout_s=wait_ms / 1000.0, mode=mode,
+    )
+    return {"ok": True, **res}
+
+
+@app.get("/api/ingest/progress")
+def ingest_progress(path: Optional[str] = None) -> Dict[str, Any]:
+    """Ruhsat extraction state (latest image unless path given): OCR partial fields before vision finishes."""
+    state = extraction_progress(path)
+    return {"ok": bool(state), **state}
+
+
 if __name__ == "__main__":
     import uvicorn
 
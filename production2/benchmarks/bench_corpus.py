@@ -0,0 +1,264 @@
+"""Offline corpus benchmark of the static hot paths, compared to a saved baseline.
+
+Replays stored pages (input_htmls/, qt_browser/, memory/TmpData/webbot2html/
+and get_save_Html snapshots {"html", "metadata"} in tmp/html/) through
+
+  filter_Html (cache cleared per call), static_analyze_page,
+  map_home_page_static, map_side_menu_static, detect_final_page_arrived,
+  _heuristic_map_fields
+
+Stages after filter_Html get the filtered page, as in the F1/F2/F3 flows.
+Per stage it reports calls/s, MB/s, p50/p95 latency and peak traced memory
+(a separate tracemalloc pass, so timings are not slowed by tracing).
+No network and no LLM; mapping artifacts are written to a temp dir.
+
+With a baseline file present the run fails (exit 1) when a stage's p95 is
+more than --tolerance above the baseline or its peak memory more than
+--mem-tolerance above it. When a small pure-Python calibration loop runs
+slower than at baseline time, the latency limits grow by that factor so a
+slower machine does not read as a regression (they never shrink: a
+calibration that happens to run fast must not fail an unchanged tree).
+
+    python production2/benchmarks/bench_corpus.py [--repeat 5] [--json out.json]
+    python production2/benchmarks/bench_corpus.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_P2 = Path(__file__).resolve().parents[1]
+_REPO = _P2.parent
+for _p in (_P2 / "backend", _P2):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+import config  # type: ignore  # noqa: E402
+import logging_utils  # type: ignore  # noqa: E402
+from backend import logging_utils as backend_logging_utils  # type: ignore  # noqa: E402
+from Components import getHtml, mappingStatic, mappingStaticSideMenu  # type: ignore  # noqa: E402
+from Components.mappingStaticFillForms import static_analyze_page  # type: ignore  # noqa: E402
+from Components.detectFinalPageArrivedinUserTask import detect_final_page_arrived  # type: ignore  # noqa: E402
+from Components.letLLMMapUserPageForms import _heuristic_map_fields  # type: ignore  # noqa: E402
+
+DEFAULT_DIRS = [
+    _REPO / "input_htmls",
+    _REPO / "qt_browser",
+    _REPO / "memory" / "TmpData" / "webbot2html",
+    _P2 / "tmp" / "html",
+]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline_corpus.json"
+RUHSAT_KEYS = ["plaka_no", "sasi_no", "motor_no", "model_yili", "tckimlik", "dogum_tarihi"]
+STAGES = ("filter_Html", "static_analyze_page", "map_home_page_static", "map_side_menu_static",
+          "detect_final_page_arrived", "_heuristic_map_fields")
+
+
+def load_corpus(dirs: List[Path]) -> List[Tuple[str, str]]:
+    """(name, raw html) for every *.html and snapshot *.json below dirs."""
+    pages: List[Tuple[str, str]] = []
+    for d in dirs:
+        if not d.is_dir():
+            continue
+        for p in sorted(d.rglob("*")):
+            if p.suffix == ".html":
+                html = p.read_text(encoding="utf-8", errors="ignore")
+            elif p.suffix == ".json":
+                try:
+                    data = json.loads(p.read_text(encoding="utf-8", errors="ignore"))
+                except ValueError:
+                    continue
+                html = data.get("html") if isinstance(data, dict) else None
+                if not isinstance(html, str):
+                    continue
+            else:
+                continue
+            if html.strip():
+                pages.append((str(p.relative_to(_REPO)) if p.is_relative_to(_REPO) else str(p), html))
+    return pages
+
+
+def _stage_fns(tmp_dir: str) -> Dict[str, Callable[[str, str], Any]]:
+    cfg = copy.deepcopy(config.load_config())
+    cfg.setdefault("paths", {})["tmpDir"] = tmp_dir
+
+    def _filter(raw: str, _filtered: str) -> Any:
+        getHtml._FILTER_CACHE.clear()  # measure the BeautifulSoup pass, not the cache
+        return getHtml.filter_Html(raw)
+
+    return {
+        "filter_Html": _filter,
+        "static_analyze_page": lambda raw, f: static_analyze_page(f, "https://bench.local/form", "Yeni Trafik", cfg),
+        "map_home_page_static": lambda raw, f: mappingStatic.map_home_page_static(f, name="bench"),
+        "map_side_menu_static": lambda raw, f: mappingStaticSideMenu.map_side_menu_static(f, name="bench"),
+        "detect_final_page_arrived": lambda raw, f: detect_final_page_arrived(f),
+        "_heuristic_map_fields": lambda raw, f: _heuristic_map_fields(f, RUHSAT_KEYS),
+    }
+
+
+def _pct(sorted_ms: List[float], q: float) -> float:
+    i = min(len(sorted_ms) - 1, max(0, int(round(q * (len(sorted_ms) - 1)))))
+    return sorted_ms[i]
+
+
+def _clear_logs() -> None:
+    # the components log every call and the log store is unbounded
+    logging_utils.clear_log_records()
+    backend_logging_utils.clear_log_records()
+
+
+def calibrate(rounds: int = 5) -> float:
+    """ms for a fixed pure-Python workload (best of rounds): the machine speed unit."""
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        acc: Dict[str, int] = {}
+        for i in range(200_000):
+            k = "k%d" % (i % 997)
+            acc[k] = acc.get(k, 0) + len(k)
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 3)
+
+
+def run(pages: List[Tuple[str, str]], repeat: int, stages: List[str]) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="p2bench-") as tmp:
+        # map_*_static write their mapping JSON under <_root>/tmp/jsonMappings
+        saved_roots = mappingStatic._root, mappingStaticSideMenu._root
+        mappingStatic._root = mappingStaticSideMenu._root = Path(tmp)
+        try:
+            fns = _stage_fns(tmp)
+            inputs = [(raw, getHtml._filter_Html(raw).html) for _name, raw in pages]
+            total_mb = sum(len(raw.encode("utf-8")) for raw, _f in inputs) / 1048576
+            results: Dict[str, Any] = {}
+            for stage in stages:
+                fn = fns[stage]
+                for raw, filtered in inputs:  # warm-up (imports, regex compiles, config)
+                    fn(raw, filtered)
+                _clear_logs()
+                lat: List[float] = []
+                t_all = time.perf_counter()
+                for _ in range(repeat):
+                    for raw, filtered in inputs:
+                        t0 = time.perf_counter()
+                        fn(raw, filtered)
+                        lat.append((time.perf_counter() - t0) * 1000)
+                elapsed = time.perf_counter() - t_all
+                _clear_logs()
+                peak = 0
+                tracemalloc.start()
+                try:
+                    for raw, filtered in inputs:
+                        tracemalloc.reset_peak()
+                        fn(raw, filtered)
+                        peak = max(peak, tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+                _clear_logs()
+                lat.sort()
+                results[stage] = {
+                    "calls": len(lat),
+                    "calls_per_s": round(len(lat) / elapsed, 1),
+                    "mb_per_s": round(total_mb * repeat / elapsed, 2),
+                    "p50_ms": round(statistics.median(lat), 3),
+                    "p95_ms": round(_pct(lat, 0.95), 3),
+                    "max_ms": round(lat[-1], 3),
+                    "peak_mem_kb": round(peak / 1024, 1),
+                }
+        finally:
+            mappingStatic._root, mappingStaticSideMenu._root = saved_roots
+    return {
+        "corpus": {"pages": len(pages), "mb": round(total_mb, 3)},
+        "repeat": repeat,
+        "calib_ms": calibrate(),
+        "python": sys.version.split()[0],
+        "stages": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, mem_tolerance: float) -> List[str]:
+    """Regression messages (empty = pass)."""
+    scale = max(1.0, (current.get("calib_ms") or 1.0) / (baseline.get("calib_ms") or current.get("calib_ms") or 1.0))
+    problems: List[str] = []
+    for stage, cur in current["stages"].items():
+        base = (baseline.get("stages") or {}).get(stage)
+        if not base:
+            continue
+        limit = base["p95_ms"] * scale * (1 + tolerance)
+        if cur["p95_ms"] > limit:
+            problems.append(f"{stage}: p95 {cur['p95_ms']:.2f} ms > {limit:.2f} ms "
+                            f"(baseline {base['p95_ms']:.2f} ms x machine {scale:.2f} x {1 + tolerance:.2f})")
+        mem_limit = base["peak_mem_kb"] * (1 + mem_tolerance)
+        if cur["peak_mem_kb"] > mem_limit:
+            problems.append(f"{stage}: peak memory {cur['peak_mem_kb']:.0f} KB > {mem_limit:.0f} KB "
+                            f"(baseline {base['peak_mem_kb']:.0f} KB)")
+    return problems
+
+
+def _print_table(res: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    c = res["corpus"]
+    print(f"corpus: {c['pages']} pages, {c['mb']:.2f} MB, repeat {res['repeat']}, calib {res['calib_ms']:.1f} ms")
+    print(f"{'stage':<27} {'calls/s':>9} {'MB/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'peak KB':>9} {'base p95':>9}")
+    for stage, r in res["stages"].items():
+        base = ((baseline or {}).get("stages") or {}).get(stage) or {}
+        bp95 = f"{base['p95_ms']:9.2f}" if base else f"{'-':>9}"
+        print(f"{stage:<27} {r['calls_per_s']:9.1f} {r['mb_per_s']:8.2f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+              f"{r['peak_mem_kb']:9.0f} {bp95}")
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", action="append", help="corpus directory (repeatable; default: the stored page dirs)")
+    ap.add_argument("--stages", default=",".join(STAGES), help="comma separated subset of: " + ", ".join(STAGES))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.30, help="allowed p95 increase (0.30 = +30%%)")
+    ap.add_argument("--mem-tolerance", type=float, default=0.20, help="allowed peak memory increase")
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        ap.error(f"unknown stages: {unknown}")
+    pages = load_corpus([Path(d) for d in args.dir] if args.dir else DEFAULT_DIRS)
+    if not pages:
+        print("no pages found in the corpus directories", file=sys.stderr)
+        return 2
+
+    # static_analyze_page / _heuristic_map_fields print [DEBUG] lines per page
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        res = run(pages, max(1, args.repeat), stages)
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+    _print_table(res, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps(res, indent=2), encoding="utf-8")
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(res, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline written: {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"no baseline at {baseline_path}; run with --update-baseline to create one")
+        return 0
+    if baseline.get("corpus") != res["corpus"]:
+        print(f"note: corpus differs from the baseline ({baseline.get('corpus')} vs {res['corpus']})")
+    problems = compare(res, baseline, args.tolerance, args.mem_tolerance)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    print("FAIL" if problems else "OK")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,101 @@
+"""Final-page detector on multi-MB pages: single pass vs. the previous version.
+
+Builds large pages by concatenating stored step pages (tsx_debug) up to the
+requested sizes, appends a final CTA + PDF link near the end, and times
+detect_final_page_arrived against the previous implementation (whole-page
+NFKD normalization + five regex scans), checking that both report the same
+cta_present / pdf_found / pdf_links.
+
+    python production2/benchmarks/bench_final_page.py [--sizes 1,4,8] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+_P2 = Path(__file__).resolve().parents[1]
+_REPO = _P2.parent
+for _p in (_P2 / "backend", _P2):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from Components.detectFinalPageArrivedinUserTask import (  # type: ignore  # noqa: E402
+    FINAL_CTA_SYNONYMS,
+    detect_final_page_arrived,
+)
+
+DEFAULT_DIR = _REPO / "memory" / "TmpData" / "webbot2html" / "tsx_debug"
+FINAL_TAIL = (
+    '<div class="actions"><button class="btn btn-success">Poliçeyi Aktifleştir</button>'
+    '<a href="/policy/print/123.pdf?dl=1">Poliçe PDF</a></div></body></html>'
+)
+
+
+def _legacy_normalize(s: str) -> str:
+    import unicodedata
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return s.lower().strip()
+
+
+def _legacy_detect(html: str) -> Dict[str, Any]:
+    low = _legacy_normalize(html)
+    hits = [t for t in FINAL_CTA_SYNONYMS if _legacy_normalize(t) in low]
+    pdf_links = re.findall(r'href=["\']([^"\']+\.pdf(?:\?[^"\']*)?)["\']', html, flags=re.IGNORECASE)
+    data_pdf = re.findall(r'href=["\'](data:application/pdf[^"\']+)["\']', html, flags=re.IGNORECASE)
+    pdf_iframes = re.findall(r'<(?:iframe|embed|object)[^>]+(?:type=["\']application/pdf["\']|src=["\'][^"\']+\.pdf)', html, flags=re.IGNORECASE)
+    re.search(r"bg-green-600|btn-primary|btn-success|class=\".*(success|primary).*\"", html, flags=re.IGNORECASE)
+    pdf_found = bool(pdf_links or data_pdf or pdf_iframes)
+    return {"cta_present": bool(hits), "pdf_found": pdf_found, "pdf_links": pdf_links}
+
+
+def _build_page(sources: List[str], size: int) -> str:
+    parts: List[str] = []
+    total = 0
+    i = 0
+    while total < size:
+        chunk = sources[i % len(sources)]
+        parts.append(chunk)
+        total += len(chunk)
+        i += 1
+    return "".join(parts) + FINAL_TAIL
+
+
+def _time(fn: Any, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", default=str(DEFAULT_DIR))
+    ap.add_argument("--sizes", default="1,4,8", help="page sizes in MB, comma separated")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    sources = [p.read_text(encoding="utf-8", errors="ignore") for p in sorted(Path(args.dir).glob("*.html"))]
+    if not sources:
+        sources = ['<div class="row"><label>Plaka</label><input name="plaka" value="06 ABC 123"><span>Şasi Numarası</span></div>']
+    print(f"{'size':>8} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}  same_signals")
+    for mb in [float(x) for x in args.sizes.split(",") if x.strip()]:
+        html = _build_page(sources, int(mb * 1024 * 1024))
+        old = _legacy_detect(html)
+        new = detect_final_page_arrived(html)
+        same = all(old[k] == new[k] for k in ("cta_present", "pdf_found", "pdf_links"))
+        t_old = _time(_legacy_detect, html, args.repeat)
+        t_new = _time(detect_final_page_arrived, html, args.repeat)
+        print(f"{len(html) / 1048576:7.1f}M {t_old * 1000:10.1f} {t_new * 1000:10.1f} {t_old / t_new:7.1f}x  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
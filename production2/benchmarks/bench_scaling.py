@@ -0,0 +1,154 @@
+"""Latency and mapping accuracy vs. page size on synthetic form pages.
+
+Sweeps PageSpec grids from synth_pages.py (forms x inputs x depth x
+options, several seeds) and runs every page through
+
+  filter_Html              ms, and how many of the expected ruhsat controls
+                           survive its forms[:5] / controls[:60] caps ("kept")
+  static_analyze_page      ms, recall / precision against the expected mapping
+  _heuristic_map_fields    ms, recall / precision
+  detect_final_page_arrived ms
+
+Mappers get the raw page (labels included), as /api/f3-static does.
+Prints one row per spec (medians over seeds) and writes long-form CSV rows
+(spec columns, stage, ms, recall, precision, kept) for plotting with
+--csv.
+
+    python production2/benchmarks/bench_scaling.py [--inputs 20,80,320] [--forms 1,8] [--csv scaling.csv]
+
+The default grid (12 specs x 2 seeds) takes a few minutes; 300 KB pages
+with 500-option selects take seconds per mapper call.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import csv
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+_HERE = Path(__file__).resolve().parent
+_P2 = _HERE.parent
+for _p in (_P2 / "backend", _P2, _HERE):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+import config  # type: ignore  # noqa: E402
+import logging_utils  # type: ignore  # noqa: E402
+from backend import logging_utils as backend_logging_utils  # type: ignore  # noqa: E402
+from Components import getHtml  # type: ignore  # noqa: E402
+from Components.mappingStaticFillForms import static_analyze_page  # type: ignore  # noqa: E402
+from Components.detectFinalPageArrivedinUserTask import detect_final_page_arrived  # type: ignore  # noqa: E402
+from Components.letLLMMapUserPageForms import _heuristic_map_fields  # type: ignore  # noqa: E402
+from synth_pages import LABEL_STYLES, PageSpec, SyntheticPage, generate_page, score_mapping  # noqa: E402
+
+SPEC_COLUMNS = ("forms", "inputs", "depth", "selects", "options", "size_kb")
+
+
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def measure(page: SyntheticPage, cfg: Dict[str, Any], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Per stage: ms (median of repeat) and, where it applies, recall/precision/kept."""
+    html = page.html
+    keys = list(page.expected)
+
+    def _filter() -> Any:
+        getHtml._FILTER_CACHE.clear()
+        return getHtml.filter_Html(html)
+
+    out: Dict[str, Dict[str, Any]] = {}
+    filtered = _filter().html
+    names = [sel.split("'")[1] for sel in page.expected.values()]  # [name='f0_3'] -> f0_3
+    kept = sum(1 for n in names if f'name="{n}"' in filtered)
+    out["filter_Html"] = {"ms": _median_ms(_filter, repeat), "kept": round(kept / len(keys), 3) if keys else 1.0}
+
+    static = static_analyze_page(html, "https://synth.local/teklif", "Yeni Trafik", cfg)
+    s = score_mapping(page, static.get("field_mapping") or {})
+    out["static_analyze_page"] = {
+        "ms": _median_ms(lambda: static_analyze_page(html, "https://synth.local/teklif", "Yeni Trafik", cfg), repeat),
+        "recall": s["recall"], "precision": s["precision"],
+    }
+    h = score_mapping(page, _heuristic_map_fields(html, keys))
+    out["_heuristic_map_fields"] = {"ms": _median_ms(lambda: _heuristic_map_fields(html, keys), repeat),
+                                    "recall": h["recall"], "precision": h["precision"]}
+    out["detect_final_page_arrived"] = {"ms": _median_ms(lambda: detect_final_page_arrived(html), repeat)}
+    logging_utils.clear_log_records()
+    backend_logging_utils.clear_log_records()
+    return out
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--forms", default="1,8")
+    ap.add_argument("--inputs", default="20,80,320")
+    ap.add_argument("--depth", default="4")
+    ap.add_argument("--options", default="10,200")
+    ap.add_argument("--selects", type=int, default=6)
+    ap.add_argument("--styles", default=",".join(LABEL_STYLES))
+    ap.add_argument("--seeds", default="0,1")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--csv", help="write long-form rows (one per spec x seed x stage)")
+    args = ap.parse_args(argv)
+
+    styles = tuple(s.strip() for s in args.styles.split(",") if s.strip())
+    rows: List[Dict[str, Any]] = []
+    print(f"{'forms':>5} {'inputs':>6} {'depth':>5} {'opts':>5} {'KB':>7} "
+          f"{'filter':>8} {'kept':>5} {'static':>8} {'rec':>5} {'heur':>8} {'rec':>5} {'final':>7}")
+    with tempfile.TemporaryDirectory(prefix="p2scaling-") as tmp:
+        cfg = copy.deepcopy(config.load_config())
+        cfg.setdefault("paths", {})["tmpDir"] = tmp  # static_analyze_page debug dumps
+        for forms, inputs, depth, options in itertools.product(
+                _ints(args.forms), _ints(args.inputs), _ints(args.depth), _ints(args.options)):
+            per_seed = []
+            for seed in _ints(args.seeds):
+                spec = PageSpec(forms=forms, inputs=inputs, depth=depth, selects=args.selects, options=options,
+                                label_styles=styles, seed=seed)
+                page = generate_page(spec)
+                # static_analyze_page / _heuristic_map_fields print [DEBUG] lines per page
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    res = measure(page, cfg, max(1, args.repeat))
+                size_kb = round(page.size_bytes / 1024, 1)
+                per_seed.append((size_kb, res))
+                for stage, r in res.items():
+                    rows.append({"forms": forms, "inputs": inputs, "depth": depth, "selects": args.selects,
+                                 "options": options, "size_kb": size_kb, "seed": seed, "stage": stage,
+                                 "ms": round(r["ms"], 3), "recall": r.get("recall", ""),
+                                 "precision": r.get("precision", ""), "kept": r.get("kept", "")})
+
+            def med(stage: str, k: str) -> float:
+                return statistics.median(r[stage][k] for _kb, r in per_seed)
+            print(f"{forms:5d} {inputs:6d} {depth:5d} {options:5d} {statistics.median(kb for kb, _r in per_seed):7.0f} "
+                  f"{med('filter_Html', 'ms'):8.1f} {med('filter_Html', 'kept'):5.2f} "
+                  f"{med('static_analyze_page', 'ms'):8.1f} {med('static_analyze_page', 'recall'):5.2f} "
+                  f"{med('_heuristic_map_fields', 'ms'):8.1f} {med('_heuristic_map_fields', 'recall'):5.2f} "
+                  f"{med('detect_final_page_arrived', 'ms'):7.2f}")
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(SPEC_COLUMNS) + ["seed", "stage", "ms", "recall", "precision", "kept"])
+            w.writeheader()
+            w.writerows(rows)
+        print(f"{len(rows)} rows written to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
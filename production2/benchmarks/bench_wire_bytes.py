@@ -0,0 +1,126 @@
+"""Wire bytes per step for the production2 API.
+
+Replays stored TsX step pages (memory/TmpData/webbot2html/tsx_debug by
+default) and reports, per step:
+
+- request bytes for /api/tsx/dev-run: plain JSON, gzip/zstd body
+  (Content-Encoding), and the delta/fingerprint upload protocol
+- response bytes for /api/f3-static analyzePageStaticFillForms with
+  verbose=1 vs verbose=0, each as identity / gzip / zstd
+
+Responses are measured through the real middleware stack (TestClient), using
+the Content-Length the server sent. Run from anywhere:
+
+    python production2/benchmarks/bench_wire_bytes.py [--dir DIR] [--limit N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+_P2 = Path(__file__).resolve().parents[1]
+_REPO = _P2.parent
+for _p in (_P2 / "backend", _P2):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # type: ignore  # noqa: E402
+from Components.wireCompression import compress_body, zstd_available  # type: ignore  # noqa: E402
+
+DEFAULT_DIR = _REPO / "memory" / "TmpData" / "webbot2html" / "tsx_debug"
+
+
+def _prefix_suffix_delta(base: str, nxt: str) -> List[List[Any]]:
+    # Same single-edit delta as react_ui/src/services/htmlUploadClient.ts
+    n = min(len(base), len(nxt))
+    p = 0
+    while p < n and base[p] == nxt[p]:
+        p += 1
+    s = 0
+    while s < n - p and base[len(base) - 1 - s] == nxt[len(nxt) - 1 - s]:
+        s += 1
+    ops: List[List[Any]] = []
+    if p:
+        ops.append(["=", p])
+    if len(base) - p - s:
+        ops.append(["-", len(base) - p - s])
+    if len(nxt) - p - s:
+        ops.append(["+", nxt[p:len(nxt) - s]])
+    return ops
+
+
+def _request_sizes(html: str, prev: str | None) -> Dict[str, int]:
+    body = {"user_command": "Yeni Trafik", "html": html, "current_url": "https://example.test/step"}
+    raw = json.dumps(body).encode("utf-8")
+    out = {"json": len(raw), "gzip": len(gzip.compress(raw, 6))}
+    if zstd_available():
+        out["zstd"] = len(compress_body(raw, "zstd"))
+    fp = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    if prev is None:
+        delta_body: Dict[str, Any] = body
+    elif prev == html:
+        delta_body = {**body, "html": None, "html_fp": fp}
+    else:
+        delta_body = {**body, "html": None, "html_fp": fp,
+                      "html_base_fp": hashlib.sha256(prev.encode("utf-8")).hexdigest(),
+                      "html_delta": _prefix_suffix_delta(prev, html)}
+    out["delta"] = len(json.dumps({k: v for k, v in delta_body.items() if v is not None}).encode("utf-8"))
+    return out
+
+
+def _response_sizes(client: TestClient, html: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    body = {"op": "analyzePageStaticFillForms", "html": html, "task": "Yeni Trafik"}
+    encodings = ["identity", "gzip"] + (["zstd"] if zstd_available() else [])
+    for verbose in (1, 0):
+        for enc in encodings:
+            with contextlib.redirect_stdout(io.StringIO()):  # feature debug prints
+                r = client.post(f"/api/f3-static?verbose={verbose}", json=body, headers={"Accept-Encoding": enc})
+            out[f"v{verbose}_{enc}"] = int(r.headers.get("content-length") or len(r.content))
+    return out
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", default=str(DEFAULT_DIR), help="directory with step_*.html pages")
+    ap.add_argument("--limit", type=int, default=12)
+    args = ap.parse_args(argv)
+
+    pages = sorted(Path(args.dir).glob("*.html"))[: args.limit]
+    if not pages:
+        print(f"no pages in {args.dir}")
+        return 1
+    client = TestClient(main.app)
+    totals: Dict[str, int] = {}
+    prev: str | None = None
+    print(f"{'step':<44} {'request bytes':<48} response bytes")
+    for page in pages:
+        html = page.read_text(encoding="utf-8", errors="ignore")
+        req = _request_sizes(html, prev)
+        resp = _response_sizes(client, html)
+        prev = html
+        for k, v in {**{f"req_{k}": v for k, v in req.items()}, **{f"resp_{k}": v for k, v in resp.items()}}.items():
+            totals[k] = totals.get(k, 0) + v
+        print(f"{page.name:<44} {json.dumps(req):<48} {json.dumps(resp)}")
+
+    print(f"\nper step average over {len(pages)} steps:")
+    base_req = totals["req_json"] or 1
+    base_resp = totals["resp_v1_identity"] or 1
+    for k in sorted(totals):
+        base = base_req if k.startswith("req_") else base_resp
+        print(f"  {k:<22} {totals[k] // len(pages):>9} B  ({100.0 * totals[k] / base:5.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,349 @@
+"""Local OpenAI-compatible stub server for load-testing the LLM fallback path.
+
+Serves POST /v1/chat/completions and POST /v1/responses with answers derived
+from the prompt, so the backend parses them like real model output:
+
+  F3 mapping prompt   (controls summary or compact tag|type|id|name|label|extra
+                       table) -> {"page_kind", "field_mapping", "actions", "evidence"}
+                       with #id / tag[name='...'] selectors of controls whose label
+                       matches a ruhsat key
+  ruhsat vision prompt -> a fixed ruhsat JSON object
+  anything else (F1/F2 click prompts) -> {"selectorType": "text", "selector": <first
+                       button/link text in the HTML>, "alternatives", "rationale"}
+
+Latency per request is drawn from --latency (ms):
+  fixed:800 | uniform:200,1500 | normal:800,200 | lognormal:800,0.5 (median, sigma)
+and errors are injected with --rate-429, --rate-5xx (500/502/503) and
+--rate-timeout (the request hangs for --timeout-s, then the connection is
+closed without a response). GET /stats returns counters and served latency
+percentiles; DELETE /stats resets them.
+
+    python production2/benchmarks/fake_openai.py --port 8765 --latency lognormal:800,0.5 --rate-429 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-fake python production2/backend/main.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ruhsat key -> label fragments (lowercase, Turkish letters folded)
+KEY_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "plaka_no": ("plaka",),
+    "sasi_no": ("sasi", "sase", "vin"),
+    "motor_no": ("motor",),
+    "model_yili": ("model yili",),
+    "tescil_tarihi": ("tescil", "kayit tarihi"),
+    "marka": ("marka",),
+    "yakit": ("yakit",),
+    "renk": ("renk",),
+    "tckimlik": ("tc kimlik", "tckn"),
+}
+FAKE_RUHSAT = {
+    "plaka_no": "06 AK 8886", "marka": "RENAULT", "model_yili": "2005", "tescil_tarihi": "24.08.2004",
+    "sasi_no": "VF1LB240531754309", "motor_no": "K4MJ730", "yakit": "BENZİN", "renk": "GRİ",
+}
+_FOLD = str.maketrans("şŞıİğĞüÜöÖçÇ", "ssiigguuoocc")
+_SUMMARY_ATTR = re.compile(r"(label|label-wrap|lb|aria|ph|title)=(.+?)(?= (?:label|label-wrap|lb|db|aria|ph|title|"
+                           r"aria-labelledby|aria-describedby|name|data-[\w-]+)=|$)")
+TABLE_HEADER = "tag|type|id|name|label|extra"
+
+
+def _fold(s: str) -> str:
+    return " ".join(s.translate(_FOLD).lower().split())
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """'fixed:800' | 'uniform:lo,hi' | 'normal:mean,sd' | 'lognormal:median,sigma' -> rng -> ms."""
+    kind, _, args = spec.partition(":")
+    if not args:  # bare number
+        kind, args = "fixed", kind
+    nums = [float(x) for x in args.split(",") if x.strip()]
+    if kind == "fixed" and len(nums) == 1:
+        return lambda rng: nums[0]
+    if kind == "uniform" and len(nums) == 2:
+        return lambda rng: rng.uniform(nums[0], nums[1])
+    if kind == "normal" and len(nums) == 2:
+        return lambda rng: max(0.0, rng.gauss(nums[0], nums[1]))
+    if kind == "lognormal" and len(nums) == 2:
+        import math
+        return lambda rng: rng.lognormvariate(math.log(max(nums[0], 1e-3)), nums[1])
+    raise ValueError(f"bad latency spec: {spec!r}")
+
+
+def _controls(prompt: str) -> List[Dict[str, str]]:
+    """Controls listed in an F3 mapping prompt (full summary or compact table)."""
+    out: List[Dict[str, str]] = []
+    lines = prompt.splitlines()
+    if TABLE_HEADER in lines:
+        for ln in lines[lines.index(TABLE_HEADER) + 1:]:
+            cells = ln.split("|")
+            if len(cells) != 6:
+                break
+            out.append({"tag": cells[0], "id": cells[2], "name": cells[3], "label": cells[4]})
+        return out
+    in_summary = False
+    for ln in lines:
+        if ln.startswith("Available controls"):
+            in_summary = True
+            continue
+        if not in_summary:
+            continue
+        if not ln.startswith("- "):
+            break
+        bits = ln[2:].split(" ")
+        row = {"tag": bits[0], "id": "", "name": "", "label": ""}
+        for b in bits[1:]:
+            if b.startswith("#") and not row["id"]:
+                row["id"] = b[1:]
+            elif b.startswith("name=") and not row["name"]:
+                row["name"] = b[5:]
+        row["label"] = " ".join(v for _k, v in _SUMMARY_ATTR.findall(ln[2:]))
+        out.append(row)
+    return out
+
+
+def _ruhsat_keys(prompt: str) -> List[str]:
+    m = re.search(r"Ruhsat JSON[^\n]*\n(\{.*\})", prompt)
+    try:
+        keys = [k for k in json.loads(m.group(1)) if k in KEY_PATTERNS] if m else []
+    except Exception:
+        keys = []
+    return keys or list(KEY_PATTERNS)
+
+
+def fake_mapping(prompt: str) -> Dict[str, Any]:
+    """Schema-valid F3 answer: label-matched controls, or final_activation when there are none."""
+    controls = _controls(prompt)
+    if not controls and TABLE_HEADER not in prompt.splitlines():  # compact table may be cut to no rows
+        ctas = [c for c in ("Poliçeyi Aktifleştir", "Onayla", "Devam") if c in prompt]
+        return {"page_kind": "final_activation", "actions": ctas or ["Devam"], "evidence": "fake-openai: no controls"}
+    mapping: Dict[str, str] = {}
+    used = set()
+    for key in _ruhsat_keys(prompt):
+        for i, c in enumerate(controls):
+            if i in used or not (c["id"] or c["name"]):
+                continue
+            if any(p in _fold(c["label"]) for p in KEY_PATTERNS[key]):
+                mapping[key] = f"#{c['id']}" if c["id"] else f"{c['tag'] or 'input'}[name='{c['name']}']"
+                used.add(i)
+                break
+    return {"page_kind": "fill_form", "field_mapping": mapping, "actions": ["Devam"],
+            "evidence": f"fake-openai: {len(mapping)}/{len(controls)} controls matched"}
+
+
+def fake_click(text: str) -> Dict[str, Any]:
+    texts = [" ".join(t.split()) for t in re.findall(r"<(?:button|a)\b[^>]*>([^<]{1,60})</(?:button|a)>", text)]
+    texts = [t for t in texts if t]
+    return {"selectorType": "text", "selector": texts[0] if texts else "Devam",
+            "alternatives": texts[1:4], "rationale": "fake-openai: first clickable text"}
+
+
+def _prompt_of(path: str, body: Dict[str, Any]) -> Tuple[str, bool]:
+    """All text in the request and whether it carries an image."""
+    parts: List[str] = []
+    image = False
+
+    def walk(content: Any) -> None:
+        nonlocal image
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            for c in content:
+                walk(c)
+        elif isinstance(content, dict):
+            if "image" in str(content.get("type") or ""):
+                image = True
+            for k in ("text", "content"):
+                if k in content:
+                    walk(content[k])
+
+    walk(body.get("messages") if path.endswith("/chat/completions") else body.get("input"))
+    return "\n".join(parts), image
+
+
+def answer_for(path: str, body: Dict[str, Any]) -> Tuple[str, str]:
+    """(kind, JSON text) the fake model replies with."""
+    prompt, image = _prompt_of(path, body)
+    if image or "vehicle registration (ruhsat) image" in prompt:
+        return "ruhsat", json.dumps(FAKE_RUHSAT, ensure_ascii=False)
+    if "Available controls" in prompt or TABLE_HEADER in prompt or "page_kind" in prompt:
+        return "f3_mapping", json.dumps(fake_mapping(prompt), ensure_ascii=False)
+    return "click", json.dumps(fake_click(prompt), ensure_ascii=False)
+
+
+class FakeOpenAI:
+    def __init__(self, latency: str = "fixed:0", rate_429: float = 0.0, rate_5xx: float = 0.0,
+                 rate_timeout: float = 0.0, timeout_s: float = 30.0, seed: Optional[int] = None) -> None:
+        self.latency_spec = latency
+        self._latency = parse_latency(latency)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.rate_timeout = rate_timeout
+        self.timeout_s = timeout_s
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "429": 0, "5xx": 0, "timeout": 0, "bad_request": 0}
+            self.kinds: Dict[str, int] = {}
+            self.served_ms: List[float] = []
+
+    def _count(self, name: str, kind: Optional[str] = None, ms: Optional[float] = None) -> None:
+        with self._lock:
+            self.counts[name] += 1
+            if kind:
+                self.kinds[kind] = self.kinds.get(kind, 0) + 1
+            if ms is not None:
+                self.served_ms.append(ms)
+
+    def draw(self) -> Tuple[str, float]:
+        """(outcome, delay ms) for the next request."""
+        with self._lock:
+            self.counts["requests"] += 1
+            r = self._rng.random()
+            delay = self._latency(self._rng)
+        if r < self.rate_429:
+            return "429", 0.0
+        if r < self.rate_429 + self.rate_5xx:
+            return "5xx", delay
+        if r < self.rate_429 + self.rate_5xx + self.rate_timeout:
+            return "timeout", self.timeout_s * 1000
+        return "ok", delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ms = sorted(self.served_ms)
+        pct = (lambda p: round(ms[min(len(ms) - 1, int(p * len(ms)))], 1)) if ms else (lambda p: None)
+        return {"counts": dict(self.counts), "kinds": dict(self.kinds), "latency": self.latency_spec,
+                "served_ms": {"n": len(ms), "mean": round(statistics.fmean(ms), 1) if ms else None,
+                              "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}}
+
+    def handler(self) -> type:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:  # quiet: one line per request is too much under load
+                pass
+
+            def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") == "/stats":
+                    return self._send(200, fake.stats())
+                if self.path.rstrip("/") == "/v1/models":
+                    return self._send(200, {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "fake"}]})
+                self._send(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+
+            def do_DELETE(self) -> None:
+                if self.path.rstrip("/") == "/stats":
+                    fake.reset()
+                    return self._send(200, {"ok": True})
+                self._send(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+
+            def do_POST(self) -> None:
+                t0 = time.perf_counter()
+                raw = self.rfile.read(int(self.headers.get("content-length") or 0))
+                path = self.path.split("?")[0].rstrip("/")
+                if not path.endswith(("/chat/completions", "/responses")):
+                    return self._send(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+                try:
+                    body = json.loads(raw or b"{}")
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict) or body.get("stream"):
+                    fake._count("bad_request")
+                    return self._send(400, {"error": {"message": "fake-openai: JSON body without stream=true expected",
+                                                      "type": "invalid_request_error"}})
+                outcome, delay_ms = fake.draw()
+                if outcome == "429":
+                    fake._count("429")
+                    return self._send(429, {"error": {"message": "Rate limit reached (fake-openai)", "type": "requests",
+                                                      "code": "rate_limit_exceeded"}}, {"retry-after": "1"})
+                time.sleep(delay_ms / 1000)
+                if outcome == "timeout":
+                    fake._count("timeout")
+                    self.close_connection = True  # hang up without a response
+                    return
+                if outcome == "5xx":
+                    fake._count("5xx")
+                    status = fake._rng.choice((500, 502, 503))
+                    return self._send(status, {"error": {"message": f"fake-openai injected {status}", "type": "server_error"}})
+                kind, text = answer_for(path, body)
+                model = str(body.get("model") or "gpt-4o")
+                n_in = max(1, len(raw) // 4)
+                n_out = max(1, len(text) // 4)
+                now = int(time.time())
+                rid = f"fake-{threading.get_ident()}-{time.perf_counter_ns()}"
+                if path.endswith("/chat/completions"):
+                    payload = {"id": f"chatcmpl-{rid}", "object": "chat.completion", "created": now, "model": model,
+                               "choices": [{"index": 0, "finish_reason": "stop",
+                                            "message": {"role": "assistant", "content": text}}],
+                               "usage": {"prompt_tokens": n_in, "completion_tokens": n_out, "total_tokens": n_in + n_out}}
+                else:
+                    payload = {"id": f"resp_{rid}", "object": "response", "created_at": now, "model": model,
+                               "status": "completed",
+                               "output": [{"type": "message", "id": f"msg_{rid}", "status": "completed", "role": "assistant",
+                                           "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+                               "usage": {"input_tokens": n_in, "output_tokens": n_out, "total_tokens": n_in + n_out}}
+                fake._count("ok", kind, (time.perf_counter() - t0) * 1000)
+                self._send(200, payload)
+
+        return Handler
+
+
+def make_server(fake: FakeOpenAI, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Bound (not yet serving) server; port 0 picks a free port (server.server_address[1])."""
+    server = ThreadingHTTPServer((host, port), fake.handler())
+    server.daemon_threads = True
+    return server
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", default="lognormal:800,0.5", help="ms: fixed:N | uniform:lo,hi | normal:mean,sd | lognormal:median,sigma")
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--rate-5xx", type=float, default=0.0)
+    ap.add_argument("--rate-timeout", type=float, default=0.0)
+    ap.add_argument("--timeout-s", type=float, default=30.0, help="how long a 'timeout' request hangs before the connection drops")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    fake = FakeOpenAI(args.latency, args.rate_429, args.rate_5xx, args.rate_timeout, args.timeout_s, args.seed)
+    server = make_server(fake, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"fake OpenAI on http://{host}:{port}/v1  latency={args.latency} 429={args.rate_429} "
+          f"5xx={args.rate_5xx} timeout={args.rate_timeout}  (GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(fake.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,171 @@
+"""Concurrent sessions against /api/tsx/dev-run and /api/f3 analyzePage (the LLM fallback path).
+
+Every session (one asyncio task, all started at once) runs --rounds times:
+
+  POST /api/tsx/dev-run   {html, current_url, ruhsat_json, session_id}
+  POST /api/f3            {op: analyzePage, html, ruhsat_json}
+                          (always, or with --fallback-only only when dev-run
+                          answered state=need_llm_fallback)
+
+on a synthetic form page from synth_pages.py (--pages distinct pages),
+and reports per endpoint: requests, HTTP 200s, error statuses, client
+exceptions (timeouts, refused connections), p50/p95/p99/max latency and
+throughput. It also reports how many analyzePage answers carried a mapping,
+and their recall against the page's expected mapping. With --fake-url the
+fake OpenAI server's /stats (LLM calls, injected 429/5xx/timeouts) is
+reset first and printed afterwards.
+
+    python production2/benchmarks/fake_openai.py --latency lognormal:800,0.5 --rate-429 0.05 &
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-fake python production2/backend/main.py &
+    python production2/benchmarks/load_llm_fallback.py --sessions 100 --rounds 3 --fake-url http://127.0.0.1:8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+_HERE = Path(__file__).resolve().parent
+if str(_HERE) not in sys.path:
+    sys.path.insert(0, str(_HERE))
+
+from fake_openai import FAKE_RUHSAT  # noqa: E402
+from synth_pages import PageSpec, SyntheticPage, generate_page, score_mapping  # noqa: E402
+
+ENDPOINTS = ("/api/tsx/dev-run", "/api/f3")
+
+
+class Results:
+    def __init__(self) -> None:
+        self.ms: Dict[str, List[float]] = {e: [] for e in ENDPOINTS}
+        self.status: Dict[str, Dict[str, int]] = {e: {} for e in ENDPOINTS}
+        self.mapped = 0
+        self.llm_failed: Dict[str, int] = {}
+        self.recall: List[float] = []
+        self.fallback_states: Dict[str, int] = {}
+
+    def add(self, endpoint: str, ms: float, outcome: str) -> None:
+        self.ms[endpoint].append(ms)
+        self.status[endpoint][outcome] = self.status[endpoint].get(outcome, 0) + 1
+
+
+async def _post(client: httpx.AsyncClient, res: Results, endpoint: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    t0 = time.perf_counter()
+    try:
+        r = await client.post(endpoint, json=body, params={"verbose": 0})
+    except httpx.HTTPError as e:
+        res.add(endpoint, (time.perf_counter() - t0) * 1000, type(e).__name__)
+        return None
+    res.add(endpoint, (time.perf_counter() - t0) * 1000, str(r.status_code))
+    try:
+        return r.json() if r.status_code == 200 else None
+    except ValueError:
+        return None
+
+
+async def session(client: httpx.AsyncClient, res: Results, idx: int, pages: List[SyntheticPage],
+                  rounds: int, fallback_only: bool, think_s: float) -> None:
+    page = pages[idx % len(pages)]
+    ruhsat = {k: FAKE_RUHSAT.get(k, "x") for k in page.expected}
+    for rnd in range(rounds):
+        tsx = await _post(client, res, "/api/tsx/dev-run", {
+            "html": page.html, "current_url": "https://synth.local/teklif", "ruhsat_json": ruhsat,
+            "session_id": f"load-{idx}", "hard_reset": rnd == 0,
+        })
+        state = str((tsx or {}).get("state") or "none")
+        res.fallback_states[state] = res.fallback_states.get(state, 0) + 1
+        if fallback_only and state != "need_llm_fallback":
+            continue
+        f3 = await _post(client, res, "/api/f3", {"op": "analyzePage", "html": page.html, "ruhsat_json": ruhsat})
+        if f3 is not None:
+            fm = f3.get("field_mapping")
+            if f3.get("ok") and isinstance(fm, dict):
+                res.mapped += 1
+                res.recall.append(score_mapping(page, fm)["recall"])
+            else:
+                err = str(f3.get("error") or "not_ok")[:60]
+                res.llm_failed[err] = res.llm_failed.get(err, 0) + 1
+        if think_s:
+            await asyncio.sleep(think_s)
+
+
+def _pct(values: List[float], p: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(p * len(s)))] if s else 0.0
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    spec = dict(forms=args.forms, inputs=args.inputs, depth=args.depth, label_styles=("for", "wrap", "aria"))
+    pages = [generate_page(PageSpec(seed=s, **spec)) for s in range(max(1, args.pages))]
+    res = Results()
+    limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        if args.fake_url:
+            async with httpx.AsyncClient(base_url=args.fake_url, timeout=5) as fake:
+                await fake.delete("/stats")
+        t0 = time.perf_counter()
+        await asyncio.gather(*(session(client, res, i, pages, args.rounds, args.fallback_only, args.think_ms / 1000)
+                               for i in range(args.sessions)))
+        wall = time.perf_counter() - t0
+    out: Dict[str, Any] = {"sessions": args.sessions, "rounds": args.rounds, "wall_s": round(wall, 2),
+                           "page_kb": round(statistics.fmean(p.size_bytes for p in pages) / 1024, 1), "endpoints": {}}
+    for e in ENDPOINTS:
+        ms = res.ms[e]
+        out["endpoints"][e] = {
+            "requests": len(ms), "status": res.status[e], "rps": round(len(ms) / wall, 2) if wall else 0.0,
+            "p50_ms": round(_pct(ms, 0.50), 1), "p95_ms": round(_pct(ms, 0.95), 1),
+            "p99_ms": round(_pct(ms, 0.99), 1), "max_ms": round(max(ms), 1) if ms else 0.0,
+        }
+    out["tsx_states"] = res.fallback_states
+    out["analyze"] = {"mapped": res.mapped, "failed": res.llm_failed,
+                      "recall_mean": round(statistics.fmean(res.recall), 3) if res.recall else None}
+    if args.fake_url:
+        try:
+            out["fake_openai"] = httpx.get(args.fake_url.rstrip("/") + "/stats", timeout=5).json()
+        except httpx.HTTPError as e:
+            out["fake_openai"] = {"error": str(e)}
+    return out
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", default="http://127.0.0.1:5100", help="backend base URL")
+    ap.add_argument("--sessions", type=int, default=100, help="concurrent sessions (all start at once)")
+    ap.add_argument("--rounds", type=int, default=1, help="dev-run (+ analyzePage) rounds per session")
+    ap.add_argument("--fallback-only", action="store_true", help="call analyzePage only when dev-run asks for the LLM fallback")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause between rounds")
+    ap.add_argument("--pages", type=int, default=10, help="distinct synthetic pages (seeds)")
+    ap.add_argument("--forms", type=int, default=2)
+    ap.add_argument("--inputs", type=int, default=40)
+    ap.add_argument("--depth", type=int, default=4)
+    ap.add_argument("--timeout", type=float, default=180.0, help="client timeout per request (s)")
+    ap.add_argument("--fake-url", help="fake_openai.py base URL: reset its /stats before, print them after")
+    ap.add_argument("--json", help="write the report here")
+    args = ap.parse_args(argv)
+
+    out = asyncio.run(run(args))
+    print(f"{args.sessions} sessions x {args.rounds} rounds in {out['wall_s']} s (pages ~{out['page_kb']} KB)")
+    print(f"{'endpoint':18} {'n':>5} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  status")
+    for e, r in out["endpoints"].items():
+        print(f"{e:18} {r['requests']:5d} {r['rps']:7.2f} {r['p50_ms']:8.0f} {r['p95_ms']:8.0f} {r['p99_ms']:8.0f} "
+              f"{r['max_ms']:8.0f}  {json.dumps(r['status'])}")
+    print(f"dev-run states: {json.dumps(out['tsx_states'])}")
+    a = out["analyze"]
+    print(f"analyzePage: {a['mapped']} mapped (recall {a['recall_mean']}), failed {json.dumps(a['failed'], ensure_ascii=False)}")
+    if "fake_openai" in out:
+        print(f"fake OpenAI: {json.dumps(out['fake_openai'])}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,227 @@
+"""Deterministic synthetic insurer form pages with their expected field mapping.
+
+A page has `forms` forms with `inputs` controls in total. The ruhsat fields
+(plaka_no, sasi_no, ...) appear once each, spread over the forms, between
+distractor fields (Ad, TC Kimlik No, İl, ...). Every control sits under
+`depth` React-style wrapper divs; `selects` of them are <select>s with
+`options` options each. Labels are attached in one of four styles, cycled
+per control:
+
+  for      <label for=id>Plaka No</label> <input id=id>
+  wrap     <label>Plaka No <input></label>
+  aria     <span id=l>Plaka No</span> <input aria-labelledby=l>
+  sibling  <div class="field-label">Plaka No</div> <input>
+
+and the label text is one of several Turkish spellings (ŞASİ NO, Şasi
+Numarası, Sasi No, ...). Every control gets a unique, non-descriptive name
+(f<form>_<n>), so expected selectors are [name='...'] and a mapper cannot
+cheat on attribute names. The same PageSpec always yields the same page.
+
+    python production2/benchmarks/synth_pages.py --out /tmp/synth --inputs 200 --forms 4 --depth 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+LABEL_STYLES = ("for", "wrap", "aria", "sibling")
+
+# Spellings seen on insurer pages: case, dotted/dotless i, ASCII-folded, abbreviations
+TURKISH_LABELS: Dict[str, List[str]] = {
+    "plaka_no": ["Plaka No", "Plaka", "PLAKA NO", "Araç Plakası", "Plaka Numarası", "plaka numarasi"],
+    "sasi_no": ["Şasi No", "ŞASİ NO", "Şasi Numarası", "Sasi No", "Şase No", "VIN No"],
+    "motor_no": ["Motor No", "MOTOR NO", "Motor Numarası", "Motor numarasi"],
+    "model_yili": ["Model Yılı", "MODEL YILI", "Model Yili", "Model yılı:"],
+    "tescil_tarihi": ["Tescil Tarihi", "TESCİL TARİHİ", "Kayıt Tarihi", "Tescil tarihi *"],
+    "marka": ["Marka", "MARKA", "Araç Markası", "Marka *"],
+    "yakit": ["Yakıt", "Yakıt Tipi", "YAKIT TÜRÜ", "Yakit"],
+    "renk": ["Renk", "RENK", "Renk Kodu"],
+}
+DISTRACTOR_LABELS = [
+    "Ad", "Soyad", "TC Kimlik No", "Doğum Tarihi", "Cep Telefonu", "E-posta", "Adres", "İl", "İlçe",
+    "Meslek", "Poliçe Başlangıç Tarihi", "Kullanım Tarzı", "Araç Tipi", "Koltuk Sayısı", "Kampanya Kodu",
+    "Önceki Poliçe No", "Acente Notu", "Vergi No",
+]
+SELECT_KEYS = ("model_yili", "marka", "yakit", "renk")
+_WRAPPER_CLASSES = ("css-1d3bbye", "MuiGrid-item", "MuiFormControl-root", "sc-bdVaJa", "ant-form-item",
+                    "chakra-stack", "col-md-6", "form-group", "jss142", "flex flex-col gap-2")
+
+
+@dataclass
+class PageSpec:
+    forms: int = 1
+    inputs: int = 20  # controls in total, ruhsat fields included
+    depth: int = 2  # wrapper divs around each control
+    selects: int = 4  # how many controls are <select>
+    options: int = 10  # options per <select>
+    label_styles: Tuple[str, ...] = LABEL_STYLES  # cycled per control
+    variant: Optional[int] = None  # label spelling index; None = random per field
+    fields: Tuple[str, ...] = tuple(TURKISH_LABELS)  # ruhsat keys placed on the page
+    seed: int = 0
+
+    def name(self) -> str:
+        return (f"synth_f{self.forms}_i{self.inputs}_d{self.depth}_s{self.selects}_o{self.options}"
+                f"_{'-'.join(self.label_styles)}_v{'r' if self.variant is None else self.variant}_seed{self.seed}")
+
+
+@dataclass
+class SyntheticPage:
+    html: str
+    expected: Dict[str, str]  # ruhsat key -> "[name='...']"
+    labels: Dict[str, str] = field(default_factory=dict)  # ruhsat key -> label text used
+    styles: Dict[str, str] = field(default_factory=dict)  # ruhsat key -> label style used
+    spec: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.html.encode("utf-8"))
+
+
+def _esc(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _options(key: Optional[str], n: int, rng: random.Random) -> str:
+    if key == "model_yili":
+        values = [str(2025 - i) for i in range(n)]
+    elif key == "marka":
+        brands = ["RENAULT", "FIAT", "TOYOTA", "FORD", "VOLKSWAGEN", "HYUNDAI", "OPEL", "PEUGEOT", "BMW", "MERCEDES"]
+        values = [brands[i % len(brands)] + ("" if i < len(brands) else f" {i // len(brands)}") for i in range(n)]
+    else:
+        values = [f"Seçenek {i + 1}" for i in range(n)]
+    opts = ['<option value="">Seçiniz</option>']
+    opts.extend(f'<option value="{i + 1}">{_esc(v)}</option>' for i, v in enumerate(values))
+    return "".join(opts)
+
+
+def _control(tag: str, name: str, key: Optional[str], spec: PageSpec, rng: random.Random, extra: str = "") -> str:
+    if tag == "select":
+        return f'<select name="{name}" class="form-select"{extra}>{_options(key, spec.options, rng)}</select>'
+    return f'<input type="text" name="{name}" class="form-control" autocomplete="off"{extra}>'
+
+
+def _field(label: str, tag: str, name: str, style: str, key: Optional[str], spec: PageSpec, rng: random.Random) -> str:
+    lbl = _esc(label)
+    if style == "for":
+        body = f'<label for="{name}_id" class="form-label">{lbl}</label>' + _control(tag, name, key, spec, rng, f' id="{name}_id"')
+    elif style == "wrap":
+        body = f'<label class="form-label">{lbl} ' + _control(tag, name, key, spec, rng) + "</label>"
+    elif style == "aria":
+        body = f'<span id="{name}_lbl" class="caption">{lbl}</span>' + _control(tag, name, key, spec, rng, f' aria-labelledby="{name}_lbl"')
+    else:  # sibling
+        body = f'<div class="field-label">{lbl}</div><div class="field-input">' + _control(tag, name, key, spec, rng) + "</div>"
+    for d in range(spec.depth):
+        cls = _WRAPPER_CLASSES[(d + rng.randrange(len(_WRAPPER_CLASSES))) % len(_WRAPPER_CLASSES)]
+        body = f'<div class="{cls}" data-reactroot-{d}="">{body}</div>'
+    return body
+
+
+def generate_page(spec: PageSpec) -> SyntheticPage:
+    """Build the page for spec; identical specs give identical pages."""
+    rng = random.Random(spec.seed)
+    forms = max(1, spec.forms)
+    keys = [k for k in spec.fields if k in TURKISH_LABELS]
+    total = max(spec.inputs, len(keys))
+    # slot -> ruhsat key (None = distractor); ruhsat fields spread over the whole page
+    slots: List[Optional[str]] = [None] * total
+    for k, pos in zip(keys, sorted(rng.sample(range(total), len(keys)))):
+        slots[pos] = k
+    select_slots = set(rng.sample(range(total), min(max(0, spec.selects), total)))
+    styles = [s for s in spec.label_styles if s in LABEL_STYLES] or ["for"]
+
+    per_form = -(-total // forms)
+    expected: Dict[str, str] = {}
+    labels: Dict[str, str] = {}
+    used_styles: Dict[str, str] = {}
+    parts = ['<!DOCTYPE html><html lang="tr"><head><meta charset="utf-8"><title>Trafik Sigortası Teklif</title></head>',
+             '<body><div id="root"><header class="navbar"><a href="/">Ana Sayfa</a><button class="menu-toggle">Menü</button></header>',
+             '<main class="container">']
+    for f in range(forms):
+        chunk = range(f * per_form, min(total, (f + 1) * per_form))
+        if not chunk:
+            break
+        parts.append(f'<form id="form{f}" class="quote-form" novalidate><h3>Adım {f + 1}</h3>')
+        for n, slot in enumerate(chunk):
+            key = slots[slot]
+            name = f"f{f}_{n}"
+            style = styles[slot % len(styles)]
+            if key is not None:
+                variants = TURKISH_LABELS[key]
+                label = variants[spec.variant % len(variants)] if spec.variant is not None else rng.choice(variants)
+                tag = "select" if (slot in select_slots and key in SELECT_KEYS) else "input"
+                expected[key] = f"[name='{name}']"
+                labels[key] = label
+                used_styles[key] = style
+            else:
+                label = DISTRACTOR_LABELS[(slot * 7 + rng.randrange(3)) % len(DISTRACTOR_LABELS)]
+                tag = "select" if slot in select_slots else "input"
+            parts.append(_field(label, tag, name, style, key, spec, rng))
+        parts.append('<div class="actions"><button type="button" class="btn">Geri</button>'
+                     '<button type="submit" class="btn btn-primary">Devam</button></div></form>')
+    parts.append("</main></div></body></html>")
+    return SyntheticPage(html="".join(parts), expected=expected, labels=labels, styles=used_styles, spec=asdict(spec))
+
+
+def score_mapping(page: SyntheticPage, predicted: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare a mapper's {key: selector} with the expected controls (by resolved element name)."""
+    from bs4 import BeautifulSoup  # type: ignore
+
+    soup = BeautifulSoup(page.html, "html.parser")
+    correct, wrong, missing = [], [], []
+    for key, exp in page.expected.items():
+        sel = predicted.get(key)
+        if not sel:
+            missing.append(key)
+            continue
+        try:
+            el = soup.select_one(str(sel))
+        except Exception:
+            el = None
+        if el is not None and f"[name='{el.get('name')}']" == exp:
+            correct.append(key)
+        else:
+            wrong.append(key)
+    extra = [k for k in predicted if k not in page.expected and predicted.get(k)]
+    n_pred = len(correct) + len(wrong) + len(extra)
+    return {
+        "correct": correct, "wrong": wrong, "missing": missing, "unexpected": extra,
+        "precision": round(len(correct) / n_pred, 3) if n_pred else 0.0,
+        "recall": round(len(correct) / len(page.expected), 3) if page.expected else 1.0,
+    }
+
+
+def main_cli(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--out", required=True, help="directory for <name>.html + <name>.expected.json")
+    ap.add_argument("--forms", type=int, default=1)
+    ap.add_argument("--inputs", type=int, default=20)
+    ap.add_argument("--depth", type=int, default=2)
+    ap.add_argument("--selects", type=int, default=4)
+    ap.add_argument("--options", type=int, default=10)
+    ap.add_argument("--styles", default=",".join(LABEL_STYLES))
+    ap.add_argument("--variant", type=int, default=None)
+    ap.add_argument("--seeds", default="0", help="comma separated seeds, one page each")
+    args = ap.parse_args(argv)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for seed in [int(s) for s in args.seeds.split(",") if s.strip()]:
+        spec = PageSpec(forms=args.forms, inputs=args.inputs, depth=args.depth, selects=args.selects,
+                        options=args.options, label_styles=tuple(s.strip() for s in args.styles.split(",") if s.strip()),
+                        variant=args.variant, seed=seed)
+        page = generate_page(spec)
+        (out / f"{spec.name()}.html").write_text(page.html, encoding="utf-8")
+        meta = {"expected": page.expected, "labels": page.labels, "styles": page.styles, "spec": page.spec,
+                "size_bytes": page.size_bytes}
+        (out / f"{spec.name()}.expected.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"{spec.name()}.html  {page.size_bytes / 1024:.0f} KB  {len(page.expected)} expected fields")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -170,6 +170,7 @@ DEFAULT_CONFIG.setdefault("goFillForms", {
     "visionModel": "gpt-4o-mini",# model for Vision JPEG→JSON extract (F3 ingest)
         "temperature": 0.0,
         "useHeuristics": False,         # allow heuristic salvage when LLM mapping is incomplete
+        "promptBudgetTokens": 6000,     # analyzePage prompt budget; above it HTML is replaced by a ranked control table (0 = off)
         # Centralized prompt for F3 mapping (can be overridden in config.json)
         "mappingPrompt": (
             "You are an expert web UI analyzer.\n"
@@ -190,6 +191,15 @@ DEFAULT_CONFIG.setdefault("goFillForms", {
     "persist": {
         "dir": "tmp/ruhsat_json"     # where to store normalized extractions (optional)
     },
+    # Image ingest: local OCR (ocr_agent/tesseract) races the vision LLM, merged per field by confidence
+    "ingest": {
+        "ocr": True,                 # run local OCR first (skipped silently if pytesseract/tesseract missing)
+        "criticalFields": ["plaka_no", "sasi_no", "model_yili", "motor_no"],
+        "minConfidence": 0.8,        # OCR fills all critical fields >= this -> vision skipped/cancelled
+        "visionHeadStartMs": 800,    # OCR head start before the vision call is sent
+        "visionConfidence": 0.85,    # flat confidence assigned to vision fields in the merge
+        "visionTimeoutS": 60
+    },
     "stateflow": {
         "maxLoops": 10,
     "waitAfterActionMs": 600,
@@ -275,3 +285,131 @@ def get_llm_max_attempts_go_user_task() -> int:
 
 def get_go_user_task_stateflow(key: str, default: Any = None) -> Any:
     return get(f"goUserTaskPage.stateflow.{key}", default)
+
+# --- New: API wire settings (compression / verbosity) ---
+
+DEFAULT_CONFIG.setdefault("api", {
+    "compression": {
+        "enabled": True,
+        "minimumSize": 1024,          # responses smaller than this are sent as-is (bytes)
+        "gzipLevel": 6,
+        "zstdLevel": 3,               # zstd needs the optional `zstandard` package
+        "maxRequestBytes": 67108864   # decoded request body cap (64 MB)
+    },
+    # F1/F2/F3/TsX step history (write-behind into memory/db.py tables)
+    "runHistory": {
+        "enabled": True,
+        "dbPath": "tmp/runHistory.db",  # relative to production2/
+        "batchSize": 200,
+        "flushIntervalMs": 250,
+        "maxQueue": 1000,             # steps beyond this are dropped, never waited on
+        "maxSessions": 500            # open runs tracked per UI session (least recently used dropped)
+    },
+    # Durable (document, host, task) work queue + batch fill workers
+    "workQueue": {
+        "dbPath": "tmp/workQueue.db",  # relative to production2/
+        "leaseSeconds": 120,           # a crashed worker's job becomes claimable after this
+        "maxAttempts": 3,              # then the job moves to the dead letter state
+        "backoffSeconds": 5,           # retry delay, doubled per attempt (capped at 300 s)
+        "workers": 0,                  # worker threads started with the API (0 = start via POST /api/queue/workers)
+        "useLLM": True                 # allow the LLM fallback when static mapping is insufficient
+    },
+    # GET /api/page/await-change long-poll (replaces fixed post-click sleeps)
+    "pageChange": {
+        "defaultTimeoutMs": 5000,
+        "maxTimeoutMs": 30000
+    },
+    # GET /api/events (SSE) + /api/ws/events push channel (logs, step results, page changes)
+    "events": {
+        "maxQueue": 500,
+        "maxClients": 32,
+        "heartbeatS": 15
+    },
+    # GET /metrics (Prometheus text) + /api/metrics/summary (p50/p95 JSON)
+    "metrics": {
+        "enabled": True
+    },
+    # Request span trees (GET /api/trace/<id>); X-Trace: 1 forces a trace
+    "tracing": {
+        "sampleRate": 0.1,
+        "maxTraces": 200,
+        "maxSpansPerTrace": 2000
+    },
+    # /api/admin/*: X-Admin-Token must match (env P2_ADMIN_TOKEN if empty); no token = loopback clients with a loopback Host only;
+    # never CORS-enabled, and requests with a foreign Origin header are rejected
+    "admin": {
+        "token": ""
+    },
+    # POST /api/admin/profile: cProfile + stack sampling for the next N calls to an endpoint
+    "profiling": {
+        "maxSessions": 20,
+        "maxRequestsPerSession": 100,
+        "sampleIntervalMs": 5
+    }
+})
+
+
+def get_api_compression(key: str, default: Any = None) -> Any:
+    return get(f"api.compression.{key}", default)
+
+
+def get_api_run_history(key: str, default: Any = None) -> Any:
+    return get(f"api.runHistory.{key}", default)
+
+
+def get_api_work_queue(key: str, default: Any = None) -> Any:
+    return get(f"api.workQueue.{key}", default)
+
+
+def get_api_page_change(key: str, default: Any = None) -> Any:
+    return get(f"api.pageChange.{key}", default)
+
+
+def get_api_events(key: str, default: Any = None) -> Any:
+    return get(f"api.events.{key}", default)
+
+
+def get_api_metrics(key: str, default: Any = None) -> Any:
+    return get(f"api.metrics.{key}", default)
+
+
+def get_api_tracing(key: str, default: Any = None) -> Any:
+    return get(f"api.tracing.{key}", default)
+
+
+def get_api_admin(key: str, default: Any = None) -> Any:
+    return get(f"api.admin.{key}", default)
+
+
+def get_api_profiling(key: str, default: Any = None) -> Any:
+    return get(f"api.profiling.{key}", default)
+
+# --- Learned click-candidate ranking (FindHomePage / goUserPage / openSideMenu) ---
+
+DEFAULT_CONFIG.setdefault("clickRanking", {
+    "enabled": True,
+    "path": "tmp/clickRanking.json",  # relative to production2/
+    "halfLifeHours": 168,             # a success counts half as much after a week
+    "missPenalty": 0.25,              # score removed when a click did not change the page
+    "maxSelectorsPerPage": 50,
+    "maxPages": 2000,                 # least recently used (scope, host, signature) keys are dropped
+    "flushIntervalMs": 1000           # outcomes are written behind, at most this often
+})
+
+
+def get_click_ranking(key: str, default: Any = None) -> Any:
+    return get(f"clickRanking.{key}", default)
+
+# --- Record/replay transport for OpenAI calls (offline benchmarks / load tests) ---
+
+DEFAULT_CONFIG.setdefault("llmReplay", {
+    "mode": "off",                    # off | record | replay | auto (replay, record on a miss); env P2_LLM_REPLAY
+    "fixturesDir": "tmp/llmFixtures",  # relative to production2/; env P2_LLM_FIXTURES
+    "latencyMs": "recorded",          # replay delay: "recorded" (as captured) or a fixed number; env P2_LLM_LATENCY_MS
+    "latencyScale": 1.0,              # multiplies the replay delay (0 = no delay)
+    "jitterMs": 0                     # +/- uniform jitter added to the delay; env P2_LLM_JITTER_MS
+})
+
+
+def get_llm_replay(key: str, default: Any = None) -> Any:
+    return get(f"llmReplay.{key}", default)
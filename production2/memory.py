@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class HtmlMemoryStore:
@@ -69,6 +69,15 @@ class HtmlCaptureResult:
     name: str
 
 
+@dataclass
+class HtmlUploadResult:
+    """HTML rebuilt from a full/compressed/delta/unchanged upload (snapshot store)."""
+    html: str
+    fingerprint: str
+    source: str  # "full" | "compressed" | "delta" | "unchanged"
+    unchanged: bool = False  # snapshot already known -> derived results reusable
+
+
 @dataclass
 class FilteredHtmlRequest:
     """Request to produce mapping from filtered HTML."""
@@ -148,6 +157,41 @@ class PageChangeResult:
     details: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class RegionChange:
+    """A single interactive region that differs between two snapshots."""
+    region: str
+    change: str  # "structure" | "values"
+    controls_added: List[str] = field(default_factory=list)
+    controls_removed: List[str] = field(default_factory=list)
+    controls_changed: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DomDiffResult:
+    """Output from the structural (region-level) diff component."""
+    kind: str  # "no_change" | "value_change" | "structure_change" | "navigation"
+    added: List[str]
+    removed: List[str]
+    modified: List[RegionChange]
+    before_signature: str
+    after_signature: str
+    title_changed: bool = False
+
+
+@dataclass
+class PromptBudgetStats:
+    """Token accounting for one budgeted LLM prompt (logged per call)."""
+    mode: str  # "full" | "compact"
+    budget_tokens: int
+    full_tokens: int
+    prompt_tokens: int
+    tokens_saved: int
+    controls_total: int = 0
+    controls_listed: int = 0
+    missing_keys: List[str] = field(default_factory=list)
+
+
 @dataclass
 class FillAction:
     """A single UI automation step derived from a mapping."""
@@ -1,22 +1,16 @@
 import React, { useEffect, useState } from "react";
-import { BACKEND_URL } from "@/config";
+import { followBackendLogs } from "@/services/eventStream";
 
 export const BackendLogPanel: React.FC = () => {
   const [logs, setLogs] = useState<string[]>([]);
 
   useEffect(() => {
-    const fetchLogs = async () => {
-      try {
-  const res = await fetch(`${BACKEND_URL}/api/logs`);
-        const data = await res.json();
-        setLogs(data.logs || []);
-      } catch (e) {
-        setLogs(["[ERROR] Backend logları alınamadı."]);
-      }
-    };
-    fetchLogs();
-    const interval = setInterval(fetchLogs, 2000); // 2 sn'de bir güncelle
-    return () => clearInterval(interval);
+    // /api/events push (SSE) instead of polling every 2s
+    const follow = followBackendLogs(
+      recs => setLogs(recs.map(r => (typeof r === 'string' ? r : `[${r.level}] ${r.code}: ${r.message}`))),
+      { maxKeep: 50, onError: () => setLogs(["[ERROR] Backend logları alınamadı."]) },
+    );
+    return () => follow.close();
   }, []);
 
   return (
@@ -9,6 +9,7 @@ import { getDomAndUrlFromWebview, getWebview } from "@/services/webviewDom";
 import { runActions } from "@/services/ts3ActionRunner";
 import { runTs3 } from "@/services/ts3Service";
 import { BACKEND_URL } from "@/config";
+import { postHtmlJson } from "@/services/htmlUploadClient";
 import { runFindHomePageSF } from "@/stateflows/findHomePageSF";
 import { runGoUserTaskPageSF } from "@/stateflows/goUserTaskPageSF";
 import { runFillFormsUserTaskPageSF } from "@/stateflows/fillFormsUserTaskPageSF";
@@ -204,10 +205,9 @@ export const Header: React.FC<HeaderProps> = ({
           break; 
         }
         devLog('HD-TSX-REQUEST', `[step ${step}] Sending request to backend: ${html.length} chars, URL: ${url}`);
-        const r = await fetch(`${BACKEND_URL}/api/tsx/dev-run`, {
-          method: 'POST', headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ user_command: tsxCmd || 'Yeni Trafik', html, force_llm: !!forceLLM, executed_action: lastExecuted, current_url: url, hard_reset: step === 1 })
-        });
+        const r = await postHtmlJson(`${BACKEND_URL}/api/tsx/dev-run?verbose=0`,
+          { user_command: tsxCmd || 'Yeni Trafik', html, force_llm: !!forceLLM, executed_action: lastExecuted, current_url: url, hard_reset: step === 1 }
+        );
         devLog('HD-TSX-RESPONSE', `[step ${step}] Backend response: ${r.status} ${r.statusText}`);
         if (!r.ok) { 
           devLog('HD-TSX-ERR', `[step ${step}] HTTP ${r.status}`); 
@@ -238,10 +238,9 @@ export const Header: React.FC<HeaderProps> = ({
               const { html: curHtml, url: curUrl } = await getDomAndUrlFromWebview((c, m) => devLog(c, `[TS3-POLL ${i+1}/5] ${m}`));
               if (!curHtml) break;
               try {
-                const rr = await fetch(`${BACKEND_URL}/api/tsx/dev-run`, {
-                  method: 'POST', headers: { 'Content-Type': 'application/json' },
-                  body: JSON.stringify({ user_command: tsxCmd || 'Yeni Trafik', html: curHtml, prev_html: prevHtml, current_url: curUrl })
-                });
+                const rr = await postHtmlJson(`${BACKEND_URL}/api/tsx/dev-run?verbose=0`,
+                  { user_command: tsxCmd || 'Yeni Trafik', html: curHtml, prev_html: prevHtml, current_url: curUrl }
+                );
                 const jj = await rr.json();
                 devLog('HD-TS3-POLL', `[${i+1}/5] state=${jj?.state} details=${JSON.stringify(jj?.details||{})}`);
                 const d = jj?.details || {};
@@ -5,6 +5,7 @@ import { CommandPanel } from "@/components/CommandPanel";
 import { Footer } from "@/components/Footer";
 import React, { useState, useEffect } from "react";
 import { BACKEND_URL } from "@/config";
+import { followBackendLogs, FollowedLogs } from "@/services/eventStream";
 
 interface MainLayoutProps {
   appName: string;
@@ -89,23 +90,16 @@ export const MainLayout: React.FC<MainLayoutProps> = ({
       setFeLogs([]);
     }
   }, []);
+  const backendFollowRef = React.useRef<FollowedLogs | null>(null);
   const refreshBackendLogs = React.useCallback(async () => {
-    try {
-      const res = await fetch(`${BACKEND_URL}/api/logs`);
-      const data = await res.json();
-      setBackendLogs(data.logs || []);
-    } catch {
-      // ignore
-    }
+    // after /api/logs/clear: drop the local copy, new records keep streaming in
+    backendFollowRef.current?.reset();
   }, []);
 
-  // Backend loglarını çek
+  // Backend logları: /api/events (SSE) push, 2 sn'lik polling yerine
   useEffect(() => {
-    const fetchLogs = async () => {
+    const applyLogs = (logs: any[]) => {
       try {
-        const res = await fetch(`${BACKEND_URL}/api/logs`);
-        const data = await res.json();
-        const logs = data.logs || [];
         setBackendLogs(logs);
         // En güncel backend info'yu status olarak ayarla (tek tip, Türkçe, kısaltılmış)
         if (logs.length > 0) {
@@ -142,18 +136,24 @@ export const MainLayout: React.FC<MainLayoutProps> = ({
         } else setBackendStatus("");
         // Also refresh the FE logs mirror
         refreshFrontendLogs();
-  } catch (e) {
+      } catch {
+        setBackendStatus('');
+      }
+    };
+    const follow = followBackendLogs(applyLogs, {
+      onError: () => {
         setBackendLogs(["[ERROR] Backend logları alınamadı."]);
         setBackendStatus("[ERROR] Backend logları alınamadı.");
-      }
+      },
+    });
+    backendFollowRef.current = follow;
+    // FE logs live in window.__DEV_LOGS (no backend involved): keep the cheap local refresh
+    const interval = setInterval(refreshFrontendLogs, 2000);
+    return () => {
+      clearInterval(interval);
+      follow.close();
+      backendFollowRef.current = null;
     };
-    fetchLogs();
-    const interval = setInterval(() => {
-      fetchLogs();
-      // In case FE logs changed without any backend update, ensure periodic refresh
-      refreshFrontendLogs();
-    }, 2000);
-    return () => clearInterval(interval);
   }, [refreshFrontendLogs]);
   // Webview URL değiştiğinde arama kutusunu güncelle
   useEffect(() => {
@@ -0,0 +1,90 @@
+// Push channel from the backend (pairs with backend Components/eventStream.py).
+// GET /api/events is a Server-Sent Events stream of `log`, `step` and `page`
+// events; it replaces the 2s /api/logs polling of the log panels.
+// The backend keeps a bounded queue per client: when the UI falls behind,
+// the oldest events are dropped and a `dropped` event arrives first. Logs
+// are then resynced with GET /api/logs?since=<last seq>, as after a reconnect.
+import { BACKEND_URL } from "../config";
+
+export type BackendEvent = { id?: number; type: string; ts: number; data?: any; session_id?: string; count?: number };
+
+export function subscribeBackendEvents(opts: {
+  topics: Array<'log' | 'step' | 'page'>;
+  sessionId?: string;
+  onEvent: (ev: BackendEvent) => void;
+  onOpen?: () => void;
+  onDropped?: (count: number) => void;
+}): () => void {
+  const q = new URLSearchParams({ topics: opts.topics.join(',') });
+  if (opts.sessionId) q.set('session_id', opts.sessionId);
+  const es = new EventSource(`${BACKEND_URL}/api/events?${q.toString()}`);
+  const handle = (e: MessageEvent) => {
+    try { opts.onEvent(JSON.parse(e.data)); } catch {}
+  };
+  for (const t of opts.topics) es.addEventListener(t, handle as EventListener);
+  es.addEventListener('dropped', ((e: MessageEvent) => {
+    try { opts.onDropped?.(Number(JSON.parse(e.data).count) || 0); } catch {}
+  }) as EventListener);
+  // fires on the first connect and after every automatic reconnect
+  es.onopen = () => { opts.onOpen?.(); };
+  return () => es.close();
+}
+
+// Backend log list kept current by the event stream (polling fallback without EventSource).
+// onLogs receives the whole list (oldest first) every time it changes;
+// reset() empties it after POST /api/logs/clear (seq keeps counting on the backend).
+export type FollowedLogs = { close: () => void; reset: () => void };
+
+export function followBackendLogs(onLogs: (logs: any[]) => void, opts: { maxKeep?: number; onError?: (e: any) => void } = {}): FollowedLogs {
+  const maxKeep = opts.maxKeep ?? 1000;
+  let logs: any[] = [];
+  let seen = new Set<number>();
+  let lastSeq = 0;
+  let synced = false;
+  let stopped = false;
+  let syncing: Promise<void> | null = null;
+  const append = (recs: any[]) => {
+    const fresh = recs.filter(r => !r || typeof r.seq !== 'number' || !seen.has(r.seq));
+    if (!fresh.length) return;
+    let outOfOrder = false;
+    for (const r of fresh) {
+      if (!r || typeof r.seq !== 'number') continue;
+      seen.add(r.seq);
+      if (r.seq < lastSeq) outOfOrder = true;
+      lastSeq = Math.max(lastSeq, r.seq);
+    }
+    logs = logs.concat(fresh);
+    // a resync can fill a gap behind events that were already streamed
+    if (outOfOrder) logs.sort((a, b) => (a?.seq ?? 0) - (b?.seq ?? 0));
+    if (logs.length > maxKeep) {
+      logs = logs.slice(-maxKeep);
+      seen = new Set(logs.filter(r => r && typeof r.seq === 'number').map(r => r.seq));
+    }
+    if (!stopped) onLogs(logs);
+  };
+  const resync = () => {
+    // one request at a time; records already streamed are de-duplicated by seq
+    if (!syncing) {
+      const url = synced ? `${BACKEND_URL}/api/logs?since=${lastSeq}` : `${BACKEND_URL}/api/logs`;
+      syncing = fetch(url)
+        .then(r => r.json())
+        .then(d => { synced = true; append(d.logs || []); })
+        .catch(e => opts.onError?.(e))
+        .finally(() => { syncing = null; });
+    }
+    return syncing;
+  };
+  const reset = () => { logs = []; seen = new Set(); if (!stopped) onLogs(logs); };
+  if (typeof EventSource === 'undefined') {
+    resync();
+    const t = setInterval(resync, 2000);
+    return { close: () => { stopped = true; clearInterval(t); }, reset };
+  }
+  const close = subscribeBackendEvents({
+    topics: ['log'],
+    onOpen: () => { resync(); },
+    onDropped: () => { resync(); },
+    onEvent: ev => { if (ev.type === 'log' && ev.data) append([ev.data]); },
+  });
+  return { close: () => { stopped = true; close(); }, reset };
+}
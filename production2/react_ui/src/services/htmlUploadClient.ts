@@ -0,0 +1,146 @@
+// Delta HTML upload client (pairs with backend Components/htmlSnapshotStore.py).
+// Instead of posting the full page every step, send one of:
+//   { html_fp }                                  -> unchanged since fp
+//   { html_base_fp, html_delta, html_fp }        -> prefix/suffix delta vs. last page
+//   { html_b64, html_encoding: 'gzip', html_fp } -> compressed full body (large pages)
+//   { html }                                     -> plain full body (fallback)
+// Secondary snapshots (prev_html/current_html) are replaced by *_fp when the backend has them.
+// On 409 snapshot_miss the request is retried once with full bodies.
+// Large JSON bodies are additionally sent with Content-Encoding: gzip (backend WireCompressionMiddleware).
+
+type Known = { fps: string[]; lastHtml?: string; lastFp?: string };
+
+const KNOWN = new Map<string, Known>();
+const MAX_KNOWN = 3; // mirrors HtmlSnapshotStore.per_session
+const GZIP_MIN_CHARS = 64 * 1024;
+
+export const DEFAULT_HTML_SESSION = 'default';
+
+async function sha256Hex(text: string): Promise<string> {
+  const buf = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(buf)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function gzipBytes(text: string): Promise<Uint8Array | null> {
+  try {
+    const CS: any = (globalThis as any).CompressionStream;
+    if (!CS) return null;
+    const stream = new Blob([text]).stream().pipeThrough(new CS('gzip'));
+    return new Uint8Array(await new Response(stream).arrayBuffer());
+  } catch {
+    return null;
+  }
+}
+
+async function gzipBase64(text: string): Promise<string | null> {
+  try {
+    const bytes = await gzipBytes(text);
+    if (!bytes) return null;
+    let bin = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+      bin += String.fromCharCode.apply(null, Array.from(bytes.subarray(i, i + 0x8000)));
+    }
+    return btoa(bin);
+  } catch {
+    return null;
+  }
+}
+
+// Single-edit delta: common prefix + common suffix, everything between replaced.
+export function prefixSuffixDelta(base: string, next: string): Array<[string, number | string]> {
+  const max = Math.min(base.length, next.length);
+  let p = 0;
+  while (p < max && base.charCodeAt(p) === next.charCodeAt(p)) p++;
+  let s = 0;
+  while (s < max - p && base.charCodeAt(base.length - 1 - s) === next.charCodeAt(next.length - 1 - s)) s++;
+  const ops: Array<[string, number | string]> = [];
+  if (p) ops.push(['=', p]);
+  if (base.length - p - s) ops.push(['-', base.length - p - s]);
+  if (next.length - p - s) ops.push(['+', next.slice(p, next.length - s)]);
+  // the trailing suffix is implied (backend keeps the rest of the base)
+  return ops;
+}
+
+function known(sessionId: string): Known {
+  let k = KNOWN.get(sessionId);
+  if (!k) { k = { fps: [] }; KNOWN.set(sessionId, k); }
+  return k;
+}
+
+function remember(sessionId: string, fp: string, html?: string) {
+  const k = known(sessionId);
+  k.fps = [...k.fps.filter(f => f !== fp), fp].slice(-MAX_KNOWN);
+  if (html !== undefined) { k.lastHtml = html; k.lastFp = fp; }
+}
+
+export function resetHtmlSession(sessionId: string = DEFAULT_HTML_SESSION) {
+  KNOWN.delete(sessionId);
+}
+
+// Replace html / prev_html / current_html in payload with protocol fields.
+export async function encodeHtmlPayload(sessionId: string, payload: Record<string, any>, full = false): Promise<{ body: Record<string, any>; sent: Array<[string, string]> }> {
+  const body: Record<string, any> = { ...payload, session_id: sessionId };
+  const sent: Array<[string, string]> = [];
+  const k = known(sessionId);
+  const html: string | undefined = typeof payload.html === 'string' ? payload.html : undefined;
+  if (html !== undefined) {
+    const fp = await sha256Hex(html);
+    sent.push([fp, html]);
+    body.html_fp = fp;
+    if (!full) {
+      if (k.fps.includes(fp)) {
+        delete body.html;
+      } else if (k.lastHtml !== undefined && k.lastFp && k.fps.includes(k.lastFp)) {
+        const ops = prefixSuffixDelta(k.lastHtml, html);
+        const inserted = ops.reduce((n, [op, arg]) => n + (op === '+' ? String(arg).length : 0), 0);
+        if (inserted < html.length / 2) {
+          delete body.html;
+          body.html_base_fp = k.lastFp;
+          body.html_delta = ops;
+        }
+      }
+      if (body.html !== undefined && html.length >= GZIP_MIN_CHARS) {
+        const b64 = await gzipBase64(html);
+        if (b64) { delete body.html; body.html_b64 = b64; body.html_encoding = 'gzip'; }
+      }
+    }
+  }
+  for (const field of ['prev_html', 'current_html']) {
+    const v = payload[field];
+    if (typeof v !== 'string') continue;
+    const fp = v === html && sent.length ? sent[0][0] : await sha256Hex(v);
+    if (!full && (k.fps.includes(fp) || fp === body.html_fp)) {
+      delete body[field];
+      body[`${field}_fp`] = fp;
+    } else if (fp !== body.html_fp) {
+      sent.push([fp, v]);
+    }
+  }
+  return { body, sent };
+}
+
+// POST JSON using the delta protocol; falls back to full bodies on snapshot miss.
+export async function postHtmlJson(url: string, payload: Record<string, any>, sessionId: string = DEFAULT_HTML_SESSION): Promise<Response> {
+  for (const full of [false, true]) {
+    const { body, sent } = await encodeHtmlPayload(sessionId, payload, full);
+    const json = JSON.stringify(body);
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    let wire: BodyInit = json;
+    if (json.length >= GZIP_MIN_CHARS) {
+      const gz = await gzipBytes(json);
+      if (gz) { wire = gz; headers['Content-Encoding'] = 'gzip'; }
+    }
+    const res = await fetch(url, { method: 'POST', headers, body: wire });
+    if (res.status === 409 && !full) {
+      resetHtmlSession(sessionId);
+      continue;
+    }
+    if (res.ok) {
+      // secondary snapshots first so the main page stays the delta base
+      for (const [fp] of sent.slice(1)) remember(sessionId, fp);
+      if (sent.length) remember(sessionId, sent[0][0], typeof payload.html === 'string' ? sent[0][1] : undefined);
+    }
+    return res;
+  }
+  throw new Error('unreachable');
+}
@@ -0,0 +1,112 @@
+// Event-driven "wait after click" (pairs with backend Components/pageChangeWatch.py).
+// Instead of sleeping waitAfterClickMs and then diffing, the UI
+//   - pushes the page it clicked from (POST /api/page/snapshot),
+//   - long-polls GET /api/page/await-change with that fingerprint,
+//   - pushes a snapshot whenever the webview navigates or its DOM mutates
+//     (in-page MutationObserver, debounced, reported via console-message).
+// The wait ends as soon as the backend sees a structurally different page,
+// or after timeoutMs; the caller then captures + detects as before.
+import { BACKEND_URL } from "../config";
+import { getWebview, getDomAndUrlFromWebview } from "./webviewDom";
+import { postHtmlJson, DEFAULT_HTML_SESSION } from "./htmlUploadClient";
+
+const MUTATION_TAG = '__p2_page_mutation__';
+
+export type AwaitChangeResult = { changed: boolean; reason: string; waitedMs: number; snapshot?: any };
+
+async function sha256Hex(text: string): Promise<string> {
+  const buf = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(buf)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function pushSnapshot(sessionId: string, html: string, url?: string): Promise<void> {
+  if (!html) return;
+  await postHtmlJson(`${BACKEND_URL}/api/page/snapshot`, { html, current_url: url || '' }, sessionId);
+}
+
+function observeMutations(debounceMs: number): Promise<void> {
+  const wv: any = getWebview();
+  if (!wv) return Promise.resolve();
+  return wv.executeJavaScript(`(() => {
+    try {
+      if (window.__p2Observer) window.__p2Observer.disconnect();
+      let t = null;
+      const obs = new MutationObserver(() => {
+        if (t) return;
+        t = setTimeout(() => { t = null; console.debug(${JSON.stringify(MUTATION_TAG)}); }, ${Math.max(0, debounceMs)});
+      });
+      obs.observe(document.documentElement, { subtree: true, childList: true, attributes: true });
+      window.__p2Observer = obs;
+    } catch {}
+  })();`, true).catch(() => undefined);
+}
+
+function stopObserving(): void {
+  const wv: any = getWebview();
+  try { wv?.executeJavaScript(`(() => { try { window.__p2Observer && window.__p2Observer.disconnect(); window.__p2Observer = null; } catch {} })();`, true).catch(() => undefined); } catch {}
+}
+
+// Call right after the click. fromHtml = the page the click was made on.
+export async function awaitPageChange(opts: {
+  fromHtml: string;
+  fromUrl?: string;
+  timeoutMs: number;
+  sessionId?: string;
+  mode?: 'structure' | 'any';
+  log?: (m: string) => void;
+}): Promise<AwaitChangeResult> {
+  const log = opts.log || (() => {});
+  const sessionId = opts.sessionId || DEFAULT_HTML_SESSION;
+  const t0 = performance.now();
+  const wv: any = getWebview();
+  let pushing = false;
+  let pending = false;
+  const capture = async () => {
+    // one push in flight; a burst of events collapses into one trailing push
+    if (pushing) { pending = true; return; }
+    pushing = true;
+    try {
+      do {
+        pending = false;
+        const cap = await getDomAndUrlFromWebview();
+        if (cap.html) await pushSnapshot(sessionId, cap.html, cap.url);
+      } while (pending);
+    } catch (e: any) {
+      log(`page-change push failed: ${String(e?.message || e)}`);
+    } finally {
+      pushing = false;
+    }
+  };
+  const onNav = () => { capture(); };
+  const onConsole = (e: any) => { if (e?.message === MUTATION_TAG) capture(); };
+  const events = ['did-navigate', 'did-navigate-in-page', 'dom-ready', 'did-stop-loading'];
+  try {
+    const fromFp = await sha256Hex(opts.fromHtml);
+    await pushSnapshot(sessionId, opts.fromHtml, opts.fromUrl);
+    try {
+      for (const ev of events) wv?.addEventListener?.(ev, onNav);
+      wv?.addEventListener?.('console-message', onConsole);
+    } catch {}
+    await observeMutations(100);
+    // the click may already have changed the page before the observer was attached
+    capture();
+    const q = new URLSearchParams({ session_id: sessionId, from_fp: fromFp, timeout_ms: String(Math.max(0, opts.timeoutMs)), mode: opts.mode || 'structure' });
+    const res = await fetch(`${BACKEND_URL}/api/page/await-change?${q.toString()}`);
+    if (!res.ok) throw new Error(`await-change HTTP ${res.status}`);
+    const j = await res.json();
+    log(`page-change ${j.changed ? 'changed' : 'timeout'} after ${Math.round(performance.now() - t0)}ms`);
+    return { changed: !!j.changed, reason: j.reason || '', waitedMs: performance.now() - t0, snapshot: j.snapshot };
+  } catch (e: any) {
+    // backend without the endpoint: degrade to the old fixed wait
+    log(`page-change await unavailable (${String(e?.message || e)}); sleeping ${opts.timeoutMs}ms`);
+    const rest = Math.max(0, opts.timeoutMs - (performance.now() - t0));
+    await new Promise(r => setTimeout(r, rest));
+    return { changed: false, reason: 'fallback-sleep', waitedMs: performance.now() - t0 };
+  } finally {
+    try {
+      for (const ev of events) wv?.removeEventListener?.(ev, onNav);
+      wv?.removeEventListener?.('console-message', onConsole);
+    } catch {}
+    stopObserving();
+  }
+}
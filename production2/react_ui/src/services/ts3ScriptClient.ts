@@ -1,7 +1,7 @@
 import { getWebview } from './webviewDom';
 
 export async function runBackendScript(backEndUrl: string, mapping: any, ruhsat_json: any, raw: string,
-  opts: { highlight: boolean; simulateTyping: boolean; stepDelayMs: number; useDummyWhenEmpty: boolean },
+  opts: { highlight: boolean; simulateTyping: boolean; stepDelayMs: number; useDummyWhenEmpty: boolean; fillMode?: 'fast' | 'typing' },
   devLog?: (c: string, m: string) => void) {
   try {
     const r = await fetch(`${backEndUrl}/api/ts3/generate-script`, {
@@ -12,6 +12,7 @@ export async function runBackendScript(backEndUrl: string, mapping: any, ruhsat_
         highlight: opts.highlight,
         simulate_typing: opts.simulateTyping,
         step_delay_ms: opts.stepDelayMs,
+        fill_mode: opts.fillMode || 'fast',
       }})
     });
     if (!r.ok) { devLog?.('IDX-TS3-SCRIPT-ERR', `status ${r.status}`); return { ok: false }; }
@@ -20,7 +21,7 @@ export async function runBackendScript(backEndUrl: string, mapping: any, ruhsat_
     const webview = getWebview();
     if (!webview) throw new Error('Webview bulunamadı.');
     const res = await webview.executeJavaScript(String(j.script || ''), true);
-    devLog?.('IDX-TS3-FILL', JSON.stringify({ ok: res?.ok, filled: res?.filled }));
+    devLog?.('IDX-TS3-FILL', JSON.stringify({ ok: res?.ok, filled: res?.filled, timing: res?.timing }));
     if (Array.isArray(res?.logs)) res.logs.forEach((ln: string, i: number) => devLog?.('IDX-TS3-TRACE', `${i.toString().padStart(3,'0')} ${ln}`));
     return res;
   } catch (e: any) {
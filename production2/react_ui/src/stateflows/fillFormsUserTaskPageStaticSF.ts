@@ -13,7 +13,7 @@ export type F3Options = {
 
 async function postF3Static(op: string, body: any, log?: (m: string)=>void) {
   try {
-    const res = await fetch(`${BACKEND_URL}/api/f3-static`, {
+    const res = await fetch(`${BACKEND_URL}/api/f3-static?verbose=0`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ op, ...(body||{}) }),
@@ -102,9 +102,11 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
   let prevUrl  = firstSnap.url || '';
   if (!prevHtml) return { ok:false, error:'no-initial-html' };
   const domainTask = "Yeni Trafik"; // TODO: make dynamic (user selection / context)
-  // Cache last analyze results to avoid re-calling static mapping for same HTML
+  // Cache last plan to avoid re-planning the same HTML
   let lastAnaHtml: string | undefined;
   let lastAna: any | undefined;
+  // What we did on the previous page; sent with the next planPage so the backend verifies it
+  let lastExecution: any = undefined;
 
   // Track URLs already processed (filled + action tried). Simpler/more stable than fingerprint for now.
   const processedUrls = new Set<string>();
@@ -113,17 +115,18 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
   for (let i=0; i<maxLoops; i++) {
     log(`SF-F3-Static loop ${i+1}/${maxLoops} url=${prevUrl}`);
 
-  // Analyze (or reuse) to obtain mapping + page fingerprint + actions
+  // One planPage round-trip: mapping + fingerprint + final signals + validation/fallback + fill plan + actions
     let ana: any;
     if (lastAnaHtml === prevHtml && lastAna) {
       ana = lastAna;
-      log(`SF-F3-Static analyze: reused cached static mapping for current HTML`);
+      log(`SF-F3-Static plan: reused cached page plan for current HTML`);
     } else {
-      ana = await postF3Static('analyzePageStaticFillForms', { html: prevHtml, current_url: prevUrl, task: domainTask }, log);
+      ana = await postF3Static('planPage', { html: prevHtml, current_url: prevUrl, task: domainTask, ruhsat_json: ruhsat, last_execution: lastExecution }, log);
       lastAnaHtml = prevHtml; lastAna = ana;
+      if (ana?.last_execution) log(`SF-F3-Static previous page -> ${JSON.stringify(ana.last_execution)}`);
     }
     if (!ana?.ok) {
-      log(`SF-F3-Static analyze failed: ${JSON.stringify(ana)} - attempting LLM fallback`);
+      log(`SF-F3-Static plan failed: ${JSON.stringify(ana)} - attempting LLM fallback`);
       return { ok:false, step:'analyze', error: ana?.error || 'static-failed', should_fallback: true };
     }
 
@@ -131,16 +134,15 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
   const alreadyProcessed = processedUrls.has(prevUrl);
   log(`SF-F3-Static page id (url)=${prevUrl} processed=${alreadyProcessed}`);
 
-    // Final page detection (only if analysis says final OR backend op confirms)
-  let finalCandidate = !!ana.is_final; // now means pdf_found backend side
-    // Defer early return until after we optionally run actions on a final page.
-    const fin = await postF3Static('detectFinalPage', { html: prevHtml, current_url: prevUrl, task: domainTask }, log);
-  let backendFinalCandidate = !!(fin?.ok && fin.is_final);
-  const ctaPresent = !!(fin?.hits?.length || ana?.hits?.length || fin?.cta_present || ana?.cta_present);
+    // Final page signals come with the plan; defer early return until after we optionally run actions on a final page.
+    const fin = ana.final || {};
+  let finalCandidate = ana.next === 'final';
+  let backendFinalCandidate = !!fin.is_final;
+  const ctaPresent = !!(fin.hits?.length || fin.cta_present);
 
   // Track CTA presence & pdf status across loops for fallback
   (window as any).__STATIC_LAST_CTA__ = ctaPresent || (window as any).__STATIC_LAST_CTA__;
-  (window as any).__STATIC_LAST_PDF__ = (fin?.pdf_found || ana?.pdf_found) || (window as any).__STATIC_LAST_PDF__;
+  (window as any).__STATIC_LAST_PDF__ = fin.pdf_found || (window as any).__STATIC_LAST_PDF__;
 
     if (alreadyProcessed) {
       // Avoid re-filling: just quick final page check then exit loop if still same and maxLoops not exceeded.
@@ -149,32 +151,16 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
   const fieldMapping: Record<string,string> = ana.field_mapping || {};
   const hasMapping = fieldMapping && Object.keys(fieldMapping).length > 0;
   if (hasMapping) {
-        // Validation & fallback gate
-        // Determine critical fields: try calibration-provided (ana.validation?.critical_fields or ana.critical_fields) fallback to default list.
-        const critical = Array.isArray(ana?.critical_fields) && ana.critical_fields.length
-          ? ana.critical_fields
-          : ['plaka_no', 'model_yili', 'sasi_no', 'motor_no'];
-        
-        const validation = await postF3Static('validateCriticalFields', { 
-          field_mapping: fieldMapping, 
-          ruhsat_json: ruhsat, 
-          task: domainTask, 
-          current_url: prevUrl,
-          critical_fields_override: critical 
-        }, log);
-        if (validation?.ok) {
-          const fallbackCheck = await postF3Static('checkShouldFallbackToLLM', { validation_result: validation, task: domainTask, current_url: prevUrl }, log);
-          if (fallbackCheck?.ok && fallbackCheck.should_fallback) {
-            log(`SF-F3-Static fallback triggered: ${fallbackCheck.reason} (threshold=${fallbackCheck.threshold})`);
-            return { ok:false, step:'static_insufficient', should_fallback: true, fallback_reason: fallbackCheck.reason };
-          }
+        // Validation & fallback gate (evaluated by planPage)
+        if (ana.should_fallback) {
+          log(`SF-F3-Static fallback triggered: ${ana.fallback?.reason} (threshold=${ana.fallback?.threshold})`);
+          return { ok:false, step:'static_insufficient', should_fallback: true, fallback_reason: ana.fallback?.reason };
         }
 
-        const expectedKeys = Object.keys(fieldMapping).filter(k => ruhsat && typeof ruhsat[k] !== 'undefined' && String(ruhsat[k]??'').trim() !== '');
-        const dynamicThreshold = Math.min(2, Math.max(1, expectedKeys.length >= 2 ? 2 : 1));
-        
-        const order = Array.from(new Set([...critical, ...expectedKeys]))
-          .filter(k => !!fieldMapping[k] && String(ruhsat[k] ?? '').trim() !== '');
+        const verification = ana.verification || {};
+        const critical: string[] = Array.isArray(verification.critical_fields) ? verification.critical_fields : [];
+        const dynamicThreshold: number = typeof verification.min_filled === 'number' ? verification.min_filled : 1;
+        const order: string[] = Array.isArray(ana.fill_plan?.order) ? ana.fill_plan.order : [];
         log(`SF-F3-Static Form1: sequential fill order -> ${order.join(', ')}`);
 
         const selectorStatus: Record<string, boolean> = {};
@@ -195,10 +181,10 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
           if (!okOne) log(`SF-F3-Static step: give up ${k} after ${perFieldAttemptWaits.length} attempts`);
         }
 
-        await new Promise(r=>setTimeout(r, htmlCheckDelayMs));
-        const curHtmlCheck = (await getDomAndUrlFromWebview((m)=>log(`[WV] ${m}`))).html || prevHtml;
-        const filledCheck = await postF3Static('detectFormsFilled', { html: curHtmlCheck, current_url: prevUrl, task: domainTask, min_filled: dynamicThreshold }, log);
-        log(`SF-F3-Static Form1: filled-check (html-only) -> ${JSON.stringify(filledCheck)}`);
+        // No detectFormsFilled HTML round-trip: the per-selector checks above are the verification,
+        // the backend predicted it (verification.predicted_ok) and re-checks it on the next planPage.
+        lastExecution = { url: prevUrl, fingerprint: ana.fingerprint, selector_status: selectorStatus };
+        log(`SF-F3-Static Form1: verify -> predicted_ok=${!!verification.predicted_ok} predicted=${verification.predicted_filled ?? order.length} committed=${Object.values(selectorStatus).filter(Boolean).length}`);
 
         const criticalPresent = critical.some(k => !!fieldMapping[k]);
         const criticalOk = critical.filter(k => !!fieldMapping[k]).every(k => !!selectorStatus[k]);
@@ -207,7 +193,7 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
 
         let attemptedAction = false;
         // Provide richer gating diagnostics
-        log(`SF-F3-Static gates: filledCheck.ok=${!!filledCheck?.ok} criticalPresent=${criticalPresent} criticalOk=${criticalOk} committedEnough=${committedEnough} committedCount=${committedCount} dynamicThreshold=${dynamicThreshold}`);
+        log(`SF-F3-Static gates: criticalPresent=${criticalPresent} criticalOk=${criticalOk} committedEnough=${committedEnough} committedCount=${committedCount} dynamicThreshold=${dynamicThreshold}`);
 
         // Heuristic: if every mapped selector failed to verify (all false) AND we committed zero fields,
         // treat this page as effectively "no-mapping" for action purposes. This covers pages where
@@ -218,22 +204,19 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
           log('SF-F3-Static notice: all mapped selectors missing/unfilled; will force action attempt.');
         }
 
-        if ((filledCheck?.ok && (!criticalPresent || criticalOk) && committedEnough) || shouldForceActionsDueToMissingSelectors) {
-          const acts: string[] = Array.isArray(ana.actions) ? ana.actions : [];
-          if (acts.length) {
-            // Preserve css# selectors; prefix others with click# for text match
-            const clickActs = acts.map(a => a.startsWith('css#') ? a : `click#${a}`);
+        if (((!criticalPresent || criticalOk) && committedEnough) || shouldForceActionsDueToMissingSelectors) {
+          // next_actions already carry css#/click# prefixes
+          const clickActs: string[] = Array.isArray(ana.next_actions) ? ana.next_actions : [];
+          if (clickActs.length) {
             log(`SF-F3-Static actions: attempting ${clickActs.join(',')} (reason=${shouldForceActionsDueToMissingSelectors ? 'force-missing-selectors' : 'gates-passed'})`);
             
             // Log detailed action analysis for debugging
-            for (let i = 0; i < acts.length; i++) {
-              const orig = acts[i];
+            for (let i = 0; i < clickActs.length; i++) {
               const processed = clickActs[i];
-              if (orig.startsWith('css#')) {
-                const selector = orig.substring(4);
-                log(`SF-F3-Static action ${i+1}: CSS selector "${selector}" -> ${processed}`);
+              if (processed.startsWith('css#')) {
+                log(`SF-F3-Static action ${i+1}: CSS selector "${processed.substring(4)}" -> ${processed}`);
               } else {
-                log(`SF-F3-Static action ${i+1}: Text search "${orig}" -> ${processed}`);
+                log(`SF-F3-Static action ${i+1}: Text search "${processed.substring(6)}" -> ${processed}`);
               }
             }
             
@@ -241,14 +224,14 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
             attemptedAction = true;
             
             // Only attempt PDF capture on the final page (insurance-quote)
-            const isFinalPage = prevUrl?.includes('insurance-quote') || ana?.is_final || backendFinalCandidate;
+            const isFinalPage = prevUrl?.includes('insurance-quote') || backendFinalCandidate;
             if (pdfSetupOk && isFinalPage) {
               const pdfPrimaryWaitMs = 2000; // reduced to 2 seconds for faster processing
               log(`PDF-CAPTURE: Waiting for PDF generation after actions (timeout=${pdfPrimaryWaitMs}ms)...`);
               let pdfResult = await waitForPdfDownload(pdfPrimaryWaitMs, log);
               if (!pdfResult.ok) {
                 // Secondary extended wait if CTA present or final candidate heuristics indicate likely PDF
-                if (ana?.cta_present || ana?.is_final) {
+                if (ctaPresent || backendFinalCandidate) {
                   const extendedWaitMs = 1000; // reduced to 1 second for faster processing
                   log(`PDF-CAPTURE: Primary wait failed (${pdfResult.error||'timeout'}); extending wait by ${extendedWaitMs}ms due to CTA/final heuristics`);
                   const second = await waitForPdfDownload(extendedWaitMs, log);
@@ -281,7 +264,7 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
             log(`SF-F3-Static no actions for this page`);
           }
         } else {
-          log(`SF-F3-Static skip actions: gates not satisfied (htmlOk=${!!filledCheck?.ok}, criticalOk=${criticalOk}, committed=${committedCount}/${dynamicThreshold})`);
+          log(`SF-F3-Static skip actions: gates not satisfied (criticalOk=${criticalOk}, committed=${committedCount}/${dynamicThreshold})`);
         }
 
         processedUrls.add(prevUrl);
@@ -320,19 +303,19 @@ export async function runFillFormsUserTaskPageSF(opts?: F3Options) {
         }
       } else {
         // No fields to fill – but we may still have actions (e.g. final activation button)
-        const acts: string[] = Array.isArray(ana.actions) ? ana.actions : [];
-        if (acts.length && !alreadyProcessed) {
-          const clickActs = acts.map(a => a.startsWith('css#') ? a : `click#${a}`);
+        const clickActs: string[] = Array.isArray(ana.next_actions) ? ana.next_actions : [];
+        if (clickActs.length && !alreadyProcessed) {
           log(`SF-F3-Static actions(no-mapping): attempting ${clickActs.join(',')}`);
           await runActions(clickActs, true, (c,m)=>log(`${c} ${m}`));
+          lastExecution = { url: prevUrl, fingerprint: ana.fingerprint, selector_status: {} };
           
           // Only attempt PDF capture on the final page (insurance-quote)  
-          const isFinalPage = prevUrl?.includes('insurance-quote') || ana?.is_final || backendFinalCandidate;
+          const isFinalPage = prevUrl?.includes('insurance-quote') || backendFinalCandidate;
           if (pdfSetupOk && isFinalPage) {
             const pdfPrimaryWaitMs = 2000; // reduced to 2 seconds for faster processing
             log(`PDF-CAPTURE: Waiting for PDF generation after no-mapping actions (timeout=${pdfPrimaryWaitMs}ms)...`);
             let pdfResult = await waitForPdfDownload(pdfPrimaryWaitMs, log);
-            if (!pdfResult.ok && (ana?.cta_present || ana?.is_final)) {
+            if (!pdfResult.ok && (ctaPresent || backendFinalCandidate)) {
               const extendedWaitMs = 1000; // reduced to 1 second for faster processing
               log(`PDF-CAPTURE: Primary wait failed (${pdfResult.error||'timeout'}); extending wait by ${extendedWaitMs}ms due to CTA/final heuristics`);
               const second = await waitForPdfDownload(extendedWaitMs, log);
@@ -1,5 +1,7 @@
 import { BACKEND_URL } from "../config";
 import { getWebview, getDomAndUrlFromWebview } from "../services/webviewDom";
+import { postHtmlJson } from "../services/htmlUploadClient";
+import { awaitPageChange } from "../services/pageChangeClient";
 
 type PlanAction = { kind: string; selector?: string; value?: any };
 export type PlanItem = { selector: string; plan: { actions: PlanAction[]; meta?: any } };
@@ -9,11 +11,14 @@ export type F1Response = {
   allPlanHomePageCandidates?: PlanItem[];
   checkHtmlIfChanged?: { changed: boolean; reason?: string; before_hash?: string; after_hash?: string } | null;
   createCandidates?: { selectorsInOrder: string[]; mapping: any };
+  // Learned order (backend re-ranks candidates by past click outcomes for this host/page structure)
+  ranking?: { host: string; signature: string; learned: number; reordered: boolean; top?: string | null } | null;
   planLetLLMMap?: { attempt: number; maxAttempts: number; prompt: string; filteredHtml: string; hints?: any; llmSuggestion?: any; llmCandidates?: PlanItem[]; savedPaths?: any };
   error?: string;
 };
 
 // Plan/detect API. Prefer raw HTML; backend filters internally.
+// Pages go through the delta upload protocol (unchanged/delta/gzip instead of full bodies).
 async function callF1(payload: {
   // Operation mode (mandatory)
   op: 'allPlanHomePageCandidates' | 'planCheckHtmlIfChanged' | 'planLetLLMMap';
@@ -29,12 +34,12 @@ async function callF1(payload: {
   // LLM planning fields
   llm_feedback?: string | null;
   llm_attempt_index?: number | null;
+  // Learned ranking: page url for planning; for detection the url of prev_html and the clicked selector
+  current_url?: string | null;
+  prev_url?: string | null;
+  tried_selector?: string | null;
 }): Promise<F1Response> {
-  const res = await fetch(`${BACKEND_URL}/api/f1`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(payload),
-  });
+  const res = await postHtmlJson(`${BACKEND_URL}/api/f1`, payload);
   if (!res.ok) throw new Error(`F1 failed: ${res.status}`);
   return res.json();
 }
@@ -81,38 +86,6 @@ function clickInWebview(selector: string): Promise<boolean> {
   return wv.executeJavaScript(script, true);
 }
 
-function waitForWebviewEventOrTimeout(timeoutMs: number): Promise<"event" | "timeout"> {
-  const wv: any = getWebview();
-  return new Promise((resolve) => {
-    let done = false;
-    let t: any;
-    const onStop = () => finish("event");
-    const onNav = () => finish("event");
-    const onInPage = () => finish("event");
-    const onFrameFinish = () => finish("event");
-    const onDom = () => finish("event");
-    const cleanup = () => {
-      try {
-        wv?.removeEventListener?.("did-stop-loading", onStop);
-        wv?.removeEventListener?.("did-navigate", onNav);
-        wv?.removeEventListener?.("did-navigate-in-page", onInPage);
-        wv?.removeEventListener?.("did-frame-finish-load", onFrameFinish);
-        wv?.removeEventListener?.("dom-ready", onDom);
-      } catch {}
-      try { if (t) clearTimeout(t); } catch {}
-    };
-    const finish = (k: "event" | "timeout") => { if (done) return; done = true; cleanup(); resolve(k); };
-    try {
-      wv?.addEventListener?.("did-stop-loading", onStop, { once: true });
-      wv?.addEventListener?.("did-navigate", onNav, { once: true });
-      wv?.addEventListener?.("did-navigate-in-page", onInPage, { once: true });
-      wv?.addEventListener?.("did-frame-finish-load", onFrameFinish, { once: true });
-      wv?.addEventListener?.("dom-ready", onDom, { once: true });
-    } catch {}
-    t = setTimeout(() => finish("timeout"), Math.max(0, timeoutMs || 0));
-  });
-}
-
 export async function runFindHomePageSF(opts?: { waitAfterClickMs?: number; name?: string; log?: (msg: string) => void; }) {
   const log = opts?.log || (() => {});
   const waitMs = Math.max(0, opts?.waitAfterClickMs ?? 800);
@@ -127,8 +100,11 @@ export async function runFindHomePageSF(opts?: { waitAfterClickMs?: number; name
   // 2) Planning: decoupled and explicit.
   // First, get the plan list (for count + optional selector traceability).
   log(`F1 request -> allPlanHomePageCandidates`);
-  const planListRes = await callF1({ op: 'allPlanHomePageCandidates', html: rawBefore, name: opts?.name || "F1", wait_ms: 0 });
+  const planListRes = await callF1({ op: 'allPlanHomePageCandidates', html: rawBefore, name: opts?.name || "F1", wait_ms: 0, current_url: prevUrl });
   log(`F1 response <- ok=${!!planListRes?.ok} keys=${Object.keys(planListRes||{}).join(',')}`);
+  if (planListRes.ranking?.reordered) {
+    log(`F1 learned order: top=${planListRes.ranking.top} learned=${planListRes.ranking.learned}`);
+  }
   const initialPlans = Array.isArray(planListRes.allPlanHomePageCandidates) ? planListRes.allPlanHomePageCandidates : [];
   const total = initialPlans.length;
   if (!total) {
@@ -173,8 +149,9 @@ export async function runFindHomePageSF(opts?: { waitAfterClickMs?: number; name
     triedSelectors.push(act.selector);
       }
     }
-    const waited = await waitForWebviewEventOrTimeout(waitMs);
-    log(`F1 wait result: ${waited}${waited === 'timeout' ? ' (no nav event; continuing)' : ''}`);
+    // ends on the first structurally different page the backend sees; waitMs is the upper bound
+    const waited = await awaitPageChange({ fromHtml: prevRaw, fromUrl: prevUrl, timeoutMs: waitMs, log });
+    log(`F1 wait result: ${waited.reason}${waited.changed ? '' : ' (no change seen; continuing)'}`);
 
     const after = await getDomAndUrlFromWebview(msg => log(`[WV] ${msg}`));
     const rawAfter = after.html || "";
@@ -193,6 +170,8 @@ export async function runFindHomePageSF(opts?: { waitAfterClickMs?: number; name
       prev_html: prevRaw,
       current_html: rawAfter,
       wait_ms: 0,
+      prev_url: prevUrl,
+      tried_selector: item.selector,
     });
     log(`F1 response <- planCheckHtmlIfChanged ok=${!!detect?.ok}`);
     const ch = detect.checkHtmlIfChanged;
@@ -257,10 +236,10 @@ export async function runFindHomePageSF(opts?: { waitAfterClickMs?: number; name
               triedForFeedback.push(a.selector);
             }
           }
-          const waited = await waitForWebviewEventOrTimeout(Math.max(600, waitMs));
+          await awaitPageChange({ fromHtml: prevRaw2, fromUrl: before.url || '', timeoutMs: Math.max(600, waitMs), log });
           const after2 = await getDomAndUrlFromWebview(msg => log(`[WV] ${msg}`));
           const rawAfter2 = after2.html || "";
-          const det2 = await callF1({ op: 'planCheckHtmlIfChanged', html: rawAfter2, name: opts?.name || 'F1', prev_html: prevRaw2, current_html: rawAfter2, wait_ms: 0 });
+          const det2 = await callF1({ op: 'planCheckHtmlIfChanged', html: rawAfter2, name: opts?.name || 'F1', prev_html: prevRaw2, current_html: rawAfter2, wait_ms: 0, prev_url: before.url || '', tried_selector: c.selector });
           const ch2 = det2.checkHtmlIfChanged;
           if (ch2?.changed) {
             return { ok: true, changed: true, reason: ch2.reason || 'changed', index: -1, selector: c.selector } as any;
@@ -301,10 +280,10 @@ export async function runFindHomePageSF(opts?: { waitAfterClickMs?: number; name
         for (let i = 0; i < toTry.length; i++) {
           const ssel = toTry[i];
           const ok = await clickInWebview(ssel);
-          const waited = await waitForWebviewEventOrTimeout(Math.max(600, waitMs));
+          await awaitPageChange({ fromHtml: rawBefore, fromUrl: before.url || '', timeoutMs: Math.max(600, waitMs), log });
           const afterS = await getDomAndUrlFromWebview(msg => log(`[WV] ${msg}`));
           const rawAfterS = afterS.html || "";
-          const detectS = await callF1({ op: 'planCheckHtmlIfChanged', html: rawAfterS, name: opts?.name || 'F1', prev_html: rawBefore, current_html: rawAfterS, wait_ms: 0 });
+          const detectS = await callF1({ op: 'planCheckHtmlIfChanged', html: rawAfterS, name: opts?.name || 'F1', prev_html: rawBefore, current_html: rawAfterS, wait_ms: 0, prev_url: before.url || '', tried_selector: ssel });
           const chS = detectS.checkHtmlIfChanged;
           triedForFeedback.push(ssel);
           if (chS && chS.changed) {
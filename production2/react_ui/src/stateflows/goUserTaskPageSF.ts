@@ -1,5 +1,6 @@
 import { BACKEND_URL } from "../config";
 import { getWebview, getDomAndUrlFromWebview } from "../services/webviewDom";
+import { awaitPageChange } from "../services/pageChangeClient";
 
 /**
  * Orchestration for navigating to a specific user task page (e.g., "Yeni Trafik").
@@ -103,12 +104,19 @@ async function clickInWebview(selector: string): Promise<ClickDetails> {
   })();`);
 }
 
-async function detectPageChange(prevHtml: string, currentHtml: string): Promise<{ changed: boolean; reason?: string; before_hash?: string; after_hash?: string;}> {
+// tried: the click being checked; the backend records its outcome for the learned candidate order
+type TriedClick = { selector: string; op: 'openSideMenu' | 'goUserPage'; taskLabel?: string; prevUrl?: string };
+
+async function detectPageChange(prevHtml: string, currentHtml: string, tried?: TriedClick): Promise<{ changed: boolean; reason?: string; before_hash?: string; after_hash?: string;}> {
   try {
     const res = await fetch(`${BACKEND_URL}/api/f2`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ prev_html: prevHtml, current_html: currentHtml })
+      body: JSON.stringify({
+        prev_html: prevHtml,
+        current_html: currentHtml,
+        ...(tried ? { tried_selector: tried.selector, tried_op: tried.op, taskLabel: tried.taskLabel, prev_url: tried.prevUrl } : {}),
+      })
     });
     if (!res.ok) return { changed: false, reason: 'f2-fail' };
     const j = await res.json();
@@ -292,7 +300,7 @@ export async function runGoUserTaskPageSF(taskLabel: string, opts?: RunOpts): Pr
       }
       const forceLLMIter = ((!!opts.forceLLM) || (i >= 1)) && (llmTries < maxLLMTries); // enable LLM from 2nd loop, limited
       logFn(`UTASK loop ${i+1}/${maxLoops} -> goUserPage (forceLLMIter=${forceLLMIter})`);
-      const plan = await callBackend('goUserPage', { html: prevHtml, taskLabel, force_llm: forceLLMIter }, logFn);
+      const plan = await callBackend('goUserPage', { html: prevHtml, taskLabel, force_llm: forceLLMIter, current_url: cap.url || '' }, logFn);
       if (plan?.planType === 'llmPrompt') {
         if (llmTries < maxLLMTries) {
           llmTries++;
@@ -310,9 +318,10 @@ export async function runGoUserTaskPageSF(taskLabel: string, opts?: RunOpts): Pr
         await executeClickPlan(plan.selector, triedSelectors, logFn);
           staticTries++;
         }
-        await new Promise(r=>setTimeout(r, waitMs));
+        // returns as soon as the backend sees a different page (waitMs is only the upper bound)
+        await awaitPageChange({ fromHtml: prevHtml, fromUrl: cap.url || '', timeoutMs: waitMs, log: logFn });
         const afterCap = await getDomAndUrlFromWebview(m=>logFn(`[WV] ${m}`));
-        const det = await detectPageChange(prevHtml, afterCap.html||'');
+        const det = await detectPageChange(prevHtml, afterCap.html||'', { selector: plan.selector, op: 'goUserPage', taskLabel, prevUrl: cap.url || '' });
         lastChange = !!det.changed;
         prevHtml = afterCap.html || prevHtml;
         logFn(`UTASK after goUserPage click changed=${lastChange}`);
@@ -321,7 +330,7 @@ export async function runGoUserTaskPageSF(taskLabel: string, opts?: RunOpts): Pr
       }
       // No selector (or llmPrompt) -> try opening side menu every time
       logFn(`UTASK no direct selector; trying openSideMenu`);
-      const openPlan = await callBackend('openSideMenu', { html: prevHtml }, logFn);
+      const openPlan = await callBackend('openSideMenu', { html: prevHtml, current_url: cap.url || '' }, logFn);
       if (openPlan?.planType === 'fillPlan' && openPlan?.mapping?.primary) {
         attempts++;
         const selector = openPlan.mapping.primary;
@@ -343,9 +352,9 @@ export async function runGoUserTaskPageSF(taskLabel: string, opts?: RunOpts): Pr
           }
         }
         sideMenuOpened = true;
-        await new Promise(r=>setTimeout(r, Math.max(waitMs, 600)));
+        await awaitPageChange({ fromHtml: prevHtml, fromUrl: cap.url || '', timeoutMs: Math.max(waitMs, 600), log: logFn });
         const afterMenu = await getDomAndUrlFromWebview(m=>logFn(`[WV] ${m}`));
-        const detM = await detectPageChange(prevHtml, afterMenu.html||'');
+        const detM = await detectPageChange(prevHtml, afterMenu.html||'', ok ? { selector: triedSelectors[triedSelectors.length - 1], op: 'openSideMenu', prevUrl: cap.url || '' } : undefined);
         lastChange = !!detM.changed;
         prevHtml = afterMenu.html || prevHtml;
         logFn(`UTASK after menu click changed=${lastChange}`);
@@ -378,7 +387,7 @@ export async function runGoUserTaskPageSF(taskLabel: string, opts?: RunOpts): Pr
             logFn(`UTASK click -> ${ok?'ok':'fail'}`);
           }
         }
-        await new Promise(r => setTimeout(r, waitMs));
+        await awaitPageChange({ fromHtml: prevHtml, timeoutMs: waitMs, log: logFn });
         const afterCap = await getDomAndUrlFromWebview(msg => logFn(`[WV] ${msg}`));
         const afterHtml = afterCap.html || '';
         const det = await detectPageChange(prevHtml, afterHtml);
@@ -416,7 +425,7 @@ export async function runGoUserTaskPageSF(taskLabel: string, opts?: RunOpts): Pr
             logFn(`UTASK toggle click -> ${res.ok?'ok':'fail'}`);
           }
         }
-        await new Promise(r => setTimeout(r, Math.max(400, waitMs)));
+        await awaitPageChange({ fromHtml: prevHtml, timeoutMs: Math.max(400, waitMs), log: logFn });
         const afterToggle = await getDomAndUrlFromWebview(msg => logFn(`[WV] ${msg}`));
         const htmlT = afterToggle.html || '';
         // Heuristic: if new candidate appears now we mark side menu as opened.
@@ -55,7 +55,7 @@ async function runStaticLLMFallback(opts?: {
       }
 
       try {
-        const r = await fetch(`${BACKEND_URL}/api/tsx/dev-run`, {
+        const r = await fetch(`${BACKEND_URL}/api/tsx/dev-run?verbose=0`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({ 
@@ -111,7 +111,7 @@ async function runStaticLLMFallback(opts?: {
               if (!curHtml) break;
 
               try {
-                const pollResult = await fetch(`${BACKEND_URL}/api/tsx/dev-run`, {
+                const pollResult = await fetch(`${BACKEND_URL}/api/tsx/dev-run?verbose=0`, {
                   method: 'POST',
                   headers: { 'Content-Type': 'application/json' },
                   body: JSON.stringify({ user_command: tsxCmd, html: curHtml, prev_html: prevHtml, current_url: curUrl })
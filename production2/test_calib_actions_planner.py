@@ -0,0 +1,29 @@
+"""Tests for the calibration fill planner (set_value actions from fieldSelectors + ruhsat)."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.calibActionsPlanner import build_fill_plan
+
+
+def test_build_fill_plan_order_and_nested_values():
+    selectors = {"plaka_no": ["#plaka", "#plaka2"], "sasi_no": "#sasi", "motor_no": "#motor", "tckimlik": "#tc"}
+    ruhsat = {"sasi_no": "VF1XX", "Arac": {"Plaka No": "34 ABC 123"}, "Sahibi": {"TC": "12345678901"}}
+    plan = build_fill_plan(selectors, ruhsat, ["sasi_no", "plaka_no", "motor_no", "tckimlik"])
+    assert plan["ok"] and plan["count"] == 4
+    assert [(d["field"], d["selector"], d["value"]) for d in plan["details"]] == [
+        ("sasi_no", "#sasi", "VF1XX"),
+        ("plaka_no", "#plaka", "34 ABC 123"),  # nested key via the document value index
+        ("plaka_no", "#plaka2", "34 ABC 123"),
+        ("tckimlik", "#tc", "12345678901"),  # synonym "tc"; motor_no has no value and is skipped
+    ]
+
+def test_build_fill_plan_skips_look_alike_keys():
+    # "ad" (a synonym of ad_soyad) is a substring of "adres": that must not fill the name field
+    plan = build_fill_plan({"ad_soyad": "#name"}, {"adres": "Kadikoy Istanbul"}, [])
+    assert plan["ok"] and plan["details"] == []
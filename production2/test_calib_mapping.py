@@ -87,5 +87,14 @@ def test_calib_mapping():
     
     return result
 
+def test_calib_version_changes_on_save(tmp_path, monkeypatch):
+    """TsX caches static analyses per snapshot keyed by this version; a calib save must change it."""
+    from backend.Components import calibStorage
+
+    monkeypatch.setattr(calibStorage, "_CALIB_FILE", tmp_path / "calib.json")
+    before = calibStorage.version()
+    calibStorage.save("example.com", "Yeni Trafik", {"fieldSelectors": {"plaka_no": "#plk"}})
+    assert calibStorage.version() != before
+
 if __name__ == "__main__":
     test_calib_mapping()
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Tests for the learned click-candidate ranking (Components/clickRanking.py)."""
+
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.clickRanking import ANY_PAGE, ClickRanker, page_key
+from Features.findHomePage import FindHomePage
+from Features.goUserTaskPage import plan_check_page_changed
+
+URL = "https://portal.example.test/dashboard"
+HOME = """<html><head><title>Panel</title></head><body>
+<nav><a href="/" class="nav-link">Ana Sayfa</a><a href="/home" id="home">Home</a>
+<button class="btn">Dashboard</button></nav>
+<form><input name="q"><button>Ara</button></form>
+</body></html>"""
+AFTER = "<html><head><title>Ana Sayfa</title></head><body><h1>Hoş geldiniz</h1></body></html>"
+SELECTORS = ["css:a.nav-link", "css:#home", "text:Dashboard"]
+
+
+def test_rank_keeps_static_order_without_history(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"))
+    ordered, info = ranker.rank("findHomePage", URL, HOME, SELECTORS)
+    assert ordered == SELECTORS and info["reordered"] is False
+    assert info["host"] == "portal.example.test"
+
+
+def test_winner_moves_first_and_persists(tmp_path):
+    path = tmp_path / "rank.json"
+    ranker = ClickRanker(str(path))
+    ranker.record("findHomePage", URL, HOME, "css:a.nav-link", changed=False)
+    ranker.record("findHomePage", URL, HOME, "text:Dashboard", changed=True)
+    ordered, info = ranker.rank("findHomePage", URL, HOME, SELECTORS)
+    # winner first, never-tried keeps its place, the miss sinks to the end
+    assert ordered == ["text:Dashboard", "css:#home", "css:a.nav-link"]
+    assert info["reordered"] and info["top"] == "text:Dashboard"
+
+    ranker.close()
+    reloaded = ClickRanker(str(path))
+    assert reloaded.rank("findHomePage", URL, HOME, SELECTORS)[0][0] == "text:Dashboard"
+    # other scopes / hosts are unaffected
+    assert reloaded.rank("openSideMenu", URL, HOME, SELECTORS)[0] == SELECTORS
+    assert reloaded.rank("findHomePage", "https://other.test/", HOME, SELECTORS)[0] == SELECTORS
+
+
+def test_outcomes_are_written_behind(tmp_path):
+    path = tmp_path / "rank.json"
+    ranker = ClickRanker(str(path), flush_interval_s=0.5)
+    for _ in range(20):
+        ranker.record("findHomePage", URL, HOME, "css:#home", changed=True)
+    assert not path.exists() and ranker.stats()["pendingWrite"]
+    deadline = time.time() + 2
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    # background rewrites batch the burst instead of one per record
+    assert ClickRanker(str(path)).rank("findHomePage", URL, HOME, SELECTORS)[0][0] == "css:#home"
+    stats = ranker.stats()
+    assert stats["recorded"] == 20 and 1 <= stats["writes"] < 20 and not stats["pendingWrite"]
+    ranker.close()
+
+
+def test_typed_values_share_signature_and_unknown_page_uses_host_bucket(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"))
+    ranker.record("findHomePage", URL, HOME, "css:#home", changed=True)
+    typed = HOME.replace('<input name="q">', '<input name="q" value="kasko">')
+    assert page_key(URL, typed) == page_key(URL, HOME)
+    assert ranker.rank("findHomePage", URL, typed, SELECTORS)[0][0] == "css:#home"
+    # a new region changes the signature; the host-wide bucket still lifts the winner
+    other = HOME.replace("</form>", "</form><aside><button>Kapat</button></aside>")
+    host, sig = page_key(URL, other)
+    assert sig != page_key(URL, HOME)[1] and ranker.scores("findHomePage", host, sig) == {}
+    assert ranker.scores("findHomePage", host, ANY_PAGE)["css:#home"] > 0
+    assert ranker.rank("findHomePage", URL, other, SELECTORS)[0][0] == "css:#home"
+
+
+def test_learned_selector_outside_static_list_is_prepended(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"))
+    ranker.record("findHomePage", URL, HOME, "xpath://nav/a[1]", changed=True)
+    ordered, info = ranker.rank("findHomePage", URL, HOME, SELECTORS)
+    assert ordered[0] == "xpath://nav/a[1]" and ordered[1:] == SELECTORS and info["learned"] == 1
+
+
+def test_scores_decay(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"), half_life_s=3600)
+    ranker.record("findHomePage", URL, HOME, "css:#home", changed=True)
+    host, sig = page_key(URL, HOME)
+    entry = ranker._data[f"findHomePage|{host}|{sig}"]["css:#home"]
+    entry["ts"] = time.time() - 2 * 3600  # two half-lives ago
+    assert abs(ranker.scores("findHomePage", host, sig)["css:#home"] - 0.25) < 0.01
+    # an old win loses against a fresh one
+    ranker.record("findHomePage", URL, HOME, "text:Dashboard", changed=True)
+    assert ranker.rank("findHomePage", URL, HOME, SELECTORS)[0][0] == "text:Dashboard"
+
+
+def test_find_home_page_records_and_reranks(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"))
+    first = FindHomePage(HOME, op="allPlanHomePageCandidates", ranker=ranker, current_url=URL)
+    static = first["createCandidates"]["selectorsInOrder"]
+    assert len(static) > 1 and first["ranking"]["reordered"] is False
+    winner = static[-1]
+
+    det = FindHomePage(AFTER, op="planCheckHtmlIfChanged", prev_html=HOME, current_html=AFTER, wait_ms=0,
+                       ranker=ranker, prev_url=URL, tried_selector=winner)
+    assert det["checkHtmlIfChanged"]["changed"] and det["checkHtmlIfChanged"]["recorded"]
+
+    again = FindHomePage(HOME, op="allPlanHomePageCandidates", ranker=ranker, current_url=URL)
+    assert again["createCandidates"]["selectorsInOrder"][0] == winner
+    assert again["allPlanHomePageCandidates"][0]["selector"] == winner
+
+
+def test_check_page_changed_records_go_user_page_per_task(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"))
+    out = plan_check_page_changed(AFTER, HOME, ranker=ranker, tried_selector="text:Yeni Trafik",
+                                  tried_op="goUserPage", task_label="Yeni Trafik", prev_url=URL)
+    assert out["result"]["changed"] and out["recorded"]
+    host, sig = page_key(URL, HOME)
+    assert abs(ranker.scores("goUserPage:yeni trafik", host, sig)["text:Yeni Trafik"] - 1.0) < 1e-3
+    assert ranker.scores("goUserPage:kasko", host, sig) == {}
+
+def test_value_only_change_is_recorded_as_miss(tmp_path):
+    ranker = ClickRanker(str(tmp_path / "rank.json"))
+    # a re-rendered token/value changes the hash but is not a page change
+    typed = HOME.replace('<input name="q">', '<input name="q" value="t-81723">')
+    out = plan_check_page_changed(typed, HOME, ranker=ranker, tried_selector="css:#home",
+                                  tried_op="goUserPage", task_label="Yeni Trafik", prev_url=URL)
+    assert out["result"]["changed"] and out["result"]["details"]["kind"] == "value_change"
+    host, sig = page_key(URL, HOME)
+    assert ranker.scores("goUserPage:yeni trafik", host, sig)["css:#home"] < 0
+
+    det = FindHomePage(typed, op="planCheckHtmlIfChanged", prev_html=HOME, current_html=typed, wait_ms=0,
+                       ranker=ranker, prev_url=URL, tried_selector="text:Dashboard")
+    assert det["checkHtmlIfChanged"]["recorded"] and det["checkHtmlIfChanged"]["kind"] != "navigation"
+    assert ranker.scores("findHomePage", host, sig)["text:Dashboard"] < 0
@@ -0,0 +1,64 @@
+"""Tests for the structural (region-level) page diff."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.diffInteractiveRegions import diff_interactive_regions, structural_signature
+from backend.Components.detectWepPageChange import detect_web_page_change
+
+
+STEP1 = """
+<html><head><title>Araç Bilgileri</title></head><body>
+<form id="vehicle">
+  <input name="plaka" value="">
+  <select name="yakit"><option value="">Seçiniz</option><option value="benzin">Benzin</option></select>
+  <button>Devam</button>
+</form>
+<div role="dialog" id="help"><button>Kapat</button></div>
+</body></html>
+"""
+
+
+def test_value_change_only():
+    typed = STEP1.replace('name="plaka" value=""', 'name="plaka" value="06ABC123"')
+    res = diff_interactive_regions(STEP1, typed)
+    assert res.kind == "value_change"
+    assert res.added == [] and res.removed == []
+    assert [m.region for m in res.modified] == ["form#vehicle"]
+    assert res.modified[0].controls_changed == ["plaka"]
+    assert res.before_signature == res.after_signature
+    assert structural_signature(STEP1) == structural_signature(typed)
+
+
+def test_structure_change_keeps_other_regions():
+    grown = STEP1.replace("<button>Devam</button>", '<input name="sasi"><button>Devam</button>')
+    res = diff_interactive_regions(STEP1, grown)
+    assert res.kind == "structure_change"
+    assert res.modified[0].change == "structure"
+    assert res.modified[0].controls_added == ["sasi"]
+
+
+def test_navigation_detected():
+    step2 = """
+    <html><head><title>Poliçe</title></head><body>
+    <form id="policy"><input name="tckn"><button>Teklif Al</button></form>
+    </body></html>
+    """
+    res = diff_interactive_regions(STEP1, step2)
+    assert res.kind == "navigation"
+    assert "form#policy" in res.added
+    assert "form#vehicle" in res.removed
+
+
+def test_detect_web_page_change_structural_details():
+    typed = STEP1.replace('value="benzin"', 'value="benzin" selected')
+    res = detect_web_page_change(current_raw_html=typed, prev_raw_html=STEP1, structural=True)
+    assert res.changed is True
+    assert res.details["kind"] == "value_change"
+    same = detect_web_page_change(current_raw_html=STEP1, prev_raw_html=STEP1, structural=True)
+    assert same.changed is False and same.reason == "no_change"
@@ -0,0 +1,119 @@
+"""Tests for the /api/events push channel (Components/eventStream.py)."""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.eventStream import EventBus, pump_ws, sse_format, step_summary
+
+
+def test_slow_client_drops_oldest_and_gets_marker():
+    bus = EventBus(max_queue=3)
+
+    async def main():
+        sub = bus.subscribe(["log"])
+        for i in range(5):
+            bus.publish("log", {"seq": i + 1})
+        first = await sub.next_batch(1.0)
+        idle = await sub.next_batch(0.01)
+        return first, idle
+
+    first, idle = asyncio.run(main())
+    assert first[0] == {"type": "dropped", "count": 2, "ts": first[0]["ts"]}
+    assert [e["data"]["seq"] for e in first[1:]] == [3, 4, 5]
+    assert idle == []  # heartbeat tick
+    assert bus.stats()["dropped"] == 2
+
+
+def test_topic_and_session_filters():
+    bus = EventBus()
+
+    async def main():
+        s1 = bus.subscribe(["step", "page"], session_id="s1")
+        logs = bus.subscribe(["log"])
+        bus.publish("step", {"flow": "f3"}, session_id="s1")
+        bus.publish("step", {"flow": "f3"}, session_id="s2")
+        bus.publish("page", {"seq": 1})  # no session: everyone on the topic
+        bus.publish("log", {"message": "x"})
+        return await s1.next_batch(0.1), await logs.next_batch(0.1)
+
+    s1, logs = asyncio.run(main())
+    assert [(e["type"], e.get("session_id")) for e in s1] == [("step", "s1"), ("page", None)]
+    assert [e["type"] for e in logs] == ["log"]
+
+
+def test_publish_from_worker_thread_wakes_client_and_client_limit():
+    bus = EventBus(max_clients=1)
+
+    async def main():
+        sub = bus.subscribe([])
+        assert bus.subscribe([]) is None  # maxClients reached
+        threading.Timer(0.05, lambda: bus.publish("page", {"seq": 7})).start()
+        batch = await sub.next_batch(5.0)
+        bus.unsubscribe(sub)
+        return batch
+
+    batch = asyncio.run(main())
+    assert batch[0]["data"] == {"seq": 7}
+    assert bus.stats()["clients"] == 0 and bus.stats()["rejected"] == 1
+
+
+def test_sse_frame_and_step_summary():
+    ev = {"id": 3, "type": "step", "ts": 1.0, "data": step_summary(
+        "f3", "analyzePage", {"ok": True, "state": "form", "raw_html": "<html>…</html>"}, 12.34, "s1")}
+    frame = sse_format(ev)
+    assert frame.startswith("id: 3\nevent: step\ndata: {") and frame.endswith("\n\n")
+    assert "raw_html" not in frame and '"latency_ms": 12.3' in frame
+
+
+def test_ws_endpoint_streams_page_events_and_logs_since():
+    from fastapi.testclient import TestClient
+    import main  # type: ignore
+    from logging_utils import get_log_records, log  # type: ignore
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/api/ws/events?topics=page&session_id=ev-s1") as ws:
+        r = client.post("/api/page/snapshot", json={"session_id": "ev-s1", "html": "<html><body>a</body></html>"})
+        assert r.status_code == 200
+        batch = ws.receive_json()
+        assert batch[0]["type"] == "page" and batch[0]["data"]["fingerprint"] == r.json()["fingerprint"]
+
+    log("INFO", "EV-TEST", "first")
+    mark = get_log_records()[-1]["seq"]
+    log("INFO", "EV-TEST", "second")
+    newer = client.get(f"/api/logs?since={mark}").json()["logs"]
+    assert [rec["message"] for rec in newer] == ["second"]
+
+def test_ws_pump_sends_batch_when_client_message_arrives_too():
+    bus = EventBus()
+
+    class FakeSocket:
+        def __init__(self):
+            self.incoming = [{"type": "websocket.receive", "text": "ping"}]
+            self.sent = []
+
+        async def receive(self):
+            if self.incoming:
+                return self.incoming.pop(0)
+            await asyncio.sleep(0.05)
+            return {"type": "websocket.disconnect"}
+
+        async def send_json(self, data):
+            self.sent.append(data)
+
+    async def main():
+        sub = bus.subscribe(["log"])
+        bus.publish("log", {"msg": "x"})
+        ws = FakeSocket()
+        # the client message and the ready batch complete in the same loop turn
+        await pump_ws(ws, sub, heartbeat_s=5)
+        return ws.sent
+
+    sent = asyncio.run(main())
+    assert [e["data"]["msg"] for e in sent[0]] == ["x"] and len(sent) == 1
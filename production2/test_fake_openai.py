@@ -0,0 +1,85 @@
+"""Tests for the fake OpenAI server used by load tests (benchmarks/fake_openai.py)."""
+
+import json
+import random
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+root = Path(__file__).parent
+for p in (root / "backend", root / "benchmarks"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from fake_openai import FakeOpenAI, make_server, parse_latency  # noqa: E402
+from synth_pages import PageSpec, generate_page, score_mapping  # noqa: E402
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(fake):
+        server = make_server(fake, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        from openai import OpenAI
+        return OpenAI(api_key="sk-fake", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", max_retries=0, timeout=5)
+
+    yield start
+    for s in servers:
+        s.shutdown()
+        s.server_close()
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert parse_latency("fixed:250")(rng) == 250 and parse_latency("40")(rng) == 40
+    assert all(100 <= parse_latency("uniform:100,200")(rng) <= 200 for _ in range(50))
+    draws = sorted(parse_latency("lognormal:800,0.5")(rng) for _ in range(2000))
+    assert 700 < draws[1000] < 900
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+
+
+def test_mapping_answers_follow_the_prompt(serve):
+    from backend.Components.letLLMMapUserPageForms import _build_prompt_with_stats
+
+    client = serve(FakeOpenAI())
+    page = generate_page(PageSpec(inputs=30, label_styles=("for", "wrap", "aria"), variant=0))
+    prompt, _stats = _build_prompt_with_stats(page.html, {k: "x" for k in page.expected})
+    resp = client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": prompt}])
+    answer = json.loads(resp.choices[0].message.content)
+    assert answer["page_kind"] == "fill_form"
+    assert score_mapping(page, answer["field_mapping"])["precision"] == 1.0
+
+    compact, stats = _build_prompt_with_stats(page.html, {"plaka_no": "x"}, budget_tokens=1500)
+    assert stats.mode == "compact"
+    out = client.responses.create(model="gpt-4o", input=[{"role": "user", "content": [{"type": "input_text", "text": compact}]}])
+    assert list(json.loads(out.output_text)["field_mapping"]) == ["plaka_no"]
+
+    vision = client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": [
+        {"type": "text", "text": "Extract fields"}, {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AA=="}}]}])
+    assert json.loads(vision.choices[0].message.content)["plaka_no"]
+
+
+def test_error_injection_and_stats(serve):
+    import openai
+
+    fake = FakeOpenAI(rate_429=1.0)
+    client = serve(fake)
+    with pytest.raises(openai.RateLimitError):
+        client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+    fake.rate_429, fake.rate_5xx = 0.0, 1.0
+    with pytest.raises(openai.InternalServerError):
+        client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+    fake.rate_5xx, fake.rate_timeout, fake.timeout_s = 0.0, 1.0, 0.05
+    with pytest.raises(openai.APIConnectionError):
+        client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+    fake.rate_timeout = 0.0
+    client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "<button>Devam</button>"}])
+    stats = fake.stats()
+    assert stats["counts"] == {"requests": 4, "ok": 1, "429": 1, "5xx": 1, "timeout": 1, "bad_request": 0}
+    assert stats["kinds"] == {"click": 1} and stats["served_ms"]["n"] == 1
@@ -0,0 +1,49 @@
+"""Tests for the single-pass final-page detector."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.detectFinalPageArrivedinUserTask import detect_final_page_arrived
+
+
+def test_cta_only_with_weak_class():
+    res = detect_final_page_arrived('<button class="px-8 bg-green-600">POLİÇEYİ\n  Aktifleştir</button>')
+    assert res["cta_present"] is True and res["is_final"] is False
+    assert "Poliçeyi Aktifleştir" in res["hits"]
+    assert res["weak"] is True and res["reason"] == "cta_only"
+
+
+def test_pdf_signals():
+    html = (
+        '<a href="/police/123.PDF?dl=1">İndir</a>'
+        '<a href="data:application/pdf;base64,JVBERi0=">x</a>'
+        '<iframe src="/viewer/a.pdf#page=1"></iframe>'
+        '<a href="/other.html">y</a>'
+    )
+    res = detect_final_page_arrived(html)
+    assert res["pdf_found"] is True and res["is_final"] is True
+    assert res["pdf_links"] == ["/police/123.PDF?dl=1"]
+    assert len(res["pdf_embeds"]) == 2
+    assert res["reason"] == "pdf_detected"
+
+
+def test_only_visible_text_and_attributes():
+    html = (
+        '<script>var t = "Poliçeyi Üret";</script>'
+        '<div style="display: none"><div><button>Satın Al</button></div></div>'
+        '<input type="hidden" value="Teklifi Onayla">'
+        '<input type="submit" value="Poliçeyi Yazdır">'
+        '<span aria-label="Poli&ccedil;eyi Aktifle&#351;tir"></span>'
+    )
+    res = detect_final_page_arrived(html)
+    assert set(res["hits"]) == {"Poliçeyi Yazdır", "Poliçeyi Aktifleştir", "Policeyi Aktiflestir"}
+    assert res["pdf_found"] is False
+
+
+def test_no_html():
+    assert detect_final_page_arrived("")["reason"] == "no_html"
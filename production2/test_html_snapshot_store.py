@@ -0,0 +1,121 @@
+"""Tests for the delta HTML upload protocol (snapshot store)."""
+
+import base64
+import gzip
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.htmlSnapshotStore import (
+    HtmlSnapshotStore,
+    SnapshotMissError,
+    decode_html_body,
+    resolve_html_upload,
+    resolve_html_ref,
+)
+
+
+PAGE = "<html><body><form id='f'><input name='plaka' value=''></form></body></html>"
+
+
+def _fp(s):
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def test_full_then_unchanged_then_delta():
+    store = HtmlSnapshotStore()
+    first = resolve_html_upload("s1", html=PAGE, store=store)
+    assert first.source == "full" and first.unchanged is False
+
+    again = resolve_html_upload("s1", html_fp=first.fingerprint, store=store)
+    assert again.source == "unchanged" and again.unchanged is True
+    assert again.html == PAGE
+
+    typed = PAGE.replace("value=''", "value='06ABC123'")
+    p = PAGE.index("''") + 1
+    ops = [["=", p], ["+", "06ABC123"]]
+    res = resolve_html_upload("s1", html_base_fp=first.fingerprint, html_delta=ops, html_fp=_fp(typed), store=store)
+    assert res.source == "delta" and res.html == typed
+
+
+def test_compressed_body_and_refs():
+    store = HtmlSnapshotStore()
+    b64 = base64.b64encode(gzip.compress(PAGE.encode("utf-8"))).decode("ascii")
+    res = resolve_html_upload("s2", html_b64=b64, html_encoding="gzip", store=store)
+    assert res.source == "compressed" and res.html == PAGE
+    assert resolve_html_ref("s2", None, res.fingerprint, store=store) == PAGE
+
+
+def test_decoded_body_size_is_capped():
+    bomb = base64.b64encode(gzip.compress(b"a" * (4 << 20))).decode("ascii")
+    assert len(bomb) < 16 << 10
+    with pytest.raises(ValueError, match="html_too_large"):
+        decode_html_body(bomb, "gzip", max_size=1 << 20)
+    with pytest.raises(ValueError, match="html_too_large"):
+        decode_html_body(base64.b64encode(b"a" * 2048).decode("ascii"), None, max_size=1024)
+    assert decode_html_body(bomb, "gzip", max_size=8 << 20) == "a" * (4 << 20)
+
+
+def test_reused_base_stays_resident():
+    # TS3 polls re-send the same prev_html_fp; reads must refresh its LRU slot
+    store = HtmlSnapshotStore(per_session=3)
+    base = resolve_html_upload("s4", html=PAGE, store=store).fingerprint
+    for i in range(6):
+        assert resolve_html_ref("s4", None, base, store=store) == PAGE
+        resolve_html_upload("s4", html=PAGE + f"<!-- poll {i} -->", store=store)
+    assert store.get("s4", base) == PAGE
+    store.derived("s4", base)["k"] = 1
+    for i in range(2):
+        resolve_html_upload("s4", html=PAGE + f"<!-- next {i} -->", store=store)
+    assert store.derived("s4", base) == {"k": 1}
+
+
+def test_snapshot_miss_and_mismatch():
+    store = HtmlSnapshotStore()
+    with pytest.raises(SnapshotMissError):
+        resolve_html_upload("s3", html_fp="0" * 64, store=store)
+    first = resolve_html_upload("s3", html=PAGE, store=store)
+    with pytest.raises(SnapshotMissError):
+        resolve_html_upload("s3", html_base_fp=first.fingerprint, html_delta=[["+", "x"]], html_fp=first.fingerprint, store=store)
+    with pytest.raises(ValueError):
+        resolve_html_upload("s3", html_base_fp=first.fingerprint, html_delta=[["=", 10 ** 6]], store=store)
+
+
+def test_tsx_analysis_cache_is_keyed_by_every_analysis_input(monkeypatch):
+    import main  # type: ignore
+    from Components import calibStorage  # type: ignore
+
+    analyzed = []
+
+    def fake_f3(req):
+        if req.op == "loadRuhsatFromTmp":
+            return {"ok": True, "data": {"plaka_no": "34ABC123"}}
+        if req.op == "detectFinalPage":
+            return {"ok": True, "is_final": False}
+        assert req.op == "analyzePageStaticFillForms"
+        analyzed.append((req.current_url, req.task))
+        return {"ok": True, "field_mapping": {}}
+
+    version = ["v1"]
+    monkeypatch.setattr(main, "_f3_static", fake_f3)
+    monkeypatch.setattr(calibStorage, "version", lambda: version[0])
+
+    def run(**kw):
+        res = main._tsx_dev_run(main.TsxRequest(session_id="tsx-analysis-key", html=PAGE, **kw))
+        assert res["state"] == "no_forms_detected"
+
+    run(current_url="https://a.example/p1", user_command="doldur")
+    # fields the analysis never reads share the cached result
+    run(current_url="https://a.example/p1", user_command="tekrar", force_llm=True, ruhsat_json={"plaka_no": "X"})
+    assert analyzed == [("https://a.example/p1", "Yeni Trafik")]
+    run(current_url="https://a.example/p2")
+    version[0] = "v2"  # calib.json / config.json saved
+    run(current_url="https://a.example/p2")
+    assert [u for u, _ in analyzed] == ["https://a.example/p1", "https://a.example/p2", "https://a.example/p2"]
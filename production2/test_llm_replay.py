@@ -0,0 +1,90 @@
+"""Tests for the OpenAI record/replay transport (Components/llmReplay.py)."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components import llmReplay
+
+
+def _completion(content, calls):
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+    return httpx.MockTransport(handler)
+
+
+def _chat(transport, prompt):
+    from openai import OpenAI
+
+    client = OpenAI(api_key="sk-test", http_client=httpx.Client(transport=transport), max_retries=0)
+    return client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": prompt}], temperature=0.0)
+
+
+def test_request_key_ignores_key_order_only():
+    a = llmReplay.request_key("POST", "/v1/chat/completions", b'{"model": "gpt-4o", "temperature": 0}')
+    b = llmReplay.request_key("POST", "/v1/chat/completions", b'{"temperature": 0, "model": "gpt-4o"}')
+    c = llmReplay.request_key("POST", "/v1/chat/completions", b'{"temperature": 0, "model": "gpt-4o-mini"}')
+    assert a == b and a != c
+
+
+def test_record_then_replay_with_synthetic_latency(tmp_path):
+    import openai
+
+    calls = []
+    rec = llmReplay.ReplayTransport(str(tmp_path), mode="record", upstream=_completion('{"plaka_no": "#plaka"}', calls))
+    assert _chat(rec, "map the form").choices[0].message.content == '{"plaka_no": "#plaka"}'
+    assert len(calls) == 1 and rec.counts["recorded"] == 1
+    fixture = json.loads(next(tmp_path.glob("*.json")).read_text(encoding="utf-8"))
+    assert fixture["request"]["body"]["messages"][0]["content"] == "map the form"
+
+    rep = llmReplay.ReplayTransport(str(tmp_path), mode="replay", latency_ms=80, jitter_ms=10, seed=1)
+    t0 = time.perf_counter()
+    resp = _chat(rep, "map the form")
+    assert time.perf_counter() - t0 >= 0.07
+    assert resp.choices[0].message.content == '{"plaka_no": "#plaka"}' and resp.usage.total_tokens == 15
+    assert len(calls) == 1  # served from the fixture
+    with pytest.raises(openai.NotFoundError, match="replay_miss"):
+        _chat(rep, "another prompt")
+    assert rep.counts == {"hits": 1, "misses": 1, "recorded": 0}
+
+
+def test_f3_mapping_replays_offline(tmp_path, monkeypatch):
+    import openai
+    from backend.Components import letLLMMapUserPageForms as forms
+
+    monkeypatch.setattr(openai, "http_client", None)  # openai_client() installs the module-level client
+
+    html = "<form><label for='p'>Plaka No</label><input id='p' name='plaka'><button>Devam</button></form>"
+    ruhsat = {"plaka_no": "06 AK 8886"}
+    answer = json.dumps({"page_kind": "fill_form", "field_mapping": {"plaka_no": "#p"}, "actions": []})
+    monkeypatch.setenv("P2_LLM_FIXTURES", str(tmp_path))
+    monkeypatch.setenv("P2_LLM_LATENCY_MS", "0")
+
+    calls = []
+    monkeypatch.setenv("P2_LLM_REPLAY", "record")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    llmReplay.transport()._upstream = _completion(answer, calls)
+    recorded = forms.map_json_to_html_fields(html, ruhsat)
+    assert recorded["ok"] and recorded["field_mapping"] == {"plaka_no": "#p"} and len(calls) == 1
+
+    # no key, no network: the same prompt is answered from the fixture
+    monkeypatch.setenv("P2_LLM_REPLAY", "replay")
+    monkeypatch.delenv("OPENAI_API_KEY")
+    replayed = forms.map_json_to_html_fields(html, ruhsat)
+    assert replayed["field_mapping"] == recorded["field_mapping"] and len(calls) == 1
+    assert llmReplay.transport().counts["hits"] == 1
@@ -0,0 +1,87 @@
+"""Tests for the metrics registry and /metrics endpoint (Components/metrics.py)."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components import metrics
+from backend.Components.metrics import MetricsRegistry
+
+
+def test_histogram_exposition_and_quantiles():
+    reg = MetricsRegistry()
+    h = reg.histogram("t_seconds", "test", ("op",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.05, 0.5, 2.0):
+        h.observe(v, op="a")
+    text = reg.render()
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{op="a",le="0.1"} 2' in text
+    assert 't_seconds_bucket{op="a",le="1"} 3' in text
+    assert 't_seconds_bucket{op="a",le="+Inf"} 4' in text
+    assert 't_seconds_count{op="a"} 4' in text
+    s = h.summary()[0]
+    assert s["count"] == 4 and abs(s["p50"] - 0.1) < 1e-9 and s["p95"] == 1.0
+
+
+def test_label_sets_are_capped_and_escaped():
+    reg = MetricsRegistry(max_series=2)
+    c = reg.counter("t_total", "test", ("op",))
+    for op in ("a", "b", "c", "d"):
+        c.inc(op=op)
+    assert c.values() == {("a",): 1.0, ("b",): 1.0, ("_other",): 2.0}
+    reg.counter("q_total", "test", ("v",)).inc(v='x"y')
+    assert 'q_total{v="x\\"y"} 1' in reg.render()
+
+
+def test_llm_usage_cache_ratio_and_disabled_registry():
+    metrics.registry.reset()
+    resp = SimpleNamespace(model="gpt-test", usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+    metrics.record_llm_call("gpt-test", "F3", 0.4, resp=resp)
+    metrics.record_llm_call("gpt-test", "ruhsat", 1.2, usage={"input_tokens": 900, "output_tokens": 80})
+    metrics.record_llm_call("gpt-test", "F1", 0.1, ok=False)
+    assert metrics.LLM_TOKENS.values() == {("gpt-test", "prompt"): 1020.0, ("gpt-test", "completion"): 110.0}
+    assert metrics.LLM_CALLS.values()[("gpt-test", "F1", "error")] == 1.0
+    assert metrics.STAGE_SECONDS.summary()[0]["count"] == 3  # stage="llm"
+
+    for hit in (True, True, True, False):
+        metrics.cache_lookup("filterHtml", hit)
+    assert metrics.cache_hit_ratios() == {"filterHtml": 0.75}
+    assert 'p2_cache_hit_ratio{cache="filterHtml"} 0.75' in metrics.registry.render()
+
+    metrics.registry.enabled = False
+    try:
+        metrics.cache_lookup("filterHtml", False)
+        with metrics.stage("parse"):
+            pass
+    finally:
+        metrics.registry.enabled = True
+    assert metrics.cache_hit_ratios() == {"filterHtml": 0.75}
+    assert [s["stage"] for s in metrics.STAGE_SECONDS.summary()] == ["llm"]
+
+
+def test_metrics_endpoint_records_requests_and_stages():
+    from fastapi.testclient import TestClient
+    import main  # type: ignore
+
+    # main imports Components.metrics, the tests backend.Components.metrics: one shared registry
+    assert main.metrics.registry is metrics.registry
+    metrics.registry.reset()
+    client = TestClient(main.app)
+    html = "<html><body><form><input name='plaka'><button>Devam</button></form><a href='/'>Ana Sayfa</a></body></html>"
+    assert client.post("/api/f1", json={"html": html, "op": "allPlanHomePageCandidates"}).status_code == 200
+    assert client.post("/api/f3-static", json={"op": "analyzePageStaticFillForms"}).status_code == 422
+
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    assert 'p2_request_seconds_count{endpoint="/api/f1",op="allPlanHomePageCandidates",outcome="ok"} 1' in r.text
+    assert 'p2_request_seconds_count{endpoint="/api/f3-static",op="analyzePageStaticFillForms",outcome="http_422"} 1' in r.text
+    assert 'p2_stage_seconds_count{stage="filter"}' in r.text
+    assert 'p2_page_html_bytes_count{kind="raw"} 1' in r.text
+
+    summary = client.get("/api/metrics/summary").json()
+    assert {s["endpoint"] for s in summary["requests"]} == {"/api/f1", "/api/f3-static"}
@@ -0,0 +1,102 @@
+"""Tests for the non-blocking await-change hub (Components/pageChangeWatch.py)."""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.pageChangeWatch import PageChangeHub, _fingerprint
+
+FORM = """<html><head><title>Araç</title></head><body>
+<form><input name="plaka" value=""><button>Devam</button></form></body></html>"""
+TYPED = FORM.replace('value=""', 'value="34 ABC 123"')
+NEXT = """<html><head><title>Sigortalı</title></head><body>
+<form><input name="tckn"><select name="il"><option>İstanbul</option></select><button>Devam</button></form></body></html>"""
+
+
+def _publish_later(hub, delay_s, *pages):
+    def run():
+        for html in pages:
+            time.sleep(delay_s)
+            hub.publish("s1", html=html)
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+def test_resolves_on_structural_change_not_on_typing():
+    hub = PageChangeHub()
+    hub.publish("s1", html=FORM)
+
+    async def main():
+        _publish_later(hub, 0.05, TYPED, NEXT)
+        return await hub.wait_for_change("s1", from_fp=_fingerprint(FORM), timeout_s=5)
+
+    t0 = time.perf_counter()
+    res = asyncio.run(main())
+    assert res["changed"] and res["reason"] == "structure"
+    assert res["snapshot"]["fingerprint"] == _fingerprint(NEXT)
+    assert time.perf_counter() - t0 < 2  # woke on publish, not on the timeout
+
+
+def test_any_mode_and_timeout():
+    hub = PageChangeHub()
+    hub.publish("s1", html=FORM)
+
+    async def main():
+        _publish_later(hub, 0.02, TYPED)
+        typed = await hub.wait_for_change("s1", from_fp=_fingerprint(FORM), timeout_s=5, mode="any")
+        idle = await hub.wait_for_change("s1", from_fp=_fingerprint(TYPED), timeout_s=0.05)
+        return typed, idle
+
+    typed, idle = asyncio.run(main())
+    assert typed["changed"] and typed["snapshot"]["fingerprint"] == _fingerprint(TYPED)
+    assert idle["changed"] is False and idle["reason"] == "timeout"
+    assert hub.stats()["waiting"] == 0 and hub.stats()["timeouts"] == 1
+
+
+def test_change_published_before_the_wait_resolves_immediately():
+    hub = PageChangeHub()
+    hub.publish("s1", html=FORM)
+    hub.publish("s1", html=NEXT)
+    res = asyncio.run(hub.wait_for_change("s1", from_fp=_fingerprint(FORM), timeout_s=5))
+    assert res["changed"] and res["waited_ms"] < 1000
+    # re-pushing the starting page does not count as a change
+    hub.publish("s1", html=FORM)
+    res = asyncio.run(hub.wait_for_change("s1", from_fp=_fingerprint(FORM), timeout_s=0.05))
+    assert res["changed"] is False
+
+
+def test_sessions_are_isolated():
+    hub = PageChangeHub()
+    hub.publish("s1", html=FORM)
+
+    async def main():
+        threading.Timer(0.02, lambda: hub.publish("s2", html=NEXT)).start()
+        return await hub.wait_for_change("s1", from_fp=_fingerprint(FORM), timeout_s=0.2)
+
+    assert asyncio.run(main())["changed"] is False
+
+
+def test_wait_never_parses_html_on_the_event_loop(monkeypatch):
+    from backend.Components import pageChangeWatch
+
+    parsed_on = []
+    real = pageChangeWatch.structural_signature
+    monkeypatch.setattr(pageChangeWatch, "structural_signature",
+                        lambda html: parsed_on.append(threading.current_thread().name) or real(html))
+    hub = PageChangeHub()
+    # snapshots pushed with nobody waiting (the threadpool side of POST /api/page/snapshot)
+    pusher = threading.Thread(target=lambda: [hub.publish("s1", html=h) for h in (FORM, NEXT)], name="pool")
+    pusher.start()
+    pusher.join()
+
+    res = asyncio.run(hub.wait_for_change("s1", from_fp=_fingerprint(FORM), timeout_s=1))
+    assert res["changed"] and res["snapshot"]["signature"]
+    assert parsed_on == ["pool", "pool"]
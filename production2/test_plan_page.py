@@ -0,0 +1,54 @@
+"""Tests for the composite planPage op (one backend round-trip per page transition)."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Features.fillFormsUserTaskPageStatic import plan_page_transition
+
+RUHSAT = {"plaka_no": "34ABC123", "sasi_no": "VF1RFB00X12345678", "motor_no": "K9KA123", "model_yili": ""}
+FORM_HTML = """<html><body><form>
+<label for="plaka">Plaka</label><input id="plaka" name="plaka">
+<label for="sasi">Şasi No</label><input id="sasi" name="sasi">
+<label for="motor">Motor No</label><input id="motor" name="motor">
+<label for="model">Model Yılı</label><input id="model" name="model_yili">
+<button id="devam">Devam</button>
+</form></body></html>"""
+FINAL_HTML = """<html><body><h1>Poliçeniz hazır</h1>
+<a href="/files/police_123.pdf">Poliçe PDF</a></body></html>"""
+
+
+def test_plan_page_fill_plan_and_verification():
+    out = plan_page_transition(FORM_HTML, "https://x.test/form", "Yeni Trafik", RUHSAT)
+    assert out["ok"] and out["fingerprint"]
+    mapping = out["field_mapping"]
+    order = out["fill_plan"]["order"]
+    # only mapped keys that have ruhsat data, critical ones first
+    assert order and all(mapping.get(k) and RUHSAT[k] for k in order)
+    assert "model_yili" not in order
+    crit = out["verification"]["critical_fields"]
+    assert order[: len([k for k in crit if k in order])] == [k for k in crit if k in order]
+    assert [a["selector"] for a in out["fill_plan"]["actions"]] == [mapping[k] for k in order]
+    assert out["verification"]["min_filled"] <= len(order)
+    assert all(a.startswith(("css#", "click#")) for a in out["next_actions"])
+    assert out["next"] in ("fill_and_act", "fill", "fallback_llm")
+    assert out["final"]["is_final"] is False
+
+
+def test_plan_page_final_and_last_execution():
+    first = plan_page_transition(FORM_HTML, "https://x.test/form", ruhsat_json=RUHSAT)
+    last = {"url": "https://x.test/form", "fingerprint": first["fingerprint"], "selector_status": {"plaka_no": True, "sasi_no": False}}
+    out = plan_page_transition(FINAL_HTML, "https://x.test/done", ruhsat_json=RUHSAT, last_execution=last)
+    assert out["final"]["pdf_found"] and out["final"]["is_final"]
+    assert out["next"] == "final"
+    assert out["last_execution"]["page_changed"] and out["last_execution"]["url_changed"]
+    assert out["last_execution"]["verified_fields"] == ["plaka_no"]
+    assert out["last_execution"]["unverified_fields"] == ["sasi_no"]
+
+    same = plan_page_transition(FORM_HTML, "https://x.test/form", ruhsat_json=RUHSAT, last_execution=last)
+    assert same["last_execution"]["page_changed"] is False
+    assert plan_page_transition("", "u")["ok"] is False
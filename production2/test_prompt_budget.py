@@ -0,0 +1,78 @@
+"""Tests for the token-budgeted F3 mapping prompt."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.promptBudget import estimate_tokens, fit_lines, rank_controls
+from backend.Components.letLLMMapUserPageForms import _build_prompt_with_stats
+
+
+ROWS = "".join(
+    f'<div><label for="f{i}">Alan {i}</label><input id="f{i}" name="field{i}" data-qa="q{i}"></div>' for i in range(80)
+)
+BIG_PAGE = (
+    f'<form>{ROWS}<label for="sasi">Şasi Numarası</label><input id="sasi" name="chassisNo">'
+    '<input id="plk" placeholder="Plaka"></form><p>' + "lorem ipsum " * 3000 + "</p>"
+)
+RUHSAT = {"plaka_no": "06ABC123", "sasi_no": "WVW123", "motor_no": ""}
+
+
+def test_estimate_tokens_and_fit_lines():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 100) > 0
+    assert fit_lines(["a" * 40] * 10, 25) == ["a" * 40] * 2
+
+
+def test_rank_controls_prefers_missing_keys():
+    rows = [
+        {"tag": "input", "type": "text", "id": "x1", "label": "Adres"},
+        {"tag": "input", "type": "text", "id": "chassis", "label": ""},
+        {"tag": "input", "type": "text", "id": "p", "label": "Plaka No"},
+    ]
+    ranked = rank_controls(rows, ["sasi_no"], {"sasi_no": ["şasi", "chassis"]})
+    assert ranked[0][1]["id"] == "chassis" and ranked[0][1]["keys"] == ["sasi_no"]
+
+
+def test_small_page_keeps_full_prompt():
+    prompt, stats = _build_prompt_with_stats('<form><input id="plk" placeholder="Plaka"></form>', RUHSAT, budget_tokens=6000)
+    assert stats.mode == "full" and stats.tokens_saved == 0
+    assert "Filtered HTML" in prompt
+
+
+def test_large_page_compacts_within_budget():
+    prompt, stats = _build_prompt_with_stats(BIG_PAGE, RUHSAT, mapped_keys=["plaka_no"], budget_tokens=1500)
+    assert stats.mode == "compact"
+    assert stats.prompt_tokens <= 1500 < stats.full_tokens
+    assert stats.tokens_saved == stats.full_tokens - stats.prompt_tokens
+    assert stats.missing_keys == ["sasi_no"]
+    assert "lorem ipsum" not in prompt
+    table = prompt.split("tag|type|id|name|label|extra\n", 1)[1].splitlines()
+    assert table[0].startswith("input|text|sasi|chassisNo|")
+    assert stats.controls_listed == len(table) < stats.controls_total
+
+
+def test_wrapped_and_aria_labels_on_controls_with_ids():
+    html = ('<form><label>Plaka <input id="plk" name="p1"></label>'
+            '<span id="sl">Şasi No</span><input id="sasi" name="s1" aria-labelledby="sl"></form>'
+            '<p>' + "lorem ipsum " * 3000 + '</p>')
+    prompt, _stats = _build_prompt_with_stats(html, RUHSAT, budget_tokens=0)  # no budget: full prompt
+    assert "- input #plk name=p1 label-wrap=Plaka" in prompt
+    assert "lb=Şasi No" in prompt
+    compact, stats = _build_prompt_with_stats(html, RUHSAT, budget_tokens=1500)
+    assert stats.mode == "compact"
+    rows = compact.split("tag|type|id|name|label|extra\n", 1)[1].splitlines()
+    assert "input|text|plk|p1|Plaka|" in rows and "input|text|sasi|s1|Şasi No|" in rows
+
+
+def test_head_over_budget_still_lists_critical_controls():
+    big_ruhsat = {**RUHSAT, "adres": "Atatürk Cad. " * 400}
+    prompt, stats = _build_prompt_with_stats(BIG_PAGE, big_ruhsat, mapped_keys=["plaka_no"], budget_tokens=1500)
+    assert stats.mode == "compact" and stats.prompt_tokens > 1500  # the head alone is over budget
+    table = prompt.split("tag|type|id|name|label|extra\n", 1)[1].splitlines()
+    assert table and table[0].startswith("input|text|sasi|chassisNo|")
+    assert stats.controls_listed == len(table) <= len(stats.missing_keys)
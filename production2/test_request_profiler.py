@@ -0,0 +1,110 @@
+"""Tests for on-demand request profiling (Components/requestProfiler.py, /api/admin/profile)."""
+
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.requestProfiler import RequestProfiler
+
+
+def _busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def test_session_profiles_next_n_calls_only():
+    prof = RequestProfiler(interval_ms=1)
+    with prof.profile("/api/f3"):  # nothing armed: no-op
+        _busy_loop(0.01)
+    sess = prof.arm("/api/f3", 2)
+    with prof.profile("/api/f1"):
+        _busy_loop(0.01)
+    for _ in range(3):
+        with prof.profile("/api/f3", op="analyzePage"):
+            _busy_loop(0.05)
+
+    assert sess.state == "done" and len(sess.requests) == 2
+    assert sess.requests[0]["op"] == "analyzePage"
+    top = [f["function"] for f in sess.top_functions(20)]
+    assert any("_busy_loop" in f for f in top)
+    folded = sess.collapsed().splitlines()
+    assert folded and all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert any("_busy_loop (test_request_profiler.py:" in line for line in folded)
+
+
+def test_cancel_and_session_cap():
+    prof = RequestProfiler(max_sessions=2, max_count=3)
+    first = prof.arm("/api/f3", 50)
+    assert first.count == 3
+    assert prof.cancel(first.id) and not prof.cancel(first.id)
+    with prof.profile("/api/f3"):
+        pass
+    assert first.requests == []
+    prof.arm("/api/f1", 1)
+    prof.arm("/api/f2", 1)
+    assert prof.get(first.id) is None and len(prof.sessions()) == 2
+
+
+def test_admin_profile_endpoints(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main  # type: ignore
+
+    client = TestClient(main.app)
+    # TestClient is not a loopback client: without a token the admin API is closed
+    assert client.get("/api/admin/profile").status_code == 403
+    monkeypatch.setenv("P2_ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/profile", headers={"X-Admin-Token": "nope"}).status_code == 403
+    admin = {"X-Admin-Token": "s3cret"}
+    assert client.post("/api/admin/profile", json={"endpoint": "/api/runs", "count": 1}, headers=admin).status_code == 422
+
+    sess = client.post("/api/admin/profile", json={"endpoint": "/api/f1", "count": 1, "interval_ms": 1}, headers=admin).json()
+    html = "<html><body><form><input name='plaka'><button>Devam</button></form><a href='/'>Ana Sayfa</a></body></html>"
+    for _ in range(2):
+        assert client.post("/api/f1", json={"html": html, "op": "allPlanHomePageCandidates"}).status_code == 200
+
+    res = client.get(f"/api/admin/profile/{sess['id']}", headers=admin).json()
+    assert res["state"] == "done" and res["profiled"] == 1
+    assert res["requests"][0]["op"] == "allPlanHomePageCandidates"
+    assert any("main.py" in f["function"] for f in res["top_functions"])
+    folded = client.get(f"/api/admin/profile/{sess['id']}?format=collapsed", headers=admin)
+    assert folded.status_code == 200 and "attachment" in folded.headers["content-disposition"]
+    assert client.get("/api/admin/profile/unknown", headers=admin).status_code == 404
+
+    # a page in the user's browser can neither preflight nor call the admin API
+    evil = {"Origin": "http://evil.example", "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "x-admin-token"}
+    assert "access-control-allow-origin" not in client.options("/api/admin/profile", headers=evil).headers
+    assert "access-control-allow-origin" in client.options("/api/runs", headers=evil).headers
+    assert client.get("/api/admin/profile", headers={**admin, "Origin": "http://evil.example"}).status_code == 403
+    assert client.get("/api/admin/profile", headers={**admin, "Origin": "http://testserver"}).status_code == 200
+
+
+def test_admin_without_token_rejects_rebound_host(monkeypatch):
+    from fastapi import HTTPException
+    from starlette.requests import Request
+    import main  # type: ignore
+
+    monkeypatch.delenv("P2_ADMIN_TOKEN", raising=False)
+
+    def call(host, origin=None, peer="127.0.0.1"):
+        headers = [(b"host", host.encode())] + ([(b"origin", origin.encode())] if origin else [])
+        req = Request({"type": "http", "method": "GET", "path": "/api/admin/profile", "headers": headers, "client": (peer, 40000)})
+        try:
+            main._require_admin(req)
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+    assert call("127.0.0.1:5100") == 200 and call("localhost:5100", "http://localhost:5100") == 200
+    assert call("[::1]:5100", peer="::1") == 200
+    # rebinding: evil.test resolves to 127.0.0.1, Origin matches Host, the peer is loopback
+    assert call("evil.test:5100", "http://evil.test:5100") == 403
+    assert call("evil.test:5100") == 403
@@ -0,0 +1,128 @@
+"""Tests for the OCR / vision race used by ruhsat image ingest."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.extractRuhsatEngines import extract_ruhsat_race, extraction_progress, merge_extractions
+
+CRITICAL = ["plaka_no", "sasi_no"]
+
+
+def _ocr(fields, conf, delay=0.0):
+    def fn(path):
+        time.sleep(delay)
+        return {"fields": dict(fields), "confidence": dict(conf), "text": ""}
+    return fn
+
+
+def test_merge_prefers_confident_engine_and_boosts_agreement():
+    ocr = {"fields": {"plaka_no": "34 ABC 123", "sasi_no": "VF1XX0000000000001", "model_yili": "2019"},
+           "confidence": {"plaka_no": 0.95, "sasi_no": 0.4, "model_yili": 0.5}}
+    vision = {"plaka_no": "34ABC123", "sasi_no": "VF1XX0000000000009", "ad_soyad": "Ali Veli", "model_yili": ""}
+    out = merge_extractions(ocr, vision, vision_confidence=0.85)
+    assert out["sources"] == {"plaka_no": "ocr+vision", "sasi_no": "vision", "ad_soyad": "vision", "model_yili": "ocr"}
+    assert out["data"]["sasi_no"] == "VF1XX0000000000009" and out["data"]["model_yili"] == "2019"
+    assert out["confidence"]["plaka_no"] == 1.0
+
+
+def test_confident_ocr_skips_vision():
+    calls = []
+    partial = []
+    res = extract_ruhsat_race(
+        "a.jpg",
+        vision_fn=lambda p: calls.append(p) or {"plaka_no": "X"},
+        ocr_fn=_ocr({"plaka_no": "34 ABC 123", "sasi_no": "VF1XX0000000000001"}, {"plaka_no": 0.9, "sasi_no": 0.92}, 0.02),
+        critical_fields=CRITICAL,
+        vision_head_start_ms=500,
+        on_partial=partial.append,
+    )
+    time.sleep(0.05)
+    assert res["ok"] and calls == []
+    assert res["engines"]["vision"] == "skipped" and res["engines"]["total_ms"] < 400
+    assert set(res["sources"].values()) == {"ocr"}
+    assert partial and partial[0]["confident"]
+    assert extraction_progress("a.jpg")["stage"] == "done"
+
+
+def test_in_flight_vision_is_abandoned_when_ocr_is_confident():
+    release = threading.Event()
+
+    def slow_vision(path):
+        release.wait(2)
+        return {"plaka_no": "34 ABC 123"}
+
+    res = extract_ruhsat_race("b.jpg", vision_fn=slow_vision,
+                              ocr_fn=_ocr({"plaka_no": "34 ABC 123", "sasi_no": "VF1XX0000000000001"}, {"plaka_no": 0.9, "sasi_no": 0.9}, 0.1),
+                              critical_fields=CRITICAL, vision_head_start_ms=0)
+    release.set()
+    assert res["engines"]["vision"] == "cancelled" and res["engines"]["total_ms"] < 1000
+    assert res["data"]["sasi_no"] == "VF1XX0000000000001"
+
+
+def test_low_confidence_ocr_waits_for_vision_and_merges():
+    res = extract_ruhsat_race("c.jpg",
+                              vision_fn=lambda p: {"plaka_no": "34 ABC 123", "sasi_no": "VF1XX0000000000009", "ad_soyad": "Ali Veli"},
+                              ocr_fn=_ocr({"plaka_no": "34 ABC 123", "sasi_no": "VF1XXOOOOOOOOOO01"}, {"plaka_no": 0.9, "sasi_no": 0.3}),
+                              critical_fields=CRITICAL, vision_head_start_ms=0)
+    assert res["engines"]["vision"] == "used"
+    assert res["data"] == {"plaka_no": "34 ABC 123", "sasi_no": "VF1XX0000000000009", "ad_soyad": "Ali Veli"}
+    assert res["sources"]["plaka_no"] == "ocr+vision"
+
+    none = extract_ruhsat_race("d.jpg", vision_fn=None, ocr_fn=lambda p: None)
+    assert not none["ok"] and (none["engines"]["ocr"], none["engines"]["vision"]) == ("failed", "disabled")
+
+
+def test_unconfident_ocr_without_key_is_not_accepted(tmp_path, monkeypatch):
+    from Components import readInputConvertJson as ric
+
+    (tmp_path / "ruhsat.jpg").write_bytes(b"")
+    cfg = {"goFillForms.input.imageDir": str(tmp_path), "goFillForms.persist.dir": str(tmp_path / "out"),
+           "goFillForms.ingest.criticalFields": CRITICAL}
+    monkeypatch.setattr(ric, "_get_cfg", lambda path, default=None: cfg.get(path, default))
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("P2_LLM_REPLAY", "off")
+    ocr = {"fields": {"plaka_no": "34 ABC 123"}, "confidence": {"plaka_no": 0.9}}
+    race = ric.extract_ruhsat_race
+    monkeypatch.setattr(ric, "extract_ruhsat_race", lambda path, **kw: race(path, ocr_fn=_ocr(ocr["fields"], ocr["confidence"]), **kw))
+
+    out = ric.read_input_and_convert_to_json()
+    assert not out["ok"] and out["error"] == "no_key_for_vision"
+    assert out["partial"] == {"plaka_no": "34 ABC 123"}
+    assert not (tmp_path / "out").exists()
+
+    ocr["fields"]["sasi_no"], ocr["confidence"]["sasi_no"] = "VF1XX0000000000001", 0.95
+    out = ric.read_input_and_convert_to_json()
+    assert out["ok"] and out["data"]["sasi_no"] == "VF1XX0000000000001" and out["meta"]["source"] == "ocr"
+
+
+def test_vision_call_that_goes_out_is_never_reported_skipped():
+    # OCR and the vision head start finish together: either the call is skipped (no spend)
+    # or it went out and is reported as cancelled, never both
+    for i in range(40):
+        calls = []
+        res = extract_ruhsat_race(
+            f"race{i}.jpg",
+            vision_fn=lambda p: calls.append(p) or {"plaka_no": "X"},
+            ocr_fn=_ocr({"plaka_no": "34ABC123", "sasi_no": "VF1"}, {"plaka_no": 0.9, "sasi_no": 0.9}),
+            critical_fields=CRITICAL,
+            vision_head_start_ms=0,
+        )
+        time.sleep(0.01)
+        assert (res["engines"]["vision"] == "skipped") == (not calls), (i, res["engines"], calls)
+
+
+def test_progress_keeps_only_recent_images():
+    from backend.Components import extractRuhsatEngines as eng
+
+    for i in range(eng._PROGRESS_MAX + 10):
+        extract_ruhsat_race(f"img{i}.jpg", ocr_fn=_ocr({}, {}), critical_fields=CRITICAL)
+    assert len(eng._PROGRESS) == eng._PROGRESS_MAX
+    assert extraction_progress("img0.jpg") == {}
+    assert extraction_progress()["path"] == f"img{eng._PROGRESS_MAX + 9}.jpg"
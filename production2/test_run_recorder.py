@@ -0,0 +1,94 @@
+"""Tests for the write-behind run/step recorder and the /api/runs endpoints."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.runRecorder import RunRecorder
+
+
+def _recorder(tmp_path, **kw):
+    return RunRecorder(str(tmp_path / "runs.db"), flush_interval_s=0.05, **kw)
+
+
+def test_steps_are_batched_into_runs(tmp_path):
+    rec = _recorder(tmp_path)
+    url = "https://sigorta.example.com/trafik"
+    rec.record_step("F1", "allPlanHomePageCandidates", {"ok": True, "selector": "#home"}, session_id="s1", html="<a id='home'>Ana Sayfa</a>")
+    rec.record_step("F3", "analyzePage", {
+        "ok": True, "page_kind": "fill_form", "field_mapping": {"plaka_no": "#plaka"},
+        "actions": ["click#next"], "llm_usage": {"model": "m", "calls": 1, "total_tokens": 812},
+    }, session_id="s1", url=url, html="<input id='plaka'>", latency_ms=120.5)
+    rec.record_step("F3-Static", "validateCriticalFields", {"ok": False, "error": "missing sasi_no"}, session_id="s1", url=url)
+    rec.record_step("F3-Static", "detectFinalPage", {"ok": True, "is_final": True}, session_id="s1")
+    rec.record_step("F1", "planCheckHtmlIfChanged", {"ok": True, "changed": True}, session_id="s1")
+    assert rec.flush()
+
+    runs = rec.run_history()
+    assert [r["steps"] for r in runs] == [1, 4]  # final page completed the first run
+    first = runs[1]
+    assert first["status"] == "Completed" and first["host"] == "sigorta.example.com"
+    assert first["llm_tokens"] == 812 and first["failed_steps"] == 1
+    assert first["last_error"] == "missing sasi_no"
+
+    detail = rec.run_steps(first["id"])
+    steps = detail["steps"]
+    assert [s["phase"] for s in steps] == ["allPlanHomePageCandidates", "fill_form", "validateCriticalFields", "detectFinalPage"]
+    assert steps[0]["host"] is None and steps[1]["host"] == "sigorta.example.com"
+    assert len(steps[1]["fingerprint"]) == 64 and steps[1]["detail"]["actions"] == ["click#next"]
+    db = rec.database()
+    assert db.get_form_maps_by_run(first["id"])[0]["page_state"] == "fill_form"
+
+    hosts = rec.host_success_rates()
+    # the follow-up run inherits the session's host and has not completed yet
+    assert hosts[0]["host"] == "sigorta.example.com" and hosts[0]["runs"] == 2
+    assert hosts[0]["run_success_rate"] == 0.5 and hosts[0]["step_success_rate"] == 0.75
+    rec.close()
+
+
+def test_disabled_and_hard_reset(tmp_path):
+    off = RunRecorder(str(tmp_path / "off.db"), enabled=False)
+    assert off.record_step("F1", "x", {"ok": True}) is False
+    assert not (tmp_path / "off.db").exists()
+
+    rec = _recorder(tmp_path)
+    rec.record_step("TsX", "devRun", {"ok": True, "state": "static_ready"})
+    rec.record_step("TsX", "devRun", {"ok": True, "state": "static_ready"}, new_run=True)
+    rec.flush()
+    assert len(rec.run_history()) == 2
+    assert rec.stats()["written"] == 2 and rec.stats()["dropped"] == 0
+    rec.close()
+
+
+def test_session_map_keeps_only_recent_sessions(tmp_path):
+    rec = _recorder(tmp_path, max_sessions=2)
+    for sid in ("a", "b", "a", "c"):
+        rec.record_step("F1", "x", {"ok": True}, session_id=sid)
+        rec.flush()
+    assert list(rec._sessions) == ["a", "c"]  # b was the least recently active
+    rec.record_step("F1", "x", {"ok": True}, session_id="a")
+    rec.record_step("F1", "x", {"ok": True}, session_id="b")  # evicted: starts a new run
+    rec.flush()
+    assert sorted(r["steps"] for r in rec.run_history()) == [1, 1, 1, 3]
+    rec.close()
+
+
+def test_runs_endpoints(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main  # type: ignore
+
+    rec = _recorder(tmp_path)
+    monkeypatch.setattr(main, "run_recorder", rec)
+    client = TestClient(main.app)
+    r = client.post("/api/f2", json={"prev_html": "<div>a</div>", "current_html": "<div>b</div>"})
+    assert r.status_code == 200
+    runs = client.get("/api/runs").json()["runs"]
+    assert runs and runs[0]["steps"] == 1 and runs[0]["last_phase"] == "hash_changed"
+    assert client.get(f"/api/runs/{runs[0]['id']}").json()["steps"][0]["flow"] == "F2"
+    assert client.get("/api/runs/999999").status_code == 404
+    assert client.get("/api/runs/hosts").json()["ok"] is True
+    rec.close()
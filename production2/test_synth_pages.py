@@ -0,0 +1,55 @@
+"""Tests for the synthetic form page generator (benchmarks/synth_pages.py)."""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent
+for _p in (root / "backend", root / "benchmarks"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from bs4 import BeautifulSoup  # type: ignore
+
+from synth_pages import TURKISH_LABELS, PageSpec, generate_page, score_mapping  # type: ignore
+
+
+def test_same_spec_same_page_and_sizes_scale():
+    spec = PageSpec(forms=3, inputs=60, depth=5, selects=10, options=50, seed=7)
+    a, b = generate_page(spec), generate_page(spec)
+    assert a.html == b.html and a.expected == b.expected
+    assert generate_page(PageSpec(forms=3, inputs=60, depth=5, selects=10, options=50, seed=8)).html != a.html
+    assert generate_page(PageSpec(inputs=200, options=500, selects=20)).size_bytes > 10 * generate_page(PageSpec()).size_bytes
+
+
+def test_expected_controls_exist_with_their_label_style():
+    page = generate_page(PageSpec(forms=4, inputs=40, depth=3, selects=8, options=30, seed=3))
+    soup = BeautifulSoup(page.html, "html.parser")
+    assert len(soup.find_all("form")) == 4
+    assert len(soup.select("input, select")) == 40
+    assert set(page.expected) == set(TURKISH_LABELS)
+    for key, sel in page.expected.items():
+        el = soup.select(sel)
+        assert len(el) == 1, sel
+        el = el[0]
+        assert page.labels[key] in TURKISH_LABELS[key]
+        style = page.styles[key]
+        if style == "for":
+            assert soup.find("label", attrs={"for": el["id"]}).get_text(strip=True) == page.labels[key]
+        elif style == "wrap":
+            assert el.find_parent("label") is not None
+        elif style == "aria":
+            assert soup.find(id=el["aria-labelledby"]).get_text(strip=True) == page.labels[key]
+        else:
+            assert el.find_parent(class_="field-input").find_previous_sibling(class_="field-label").get_text(strip=True) == page.labels[key]
+    depth_page = generate_page(PageSpec(inputs=10, depth=6))
+    el = BeautifulSoup(depth_page.html, "html.parser").select_one(depth_page.expected["plaka_no"])
+    assert len([p for p in el.parents if p.name == "div" and p.has_attr("data-reactroot-0")]) == 1
+
+
+def test_score_mapping_resolves_selectors():
+    page = generate_page(PageSpec(inputs=20, label_styles=("for",), variant=0, fields=("plaka_no", "sasi_no", "motor_no")))
+    plaka = page.expected["plaka_no"].split("'")[1]
+    predicted = {"plaka_no": f"#{plaka}_id", "sasi_no": page.expected["motor_no"], "renk": "[name='f0_0']"}
+    s = score_mapping(page, predicted)
+    assert s["correct"] == ["plaka_no"] and s["wrong"] == ["sasi_no"] and s["missing"] == ["motor_no"]
+    assert s["unexpected"] == ["renk"] and s["recall"] == 0.333 and s["precision"] == 0.333
@@ -0,0 +1,106 @@
+"""Tests for request tracing and /api/trace (Components/tracing.py)."""
+
+import contextvars
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components import tracing
+from backend.Components.tracing import Tracer
+
+
+def test_nested_spans_errors_and_thread_context():
+    t = Tracer(sample_rate=0.0)
+
+    @tracing.traced("work")
+    def work():
+        with tracing.span("inner", k=1):
+            tracing.set_attrs(rows=3)
+        tracing.record_span("stage:llm", 0.01, model="m")
+
+    def in_thread():
+        with tracing.span("thread-span"):
+            pass
+
+    with t.trace("root", force=True) as trace_id:
+        work()
+        th = threading.Thread(target=contextvars.copy_context().run, args=(in_thread,))
+        th.start()
+        th.join()
+        with pytest.raises(ValueError):
+            with tracing.span("boom"):
+                raise ValueError("x")
+    assert tracing.current_trace_id() is None
+
+    tree = tracing.to_tree(t.get(trace_id))["root"]
+    assert [c["name"] for c in tree["children"]] == ["work", "thread-span", "boom"]
+    work_node = tree["children"][0]
+    inner, llm = sorted(work_node["children"], key=lambda c: c["name"])
+    assert inner["attrs"] == {"k": 1, "rows": 3}
+    assert llm["name"] == "stage:llm" and llm["duration_ms"] >= 10  # backdated by record_span
+    assert tree["children"][2]["error"] == "ValueError"
+
+
+def test_sampling_limits_and_otlp_export():
+    t = Tracer(sample_rate=0.0, max_traces=2, max_spans=3)
+    with t.trace("unsampled") as tid:
+        with tracing.span("ignored"):
+            pass
+    assert tid is None
+
+    ids = []
+    for i in range(3):
+        with t.trace(f"r{i}", force=True) as tid:
+            for _ in range(5):
+                with tracing.span("s"):
+                    pass
+        ids.append(tid)
+    assert t.get(ids[0]) is None and [r["name"] for r in t.recent()] == ["r2", "r1"]
+    tr = t.get(ids[2])
+    assert len(tr.spans) == 3 and tr.dropped == 3
+
+    otlp = tracing.to_otlp(tr)
+    spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(spans[0]["traceId"]) == 32 and len(spans[0]["spanId"]) == 16
+    assert "parentSpanId" not in spans[0] and spans[1]["parentSpanId"] == spans[0]["spanId"]
+    assert int(spans[0]["endTimeUnixNano"]) >= int(spans[0]["startTimeUnixNano"])
+
+
+def test_forced_request_trace_endpoint():
+    from fastapi.testclient import TestClient
+    import main  # type: ignore
+
+    # main imports Components.tracing, the Features backend.Components.tracing: one tracer
+    assert main.tracing.tracer is tracing.tracer
+    client = TestClient(main.app)
+    html = ("<html><body><form><label for='p'>Plaka</label><input id='p' name='plaka'>"
+            "<button>Devam</button></form></body></html>")
+    r = client.post("/api/f3-static", json={"op": "analyzePageStaticFillForms", "html": html,
+                                           "url": "https://example.test/form"}, headers={"X-Trace": "1"})
+    assert r.status_code == 200
+    trace_id = r.headers["x-trace-id"]
+
+    tree = client.get(f"/api/trace/{trace_id}").json()
+    assert tree["root"]["attrs"]["op"] == "analyzePageStaticFillForms"
+    assert tree["root"]["attrs"]["http.status_code"] == 200
+    names = []
+
+    def walk(n):
+        names.append(n["name"])
+        for c in n["children"]:
+            walk(c)
+    walk(tree["root"])
+    assert "fillFormsUserTaskPageStatic.plan_analyze_page_static_fill_forms" in names
+    assert "mappingStaticFillForms.static_analyze_page" in names
+    assert "stage:static_mapping" in names
+
+    assert client.get(f"/api/trace/{trace_id}?format=otlp").json()["resourceSpans"]
+    assert client.get("/api/trace/unknown").status_code == 404
+    assert trace_id in [t["trace_id"] for t in client.get("/api/trace").json()["traces"]]
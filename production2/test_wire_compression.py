@@ -0,0 +1,85 @@
+"""Tests for request/response compression and ?verbose=0 payload stripping."""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.wireCompression import (
+    WireCompressionMiddleware,
+    choose_encoding,
+    compress_body,
+    strip_diagnostics,
+    zstd_available,
+)
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(WireCompressionMiddleware, minimum_size=256, max_request_bytes=1 << 20)
+
+    @app.post("/echo")
+    def echo(body: dict):
+        return {"n": len(body.get("html", "")), "pad": "x" * int(body.get("pad", 0))}
+
+    return app
+
+
+def test_strip_diagnostics_copies_nested():
+    payload = {"ok": True, "raw": "...", "details": {"analysis": {"big": 1}, "actions": [{"prompt_snippet": "p", "a": 1}]}}
+    out = strip_diagnostics(payload)
+    assert out == {"ok": True, "details": {"actions": [{"a": 1}]}}
+    # cached results must not be mutated
+    assert "analysis" in payload["details"] and payload["raw"] == "..."
+
+
+def test_gzip_request_and_threshold():
+    client = TestClient(_app())
+    html = "<input name='plaka'>" * 500
+    raw = json.dumps({"html": html, "pad": 10}).encode("utf-8")
+    r = client.post("/echo", content=gzip.compress(raw), headers={
+        "Content-Type": "application/json", "Content-Encoding": "gzip", "Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and r.json()["n"] == len(html)
+    assert "content-encoding" not in r.headers  # below minimum_size
+
+    r = client.post("/echo", json={"pad": 5000}, headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert int(r.headers["content-length"]) < 5000
+    assert r.json()["pad"] == "x" * 5000
+
+
+def test_bad_request_encodings():
+    client = TestClient(_app())
+    r = client.post("/echo", content=b"abc", headers={"Content-Type": "application/json", "Content-Encoding": "br"})
+    assert r.status_code == 415
+    r = client.post("/echo", content=b"not gzip", headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert r.status_code == 400
+    bomb = gzip.compress(json.dumps({"html": "a" * (2 << 20)}).encode("utf-8"))
+    r = client.post("/echo", content=bomb, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    assert r.status_code == 413
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("zstd, gzip") == ("zstd" if zstd_available() else "gzip")
+
+
+@pytest.mark.skipif(not zstd_available(), reason="zstandard not installed")
+def test_zstd_roundtrip():
+    client = TestClient(_app())
+    raw = json.dumps({"html": "<select></select>" * 300, "pad": 4000}).encode("utf-8")
+    r = client.post("/echo", content=compress_body(raw, "zstd"), headers={
+        "Content-Type": "application/json", "Content-Encoding": "zstd", "Accept-Encoding": "zstd"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "zstd"
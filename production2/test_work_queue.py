@@ -0,0 +1,148 @@
+"""Tests for the durable (document, host, task) work queue and the batch fill workers."""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+root = Path(__file__).parent
+backend_path = root / "backend"
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from backend.Components.jobQueue import JobQueue
+from Features.batchFillForms import QueueWorker, plan_fill_job
+
+RUHSAT = {"plaka_no": "34ABC123", "sasi_no": "VF1RFB00X12345678", "motor_no": "K9KA123", "model_yili": "2019"}
+FORM_HTML = """<html><body><form>
+<label for="plaka">Plaka</label><input id="plaka" name="plaka">
+<label for="sasi">Şasi No</label><input id="sasi" name="sasi">
+<label for="motor">Motor No</label><input id="motor" name="motor">
+<label for="model">Model Yılı</label><input id="model" name="model_yili">
+<button id="devam">Devam</button>
+</form></body></html>"""
+
+
+def _queue(tmp_path, **kw):
+    return JobQueue(str(tmp_path / "queue.db"), **kw)
+
+
+def test_fanout_dedupes_active_triples(tmp_path):
+    q = _queue(tmp_path)
+    ids = q.enqueue_fanout(["a.json", "b.json"], ["x.com", "y.com", "z.com"], "Yeni Trafik")
+    assert len(ids) == 6
+    assert q.enqueue("a.json", "x.com", "Yeni Trafik") is None
+    assert q.enqueue("a.json", "x.com", "Kasko") is not None
+    assert q.stats()["counts"]["queued"] == 7
+
+
+def test_lease_complete_and_retry_to_dead_letter(tmp_path):
+    q = _queue(tmp_path, backoff_s=0.0)
+    done_id = q.enqueue("a.json", "x.com", "Yeni Trafik")
+    bad_id = q.enqueue("b.json", "x.com", "Yeni Trafik", max_attempts=2)
+
+    jobs = q.lease("w1", limit=10)
+    assert [j.id for j in jobs] == [done_id, bad_id]
+    assert q.lease("w2") == []  # everything is leased
+    assert q.complete(done_id, "w1", {"state": "plan_ready"})
+    assert q.fail(bad_id, "w2", "not mine") is None  # lease belongs to w1
+
+    assert q.fail(bad_id, "w1", "timeout") == "queued"
+    retry = q.lease("w2")
+    assert [(j.id, j.attempts) for j in retry] == [(bad_id, 2)]
+    assert q.fail(bad_id, "w2", "timeout again") == "dead"
+
+    stats = q.stats()
+    assert stats["counts"] == {"queued": 0, "leased": 0, "done": 1, "dead": 1}
+    assert stats["done_in_window"] == 1 and stats["jobs_per_min"] > 0
+    dead = q.list_jobs(state="dead")
+    assert dead[0]["last_error"] == "timeout again" and dead[0]["attempts"] == 2
+    assert q.get(done_id)["result"] == {"state": "plan_ready"}
+
+    # requeue revives the dead job in place, so the triple is active (and deduped) again
+    assert q.requeue(bad_id)
+    assert q.enqueue("b.json", "x.com", "Yeni Trafik") is None
+    assert q.get(bad_id)["state"] == "queued" and q.get(bad_id)["attempts"] == 0
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    q = _queue(tmp_path)
+    job_id = q.enqueue("a.json", "x.com", "Yeni Trafik", max_attempts=2)
+    assert q.lease("crashed", lease_s=0.01)
+    time.sleep(0.05)
+    (job,) = q.lease("w2", lease_s=60)
+    assert job.id == job_id and job.attempts == 2
+    assert not q.heartbeat(job_id, "crashed")
+    assert q.heartbeat(job_id, "w2")
+    assert not q.complete(job_id, "crashed")
+    assert q.complete(job_id, "w2")
+
+
+def test_plan_fill_job_static_first():
+    res = plan_fill_job(RUHSAT, FORM_HTML, "https://sigorta.example.com/", "Yeni Trafik", use_llm=False)
+    assert res["state"] == "plan_ready" and res["method"] == "static_heuristics"
+    assert res["success_rate"] == 1.0
+    values = {a["selector"]: a["value"] for a in res["fill_plan"]["actions"] if a["kind"] == "set_value"}
+    fm = res["field_mapping"]
+    assert values[fm["plaka_no"]] == "34ABC123" and values[fm["sasi_no"]] == "VF1RFB00X12345678"
+
+    res = plan_fill_job(RUHSAT, "<form><input id='q' name='q'></form>", None, "Yeni Trafik", use_llm=False)
+    assert res["state"] in ("need_llm_fallback", "no_forms_detected")
+
+
+def test_workers_drain_the_queue(tmp_path):
+    doc = tmp_path / "ruhsat.json"
+    doc.write_text(json.dumps(RUHSAT), encoding="utf-8")
+    page = tmp_path / "form.html"
+    page.write_text(FORM_HTML, encoding="utf-8")
+    q = _queue(tmp_path, backoff_s=0.0)
+    hosts = ["a.example.com", "b.example.com", "c.example.com"]
+    q.enqueue_fanout([str(doc)], hosts, "Yeni Trafik", {"html_path": str(page)})
+    q.enqueue(str(tmp_path / "missing.json"), "a.example.com", "Yeni Trafik", {"html_path": str(page)}, max_attempts=2)
+
+    stop = threading.Event()
+    workers = [QueueWorker(q, worker_id=f"w{i}", poll_s=0.01, use_llm=False) for i in range(2)]
+    threads = [threading.Thread(target=w.run, args=(stop,), kwargs={"exit_when_idle": True}) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    stats = q.stats()
+    assert stats["counts"] == {"queued": 0, "leased": 0, "done": 3, "dead": 1}
+    done = q.list_jobs(state="done")
+    assert sorted(j["host"] for j in done) == sorted(hosts)
+    assert all(j["result"]["state"] == "plan_ready" for j in done)
+    dead = q.list_jobs(state="dead")[0]
+    assert "document not found" in dead["last_error"] and dead["attempts"] == 1  # not retried
+
+def test_fanout_payloads_per_document_and_host(tmp_path):
+    q = _queue(tmp_path)
+    q.enqueue_fanout(["d1", "d2"], ["x.com", "y.com"], "Yeni Trafik", {"note": "shared"},
+                     document_payloads={"d1": {"ruhsat_json": {"plaka_no": "1"}}, "d2": {"ruhsat_json": {"plaka_no": "2"}}},
+                     host_payloads={"x.com": {"html": "<x>"}, "y.com": {"html": "<y>"}})
+    jobs = {(j["document"], j["host"]): j["payload"] for j in q.list_jobs()}
+    assert jobs[("d2", "x.com")] == {"note": "shared", "ruhsat_json": {"plaka_no": "2"}, "html": "<x>"}
+    assert jobs[("d1", "y.com")]["ruhsat_json"] == {"plaka_no": "1"} and jobs[("d1", "y.com")]["html"] == "<y>"
+
+
+def test_enqueue_api_rejects_shared_per_job_payload(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main  # type: ignore
+
+    q = _queue(tmp_path)
+    monkeypatch.setattr(main, "_get_work_queue", lambda: q)
+    client = TestClient(main.app)
+    body = {"documents": ["a.json", "b.json"], "hosts": ["x.com"], "payload": {"ruhsat_json": RUHSAT}}
+    assert client.post("/api/queue/enqueue", json=body).status_code == 422
+    body = {"documents": ["a.json"], "hosts": ["x.com", "y.com"], "payload": {"html": FORM_HTML}}
+    assert client.post("/api/queue/enqueue", json=body).status_code == 422
+
+    body = {"documents": [{"id": "a", "ruhsat_json": RUHSAT}, "b.json"], "hosts": ["x.com", "y.com"],
+            "pages": {"x.com": {"html": FORM_HTML, "url": "https://x.com/form"}}}
+    res = client.post("/api/queue/enqueue", json=body).json()
+    assert res["enqueued"] == 4
+    jobs = {(j["document"], j["host"]): j["payload"] for j in q.list_jobs()}
+    assert jobs[("a", "x.com")] == {"ruhsat_json": RUHSAT, "html": FORM_HTML, "url": "https://x.com/form"}
+    assert jobs[("b.json", "y.com")] == {}
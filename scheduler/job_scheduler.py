@@ -1,46 +1,340 @@
+import os
 import threading
 import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 
 class JobState:
     WAITING = "waiting"
     RUNNING = "running"
     DONE = "done"
     ERROR = "error"
+    CANCELLED = "cancelled"
+    SKIPPED = "skipped"  # bir bağımlılığı başarısız/iptal oldu
+
+    FINAL = frozenset({DONE, ERROR, CANCELLED, SKIPPED})
+
+
+def _timed_call(func, args, kwargs):
+    """Worker (thread veya process) içinde çalışır: (ok, sonuç/hata, wall_s, cpu_s)."""
+    w0 = time.perf_counter()
+    c0 = time.thread_time()
+    try:
+        value = func(*args, **kwargs)
+        ok = True
+    except Exception as e:
+        value = str(e)
+        ok = False
+    return ok, value, time.perf_counter() - w0, time.thread_time() - c0
+
 
 class Job:
-    def __init__(self, name, func):
+    """Tek iş: bağımlılıklar, deneme başına timeout, backoff'lu retry ve zamanlama.
+
+    timeout aşılırsa ya da iş iptal edilirse cancel_event set edilir; uzun
+    süren fonksiyonlar bu event'i kontrol ederek erken çıkabilir (thread'ler
+    dışarıdan öldürülemez).
+    """
+
+    def __init__(self, name, func, deps=None, timeout=None, retries=0, backoff=0.5, backoff_factor=2.0, args=(), kwargs=None):
         self.name = name
         self.func = func
+        self.deps = list(deps or [])
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
         self.state = JobState.WAITING
         self.result = None
         self.error = None
+        self.attempts = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._not_before = 0.0
+        self._attempt_started = None
+
     def run(self, *args, **kwargs):
+        """Job'u çağıran thread'de bir kez çalıştır (scheduler olmadan)."""
         self.state = JobState.RUNNING
-        try:
-            self.result = self.func(*args, **kwargs)
+        self.attempts += 1
+        self.started_at = self.started_at or time.time()
+        ok, value, wall, cpu = _timed_call(self.func, args or self.args, kwargs or self.kwargs)
+        self.wall_time += wall
+        self.cpu_time += cpu
+        self.finished_at = time.time()
+        if ok:
+            self.result = value
             self.state = JobState.DONE
-        except Exception as e:
-            self.error = str(e)
+        else:
+            self.error = value
             self.state = JobState.ERROR
 
+    def status(self):
+        wall = self.wall_time
+        if self.state == JobState.RUNNING and self._attempt_started is not None:
+            wall += time.monotonic() - self._attempt_started
+        return {
+            "name": self.name,
+            "state": self.state,
+            "deps": list(self.deps),
+            "attempts": self.attempts,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(self.cpu_time, 4),
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
 class JobScheduler:
-    def __init__(self):
+    """Bağımlılık grafiğine (DAG) göre işleri sınırlı bir havuzda paralel çalıştırır.
+
+    - Bağımlılıkları DONE olan işler en fazla max_workers eşzamanlı olarak başlar.
+    - Başarısız bir deneme retries kadar backoff * backoff_factor**(n-1) saniye
+      sonra tekrar denenir; hatalı/iptal edilen bir işin bağımlıları SKIPPED olur.
+    - fail_fast=True ilk kalıcı hatada kalan her şeyi iptal eder (eski davranış).
+    - executor="process" işleri ProcessPoolExecutor'da çalıştırır (func ve
+      argümanları pickle edilebilir olmalı).
+    """
+
+    def __init__(self, max_workers=None, executor="thread", fail_fast=False):
         self.jobs = []
         self.state_log = []
-    def add_job(self, job):
-        self.jobs.append(job)
-    def run_all(self):
-        for job in self.jobs:
-            self.state_log.append((job.name, JobState.WAITING))
-            job.run()
-            self.state_log.append((job.name, job.state))
-            if job.state == JobState.ERROR:
-                print(f"[Scheduler] {job.name} failed: {job.error}")
-                break
+        # işler çoğunlukla I/O (LLM, tarayıcı) bekler; process havuzu CPU sayısıyla sınırlı
+        default_workers = (os.cpu_count() or 1) if executor == "process" else 4
+        self.max_workers = max(1, int(max_workers or default_workers))
+        self.executor = executor
+        self.fail_fast = fail_fast
+        self._lock = threading.RLock()
+        self._running = {}  # future -> job
+        self._abandoned = set()  # timeout/iptal sonrası hâlâ slot tutan future'lar
+        self._kick = Future()
+        self._active = False
+
+    def add_job(self, job, deps=None):
+        """İş ekle; run_all çalışırken de eklenebilir (ör. sıradaki doküman)."""
+        with self._lock:
+            if any(j.name == job.name for j in self.jobs):
+                raise ValueError(f"duplicate job name: {job.name}")
+            if deps is not None:
+                job.deps = list(deps)
+            if self._active:
+                missing = [d for d in job.deps if self.get_job(d) is None]
+                if missing:
+                    raise ValueError(f"job {job.name} depends on unknown job(s): {missing}")
+            self.jobs.append(job)
+            self._wake()
+        return job
+
+    def get_job(self, name):
+        with self._lock:
+            return next((j for j in self.jobs if j.name == name), None)
+
+    def cancel(self, name=None):
+        """name verilirse o işi ve ona bağlı işleri, verilmezse tüm bekleyen/çalışan işleri iptal et."""
+        with self._lock:
+            if name is None:
+                targets = list(self.jobs)
             else:
-                print(f"[Scheduler] {job.name} finished.")
+                targets = self._with_dependents(name)
+            for job in targets:
+                if job.state in JobState.FINAL:
+                    continue
+                job.cancel_event.set()
+                job.error = job.error or "cancelled"
+                for fut, j in list(self._running.items()):
+                    if j is job:
+                        self._release(fut)
+                self._finish(job, JobState.CANCELLED)
+            self._wake()
+
+    def run_all(self, timeout=None):
+        """Tüm işler son duruma (done/error/cancelled/skipped) gelene kadar çalıştır."""
+        self._validate()
+        pool_cls = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+        pool = pool_cls(max_workers=self.max_workers)
+        overall = time.monotonic() + timeout if timeout else None
+        self._active = True
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    if overall is not None and now >= overall:
+                        self.cancel()
+                    self._check_timeouts(now)
+                    self._skip_blocked()
+                    self._submit_ready(pool, now)
+                    if not self._running and all(j.state in JobState.FINAL for j in self.jobs):
+                        break
+                    if self._kick.done():
+                        self._kick = Future()
+                    pending = set(self._running) | self._abandoned | {self._kick}
+                    wake = self._next_wake(now, overall)
+                done, _ = wait(pending, timeout=wake, return_when=FIRST_COMPLETED)
+                with self._lock:
+                    for fut in done:
+                        if fut is not self._kick:
+                            self._collect(fut)
+        finally:
+            self._active = False
+            pool.shutdown(wait=False, cancel_futures=True)
+        return self.get_states()
+
     def get_states(self):
-        return [(job.name, job.state) for job in self.jobs]
+        with self._lock:
+            return [job.status() for job in self.jobs]
+
+    # --- iç yardımcılar ---------------------------------------------------
+    def _wake(self):
+        if not self._kick.done():
+            self._kick.set_result(None)
+
+    def _with_dependents(self, name):
+        out, names = [], {name}
+        changed = True
+        while changed:
+            changed = False
+            for job in self.jobs:
+                if job.name not in names and names.intersection(job.deps):
+                    names.add(job.name)
+                    changed = True
+        for job in self.jobs:
+            if job.name in names:
+                out.append(job)
+        return out
+
+    def _validate(self):
+        with self._lock:
+            names = {j.name for j in self.jobs}
+            for job in self.jobs:
+                missing = [d for d in job.deps if d not in names]
+                if missing:
+                    raise ValueError(f"job {job.name} depends on unknown job(s): {missing}")
+            indeg = {j.name: len(set(j.deps)) for j in self.jobs}
+            ready = [n for n, d in indeg.items() if d == 0]
+            seen = 0
+            while ready:
+                n = ready.pop()
+                seen += 1
+                for j in self.jobs:
+                    if n in j.deps:
+                        indeg[j.name] -= 1
+                        if indeg[j.name] == 0:
+                            ready.append(j.name)
+            if seen != len(self.jobs):
+                cyclic = sorted(n for n, d in indeg.items() if d > 0)
+                raise ValueError(f"dependency cycle between jobs: {cyclic}")
+
+    def _finish(self, job, state, result=None):
+        job.state = state
+        job.finished_at = time.time()
+        if state == JobState.DONE:
+            job.result = result
+        self.state_log.append((job.name, state))
+        if state == JobState.DONE:
+            print(f"[Scheduler] {job.name} finished.")
+        elif state == JobState.ERROR:
+            print(f"[Scheduler] {job.name} failed: {job.error}")
+            if self.fail_fast:
+                self.cancel()
+
+    def _skip_blocked(self):
+        by_name = {j.name: j for j in self.jobs}
+        changed = True
+        while changed:
+            changed = False
+            for job in self.jobs:
+                if job.state != JobState.WAITING:
+                    continue
+                bad = [d for d in job.deps if by_name[d].state in (JobState.ERROR, JobState.CANCELLED, JobState.SKIPPED)]
+                if bad:
+                    job.error = f"dependency not done: {bad}"
+                    self._finish(job, JobState.SKIPPED)
+                    changed = True
+
+    def _submit_ready(self, pool, now):
+        by_name = {j.name: j for j in self.jobs}
+        for job in self.jobs:
+            if len(self._running) + len(self._abandoned) >= self.max_workers:
+                return
+            if job.state != JobState.WAITING or job._not_before > now:
+                continue
+            if any(by_name[d].state != JobState.DONE for d in job.deps):
+                continue
+            job.state = JobState.RUNNING
+            job.attempts += 1
+            job.started_at = job.started_at or time.time()
+            job._attempt_started = now
+            self.state_log.append((job.name, JobState.RUNNING))
+            fut = pool.submit(_timed_call, job.func, job.args, job.kwargs)
+            self._running[fut] = job
+
+    def _release(self, fut):
+        job = self._running.pop(fut, None)
+        if job is not None and job._attempt_started is not None:
+            job.wall_time += time.monotonic() - job._attempt_started
+            job._attempt_started = None
+        if not fut.cancel():
+            self._abandoned.add(fut)
+
+    def _check_timeouts(self, now):
+        for fut, job in list(self._running.items()):
+            if job.timeout and now - job._attempt_started >= job.timeout:
+                job.cancel_event.set()
+                self._release(fut)
+                self._attempt_failed(job, f"timeout after {job.timeout}s", now)
+
+    def _collect(self, fut):
+        if fut in self._abandoned:
+            self._abandoned.discard(fut)
+            return
+        job = self._running.pop(fut, None)
+        if job is None:
+            return
+        job._attempt_started = None
+        try:
+            ok, value, wall, cpu = fut.result()
+        except CancelledError:
+            ok, value, wall, cpu = False, "cancelled", 0.0, 0.0
+        except Exception as e:  # ör. pickle hatası / bozuk process havuzu
+            ok, value, wall, cpu = False, f"{type(e).__name__}: {e}", 0.0, 0.0
+        job.wall_time += wall
+        job.cpu_time += cpu
+        if ok:
+            job.error = None
+            self._finish(job, JobState.DONE, value)
+        else:
+            self._attempt_failed(job, value, time.monotonic())
+
+    def _attempt_failed(self, job, error, now):
+        job.error = error
+        if job.attempts <= job.retries:
+            delay = job.backoff * (job.backoff_factor ** (job.attempts - 1))
+            job._not_before = now + delay
+            job.cancel_event = threading.Event()
+            job.state = JobState.WAITING
+            self.state_log.append((job.name, JobState.WAITING))
+            print(f"[Scheduler] {job.name} attempt {job.attempts} failed ({error}); retry in {delay:.2f}s")
+        else:
+            self._finish(job, JobState.ERROR)
+
+    def _next_wake(self, now, overall):
+        wake = 1.0
+        for job in self._running.values():
+            if job.timeout:
+                wake = min(wake, job.timeout - (now - job._attempt_started))
+        for job in self.jobs:
+            if job.state == JobState.WAITING and job._not_before > now:
+                wake = min(wake, job._not_before - now)
+        if overall is not None:
+            wake = min(wake, overall - now)
+        return max(0.0, wake)
+
 
 # Örnek kullanım (test amaçlı):
 if __name__ == "__main__":
@@ -56,9 +350,9 @@ if __name__ == "__main__":
         print("LLM mapping yapılıyor...")
         time.sleep(1)
         return "llm done"
-    scheduler = JobScheduler()
+    scheduler = JobScheduler(max_workers=2)
     scheduler.add_job(Job("webbot", webbot_job))
-    scheduler.add_job(Job("memory", memory_job))
-    scheduler.add_job(Job("llm", llm_job))
+    scheduler.add_job(Job("memory", memory_job, deps=["webbot"]))
+    scheduler.add_job(Job("llm", llm_job))  # webbot ile paralel
     scheduler.run_all()
     print("Job states:", scheduler.get_states())
@@ -0,0 +1,162 @@
+# test_job_scheduler.py
+# DAG scheduler: bağımlılık sırası, paralellik, timeout, retry, iptal ve zamanlama.
+import threading
+import time
+
+import pytest
+
+from scheduler.job_scheduler import Job, JobScheduler, JobState
+
+
+def _states(scheduler):
+    return {s['name']: s['state'] for s in scheduler.get_states()}
+
+
+def test_independent_jobs_overlap_and_deps_wait():
+    order = []
+    lock = threading.Lock()
+
+    def step(name, delay):
+        def fn():
+            with lock:
+                order.append(('start', name))
+            time.sleep(delay)
+            with lock:
+                order.append(('end', name))
+            return name
+        return fn
+
+    s = JobScheduler(max_workers=2)
+    s.add_job(Job('extract_doc2', step('extract_doc2', 0.3)))
+    s.add_job(Job('webbot', step('webbot', 0.1)))
+    s.add_job(Job('map_doc1', step('map_doc1', 0.1), deps=['webbot']))
+    t0 = time.perf_counter()
+    states = s.run_all()
+    elapsed = time.perf_counter() - t0
+    assert all(st['state'] == JobState.DONE for st in states)
+    assert elapsed < 0.55  # sıralı olsaydı >= 0.5 + overhead
+    assert order.index(('end', 'webbot')) < order.index(('start', 'map_doc1'))
+    assert order.index(('start', 'map_doc1')) < order.index(('end', 'extract_doc2'))
+    assert s.get_job('map_doc1').result == 'map_doc1'
+
+
+def test_max_workers_bounds_concurrency():
+    running = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    s = JobScheduler(max_workers=3)
+    for i in range(9):
+        s.add_job(Job(f'j{i}', fn))
+    s.run_all()
+    assert peak[0] == 3
+
+
+def test_retry_with_backoff_then_done():
+    calls = []
+
+    def flaky():
+        calls.append(time.perf_counter())
+        if len(calls) < 3:
+            raise RuntimeError('geçici hata')
+        return 'ok'
+
+    s = JobScheduler()
+    s.add_job(Job('llm', flaky, retries=2, backoff=0.05, backoff_factor=2.0))
+    st = s.run_all()[0]
+    assert st['state'] == JobState.DONE and st['attempts'] == 3 and st['error'] is None
+    assert calls[1] - calls[0] >= 0.045 and calls[2] - calls[1] >= 0.095
+
+
+def test_error_and_timeout_skip_dependents():
+    def boom():
+        raise ValueError('HTML not in memory')
+
+    # timeout'a uğrayan thread slotunu bitene kadar tutar; diğerleri için yer kalsın
+    s = JobScheduler(max_workers=4)
+    s.add_job(Job('memory', boom))
+    s.add_job(Job('llm', lambda: 'x', deps=['memory']))
+    s.add_job(Job('slow', lambda: time.sleep(2), timeout=0.1))
+    s.add_job(Job('after_slow', lambda: 'x', deps=['slow']))
+    s.add_job(Job('independent', lambda: 'y'))
+    t0 = time.perf_counter()
+    s.run_all()
+    assert time.perf_counter() - t0 < 1.0
+    assert _states(s) == {'memory': 'error', 'llm': 'skipped', 'slow': 'error',
+                          'after_slow': 'skipped', 'independent': 'done'}
+    assert s.get_job('memory').error == 'HTML not in memory'
+    assert s.get_job('slow').error.startswith('timeout')
+    assert s.get_job('slow').cancel_event.is_set()
+
+
+def test_fail_fast_and_cancel():
+    s = JobScheduler(max_workers=1, fail_fast=True)
+    s.add_job(Job('a', lambda: 1 / 0))
+    s.add_job(Job('b', lambda: 'b'))
+    s.run_all()
+    assert _states(s) == {'a': 'error', 'b': 'cancelled'}
+
+    s = JobScheduler(max_workers=2)
+    started = threading.Event()
+
+    def long_job():
+        started.set()
+        s.get_job('long').cancel_event.wait(5)
+
+    s.add_job(Job('long', long_job))
+    s.add_job(Job('child', lambda: 'x', deps=['long']))
+    runner = threading.Thread(target=s.run_all)
+    runner.start()
+    assert started.wait(2)
+    s.cancel('long')
+    runner.join(2)
+    assert not runner.is_alive()
+    assert _states(s) == {'long': 'cancelled', 'child': 'cancelled'}
+
+
+def test_timing_and_validation():
+    def busy():
+        t = time.perf_counter()
+        while time.perf_counter() - t < 0.05:
+            pass
+
+    s = JobScheduler()
+    s.add_job(Job('cpu', busy))
+    s.add_job(Job('sleep', lambda: time.sleep(0.05)))
+    states = {st['name']: st for st in s.run_all()}
+    # thread CPU depends on GIL/host contention; only check that it was measured
+    assert states['cpu']['cpu_s'] > 0 and states['cpu']['wall_s'] >= 0.05
+    assert states['sleep']['cpu_s'] < 0.02 and states['sleep']['wall_s'] >= 0.05
+
+    s = JobScheduler()
+    s.add_job(Job('a', lambda: 1, deps=['b']))
+    s.add_job(Job('b', lambda: 1, deps=['a']))
+    with pytest.raises(ValueError, match='cycle'):
+        s.run_all()
+    s = JobScheduler()
+    s.add_job(Job('a', lambda: 1, deps=['nope']))
+    with pytest.raises(ValueError, match='unknown'):
+        s.run_all()
+
+
+def test_sequential_run_compat():
+    job = Job('webbot', lambda: 'webbot done')
+    job.run()
+    assert job.state == JobState.DONE and job.result == 'webbot done' and job.attempts == 1
+
+
+def test_process_pool():
+    s = JobScheduler(max_workers=1, executor='process')
+    s.add_job(Job('pow', pow, args=(2, 10)))
+    s.add_job(Job('closure', lambda: 1, deps=['pow']))  # pickle edilemez -> error
+    s.run_all()
+    assert s.get_job('pow').result == 1024
+    assert s.get_job('closure').state == JobState.ERROR
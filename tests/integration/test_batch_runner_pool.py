@@ -0,0 +1,41 @@
+import os
+import pytest
+
+RUN_E2E = os.getenv("RUN_E2E", "0") == "1"
+
+FORM = """<html><body><form>
+<label for="plaka">Plaka</label><input id="plaka">
+<label for="il">İl</label><select id="il"><option>İstanbul</option><option>Ankara</option></select>
+<button type="button" id="devam" onclick="document.title='sent:'+document.getElementById('plaka').value">Devam</button>
+</form></body></html>"""
+
+
+@pytest.mark.skipif(not RUN_E2E, reason="Set RUN_E2E=1 to run Playwright-backed batch runner test")
+def test_pool_runs_fill_plans_on_local_fixtures(tmp_path):
+    from backend.helpers.batch_runner import FixtureServer, execute_plan, normalize_plan, run_batch
+    from backend.helpers.playwright_pool import BrowserPool
+
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "form.html").write_text(FORM, encoding="utf-8")
+    plan = {"plan": {"actions": [
+        {"kind": "set_value", "selector": "#plaka", "value": "34 ABC 123"},
+        {"kind": "select_option", "selector": "select#il", "option": "Ankara"},
+        {"kind": "click", "selector": "#devam"},
+    ]}}
+
+    with FixtureServer([site]) as server, BrowserPool(size=2) as pool:
+        jobs = [{"url": server.url_for(site / "form.html"), "plan": plan}] * 6
+        report = run_batch(pool, jobs)
+
+        def fill_and_read_title(page, url):
+            page.goto(url)
+            execute_plan(page, normalize_plan(plan))
+            return page.title()
+
+        title = pool.submit(fill_and_read_title, jobs[0]["url"]).result()
+
+    assert report["errors"] == [] and report["actions_failed"] == 0
+    assert report["actions_applied"] == 18 and report["pages_per_min"] > 0
+    assert pool.stats["launches"] == 2  # browsers are reused across jobs
+    assert title == "sent:34 ABC 123"  # values were set before the click
@@ -6,6 +6,9 @@ from webbot.webbot_filler import (
     build_fill_plan,
     analyze_selectors,
     generate_injection_script,
+    typing_fields_from,
+    value_index,
+    FillItem,
 )
 
 
@@ -40,6 +43,21 @@ def test_resolve_values_pipeline():
     assert any("raw-extract" in l for l in logs)
 
 
+def test_value_index_is_built_once_per_document():
+    doc = {"Arac": {"Plaka No": "34 abc 123"}, "Sahibi": {"TC": "12345678901"},
+           "raw_response": "```json\n{\"ad_soyad\": \"Ali Veli\"}\n```"}
+    idx = value_index(doc)
+    assert value_index(dict(doc)) is idx  # same content -> same index
+    assert value_index({**doc, "x": 1}) is not idx
+    assert idx.lookup("plaka_no") == ("34 abc 123", "Arac.Plaka No")
+    assert idx.lookup("tckimlik")[0] == "12345678901"
+    assert idx.lookup("ad_soyad") == ("Ali Veli", "rawresponse")
+    assert idx.lookup("motor_no") == (None, "")
+    resolved, logs = resolve_values(["plaka_no", "tckimlik"], doc, None, index=idx, use_dummy_when_empty=False)
+    assert resolved == {"plaka_no": "34 ABC 123", "tckimlik": "12345678901"}
+    assert logs[0].startswith("flat-keys") and any(l.startswith("raw-json") for l in logs)
+
+
 def test_build_plan_and_analyze_selectors():
     html = """
     <form>
@@ -82,3 +100,22 @@ def test_generate_injection_script_smoke():
     script = generate_injection_script(plan, highlight=True, simulate_typing=True, step_delay_ms=10)
     assert "selector-check plaka_no" in script or "selector-check" in script
     assert "document.querySelectorAll" in script
+
+
+def test_fast_fill_script_keeps_typing_only_for_calibrated_fields():
+    plan = [
+        FillItem(field="plaka_no", selector="#plk", value="34 ABC 123"),
+        FillItem(field="sasi_no", selector="#sasi", value="VF1LB240531754309"),
+    ]
+    mapping = {"field_mapping": {"plaka_no": "#plk", "sasi_no": "#sasi"}, "typing_fields": ["sasi_no"]}
+    assert typing_fields_from(mapping) == ["sasi_no"]
+    assert typing_fields_from({"typingFields": {"plaka_no": True, "sasi_no": False}}) == ["plaka_no"]
+
+    script = generate_injection_script(plan, fill_mode="fast", typing_fields=typing_fields_from(mapping))
+    assert "const fastMode = true;" in script
+    items = json.loads(script.split("const items = ", 1)[1].split(";\n", 1)[0])
+    assert [(it["field"], it["typing"]) for it in items] == [("plaka_no", False), ("sasi_no", True)]
+    assert "timing total" in script and "timing fast-fill" in script
+
+    legacy = generate_injection_script(plan)
+    assert "const fastMode = false;" in legacy
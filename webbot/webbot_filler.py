@@ -8,9 +8,13 @@ for diagnostics. These do not perform DOM operations; they prepare data and anal
 to help validate mappings and values before injection.
 """
 
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple
+import hashlib
 import re
+import threading
 import json as _json
 
 
@@ -92,51 +96,109 @@ DEFAULT_SYNONYMS: Dict[str, List[str]] = {
 }
 
 
+@lru_cache(maxsize=2048)
+def _candidates(key: str, synonyms: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Normalized lookup keys for a field: the key itself first, then its synonyms."""
+    out: List[str] = []
+    for c in (key,) + synonyms:
+        n = _normalize_key(c)
+        if n and n not in out:
+            out.append(n)
+    return tuple(out)
+
+
+class ValueIndex:
+    """Per-document value index for resolve_values.
+
+    Built once per (ruhsat_json, raw_text): the flattened ruhsat (normalized key ->
+    value/path), the raw-text + raw_response extraction, and a memo of resolved
+    fields, so planning many pages for the same document does not re-flatten,
+    re-normalize synonyms, substring-scan or re-run the raw regexes every call.
+    """
+
+    def __init__(self, ruhsat_json: Dict[str, Any] | None, raw_text: str | None = None):
+        self.flat = flatten_data(ruhsat_json or {})
+        self.logs: List[str] = ["flat-keys " + ",".join(list(self.flat.keys())[:80])]
+        raw_extract = extract_from_raw(raw_text or "")
+        # Additionally, check ruhsat_json['raw_response'] for code-fenced JSON and merge
+        if isinstance(ruhsat_json, dict) and isinstance(ruhsat_json.get('raw_response'), str):
+            j = extract_from_raw_response_json(ruhsat_json['raw_response'])
+            if isinstance(j, dict) and j:
+                # Merge keys directly (they often match desired field names)
+                for k in ["tckimlik", "dogum_tarihi", "ad_soyad", "plaka_no"]:
+                    if k in j and j[k] not in (None, ""):
+                        raw_extract[k] = j[k]
+                self.logs.append("raw-json " + str({k: j.get(k) for k in ["tckimlik","dogum_tarihi","ad_soyad","plaka_no"]}))
+        if raw_extract:
+            self.logs.append("raw-extract " + str(raw_extract))
+        self.raw_extract = raw_extract
+        # non-empty leaves in document order, for the substring fallback
+        self._filled = [(fk, info) for fk, info in self.flat.items() if info["value"] not in (None, "")]
+        self._memo: Dict[Tuple[str, Tuple[str, ...], bool], Tuple[Any, str]] = {}
+
+    def lookup(self, key: str, synonyms: Dict[str, List[str]] | None = None,
+               allow_substring: bool = True) -> Tuple[Any, str]:
+        """(value, source) for a field; (None, '') when the document has nothing for it.
+
+        allow_substring=False keeps to exact normalized keys, synonyms and raw_response
+        (no 'ad' -> 'adres' style guesses), for callers that must not fill a wrong value.
+        """
+        syn = tuple((synonyms or DEFAULT_SYNONYMS).get(key, ()))
+        hit = self._memo.get((key, syn, allow_substring))
+        if hit is None:
+            hit = self._lookup(key, _candidates(key, syn), allow_substring)
+            self._memo[(key, syn, allow_substring)] = hit
+        return hit
+
+    def _lookup(self, key: str, cands: Tuple[str, ...], allow_substring: bool = True) -> Tuple[Any, str]:
+        for c in cands:
+            info = self.flat.get(c)
+            if info is not None and info["value"] not in (None, ""):
+                return info["value"], info["path"]
+        # substring fallback
+        for fk, info in (self._filled if allow_substring else ()):
+            if any(c in fk for c in cands):
+                return info["value"], info["path"]
+        if key in self.raw_extract:
+            return self.raw_extract[key], 'rawresponse'
+        return None, ''
+
+
+_INDEX_CACHE: "OrderedDict[str, ValueIndex]" = OrderedDict()
+_INDEX_CACHE_MAX = 128
+_INDEX_LOCK = threading.Lock()
+
+
+def value_index(ruhsat_json: Dict[str, Any] | None, raw_text: str | None = None) -> ValueIndex:
+    """Shared ValueIndex for a document (LRU keyed by content, so edited documents get a new index)."""
+    try:
+        body = _json.dumps(ruhsat_json or {}, sort_keys=True, ensure_ascii=False, default=str)
+    except Exception:
+        return ValueIndex(ruhsat_json, raw_text)
+    sig = hashlib.sha1((body + "\x00" + (raw_text or "")).encode("utf-8")).hexdigest()
+    with _INDEX_LOCK:
+        idx = _INDEX_CACHE.get(sig)
+        if idx is not None:
+            _INDEX_CACHE.move_to_end(sig)
+            return idx
+    idx = ValueIndex(ruhsat_json, raw_text)
+    with _INDEX_LOCK:
+        _INDEX_CACHE[sig] = idx
+        while len(_INDEX_CACHE) > _INDEX_CACHE_MAX:
+            _INDEX_CACHE.popitem(last=False)
+    return idx
+
+
 def resolve_values(mapping_keys: List[str], ruhsat_json: Dict[str, Any] | None, raw_text: str | None,
                    synonyms: Dict[str, List[str]] | None = None,
                    sample_values: Dict[str, Any] | None = None,
-                   use_dummy_when_empty: bool = True) -> Tuple[Dict[str, Any], List[str]]:
-    logs: List[str] = []
-    flat = flatten_data(ruhsat_json or {})
-    logs.append("flat-keys " + ",".join(list(flat.keys())[:80]))
-    raw = raw_text or ""
-    raw_extract = extract_from_raw(raw)
-    # Additionally, check ruhsat_json['raw_response'] for code-fenced JSON and merge
-    if isinstance(ruhsat_json, dict) and isinstance(ruhsat_json.get('raw_response'), str):
-        j = extract_from_raw_response_json(ruhsat_json['raw_response'])
-        if j:
-            # Merge keys directly (they often match desired field names)
-            for k in ["tckimlik", "dogum_tarihi", "ad_soyad", "plaka_no"]:
-                if k in j and j[k] not in (None, ""):
-                    raw_extract[k] = j[k]
-            logs.append("raw-json " + str({k: j.get(k) for k in ["tckimlik","dogum_tarihi","ad_soyad","plaka_no"]}))
-    if raw_extract:
-        logs.append("raw-extract " + str(raw_extract))
-    syns = synonyms or DEFAULT_SYNONYMS
+                   use_dummy_when_empty: bool = True,
+                   index: ValueIndex | None = None) -> Tuple[Dict[str, Any], List[str]]:
+    idx = index or value_index(ruhsat_json, raw_text)
+    logs: List[str] = list(idx.logs)
     resolved: Dict[str, Any] = {}
     for key in mapping_keys:
-        nkey = _normalize_key(key)
-        cands = {nkey}
-        for s in syns.get(key, []):
-            cands.add(_normalize_key(s))
-        found_val = None
-        found_from = ''
-        for c in cands:
-            if c in flat and flat[c]["value"] not in (None, ""):
-                found_val = flat[c]["value"]
-                found_from = flat[c]["path"]
-                break
-        if found_val is None:
-            # substring fallback
-            for fk, info in flat.items():
-                if any(c in fk for c in cands):
-                    if info["value"] not in (None, ""):
-                        found_val = info["value"]
-                        found_from = info["path"]
-                        break
-        if found_val is None and key in raw_extract:
-            found_val = raw_extract[key]
-            found_from = 'rawresponse'
+        found_val, found_from = idx.lookup(key, synonyms)
         # sample values from mapping if provided
         if (found_val is None or str(found_val).strip() == '') and sample_values and key in sample_values:
             found_val = sample_values[key]
@@ -180,8 +242,9 @@ def build_fill_plan(mapping: Dict[str, Any], ruhsat_json: Dict[str, Any] | None,
     fm: Dict[str, str] = mapping.get('field_mapping', {}) or {}
     sample_values = mapping.get('sample_values') or mapping.get('value_defaults') or {}
     keys = list(fm.keys())
+    index = value_index(ruhsat_json, raw_text)
     resolved, logs = resolve_values(keys, ruhsat_json, raw_text, sample_values=sample_values,
-                                    use_dummy_when_empty=options.get('use_dummy_when_empty', True))
+                                    use_dummy_when_empty=options.get('use_dummy_when_empty', True), index=index)
     plan = [FillItem(field=k, selector=fm[k], value=resolved.get(k, '')) for k in keys]
     return plan, resolved, logs
 
@@ -203,32 +266,65 @@ def analyze_selectors(html: str, mapping: Dict[str, Any]) -> Dict[str, Dict[str,
     return res
 
 
+def typing_fields_from(mapping: Dict[str, Any] | None) -> List[str]:
+    """Fields a site's calibration marks as needing real keystrokes.
+
+    Accepts ``typing_fields`` (static mapping output) or ``typingFields``
+    (calib.json), either a list of field keys or a {field: bool} dict.
+    """
+    if not isinstance(mapping, dict):
+        return []
+    raw = mapping.get('typing_fields')
+    if raw is None:
+        raw = mapping.get('typingFields')
+    if isinstance(raw, dict):
+        return [str(k) for k, v in raw.items() if v]
+    if isinstance(raw, (list, tuple)):
+        return [str(k) for k in raw if k]
+    return []
+
+
 def generate_injection_script(plan: List[FillItem], highlight: bool = True, simulate_typing: bool = True,
-                              step_delay_ms: int = 0, commit_enter: bool = True) -> str:
+                              step_delay_ms: int = 0, commit_enter: bool = True,
+                              fill_mode: str | None = None, typing_fields: List[str] | None = None) -> str:
     """Create a minimal JS script that logs the plan and attempts fills by selector.
     This is primarily for debugging and parity tests.
+
+    fill_mode:
+      - None/"typing": legacy sequential fill; every field is typed char by char
+        when simulate_typing (keydown/input/keyup + 5 ms per char), then Enter/blur.
+      - "fast": all elements are resolved first, values are set through the native
+        setter and each field gets a single input + change event. Only the fields in
+        typing_fields (calibration: needs keystrokes) fall back to the typing path.
+    The returned logs carry timing lines (resolve/fill/total ms, per-field ms).
     """
     entries = [
         {
             "field": it.field,
             "selector": it.selector,
             "value": it.value,
+            "typing": bool(typing_fields) and it.field in typing_fields,
         }
         for it in plan
     ]
+    fast = (fill_mode or "typing") == "fast"
     # keep script simple; real typing logic exists in frontend ts3Service
     return (
         "(() => {\n"
-        + f"  const items = {entries!r};\n"
+        + f"  const items = {_json.dumps(entries, default=str)};\n"
         + f"  const highlight = {str(bool(highlight)).lower()};\n"
         + f"  const simulateTyping = {str(bool(simulate_typing)).lower()};\n"
         + f"  const step = {int(step_delay_ms)};\n"
         + f"  const commitEnter = {str(bool(commit_enter)).lower()};\n"
+        + f"  const fastMode = {str(fast).lower()};\n"
         + "  const delay = ms => new Promise(r => setTimeout(r, ms));\n"
+        + "  const now = () => (window.performance && performance.now) ? performance.now() : Date.now();\n"
+        + "  const ms = t => (now() - t).toFixed(1);\n"
         + "  const logs = [];\n"
         + "  const setNativeValue = (el, value) => {\n"
         + "    try {\n"
-        + "      const proto = el && el.tagName === 'INPUT' ? window.HTMLInputElement.prototype : (el && el.tagName === 'TEXTAREA' ? window.HTMLTextAreaElement.prototype : null);\n"
+        + "      const tag = el && el.tagName;\n"
+        + "      const proto = tag === 'INPUT' ? window.HTMLInputElement.prototype : (tag === 'TEXTAREA' ? window.HTMLTextAreaElement.prototype : (tag === 'SELECT' ? window.HTMLSelectElement.prototype : null));\n"
         + "      if (proto) { const desc = Object.getOwnPropertyDescriptor(proto, 'value'); if (desc && desc.set) { desc.set.call(el, value); return true; } }\n"
         + "    } catch(e) {}\n"
         + "    try { el.value = value; return true; } catch(e) { return false; }\n"
@@ -251,25 +347,64 @@ def generate_injection_script(plan: List[FillItem], highlight: bool = True, simu
         + "    try { el.dispatchEvent(new KeyboardEvent('keypress', { key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true })); } catch(e) {}\n"
         + "    try { el.dispatchEvent(new KeyboardEvent('keyup', { key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true })); } catch(e) {}\n"
         + "  };\n"
-        + "  const setVal = async (el, val) => {\n"
+        + "  const setVal = async (el, val, typing) => {\n"
         + "    if (!el) return;\n"
         + "    try { el.focus(); } catch(e) {}\n"
         + "    const v = String(val == null ? '' : val);\n"
-        + "    if (simulateTyping) { await typeInto(el, v); } else { setNativeValue(el, v); el.dispatchEvent(new Event('input', {bubbles:true})); el.dispatchEvent(new Event('change', {bubbles:true})); }\n"
+        + "    if (typing) { await typeInto(el, v); } else { setNativeValue(el, v); el.dispatchEvent(new Event('input', {bubbles:true})); el.dispatchEvent(new Event('change', {bubbles:true})); }\n"
         + "    if (commitEnter) { pressEnter(el); }\n"
         + "    try { el.dispatchEvent(new Event('blur', { bubbles: true })); } catch(e) {}\n"
         + "  };\n"
+        + "  const setFast = (el, val) => {\n"
+        + "    const v = String(val == null ? '' : val);\n"
+        + "    if (el.tagName === 'SELECT') {\n"
+        + "      const opt = Array.from(el.options || []).find(o => o.value === v || (o.text || '').trim() === v);\n"
+        + "      setNativeValue(el, opt ? opt.value : v);\n"
+        + "    } else { setNativeValue(el, v); }\n"
+        + "    el.dispatchEvent(new Event('input', { bubbles: true }));\n"
+        + "    el.dispatchEvent(new Event('change', { bubbles: true }));\n"
+        + "  };\n"
+        + "  const mark = (el) => { try { el.scrollIntoView({behavior:'smooth', block:'center'}); const prev = el.style.outline; el.style.outline='2px solid #22c55e'; setTimeout(()=>{ try{ el.style.outline=prev; }catch(e){} }, Math.max(1200, step)); } catch(e) {} };\n"
+        + "  const resolveEl = (it) => {\n"
+        + "    try { const els = document.querySelectorAll(String(it.selector)); logs.push('selector-check '+it.field+' -> '+it.selector+' (count='+els.length+')'); return els.length>0 ? els[0] : null; } catch(e) { logs.push('selector-error '+it.field+' -> '+String(e)); return null; }\n"
+        + "  };\n"
         + "  return (async () => {\n"
+        + "    const t0 = now();\n"
         + "    let filled = 0;\n"
-        + "    for (const it of items) {\n"
-        + "      let el = null;\n"
-        + "      try { const els = document.querySelectorAll(String(it.selector)); logs.push('selector-check '+it.field+' -> '+it.selector+' (count='+els.length+')'); if (els.length>0) el = els[0]; } catch(e) { logs.push('selector-error '+it.field+' -> '+String(e)); }\n"
-        + "      if (!el) { logs.push('not-found '+it.field); continue; }\n"
-        + "      await setVal(el, it.value); filled++;\n"
-        + "      if (highlight) { try { el.scrollIntoView({behavior:'smooth', block:'center'}); const prev = el.style.outline; el.style.outline='2px solid #22c55e'; setTimeout(()=>{ try{ el.style.outline=prev; }catch(e){} }, Math.max(1200, step)); } catch(e) {} }\n"
-        + "      if (step>0) await delay(step);\n"
+        + "    if (fastMode) {\n"
+        + "      const resolved = items.map(it => [it, resolveEl(it)]);\n"
+        + "      logs.push('timing resolve '+ms(t0)+'ms fields='+items.length);\n"
+        + "      const tFill = now();\n"
+        + "      for (const [it, el] of resolved) {\n"
+        + "        if (!el) { logs.push('not-found '+it.field); continue; }\n"
+        + "        if (it.typing) continue;\n"
+        + "        const tf = now(); setFast(el, it.value); filled++;\n"
+        + "        logs.push('timing fill '+it.field+' fast '+ms(tf)+'ms');\n"
+        + "      }\n"
+        + "      const fastCount = filled;\n"
+        + "      logs.push('timing fast-fill '+ms(tFill)+'ms fields='+fastCount);\n"
+        + "      const tType = now();\n"
+        + "      for (const [it, el] of resolved) {\n"
+        + "        if (!el || !it.typing) continue;\n"
+        + "        const tf = now(); await setVal(el, it.value, true); filled++;\n"
+        + "        logs.push('timing fill '+it.field+' typing '+ms(tf)+'ms');\n"
+        + "        if (step>0) await delay(step);\n"
+        + "      }\n"
+        + "      if (filled > fastCount) logs.push('timing typing-fill '+ms(tType)+'ms fields='+(filled-fastCount));\n"
+        + "      if (highlight) { for (const [, el] of resolved) { if (el) mark(el); } }\n"
+        + "    } else {\n"
+        + "      for (const it of items) {\n"
+        + "        const el = resolveEl(it);\n"
+        + "        if (!el) { logs.push('not-found '+it.field); continue; }\n"
+        + "        const tf = now(); await setVal(el, it.value, simulateTyping); filled++;\n"
+        + "        logs.push('timing fill '+it.field+' '+(simulateTyping ? 'typing' : 'native')+' '+ms(tf)+'ms');\n"
+        + "        if (highlight) mark(el);\n"
+        + "        if (step>0) await delay(step);\n"
+        + "      }\n"
         + "    }\n"
-        + "    return { ok: true, filled, logs };\n"
+        + "    const totalMs = Number(ms(t0));\n"
+        + "    logs.push('timing total '+totalMs+'ms mode='+(fastMode ? 'fast' : 'typing')+' filled='+filled);\n"
+        + "    return { ok: true, filled, logs, timing: { mode: fastMode ? 'fast' : 'typing', total_ms: totalMs } };\n"
         + "  })();\n"
         + "})()"
     )